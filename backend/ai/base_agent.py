@@ -3,17 +3,33 @@ Lightweight base agent wrapping agno's Agent.
 
 Inspired by carta-ai's BaseAgnoAgent but stripped down for simplicity.
 Provides: model resolution, structured output, and XML context injection.
+Provider SDK clients are shared across runs through ai.pool.model_pool, and
+runs can be hedged against an alternate model (see ai.hedging). Every
+provider request waits for a slot under the global and per-restaurant
+concurrency limits (see ai.limiter) and is reported to ai.metrics.llm_metrics.
+
+Prompt layout: the system prompt (instructions + get_context()) should be
+identical across requests so providers can serve it from their prompt
+cache; per-request data (get_request_context()) goes in the user message
+after it. Agents with cache_prompt_prefix also mark the system prompt with
+cache_control for Anthropic models, which cache only what is marked.
 """
 
 import logging
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from typing import Any
 
 from agno.agent import Agent
+from agno.run.agent import RunCompletedEvent, RunContentEvent
 from django.conf import settings
 from pydantic import BaseModel
 
-from ai.models import resolve_model
+from ai.hedging import arun_hedged, run_hedged
+from ai.limiter import LLMCapacityError, Slot, llm_limiter
+from ai.metrics import llm_metrics, metrics_from_run
+from ai.pool import model_pool
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +45,23 @@ class BaseAgent(ABC):
 
     Optionally override:
         - default_model (class var)
+        - hedge_after / hedge_model (class vars, see _hedge_policy())
+        - cache_prompt_prefix (class var)
+        - get_model_id()
         - get_context(**kwargs)
+        - get_request_context(**kwargs)
     """
 
     default_model: str = "gpt-4o-mini"
+    hedge_after: float | None = None  # seconds (about p95) before a hedged request is sent
+    hedge_model: str = ""  # alternate model; LLM_HEDGE_MODEL when empty
+    cache_prompt_prefix: bool = False  # mark the system prompt cacheable (Anthropic)
+
+    def __init__(self, model_id: str | None = None):
+        self.model_id = model_id or self.get_model_id()
+        self._model = None  # model checked out of the pool by _resolve_model()
+        self._build_kwargs: dict[str, Any] = {}
+        self._context_bytes = 0  # instructions + additional context of the built agent
 
     # ── Abstract interface ──────────────────────────────────────────────
 
@@ -51,6 +80,10 @@ class BaseAgent(ABC):
         """Return a Pydantic model class for structured output, or None."""
         ...
 
+    def get_model_id(self) -> str:
+        """Model to run: global LLM_MODEL setting overrides default_model."""
+        return getattr(settings, "LLM_MODEL", "") or self.default_model
+
     def get_context(self, **kwargs: Any) -> dict[str, str]:
         """
         Return context sections as {tag_name: content}.
@@ -58,12 +91,158 @@ class BaseAgent(ABC):
         """
         return {}
 
+    def get_request_context(self, **kwargs: Any) -> dict[str, str]:
+        """
+        Per-request context sections, sent in the user message.
+
+        Keeping data that changes on every call here rather than in
+        get_context() leaves the system prompt a stable, cacheable prefix.
+        """
+        return {}
+
     # ── Internal helpers ────────────────────────────────────────────────
 
-    def _resolve_model(self):
-        """Resolve model: global LLM_MODEL setting overrides default_model."""
-        model_id = getattr(settings, "LLM_MODEL", "") or self.default_model
-        return resolve_model(model_id)
+    def _resolve_model(self, *, is_async: bool = False):
+        """Build the agno model for self.model_id, reusing a pooled SDK client."""
+        self._model = model_pool.checkout(self.get_name(), self.model_id, is_async=is_async)
+        return self._model
+
+    def _release_model(self, *, is_async: bool = False) -> None:
+        """Return the model's SDK client to the pool once the run is over."""
+        if self._model is not None:
+            model_pool.checkin(self.get_name(), self.model_id, self._model, is_async=is_async)
+            self._model = None
+
+    def _hedge_policy(self) -> tuple[str, float] | None:
+        """
+        (alternate model, budget in seconds) when runs should be hedged.
+
+        Hedging is opt-in through LLM_HEDGING_ENABLED. LLM_HEDGE_BUDGETS
+        overrides the agent's hedge_after budget by agent name.
+        """
+        if not settings.LLM_HEDGING_ENABLED:
+            return None
+        budget = settings.LLM_HEDGE_BUDGETS.get(self.get_name(), self.hedge_after)
+        alternate = self.hedge_model or settings.LLM_HEDGE_MODEL
+        if budget is None or not alternate or alternate == self.model_id:
+            return None
+        return alternate, budget
+
+    def _is_valid_output(self, content: Any) -> bool:
+        output_schema = self.get_output_schema()
+        if output_schema is not None:
+            return isinstance(content, output_schema)
+        return content is not None
+
+    def _compose_prompt(self, prompt: str, **kwargs: Any) -> str:
+        """The user message: per-request context sections followed by the prompt."""
+        request_context = self._format_context(self.get_request_context(**kwargs))
+        return f"{request_context}\n\n{prompt}" if request_context else prompt
+
+    def _prompt_bytes(self, args: tuple, kwargs: dict[str, Any]) -> int:
+        """Size of everything sent to the model: context, prompt text and images."""
+        size = self._context_bytes + sum(len(arg.encode()) for arg in args if isinstance(arg, str))
+        return size + sum(len(image.content or b"") for image in kwargs.get("images") or [])
+
+    def _record_call(
+        self,
+        run_metrics,
+        started: float,
+        prompt_bytes: int,
+        *,
+        retries: int = 0,
+        time_to_first_token: float | None = None,
+        slot: Slot | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        llm_metrics.record(
+            metrics_from_run(
+                self.get_name(),
+                self.model_id,
+                run_metrics,
+                wall_time=time.perf_counter() - started,
+                prompt_bytes=prompt_bytes,
+                retries=retries,
+                time_to_first_token=time_to_first_token,
+                queue_wait=slot.wait if slot is not None else 0.0,
+                rejected=isinstance(error, LLMCapacityError),
+                error=repr(error) if error is not None else "",
+            )
+        )
+
+    def _run_once(self, agent: Agent, *args: Any, retries: int = 0, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        output = error = None
+        slot = llm_limiter.slot()
+        try:
+            with slot:
+                output = agent.run(*args, **kwargs)
+            return output.content
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            self._release_model()
+            metrics = getattr(output, "metrics", None)
+            prompt_bytes = self._prompt_bytes(args, kwargs)
+            self._record_call(metrics, started, prompt_bytes, retries=retries, slot=slot, error=error)
+
+    async def _arun_once(self, agent: Agent, *args: Any, retries: int = 0, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        output = error = None
+        slot = llm_limiter.slot()
+        try:
+            async with slot:
+                output = await agent.arun(*args, **kwargs)
+            return output.content
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            self._release_model(is_async=True)
+            metrics = getattr(output, "metrics", None)
+            prompt_bytes = self._prompt_bytes(args, kwargs)
+            self._record_call(metrics, started, prompt_bytes, retries=retries, slot=slot, error=error)
+
+    def _run_agent(self, agent: Agent, *args: Any, **kwargs: Any) -> Any:
+        """Run a built agent and return its content, hedged if the policy says so."""
+        policy = self._hedge_policy()
+        if policy is None:
+            return self._run_once(agent, *args, **kwargs)
+        alternate_model, budget = policy
+
+        def alternate(run_id: str) -> Any:
+            hedge = type(self)(model_id=alternate_model)
+            hedge_agent = hedge._build_agent(**self._build_kwargs)
+            return hedge._run_once(hedge_agent, *args, run_id=run_id, retries=1, **kwargs)
+
+        return run_hedged(
+            self.get_name(),
+            budget,
+            lambda run_id: self._run_once(agent, *args, run_id=run_id, **kwargs),
+            alternate,
+            self._is_valid_output,
+        )
+
+    async def _arun_agent(self, agent: Agent, *args: Any, **kwargs: Any) -> Any:
+        """Async equivalent of _run_agent()."""
+        policy = self._hedge_policy()
+        if policy is None:
+            return await self._arun_once(agent, *args, **kwargs)
+        alternate_model, budget = policy
+
+        async def alternate() -> Any:
+            hedge = type(self)(model_id=alternate_model)
+            hedge_agent = hedge._build_agent(is_async=True, **self._build_kwargs)
+            return await hedge._arun_once(hedge_agent, *args, retries=1, **kwargs)
+
+        return await arun_hedged(
+            self.get_name(),
+            budget,
+            lambda: self._arun_once(agent, *args, **kwargs),
+            alternate,
+            self._is_valid_output,
+        )
 
     @staticmethod
     def _format_context(context: dict[str, str]) -> str:
@@ -75,20 +254,32 @@ class BaseAgent(ABC):
             sections.append(f"<{tag}>\n{content}\n</{tag}>")
         return "\n\n".join(sections)
 
-    def _build_agent(self, **kwargs: Any) -> Agent:
-        """Create the underlying agno Agent instance."""
-        model = self._resolve_model()
+    def _build_agent(self, *, parse_response: bool = True, is_async: bool = False, **kwargs: Any) -> Agent:
+        """
+        Create the underlying agno Agent instance.
+
+        parse_response=False keeps the provider's structured output format but
+        lets agno stream the raw JSON instead of waiting to parse it.
+        is_async=True wires in the pooled client for the running event loop.
+        """
+        self._build_kwargs = {"parse_response": parse_response, **kwargs}
+        model = self._resolve_model(is_async=is_async)
+        if self.cache_prompt_prefix and settings.LLM_PROMPT_CACHE_ENABLED and hasattr(model, "cache_system_prompt"):
+            model.cache_system_prompt = True
         context = self.get_context(**kwargs)
         additional_context = self._format_context(context)
         output_schema = self.get_output_schema()
+        instructions = self.get_instructions()
+        self._context_bytes = len(instructions.encode()) + len(additional_context.encode())
 
         return Agent(
             name=self.get_name(),
             model=model,
-            instructions=self.get_instructions(),
+            instructions=instructions,
             additional_context=additional_context or None,
             output_schema=output_schema,
             structured_outputs=output_schema is not None,
+            parse_response=parse_response,
             markdown=False,
         )
 
@@ -109,11 +300,64 @@ class BaseAgent(ABC):
         instance = cls()
         agent = instance._build_agent(**kwargs)
 
-        run_prompt = prompt or instance.prompt(**kwargs)
+        run_prompt = instance._compose_prompt(prompt or instance.prompt(**kwargs), **kwargs)
         logger.info("[%s] Running with model=%s", instance.get_name(), agent.model)
 
-        result = agent.run(run_prompt)
-        return result.content
+        return instance._run_agent(agent, run_prompt)
+
+    @classmethod
+    async def arun(cls, prompt: str = "", **kwargs: Any) -> Any:
+        """
+        Async equivalent of run(). The model call is awaited on the event
+        loop, so no thread is held while waiting for the provider.
+        """
+        instance = cls()
+        agent = instance._build_agent(is_async=True, **kwargs)
+
+        run_prompt = instance._compose_prompt(prompt or instance.prompt(**kwargs), **kwargs)
+        logger.info("[%s] Running async with model=%s", instance.get_name(), agent.model)
+
+        return await instance._arun_agent(agent, run_prompt)
+
+    @classmethod
+    def stream(cls, prompt: str = "", **kwargs: Any) -> Iterator[str]:
+        """
+        Run the agent with streaming and yield response text as it arrives.
+
+        For structured agents the chunks concatenate to the JSON document
+        that run() would have parsed into output_schema.
+        """
+        instance = cls()
+        agent = instance._build_agent(parse_response=False, **kwargs)
+
+        run_prompt = instance._compose_prompt(prompt or instance.prompt(**kwargs), **kwargs)
+        logger.info("[%s] Streaming with model=%s", instance.get_name(), agent.model)
+
+        started = time.perf_counter()
+        run_metrics = error = time_to_first_token = None
+        slot = llm_limiter.slot()
+        try:
+            with slot:
+                for event in agent.run(run_prompt, stream=True, stream_events=True):
+                    if isinstance(event, RunContentEvent) and isinstance(event.content, str) and event.content:
+                        if time_to_first_token is None:
+                            time_to_first_token = time.perf_counter() - started
+                        yield event.content
+                    elif isinstance(event, RunCompletedEvent):
+                        run_metrics = event.metrics
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            instance._release_model()
+            instance._record_call(
+                run_metrics,
+                started,
+                instance._prompt_bytes((run_prompt,), {}),
+                time_to_first_token=time_to_first_token,
+                slot=slot,
+                error=error,
+            )
 
     def prompt(self, **kwargs: Any) -> str:
         """
@@ -0,0 +1,211 @@
+"""
+Shared, bounded thread pool for fanning out LLM calls.
+
+Menu uploads parse their pages in parallel. A fresh ThreadPoolExecutor per
+upload let concurrent uploads multiply threads without limit, and one stuck
+page held up the whole upload. Fan-out now goes through llm_executor:
+LLM_EXECUTOR_WORKERS threads per process, shared by every request and task.
+
+run_all() runs one task per argument under two deadlines: a per-task
+timeout, counted from when the task starts running (time queued behind
+other uploads does not count against it), and a deadline for the whole
+batch. A task that times out is retried once and the first attempt to
+finish wins. Tasks still unfinished at the batch deadline fail with
+TimeoutError; the caller gets the results that did finish. max_parallel
+caps how many of a batch's tasks run at once, e.g. to the concurrency
+limit the calls are made under (ai.limiter), so tasks do not spend their
+timeout waiting for a slot.
+
+Threads cannot be killed: an abandoned attempt keeps its worker until the
+provider call returns or hits the client timeout. Attempts still queued are
+cancelled.
+
+stats() reports saturation, i.e. running and queued tasks against the pool
+size. The admin LLM metrics endpoint serves it, and with the prometheus
+sink it is exported as gauges.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+
+MAX_POLL_INTERVAL = 1.0  # seconds between timeout checks while tasks run
+
+
+@dataclass
+class ExecutorStats:
+    workers: int = 0
+    running: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    tasks: int = 0
+    retries: int = 0  # attempts started again after a task timeout
+    timeouts: int = 0  # tasks failed by their retried timeout or the batch deadline
+
+    @property
+    def saturation(self) -> float:
+        """Running plus queued tasks per worker; above 1 means tasks are waiting."""
+        return (self.running + self.queued) / self.workers if self.workers else 0.0
+
+
+class _Attempt:
+    def __init__(self, index: int):
+        self.index = index
+        self.started: float | None = None  # set once a worker picks it up
+        self.future: Future | None = None
+
+
+@functools.cache
+def _register_prometheus_gauges(executor: "LLMExecutor") -> None:
+    # prometheus_client metrics are process-global and can only be registered once.
+    from prometheus_client import Gauge
+
+    for field in ("workers", "running", "queued"):
+        Gauge(f"llm_executor_{field}", f"LLM executor {field} tasks").set_function(
+            lambda field=field: getattr(executor.stats(), field)
+        )
+    Gauge("llm_executor_saturation", "LLM executor running and queued tasks per worker").set_function(
+        lambda: executor.stats().saturation
+    )
+
+
+class LLMExecutor:
+    def __init__(self):
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._stats = ExecutorStats()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=settings.LLM_EXECUTOR_WORKERS, thread_name_prefix="llm-executor"
+                )
+                self._stats.workers = settings.LLM_EXECUTOR_WORKERS
+                if "prometheus" in settings.LLM_METRICS_SINKS:
+                    _register_prometheus_gauges(self)
+            return self._pool
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for field, delta in deltas.items():
+                setattr(self._stats, field, getattr(self._stats, field) + delta)
+            self._stats.max_queued = max(self._stats.max_queued, self._stats.queued)
+
+    def _submit(self, index: int, fn: Callable[[Any], Any], arg: Any) -> _Attempt:
+        attempt = _Attempt(index)
+        # Run in a copy of the caller's context so metrics labels follow the request.
+        context = contextvars.copy_context()
+
+        def run():
+            attempt.started = time.monotonic()
+            self._count(queued=-1, running=1)
+            try:
+                return context.run(fn, arg)
+            finally:
+                self._count(running=-1)
+
+        self._count(queued=1)
+        attempt.future = self._executor().submit(run)
+        return attempt
+
+    def _cancel(self, attempt: _Attempt) -> None:
+        if attempt.future.cancel():
+            self._count(queued=-1)
+
+    def run_all(
+        self,
+        fn: Callable[[Any], Any],
+        args: list[Any],
+        *,
+        task_timeout: float,
+        deadline: float,
+        on_done: Callable[[int, Any, BaseException | None], None],
+        max_parallel: int | None = None,
+    ) -> None:
+        """
+        Call fn(arg) for each of args on the shared pool, at most
+        max_parallel (if given) at a time.
+
+        on_done(index, result, error) is called on the calling thread once
+        per argument, as it finishes: error is None on success, the raised
+        exception, or a TimeoutError once the task's retry or the batch
+        deadline (both in seconds) ran out.
+        """
+        batch_end = time.monotonic() + deadline
+        attempts: dict[int, list[_Attempt]] = {index: [] for index in range(len(args))}
+        self._count(tasks=len(args))
+        pending = set(attempts)
+        waiting = deque(attempts)  # tasks not started because of max_parallel
+        seen: set[Future] = set()  # finished attempts already handled
+        poll = min(MAX_POLL_INTERVAL, task_timeout / 4)
+
+        def start_waiting() -> None:
+            while waiting and (max_parallel is None or len(pending) - len(waiting) < max_parallel):
+                index = waiting.popleft()
+                attempts[index].append(self._submit(index, fn, args[index]))
+
+        def finish(index: int, result: Any, error: BaseException | None) -> None:
+            pending.discard(index)
+            for attempt in attempts[index]:
+                self._cancel(attempt)
+            on_done(index, result, error)
+            start_waiting()
+
+        start_waiting()
+
+        while pending:
+            live = {a.future: a for index in pending for a in attempts[index] if a.future not in seen}
+            done, _ = wait(live, timeout=poll, return_when=FIRST_COMPLETED)
+            seen |= done
+            for future in done:
+                attempt = live[future]
+                if attempt.index not in pending:
+                    continue
+                error = future.exception()
+                if error is None:
+                    finish(attempt.index, future.result(), None)
+                elif all(a.future.done() for a in attempts[attempt.index]):
+                    finish(attempt.index, None, error)
+                # else another attempt of the task is still running and may succeed
+
+            now = time.monotonic()
+            if now >= batch_end:
+                waiting.clear()
+                for index in sorted(pending):
+                    self._count(timeouts=1)
+                    finish(index, None, TimeoutError(f"Not finished within the {deadline:g}s deadline"))
+                break
+            for index in sorted(pending):
+                if not attempts[index]:
+                    continue
+                latest = attempts[index][-1]
+                if latest.started is None or now - latest.started < task_timeout:
+                    continue
+                if len(attempts[index]) == 1:
+                    self._count(retries=1)
+                    attempts[index].append(self._submit(index, fn, args[index]))
+                else:
+                    self._count(timeouts=1)
+                    finish(index, None, TimeoutError(f"No answer within {task_timeout:g}s, twice"))
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(**vars(self._stats))
+
+    def reset(self) -> None:
+        """Forget the counters; the pool itself is kept."""
+        with self._lock:
+            workers = self._stats.workers
+            self._stats = ExecutorStats(workers=workers)
+
+
+llm_executor = LLMExecutor()
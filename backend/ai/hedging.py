@@ -0,0 +1,195 @@
+"""
+Hedged LLM requests.
+
+A single slow provider response sets the tail latency of order parsing. When
+hedging is enabled for an agent and the primary model has not answered within
+the agent's budget (roughly its p95 latency), the same request is sent to an
+alternate model - usually on the other provider - and the first valid result
+wins. A primary that fails outright is failed over to the alternate straight
+away instead of waiting for the budget.
+
+The losing request is cancelled: async runs cancel the task, sync runs ask
+agno to cancel the run and drop its result. A sync HTTP call already in
+flight cannot be interrupted, so its worker thread finishes in the
+background.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import uuid
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+from agno.agent import Agent
+
+logger = logging.getLogger(__name__)
+
+HEDGE_MAX_WORKERS = 32  # threads shared by sync primaries and their hedges
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0  # runs that went through the hedging policy
+    hedged: int = 0  # alternate request fired because the budget ran out
+    failovers: int = 0  # alternate request fired because the primary failed
+    hedge_wins: int = 0  # hedged/failed-over runs answered by the alternate
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.calls if self.calls else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        fired = self.hedged + self.failovers
+        return self.hedge_wins / fired if fired else 0.0
+
+
+class HedgeStatsRegistry:
+    def __init__(self):
+        self._stats: dict[str, HedgeStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent_name: str, *, hedged=False, failover=False, hedge_won=False) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(agent_name, HedgeStats())
+            stats.calls += 1
+            stats.hedged += hedged
+            stats.failovers += failover
+            stats.hedge_wins += hedge_won
+
+    def snapshot(self) -> dict[str, HedgeStats]:
+        with self._lock:
+            return {name: HedgeStats(**vars(stats)) for name, stats in self._stats.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+hedge_stats = HedgeStatsRegistry()
+
+_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge")
+
+
+class _Attempt:
+    """One sync request, cancellable through agno's run registry."""
+
+    def __init__(self, fn: Callable[[str], Any], is_alternate: bool):
+        self.run_id = str(uuid.uuid4())
+        self.is_alternate = is_alternate
+        # Run in a copy of the caller's context so metrics labels follow the request.
+        self.future = _executor.submit(contextvars.copy_context().run, fn, self.run_id)
+
+    def cancel(self) -> None:
+        if not self.future.cancel():
+            Agent.cancel_run(self.run_id)
+
+
+def _outcome(future, is_valid: Callable[[Any], bool]) -> tuple[bool, Any]:
+    """(True, result) for a valid result, otherwise (False, exception or result)."""
+    try:
+        result = future.result()
+    except Exception as exc:
+        return False, exc
+    return is_valid(result), result
+
+
+def _fail(agent_name: str, outcome: Any):
+    if isinstance(outcome, BaseException):
+        raise outcome
+    logger.warning("[%s] Primary and hedged requests both returned invalid output", agent_name)
+    return outcome
+
+
+def run_hedged(
+    agent_name: str,
+    budget: float,
+    primary: Callable[[str], Any],
+    alternate: Callable[[str], Any],
+    is_valid: Callable[[Any], bool],
+) -> Any:
+    """
+    Run primary(run_id), hedging with alternate(run_id) after budget seconds.
+
+    Returns the first valid result. If neither request produces one, the
+    last error is raised (or the last invalid result returned).
+    """
+    first = _Attempt(primary, is_alternate=False)
+    done, _ = wait([first.future], timeout=budget)
+    if done:
+        ok, outcome = _outcome(first.future, is_valid)
+        if ok:
+            hedge_stats.record(agent_name)
+            return outcome
+        logger.warning("[%s] Primary request failed, failing over: %r", agent_name, outcome)
+        second = _Attempt(alternate, is_alternate=True)
+        ok, outcome = _outcome(wait([second.future]).done.pop(), is_valid)
+        hedge_stats.record(agent_name, failover=True, hedge_won=ok)
+        return outcome if ok else _fail(agent_name, outcome)
+
+    logger.info("[%s] No answer after %.1fs, sending hedged request", agent_name, budget)
+    pending = [first, _Attempt(alternate, is_alternate=True)]
+    outcome = None
+    while pending:
+        done, _ = wait([a.future for a in pending], return_when=FIRST_COMPLETED)
+        for attempt in [a for a in pending if a.future in done]:
+            pending.remove(attempt)
+            ok, outcome = _outcome(attempt.future, is_valid)
+            if ok:
+                for loser in pending:
+                    loser.cancel()
+                hedge_stats.record(agent_name, hedged=True, hedge_won=attempt.is_alternate)
+                return outcome
+    hedge_stats.record(agent_name, hedged=True)
+    return _fail(agent_name, outcome)
+
+
+async def _aoutcome(task: asyncio.Task, is_valid: Callable[[Any], bool]) -> tuple[bool, Any]:
+    try:
+        result = await task
+    except Exception as exc:
+        return False, exc
+    return is_valid(result), result
+
+
+async def arun_hedged(
+    agent_name: str,
+    budget: float,
+    primary: Callable[[], Awaitable[Any]],
+    alternate: Callable[[], Awaitable[Any]],
+    is_valid: Callable[[Any], bool],
+) -> Any:
+    """Async equivalent of run_hedged(); the losing task is cancelled."""
+    first = asyncio.ensure_future(primary())
+    done, _ = await asyncio.wait({first}, timeout=budget)
+    if done:
+        ok, outcome = await _aoutcome(first, is_valid)
+        if ok:
+            hedge_stats.record(agent_name)
+            return outcome
+        logger.warning("[%s] Primary request failed, failing over: %r", agent_name, outcome)
+        ok, outcome = await _aoutcome(asyncio.ensure_future(alternate()), is_valid)
+        hedge_stats.record(agent_name, failover=True, hedge_won=ok)
+        return outcome if ok else _fail(agent_name, outcome)
+
+    logger.info("[%s] No answer after %.1fs, sending hedged request", agent_name, budget)
+    second = asyncio.ensure_future(alternate())
+    pending = {first, second}
+    outcome = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                ok, outcome = await _aoutcome(task, is_valid)
+                if ok:
+                    hedge_stats.record(agent_name, hedged=True, hedge_won=task is second)
+                    return outcome
+    finally:
+        for task in pending:
+            task.cancel()
+    hedge_stats.record(agent_name, hedged=True)
+    return _fail(agent_name, outcome)
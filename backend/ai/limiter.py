@@ -0,0 +1,312 @@
+"""
+Concurrency limits for LLM provider requests.
+
+Every provider request BaseAgent makes takes a slot from the global pool
+and, when it is made for a restaurant (llm_call_context(restaurant=...)),
+one from that restaurant's pool, so a burst of scans at one busy restaurant
+cannot use up the provider rate limits of every tenant.
+
+- A restaurant's limit is its subscription plan's llm_concurrency in
+  SUBSCRIPTION_PLANS (llm_call_context(plan=...)), or
+  LLM_RESTAURANT_CONCURRENCY for restaurants without a plan.
+- LLM_GLOBAL_CONCURRENCY caps all restaurants together.
+- A limit of 0 means unlimited.
+- Calls made in a named pool (llm_call_context(pool=...)) take their
+  restaurant slot from a separate pool of the same size, and may queue for
+  LLM_POOL_MAX_WAIT[pool] seconds. Menu uploads parse their pages in the
+  "menu_upload" pool: a page takes 10-60s, far longer than the default
+  wait, and an upload should neither starve nor be starved by the
+  restaurant's order parsing.
+
+A request that finds no free slot waits, polling, for up to
+LLM_CONCURRENCY_MAX_WAIT seconds (unless its pool sets its own wait) and
+then fails fast with LLMCapacityError:
+429 when its restaurant is at its limit, 503 when the whole service is, both
+with a Retry-After header.
+
+Slots are members of Redis sorted sets, scored by when they were taken, so
+the limits hold across workers and processes. A slot is a lease: one held
+for longer than LLM_CONCURRENCY_LEASE seconds (a worker that died
+mid-request) is reclaimed. LLM_CONCURRENCY_BACKEND = "local" keeps slots in
+process memory instead, for single-process deployments and tests. If Redis
+is unreachable, requests go ahead unlimited rather than failing.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from ai.metrics import current_call_context
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.05  # seconds between attempts while queued, plus up to as much jitter
+
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+for i, key in ipairs(KEYS) do
+    redis.call("ZREMRANGEBYSCORE", key, "-inf", now - lease)
+    if redis.call("ZCARD", key) >= tonumber(ARGV[3 + i]) then
+        return i
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call("ZADD", key, now, ARGV[3])
+    redis.call("EXPIRE", key, math.ceil(lease))
+end
+return 0
+"""
+
+
+class LLMCapacityError(APIException):
+    """No LLM slot became free within LLM_CONCURRENCY_MAX_WAIT."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "We're busy processing orders right now. Please try again in a moment."
+    default_code = "llm_capacity"
+
+    def __init__(self, scope: str, wait: int):
+        super().__init__()
+        self.scope = scope  # "restaurant" or "global"
+        self.wait = wait  # seconds, sent as Retry-After
+        if scope == "restaurant":
+            self.status_code = status.HTTP_429_TOO_MANY_REQUESTS
+
+
+@dataclass
+class _Pool:
+    scope: str
+    key: str
+    limit: int
+
+
+@dataclass
+class LimiterStats:
+    acquired: int = 0  # requests that got their slots
+    queued: int = 0  # ... of which had to wait for one
+    rejected: dict[str, int] = field(default_factory=dict)  # by scope
+    total_wait: float = 0.0  # seconds, over all requests including rejected ones
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        requests = self.acquired + sum(self.rejected.values())
+        return self.total_wait / requests if requests else 0.0
+
+
+# ── Slot stores ─────────────────────────────────────────────────────────
+
+
+class RedisSlotStore:
+    def __init__(self):
+        self._client = redis.from_url(settings.CELERY_BROKER_URL)
+        self._acquire = self._client.register_script(_ACQUIRE_SCRIPT)
+
+    def try_acquire(self, pools: list[_Pool], token: str, now: float, lease: float) -> _Pool | None:
+        """Take a slot in every pool, or none; returns the first full pool."""
+        full = self._acquire(
+            keys=[pool.key for pool in pools],
+            args=[now, lease, token, *(pool.limit for pool in pools)],
+        )
+        return pools[full - 1] if full else None
+
+    def release(self, pools: list[_Pool], token: str) -> None:
+        pipeline = self._client.pipeline()
+        for pool in pools:
+            pipeline.zrem(pool.key, token)
+        pipeline.execute()
+
+
+class LocalSlotStore:
+    def __init__(self):
+        self._slots: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, pools: list[_Pool], token: str, now: float, lease: float) -> _Pool | None:
+        with self._lock:
+            for pool in pools:
+                slots = self._slots.setdefault(pool.key, {})
+                for expired in [t for t, taken in slots.items() if taken <= now - lease]:
+                    del slots[expired]
+                if len(slots) >= pool.limit:
+                    return pool
+            for pool in pools:
+                self._slots[pool.key][token] = now
+            return None
+
+    def release(self, pools: list[_Pool], token: str) -> None:
+        with self._lock:
+            for pool in pools:
+                self._slots.get(pool.key, {}).pop(token, None)
+
+
+# ── Limiter ─────────────────────────────────────────────────────────────
+
+
+class Slot:
+    """
+    One request's slots, taken on enter (sync or async) and given back on exit.
+
+    wait is the time spent queued, also when the request was rejected.
+    """
+
+    def __init__(self, limiter: "ConcurrencyLimiter", pools: list[_Pool], max_wait: float):
+        self._limiter = limiter
+        self._pools = pools
+        self._max_wait = max_wait
+        self._token = uuid.uuid4().hex
+        self._held: list[_Pool] = []
+        self.wait = 0.0
+
+    def _attempt(self) -> _Pool | None:
+        """Try once; returns the full pool, or None once the slots are held."""
+        store = self._limiter.store
+        try:
+            full = store.try_acquire(self._pools, self._token, time.time(), settings.LLM_CONCURRENCY_LEASE)
+        except redis.RedisError as exc:
+            logger.warning("LLM concurrency limiter unavailable, not limiting: %s", exc)
+            return None
+        if full is None:
+            self._held = self._pools
+        return full
+
+    def _queue(self, full: _Pool, started: float) -> float:
+        """Seconds to sleep before the next attempt; raises once the wait budget is spent."""
+        self.wait = time.monotonic() - started
+        if self.wait >= self._max_wait:
+            self._limiter._record(self.wait, rejected=full.scope)
+            logger.warning("LLM %s concurrency limit %d reached (%s)", full.scope, full.limit, full.key)
+            raise LLMCapacityError(full.scope, settings.LLM_CONCURRENCY_RETRY_AFTER)
+        return POLL_INTERVAL * (1 + random.random())
+
+    def _acquired(self, started: float, queued: bool) -> None:
+        self.wait = time.monotonic() - started
+        self._limiter._record(self.wait, queued=queued)
+
+    def __enter__(self) -> "Slot":
+        if self._pools:
+            started = time.monotonic()
+            queued = False
+            while (full := self._attempt()) is not None:
+                queued = True
+                time.sleep(self._queue(full, started))
+            self._acquired(started, queued)
+        return self
+
+    async def __aenter__(self) -> "Slot":
+        if self._pools:
+            started = time.monotonic()
+            queued = False
+            attempt = sync_to_async(self._attempt, thread_sensitive=False)
+            while (full := await attempt()) is not None:
+                queued = True
+                await asyncio.sleep(self._queue(full, started))
+            self._acquired(started, queued)
+        return self
+
+    def _release(self) -> None:
+        if not self._held:
+            return
+        try:
+            self._limiter.store.release(self._held, self._token)
+        except redis.RedisError as exc:
+            # The slots expire with their lease.
+            logger.warning("Could not release LLM concurrency slots: %s", exc)
+        self._held = []
+
+    def __exit__(self, *exc_info) -> None:
+        self._release()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await sync_to_async(self._release, thread_sensitive=False)()
+
+
+class ConcurrencyLimiter:
+    def __init__(self):
+        self._store = None
+        self._stats = LimiterStats()
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> RedisSlotStore | LocalSlotStore:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    backends = {"redis": RedisSlotStore, "local": LocalSlotStore}
+                    backend = settings.LLM_CONCURRENCY_BACKEND
+                    if backend not in backends:
+                        raise ImproperlyConfigured(
+                            f"Unknown LLM_CONCURRENCY_BACKEND '{backend}'. Expected one of {sorted(backends)}."
+                        )
+                    self._store = backends[backend]()
+        return self._store
+
+    @staticmethod
+    def restaurant_limit(plan: str) -> int:
+        """Concurrent LLM requests allowed per restaurant on plan ("" for no plan)."""
+        plan_config = settings.SUBSCRIPTION_PLANS.get(plan, {})
+        return plan_config.get("llm_concurrency", settings.LLM_RESTAURANT_CONCURRENCY)
+
+    def _pools(self) -> list[_Pool]:
+        if not settings.LLM_CONCURRENCY_LIMITS_ENABLED:
+            return []
+        labels = current_call_context()
+        pools = []
+        restaurant = labels.get("restaurant")
+        if restaurant:
+            key = f"llm-slots:restaurant:{restaurant}"
+            if labels.get("pool"):
+                key += f":{labels['pool']}"
+            pools.append(_Pool("restaurant", key, self.restaurant_limit(labels.get("plan", ""))))
+        pools.append(_Pool("global", "llm-slots:global", settings.LLM_GLOBAL_CONCURRENCY))
+        return [pool for pool in pools if pool.limit > 0]
+
+    def slot(self) -> Slot:
+        """Slots for one provider request made in the current llm_call_context()."""
+        pool = current_call_context().get("pool", "")
+        return Slot(self, self._pools(), settings.LLM_POOL_MAX_WAIT.get(pool, settings.LLM_CONCURRENCY_MAX_WAIT))
+
+    def restaurant_concurrency(self) -> int | None:
+        """
+        Requests the current llm_call_context() may make at once in its
+        restaurant pool; None when that is unlimited.
+        """
+        limits = [pool.limit for pool in self._pools() if pool.scope == "restaurant"]
+        return limits[0] if limits else None
+
+    def _record(self, wait: float, *, queued: bool = False, rejected: str = "") -> None:
+        with self._lock:
+            stats = self._stats
+            if rejected:
+                stats.rejected[rejected] = stats.rejected.get(rejected, 0) + 1
+            else:
+                stats.acquired += 1
+                stats.queued += queued
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+
+    def stats(self) -> LimiterStats:
+        with self._lock:
+            stats = self._stats
+            return LimiterStats(stats.acquired, stats.queued, dict(stats.rejected), stats.total_wait, stats.max_wait)
+
+    def reset(self) -> None:
+        """Forget the counters and rebuild the slot store from settings on next use."""
+        with self._lock:
+            self._store = None
+            self._stats = LimiterStats()
+
+
+llm_limiter = ConcurrencyLimiter()
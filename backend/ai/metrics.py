@@ -0,0 +1,289 @@
+"""
+Per-call LLM metrics.
+
+BaseAgent records one LLMCallMetrics per provider request - wall time,
+time to first token, time queued for a concurrency slot (ai.limiter),
+token usage, cached input tokens, prompt size and estimated cost - and
+hands it to the sinks named in LLM_METRICS_SINKS:
+
+    log         one structured log line per call (the default)
+    memory      in-process ring buffer, served by the admin metrics endpoint
+    prometheus  histograms and counters (needs prometheus_client installed)
+
+Callers tag the calls they trigger with llm_call_context(), e.g. the
+restaurant whose menu is being parsed, so slow menus can be told apart.
+Prometheus labels its series by plan rather than restaurant, so their
+number does not grow with the number of restaurants; the log and memory
+sinks keep the restaurant.
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from agno.models.metrics import Metrics
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from ai.models import is_anthropic_model
+
+logger = logging.getLogger(__name__)
+
+# USD per million (input, cached input, output) tokens, used when the provider reports no cost.
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "claude-sonnet-4": (3.00, 0.30, 15.00),
+}
+
+_call_context: contextvars.ContextVar[dict[str, str] | None] = contextvars.ContextVar("llm_call_context", default=None)
+
+
+@contextmanager
+def llm_call_context(**labels: str):
+    """Attach labels (e.g. restaurant="slug") to LLM calls made inside the block."""
+    token = _call_context.set({**current_call_context(), **labels})
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_call_context() -> dict[str, str]:
+    return _call_context.get() or {}
+
+
+def estimate_cost(model_id: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float | None:
+    """
+    Cost in USD from MODEL_PRICES, or None for unknown models.
+
+    cached_tokens are the part of input_tokens read from the prompt cache.
+    """
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model_id.startswith(prefix):
+            input_price, cached_price, output_price = MODEL_PRICES[prefix]
+            uncached = input_tokens - cached_tokens
+            return (uncached * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000
+    return None
+
+
+@dataclass
+class LLMCallMetrics:
+    agent: str
+    model: str
+    restaurant: str = ""
+    plan: str = ""  # the restaurant's subscription plan
+    wall_time: float = 0.0  # seconds
+    time_to_first_token: float | None = None  # seconds; streamed runs only
+    input_tokens: int = 0  # including cached_input_tokens, for every provider
+    output_tokens: int = 0
+    cached_input_tokens: int = 0  # input tokens served from the provider's prompt cache
+    cache_write_tokens: int = 0  # input tokens written to the prompt cache (Anthropic)
+    prompt_bytes: int = 0
+    retries: int = 0  # 1 for a hedged or failover request (see ai.hedging)
+    queue_wait: float = 0.0  # seconds waited for a concurrency slot, included in wall_time
+    rejected: bool = False  # no slot came free; the provider was not called
+    cost: float | None = None  # USD
+    error: str = ""
+
+    @property
+    def cache_hit(self) -> bool:
+        return self.cached_input_tokens > 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "cache_hit": self.cache_hit}
+
+
+def metrics_from_run(
+    agent_name: str,
+    model_id: str,
+    run_metrics: Metrics | None,
+    *,
+    wall_time: float,
+    prompt_bytes: int,
+    retries: int = 0,
+    time_to_first_token: float | None = None,
+    queue_wait: float = 0.0,
+    rejected: bool = False,
+    error: str = "",
+) -> LLMCallMetrics:
+    """Build an LLMCallMetrics from agno's run metrics (which may be None)."""
+    if not isinstance(run_metrics, Metrics):
+        run_metrics = None
+    input_tokens = getattr(run_metrics, "input_tokens", 0) or 0
+    output_tokens = getattr(run_metrics, "output_tokens", 0) or 0
+    cached_tokens = getattr(run_metrics, "cache_read_tokens", 0) or 0
+    cache_write_tokens = getattr(run_metrics, "cache_write_tokens", 0) or 0
+    if is_anthropic_model(model_id):
+        # Anthropic reports cache reads and writes separately from input_tokens.
+        input_tokens += cached_tokens + cache_write_tokens
+    cost = getattr(run_metrics, "cost", None)
+    if cost is None and (input_tokens or output_tokens):
+        cost = estimate_cost(model_id, input_tokens, output_tokens, cached_tokens)
+    return LLMCallMetrics(
+        agent=agent_name,
+        model=model_id,
+        restaurant=current_call_context().get("restaurant", ""),
+        plan=current_call_context().get("plan", ""),
+        wall_time=wall_time,
+        time_to_first_token=time_to_first_token or getattr(run_metrics, "time_to_first_token", None),
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cached_input_tokens=cached_tokens,
+        cache_write_tokens=cache_write_tokens,
+        prompt_bytes=prompt_bytes,
+        retries=retries,
+        queue_wait=queue_wait,
+        rejected=rejected,
+        cost=cost,
+        error=error,
+    )
+
+
+# ── Sinks ───────────────────────────────────────────────────────────────
+
+
+class MetricsSink(ABC):
+    @abstractmethod
+    def emit(self, metrics: LLMCallMetrics) -> None:
+        """Record one LLM call."""
+        ...
+
+
+class LogSink(MetricsSink):
+    def emit(self, metrics: LLMCallMetrics) -> None:
+        logger.info(
+            "[%s] model=%s restaurant=%s wall=%.3fs queued=%.3fs ttft=%s tokens=%d/%d cached=%d/%d prompt_bytes=%d "
+            "retries=%d%s",
+            metrics.agent,
+            metrics.model,
+            metrics.restaurant or "-",
+            metrics.wall_time,
+            metrics.queue_wait,
+            f"{metrics.time_to_first_token:.3f}s" if metrics.time_to_first_token is not None else "-",
+            metrics.input_tokens,
+            metrics.output_tokens,
+            metrics.cached_input_tokens,
+            metrics.cache_write_tokens,
+            metrics.prompt_bytes,
+            metrics.retries,
+            f" error={metrics.error}" if metrics.error else "",
+            extra={"llm_metrics": metrics.to_dict()},
+        )
+
+
+class RingBufferSink(MetricsSink):
+    """Keeps the most recent calls in memory for the admin metrics endpoint."""
+
+    def __init__(self, size: int):
+        self._calls: deque[LLMCallMetrics] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def emit(self, metrics: LLMCallMetrics) -> None:
+        with self._lock:
+            self._calls.append(metrics)
+
+    def recent(self) -> list[LLMCallMetrics]:
+        """Buffered calls, newest first."""
+        with self._lock:
+            return list(reversed(self._calls))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calls.clear()
+
+
+class PrometheusSink(MetricsSink):
+    def __init__(self):
+        try:
+            from prometheus_client import Counter, Histogram
+        except ImportError as exc:
+            raise ImproperlyConfigured(
+                "LLM_METRICS_SINKS includes 'prometheus' but prometheus_client is not installed."
+            ) from exc
+
+        labels = ["agent", "model", "plan"]
+        self.wall_time = Histogram("llm_call_seconds", "LLM call wall time", labels)
+        self.ttft = Histogram("llm_time_to_first_token_seconds", "LLM time to first token", labels)
+        self.queue_wait = Histogram("llm_queue_wait_seconds", "Time queued for an LLM concurrency slot", labels)
+        self.tokens = Counter("llm_tokens_total", "LLM tokens", [*labels, "kind"])
+        self.prompt_bytes = Counter("llm_prompt_bytes_total", "LLM prompt size", labels)
+        self.calls = Counter("llm_calls_total", "LLM calls", [*labels, "outcome"])
+        self.cost = Counter("llm_cost_usd_total", "Estimated LLM cost", labels)
+
+    def emit(self, metrics: LLMCallMetrics) -> None:
+        labels = {"agent": metrics.agent, "model": metrics.model, "plan": metrics.plan}
+        self.wall_time.labels(**labels).observe(metrics.wall_time)
+        if metrics.time_to_first_token is not None:
+            self.ttft.labels(**labels).observe(metrics.time_to_first_token)
+        self.queue_wait.labels(**labels).observe(metrics.queue_wait)
+        self.tokens.labels(**labels, kind="input").inc(metrics.input_tokens)
+        self.tokens.labels(**labels, kind="output").inc(metrics.output_tokens)
+        self.tokens.labels(**labels, kind="cached").inc(metrics.cached_input_tokens)
+        self.tokens.labels(**labels, kind="cache_write").inc(metrics.cache_write_tokens)
+        self.prompt_bytes.labels(**labels).inc(metrics.prompt_bytes)
+        outcome = "rejected" if metrics.rejected else "error" if metrics.error else "retry" if metrics.retries else "ok"
+        self.calls.labels(**labels, outcome=outcome).inc()
+        if metrics.cost is not None:
+            self.cost.labels(**labels).inc(metrics.cost)
+
+
+@functools.cache
+def _prometheus_sink() -> PrometheusSink:
+    # prometheus_client metrics are process-global and can only be registered once.
+    return PrometheusSink()
+
+
+class MetricsRecorder:
+    """Fans call metrics out to the sinks configured in LLM_METRICS_SINKS."""
+
+    def __init__(self):
+        self._sinks: dict[str, MetricsSink] | None = None
+        self._lock = threading.Lock()
+
+    def _build_sinks(self) -> dict[str, MetricsSink]:
+        factories = {
+            "log": LogSink,
+            "memory": lambda: RingBufferSink(settings.LLM_METRICS_BUFFER_SIZE),
+            "prometheus": _prometheus_sink,
+        }
+        sinks = {}
+        for name in settings.LLM_METRICS_SINKS:
+            if name not in factories:
+                raise ImproperlyConfigured(f"Unknown LLM metrics sink '{name}'. Expected one of {sorted(factories)}.")
+            sinks[name] = factories[name]()
+        return sinks
+
+    @property
+    def sinks(self) -> dict[str, MetricsSink]:
+        if self._sinks is None:
+            with self._lock:
+                if self._sinks is None:
+                    self._sinks = self._build_sinks()
+        return self._sinks
+
+    def record(self, metrics: LLMCallMetrics) -> None:
+        for sink in self.sinks.values():
+            try:
+                sink.emit(metrics)
+            except Exception:
+                logger.exception("LLM metrics sink %s failed", type(sink).__name__)
+
+    def recent(self) -> list[LLMCallMetrics]:
+        """Calls held by the in-memory sink, newest first ([] when it is not enabled)."""
+        sink = self.sinks.get("memory")
+        return sink.recent() if sink is not None else []
+
+    def reset(self) -> None:
+        """Rebuild sinks from settings on next use."""
+        with self._lock:
+            self._sinks = None
+
+
+llm_metrics = MetricsRecorder()
@@ -3,6 +3,8 @@ Model resolution: map a model ID string to an agno Model instance.
 
 Supports OpenAI and Anthropic models. The provider is inferred from the
 model ID string (e.g. "gpt-4o-mini" → OpenAIChat, "claude-sonnet-4-20250514" → Claude).
+With LLM_REPLAY_RECORDINGS set, every model ID resolves to a ReplayModel
+serving recorded responses instead (see ai.replay).
 """
 
 import logging
@@ -16,12 +18,26 @@ _OPENAI_PREFIXES = ("gpt-", "o1-", "o3-", "o4-")
 _ANTHROPIC_KEYWORDS = ("claude",)
 
 
+def is_anthropic_model(model_id: str) -> bool:
+    return any(kw in model_id.lower() for kw in _ANTHROPIC_KEYWORDS)
+
+
 def resolve_model(model_id: str):
     """
     Given a model ID string, return the appropriate agno Model instance.
 
     Raises ValueError if the provider cannot be inferred.
     """
+    if settings.LLM_REPLAY_RECORDINGS:
+        from ai.replay import ReplayModel, replay_library
+
+        library = replay_library(
+            settings.LLM_REPLAY_RECORDINGS,
+            seed=settings.LLM_REPLAY_SEED,
+            latency_scale=settings.LLM_REPLAY_LATENCY_SCALE,
+        )
+        return ReplayModel(id=model_id, library=library)
+
     model_id_lower = model_id.lower()
 
     if any(model_id_lower.startswith(p) for p in _OPENAI_PREFIXES):
@@ -32,7 +48,7 @@ def resolve_model(model_id: str):
             api_key=settings.OPENAI_API_KEY or None,
         )
 
-    if any(kw in model_id_lower for kw in _ANTHROPIC_KEYWORDS):
+    if is_anthropic_model(model_id):
         from agno.models.anthropic import Claude
 
         return Claude(
@@ -0,0 +1,106 @@
+"""
+Process-wide pool of provider SDK clients for agno models.
+
+resolve_model() returns a fresh agno Model whose OpenAI/Anthropic client is
+created lazily on first use, so a new client - and a new HTTP connection
+pool and TLS session - used to be built for every agent run. The pool keeps
+the SDK clients created by earlier runs and hands them to new Model
+instances, keyed by agent class and model ID.
+
+Only the SDK clients are shared; they are thread-safe and keep connections
+alive between requests. agno Agent and Model objects are still built per
+call, so per-call context (menu XML, images) never leaks between runs.
+Async clients are bound to the event loop that created them and are pooled
+per loop.
+"""
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass, field
+
+from ai.models import resolve_model
+
+
+@dataclass
+class PoolStats:
+    created: int = 0  # runs that created (and donated) a new client
+    reused: int = 0  # runs that were handed an existing client
+
+    @property
+    def reuse_rate(self) -> float:
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+
+@dataclass
+class _PoolEntry:
+    client: object = None
+    async_clients: weakref.WeakKeyDictionary = field(default_factory=weakref.WeakKeyDictionary)
+    stats: PoolStats = field(default_factory=PoolStats)
+
+
+def _usable(client) -> bool:
+    return client is not None and not client.is_closed()
+
+
+class ModelClientPool:
+    def __init__(self):
+        self._entries: dict[tuple[str, str], _PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: tuple[str, str]) -> _PoolEntry:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries.setdefault(key, _PoolEntry())
+        return entry
+
+    def checkout(self, agent_name: str, model_id: str, *, is_async: bool = False):
+        """
+        Return a new agno Model for model_id wired to the pooled client, if any.
+
+        Async checkouts must happen on the event loop that will run the model.
+        """
+        model = resolve_model(model_id)
+        with self._lock:
+            entry = self._entry((agent_name, model_id))
+            if is_async:
+                pooled = entry.async_clients.get(asyncio.get_running_loop())
+                if _usable(pooled):
+                    model.async_client = pooled
+                    entry.stats.reused += 1
+            elif _usable(entry.client):
+                model.client = entry.client
+                entry.stats.reused += 1
+        return model
+
+    def checkin(self, agent_name: str, model_id: str, model, *, is_async: bool = False) -> None:
+        """Keep the client a finished run created so later runs can reuse it."""
+        with self._lock:
+            entry = self._entry((agent_name, model_id))
+            if is_async:
+                loop = asyncio.get_running_loop()
+                client = getattr(model, "async_client", None)
+                if client is not None and not _usable(entry.async_clients.get(loop)):
+                    entry.async_clients[loop] = client
+                    entry.stats.created += 1
+            else:
+                client = getattr(model, "client", None)
+                if client is not None and not _usable(entry.client):
+                    entry.client = client
+                    entry.stats.created += 1
+
+    def stats(self) -> dict[str, PoolStats]:
+        """Reuse counters per "AgentName:model-id"."""
+        with self._lock:
+            return {
+                f"{name}:{model_id}": PoolStats(entry.stats.created, entry.stats.reused)
+                for (name, model_id), entry in self._entries.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+model_pool = ModelClientPool()
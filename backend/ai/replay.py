@@ -0,0 +1,233 @@
+"""
+Replay model backend: serves recorded structured responses instead of
+calling a provider, so the parse pipelines can be run and benchmarked
+offline.
+
+When LLM_REPLAY_RECORDINGS names a recordings file, resolve_model()
+returns a ReplayModel for every model ID. Recordings are JSON:
+
+    {
+      "recordings": [
+        {
+          "schema": "ParsedOrder",
+          "match": "two large lattes",
+          "latency": {"median_ms": 900, "p95_ms": 2400},
+          "response": {"items": [...], "language": "en"}
+        }
+      ]
+    }
+
+- schema is the output schema class name the agent asks for.
+- match (optional) must occur in the last user message. The recording with
+  the longest matching match wins; recordings without one match anything.
+  Equally good recordings are served in turn (e.g. one per menu page).
+- latency (optional) is a lognormal distribution given by its median and
+  p95, sampled from a seeded generator and scaled by
+  LLM_REPLAY_LATENCY_SCALE. Without it a response is served immediately.
+
+Token usage is estimated from message sizes (about 4 characters per token)
+so ai.metrics records comparable numbers for replayed calls.
+"""
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.metrics import Metrics
+from agno.models.response import ModelResponse
+
+_Z95 = 1.6449  # standard normal 95th percentile
+_CHARS_PER_TOKEN = 4
+_STREAM_CHUNK_CHARS = 64
+
+
+class ReplayMissError(LookupError):
+    """No recording matches the request."""
+
+
+@dataclass(frozen=True)
+class LatencyDistribution:
+    """Lognormal latency given by its median and 95th percentile, in milliseconds."""
+
+    median_ms: float = 0.0
+    p95_ms: float | None = None
+
+    def sample(self, rng: random.Random) -> float:
+        """One latency in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        if not self.p95_ms or self.p95_ms <= self.median_ms:
+            return self.median_ms / 1000
+        sigma = math.log(self.p95_ms / self.median_ms) / _Z95
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+
+@dataclass
+class Recording:
+    schema: str
+    response: Any  # JSON document, or plain text for unstructured agents
+    match: str = ""
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+
+    @property
+    def content(self) -> str:
+        return self.response if isinstance(self.response, str) else json.dumps(self.response)
+
+
+class ReplayLibrary:
+    """A set of recordings and the seeded generator their latencies are drawn from."""
+
+    def __init__(self, recordings: list[Recording] | None = None, *, seed: int = 0, latency_scale: float = 1.0):
+        self.recordings = list(recordings or [])
+        self.latency_scale = latency_scale
+        self._rng = random.Random(seed)
+        self._served: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs: Any) -> "ReplayLibrary":
+        data = json.loads(Path(path).read_text())
+        return cls([_recording_from_dict(entry) for entry in data["recordings"]], **kwargs)
+
+    def add(self, schema: str, response: Any, *, match: str = "", latency: LatencyDistribution | None = None) -> None:
+        self.recordings.append(Recording(schema, response, match, latency or LatencyDistribution()))
+
+    def lookup(self, schema: str, prompt: str) -> tuple[Recording, float]:
+        """The recording to serve for schema and prompt, and the latency (seconds) to serve it with."""
+        candidates = [r for r in self.recordings if r.schema == schema and r.match in prompt]
+        if not candidates:
+            raise ReplayMissError(f"No recorded {schema or 'text'} response matches prompt {prompt[:200]!r}")
+        best = max(len(r.match) for r in candidates)
+        candidates = [r for r in candidates if len(r.match) == best]
+        with self._lock:
+            key = (schema, candidates[0].match)
+            turn = self._served.get(key, 0)
+            self._served[key] = turn + 1
+            recording = candidates[turn % len(candidates)]
+            latency = recording.latency.sample(self._rng) * self.latency_scale
+        return recording, latency
+
+
+def _recording_from_dict(entry: dict[str, Any]) -> Recording:
+    return Recording(
+        schema=entry["schema"],
+        response=entry["response"],
+        match=entry.get("match", ""),
+        latency=LatencyDistribution(**entry.get("latency", {})),
+    )
+
+
+def _schema_name(response_format: Any) -> str:
+    if isinstance(response_format, type):
+        return response_format.__name__
+    if isinstance(response_format, dict):
+        return response_format.get("json_schema", {}).get("name", "")
+    return ""
+
+
+def _last_user_message(messages: list[Message]) -> str:
+    for message in reversed(messages):
+        if message.role == "user":
+            return message.get_content_string()
+    return ""
+
+
+@dataclass
+class ReplayModel(Model):
+    """agno Model that answers from a ReplayLibrary."""
+
+    id: str = "replay"
+    name: str = "Replay"
+    provider: str = "Replay"
+    supports_native_structured_outputs: bool = True
+    library: ReplayLibrary | None = None
+
+    def _lookup(self, messages: list[Message], response_format: Any) -> tuple[Recording, float]:
+        if self.library is None:
+            raise ReplayMissError("ReplayModel has no recordings")
+        return self.library.lookup(_schema_name(response_format), _last_user_message(messages))
+
+    @staticmethod
+    def _usage(messages: list[Message], content: str) -> Metrics:
+        prompt_chars = sum(len(message.get_content_string()) for message in messages)
+        return Metrics(
+            input_tokens=prompt_chars // _CHARS_PER_TOKEN,
+            output_tokens=len(content) // _CHARS_PER_TOKEN,
+            total_tokens=(prompt_chars + len(content)) // _CHARS_PER_TOKEN,
+        )
+
+    def _response(self, messages: list[Message], recording: Recording) -> ModelResponse:
+        return ModelResponse(
+            role=self.assistant_message_role,
+            content=recording.content,
+            response_usage=self._usage(messages, recording.content),
+        )
+
+    def _chunks(self, messages: list[Message], recording: Recording) -> Iterator[ModelResponse]:
+        content = recording.content
+        for start in range(0, len(content), _STREAM_CHUNK_CHARS):
+            yield ModelResponse(role=self.assistant_message_role, content=content[start : start + _STREAM_CHUNK_CHARS])
+        yield ModelResponse(response_usage=self._usage(messages, content))
+
+    # ── agno Model interface ───────────────────────────────────────────────
+
+    def invoke(self, messages: list[Message], assistant_message: Message, response_format=None, **kwargs: Any):
+        recording, latency = self._lookup(messages, response_format)
+        assistant_message.metrics.start_timer()
+        time.sleep(latency)
+        assistant_message.metrics.stop_timer()
+        return self._response(messages, recording)
+
+    async def ainvoke(self, messages: list[Message], assistant_message: Message, response_format=None, **kwargs: Any):
+        recording, latency = self._lookup(messages, response_format)
+        assistant_message.metrics.start_timer()
+        await asyncio.sleep(latency)
+        assistant_message.metrics.stop_timer()
+        return self._response(messages, recording)
+
+    def invoke_stream(
+        self, messages: list[Message], assistant_message: Message, response_format=None, **kwargs: Any
+    ) -> Iterator[ModelResponse]:
+        recording, latency = self._lookup(messages, response_format)
+        assistant_message.metrics.start_timer()
+        time.sleep(latency)
+        yield from self._chunks(messages, recording)
+        assistant_message.metrics.stop_timer()
+
+    async def ainvoke_stream(
+        self, messages: list[Message], assistant_message: Message, response_format=None, **kwargs: Any
+    ) -> AsyncIterator[ModelResponse]:
+        recording, latency = self._lookup(messages, response_format)
+        assistant_message.metrics.start_timer()
+        await asyncio.sleep(latency)
+        for chunk in self._chunks(messages, recording):
+            yield chunk
+        assistant_message.metrics.stop_timer()
+
+    def _parse_provider_response(self, response: Any, **kwargs: Any) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response: Any) -> ModelResponse:
+        return response
+
+
+_libraries: dict[tuple[str, int, float], ReplayLibrary] = {}
+_libraries_lock = threading.Lock()
+
+
+def replay_library(path: str, *, seed: int = 0, latency_scale: float = 1.0) -> ReplayLibrary:
+    """The ReplayLibrary for a recordings file, loaded once per process."""
+    key = (path, seed, latency_scale)
+    with _libraries_lock:
+        if key not in _libraries:
+            _libraries[key] = ReplayLibrary.from_file(path, seed=seed, latency_scale=latency_scale)
+        return _libraries[key]
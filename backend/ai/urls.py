@@ -0,0 +1,7 @@
+from django.urls import path
+
+from ai.views import LLMMetricsView
+
+urlpatterns = [
+    path("admin/llm-metrics/", LLMMetricsView.as_view(), name="llm-metrics"),
+]
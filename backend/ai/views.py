@@ -0,0 +1,59 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ai.executor import llm_executor
+from ai.hedging import hedge_stats
+from ai.limiter import llm_limiter
+from ai.metrics import llm_metrics
+from ai.pool import model_pool
+from orders.llm.parse_cache import parse_cache
+
+
+class LLMMetricsView(APIView):
+    """
+    Recent LLM calls from the in-memory metrics sink, newest first.
+
+    ?agent= and ?restaurant= filter the calls, and "prompt_cache" totals
+    their input tokens per agent against those read from or written to the
+    provider's prompt cache. Requires "memory" in LLM_METRICS_SINKS; the
+    pool, hedging, concurrency limiter, executor and order parse cache
+    counters are always included.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        calls = llm_metrics.recent()
+        for field in ("agent", "restaurant"):
+            value = request.query_params.get(field)
+            if value:
+                calls = [call for call in calls if getattr(call, field) == value]
+
+        prompt_cache = {}
+        for call in calls:
+            totals = prompt_cache.setdefault(
+                call.agent, {"input_tokens": 0, "cached_input_tokens": 0, "cache_write_tokens": 0}
+            )
+            totals["input_tokens"] += call.input_tokens
+            totals["cached_input_tokens"] += call.cached_input_tokens
+            totals["cache_write_tokens"] += call.cache_write_tokens
+        for totals in prompt_cache.values():
+            totals["cached_share"] = (
+                totals["cached_input_tokens"] / totals["input_tokens"] if totals["input_tokens"] else 0.0
+            )
+
+        limiter_stats = llm_limiter.stats()
+        executor_stats = llm_executor.stats()
+        parse_cache_stats = parse_cache.stats
+        return Response(
+            {
+                "calls": [call.to_dict() for call in calls],
+                "prompt_cache": prompt_cache,
+                "client_pool": {key: vars(stats) for key, stats in model_pool.stats().items()},
+                "hedging": {name: vars(stats) for name, stats in hedge_stats.snapshot().items()},
+                "concurrency": {**vars(limiter_stats), "mean_wait": limiter_stats.mean_wait},
+                "executor": {**vars(executor_stats), "saturation": executor_stats.saturation},
+                "parse_cache": {**vars(parse_cache_stats), "hit_rate": parse_cache_stats.hit_rate},
+            }
+        )
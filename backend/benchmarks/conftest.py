@@ -0,0 +1,127 @@
+"""
+Benchmark suite helpers.
+
+Benchmarks are ordinary pytest tests. They assert on correctness and on
+machine-independent budgets (query counts, payload sizes), and record
+timings through the ``bench`` fixture. Recorded results are printed as a
+table at the end of the run so CI logs show them next to the test results.
+Pipeline benchmarks split their timings by stage with the ``stages`` fixture.
+"""
+
+import inspect
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+
+_RESULTS: list[tuple[str, str, str]] = []
+
+
+class BenchRecorder:
+    def __init__(self, name: str):
+        self.name = name
+
+    def measure(self, fn: Callable[[], object], *, repeat: int = 5) -> float:
+        """Run fn repeat times and return the median wall time in seconds."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def record(self, metric: str, value) -> None:
+        _RESULTS.append((self.name, metric, str(value)))
+
+    def record_time(self, metric: str, seconds: float) -> None:
+        self.record(metric, f"{seconds * 1000:.3f} ms")
+
+
+class StageTimer:
+    """
+    Splits wall time between pipeline stages.
+
+    time(owner, attr, stage) patches a function, method, staticmethod or
+    classmethod so that its calls count towards stage; time_queries() does
+    the same for database queries. Stage times are exclusive: a stage called
+    inside another (a query inside validation, the model inside an agent
+    run) is subtracted from the outer one, so stages add up to the time
+    spent in them. Calls on worker threads add up across threads.
+    """
+
+    def __init__(self):
+        self.totals: dict[str, float] = defaultdict(float)
+        self.calls: Counter[str] = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._patches = ExitStack()
+
+    def _run(self, stage: str, fn: Callable, *args, **kwargs):
+        stack = self._local.__dict__.setdefault("stack", [])
+        frame = [0.0]  # time spent in nested stages
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            with self._lock:
+                self.totals[stage] += elapsed - frame[0]
+                self.calls[stage] += 1
+
+    def time(self, owner, attr: str, stage: str) -> None:
+        original = inspect.getattr_static(owner, attr)
+        descriptor = type(original) if isinstance(original, (staticmethod, classmethod)) else None
+        func = original.__func__ if descriptor else original
+
+        def timed(*args, **kwargs):
+            return self._run(stage, func, *args, **kwargs)
+
+        self._patches.enter_context(patch.object(owner, attr, descriptor(timed) if descriptor else timed))
+
+    def time_queries(self, stage: str = "DB") -> None:
+        def wrapper(execute, sql, params, many, context):
+            return self._run(stage, execute, sql, params, many, context)
+
+        self._patches.enter_context(connection.execute_wrapper(wrapper))
+
+    def record(self, bench: "BenchRecorder", runs: int = 1) -> None:
+        """Record the mean time per run of each stage."""
+        for stage, seconds in self.totals.items():
+            bench.record_time(f"{stage} (per run)", seconds / runs)
+
+    def __enter__(self) -> "StageTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._patches.close()
+
+
+@pytest.fixture
+def bench(request):
+    return BenchRecorder(request.node.name)
+
+
+@pytest.fixture
+def stages():
+    with StageTimer() as timer:
+        yield timer
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    width = max(len(name) for name, _, _ in _RESULTS)
+    metric_width = max(len(metric) for _, metric, _ in _RESULTS)
+    for name, metric, value in _RESULTS:
+        terminalreporter.write_line(f"{name:<{width}}  {metric:<{metric_width}}  {value}")
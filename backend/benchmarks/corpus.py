@@ -0,0 +1,92 @@
+"""
+Shared order corpus for parsing benchmarks.
+
+fixtures/order_corpus.json holds a ~30 item fixture menu and customer
+utterances with the parse a correct model would return, written in terms of
+item/variant/modifier names so the corpus does not depend on database IDs.
+Orders marked ``needs_llm`` require real language understanding (other
+languages, allergies, vague requests, items not on the menu).
+
+``extra_menu`` lists additional dishes (one variant each, no modifiers) that
+pad the menu out to a large restaurant's size for prompt-size benchmarks.
+"""
+
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+CORPUS_PATH = Path(__file__).parent / "fixtures" / "order_corpus.json"
+
+
+def load_order_corpus() -> dict:
+    with open(CORPUS_PATH) as f:
+        return json.load(f)
+
+
+@dataclass
+class CorpusMenu:
+    restaurant: object
+    version: object
+    items: dict  # item name -> MenuItem
+    variants: dict  # (item name, label) -> MenuItemVariant
+    modifiers: dict  # (item name, modifier name) -> MenuItemModifier
+
+    def expected_order(self, order: dict) -> ParsedOrder:
+        """Turn a corpus order's name-based expectation into a ParsedOrder."""
+        items = []
+        for line in order["expected"]:
+            name = line["item"]
+            items.append(
+                ParsedOrderItem(
+                    menu_item_id=self.items[name].id,
+                    variant_id=self.variants[(name, line["variant"])].id,
+                    quantity=line["quantity"],
+                    modifier_ids=[self.modifiers[(name, m)].id for m in line.get("modifiers", [])],
+                    special_requests=line.get("special_requests", ""),
+                )
+            )
+        return ParsedOrder(items=items, allergies=order.get("allergies", []), language=order.get("language", "en"))
+
+
+def build_corpus_menu(corpus: dict | None = None, restaurant=None, *, large: bool = False) -> CorpusMenu:
+    """Create the corpus menu as the restaurant's active version."""
+    corpus = corpus or load_order_corpus()
+    restaurant = restaurant or RestaurantFactory()
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    menu = CorpusMenu(restaurant, version, {}, {}, {})
+    for cat_order, category in enumerate(corpus["menu"]):
+        cat = MenuCategoryFactory(version=version, name=category["category"], sort_order=cat_order)
+        for item_order, data in enumerate(category["items"]):
+            item = MenuItemFactory(
+                category=cat, name=data["name"], description=data["description"], sort_order=item_order
+            )
+            menu.items[item.name] = item
+            for label, price, is_default in data["variants"]:
+                menu.variants[(item.name, label)] = MenuItemVariantFactory(
+                    menu_item=item, label=label, price=Decimal(price), is_default=is_default
+                )
+            for name, adjustment in data["modifiers"]:
+                menu.modifiers[(item.name, name)] = MenuItemModifierFactory(
+                    menu_item=item, name=name, price_adjustment=Decimal(adjustment)
+                )
+    if large:
+        for cat_order, category in enumerate(corpus["extra_menu"], start=len(corpus["menu"])):
+            cat = MenuCategoryFactory(version=version, name=category["category"], sort_order=cat_order)
+            for item_order, name in enumerate(category["items"]):
+                item = MenuItemFactory(category=cat, name=name, description="", sort_order=item_order)
+                menu.items[name] = item
+                menu.variants[(name, "Regular")] = MenuItemVariantFactory(
+                    menu_item=item, label="Regular", price=Decimal("9.00")
+                )
+    return menu
@@ -0,0 +1,92 @@
+"""
+Load test: concurrent order parses through the threaded (sync) path and the
+async path, with the LLM replaced by a fixed-latency stub.
+
+The sync path is bounded by its worker threads - each parse holds one for
+the whole model call. The async path awaits the model call, so in-flight
+parses are limited only by the event loop.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.corpus import build_corpus_menu
+from orders.llm.base import ParsedOrder
+from orders.services import OrderService
+
+REQUESTS = 200
+LLM_LATENCY = 0.1  # seconds
+WORKER_THREADS = 20
+
+
+class InFlight:
+    def __init__(self):
+        self.current = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+@pytest.fixture
+def corpus_restaurant(transactional_db, settings):
+    settings.ORDER_FAST_PATH_ENABLED = False
+    return build_corpus_menu().restaurant
+
+
+def test_async_vs_threaded_parse_concurrency(corpus_restaurant, bench):
+    restaurant = corpus_restaurant
+    # Distinct texts so the parse cache never answers for the model.
+    texts = [f"order number {i} please" for i in range(REQUESTS)]
+
+    sync_flight = InFlight()
+
+    def slow_run(**kwargs):
+        with sync_flight:
+            time.sleep(LLM_LATENCY)
+        return ParsedOrder(items=[])
+
+    with patch("orders.services.OrderParsingAgent.run", side_effect=slow_run):
+        OrderService.parse_order(restaurant, "warm up")  # build menu artifacts once
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=WORKER_THREADS) as pool:
+            list(pool.map(lambda text: OrderService.parse_order(restaurant, "sync " + text), texts))
+        threaded = time.perf_counter() - start
+
+    async_flight = InFlight()
+
+    async def slow_arun(**kwargs):
+        with async_flight:
+            await asyncio.sleep(LLM_LATENCY)
+        return ParsedOrder(items=[])
+
+    async def run_async():
+        await OrderService.aparse_order(restaurant, "warm up async")
+        start = time.perf_counter()
+        await asyncio.gather(*(OrderService.aparse_order(restaurant, "async " + text) for text in texts))
+        return time.perf_counter() - start
+
+    with patch("orders.services.OrderParsingAgent.arun", side_effect=slow_arun):
+        async_elapsed = asyncio.run(run_async())
+
+    assert sync_flight.peak <= WORKER_THREADS
+    assert async_flight.peak > WORKER_THREADS
+
+    bench.record("requests / llm latency", f"{REQUESTS} / {LLM_LATENCY * 1000:.0f} ms")
+    bench.record("threaded peak in-flight llm calls", f"{sync_flight.peak} ({WORKER_THREADS} threads)")
+    bench.record("async peak in-flight llm calls", async_flight.peak)
+    bench.record_time("threaded wall time", threaded)
+    bench.record_time("async wall time", async_elapsed)
+    bench.record("threaded throughput", f"{REQUESTS / threaded:.0f} req/s")
+    bench.record("async throughput", f"{REQUESTS / async_elapsed:.0f} req/s")
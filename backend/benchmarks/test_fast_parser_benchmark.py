@@ -0,0 +1,45 @@
+"""
+Fast-path order parsing over the fixture corpus: how many orders skip the
+LLM, whether every fast-path answer agrees with the expected model parse,
+and what a parse costs compared to an LLM round trip.
+"""
+
+import time
+
+import pytest
+
+from benchmarks.corpus import build_corpus_menu, load_order_corpus
+from orders.llm.fast_parser import FastOrderParser
+
+
+@pytest.mark.django_db
+def test_fast_path_hit_rate_and_agreement(bench):
+    corpus = load_order_corpus()
+    menu = build_corpus_menu(corpus)
+    parser = FastOrderParser.build(menu.version.id)
+
+    handled = agreed = 0
+    disagreements = []
+    timings = []
+    for order in corpus["orders"]:
+        start = time.perf_counter()
+        parsed, _ = parser.parse(order["text"])
+        timings.append(time.perf_counter() - start)
+        if parsed is None:
+            continue
+        handled += 1
+        if parsed == menu.expected_order(order):
+            agreed += 1
+        else:
+            disagreements.append(order["text"])
+
+    # A wrong fast-path answer is worse than an LLM call; agreement must be exact.
+    assert disagreements == []
+    simple = [o for o in corpus["orders"] if not o.get("needs_llm")]
+    assert handled >= len(simple) * 0.8
+
+    bench.record("corpus orders", len(corpus["orders"]))
+    bench.record("fast-path hit rate", f"{handled / len(corpus['orders']):.0%}")
+    bench.record("agreement with expected parse", f"{agreed}/{handled}")
+    bench.record_time("mean parse", sum(timings) / len(timings))
+    bench.record_time("build matcher", bench.measure(lambda: FastOrderParser.build(menu.version.id)))
@@ -0,0 +1,99 @@
+"""
+Verbose vs compact menu encoding on the large (~100 item) fixture menu:
+prompt tokens for the full menu and per corpus order (after retrieval
+pruning), and the local cost of a parse in each format.
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated
+as words plus punctuation marks, which tracks BPE counts closely for menu
+text. Without a live model, parse latency covers everything OrderService
+does around the model call (context, short ID translation, pricing); the
+model stub answers with the corpus's expected parse in the format's IDs, and
+every parse must price back to exactly the expected lines.
+"""
+
+import re
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.corpus import build_corpus_menu, load_order_corpus
+from orders.llm.base import ParsedOrder
+from orders.llm.compact_menu import CompactMenu
+from orders.llm.menu_context import build_menu_context, with_header
+from orders.services import OrderService
+
+try:
+    import tiktoken
+except ImportError:  # optional; estimate instead
+    tiktoken = None
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    if tiktoken is not None:
+        return len(tiktoken.get_encoding("o200k_base").encode(text))
+    return len(_TOKEN_RE.findall(text))
+
+
+def to_short_ids(menu: CompactMenu, parsed: ParsedOrder) -> ParsedOrder:
+    """Inverse of CompactMenu.to_db(): what a model reading the compact menu answers."""
+    numbers = {row.item_id: (number, row) for number, row in enumerate(menu.rows, start=1)}
+    items = []
+    for item in parsed.items:
+        number, row = numbers[item.menu_item_id]
+        items.append(
+            item.model_copy(
+                update={
+                    "menu_item_id": number,
+                    "variant_id": row.variant_ids.index(item.variant_id) + 1,
+                    "modifier_ids": [row.modifier_ids.index(m) + 1 for m in item.modifier_ids],
+                }
+            )
+        )
+    return parsed.model_copy(update={"items": items})
+
+
+@pytest.fixture
+def large_corpus_menu(db, settings):
+    settings.ORDER_FAST_PATH_ENABLED = False
+    corpus = load_order_corpus()
+    return corpus, build_corpus_menu(corpus, large=True)
+
+
+@pytest.mark.parametrize("menu_format", ["verbose", "compact"])
+def test_menu_format_tokens_and_parse_latency(large_corpus_menu, menu_format, settings, bench):
+    settings.ORDER_MENU_FORMAT = menu_format
+    corpus, menu = large_corpus_menu
+    restaurant = menu.restaurant
+    compact = CompactMenu.build(menu.version.id)
+    full = with_header(restaurant, compact.render()) if menu_format == "compact" else build_menu_context(restaurant)
+
+    prompts = []
+    mismatches = []
+
+    def answer(**kwargs):
+        prompts.append(kwargs["menu_context"])
+        return answer.parsed
+
+    with patch("orders.services.OrderParsingAgent.run", side_effect=answer):
+        for i, order in enumerate(corpus["orders"]):
+            expected = menu.expected_order(order)
+            answer.parsed = to_short_ids(compact, expected) if menu_format == "compact" else expected
+            # A unique suffix keeps the parse cache from answering.
+            result = OrderService.parse_order(restaurant, f"{order['text']} #{i}")
+            priced = [(line["menu_item_id"], line["variant"]["id"], line["quantity"]) for line in result["items"]]
+            if priced != [(item.menu_item_id, item.variant_id, item.quantity) for item in expected.items]:
+                mismatches.append(order["text"])
+
+        answer.parsed = ParsedOrder(items=[])
+        latency = bench.measure(lambda: OrderService.parse_order(restaurant, "2 large lattes with oat milk"), repeat=20)
+
+    assert mismatches == []
+    mean_tokens = sum(count_tokens(p) for p in prompts) / len(prompts)
+
+    bench.record("token counter", "tiktoken o200k_base" if tiktoken else "estimated")
+    bench.record("full menu tokens", count_tokens(full))
+    bench.record("mean prompt menu tokens", round(mean_tokens))
+    bench.record("full menu chars", len(full))
+    bench.record_time("parse latency (model excluded)", latency)
@@ -0,0 +1,113 @@
+"""
+Menu photo preprocessing (restaurants.llm.image_preprocessing) on rendered
+fixture menus: a 12MP phone photo stored sideways with an EXIF orientation,
+and a tall scrolled screenshot of a long menu.
+
+Without a live model, the benchmark records what drives vision latency and
+accuracy instead: the base64 payload sent to the provider, the image tokens
+it bills (OpenAI's high-detail tiling), the local preprocessing time, and
+the height of a text line in the image the model actually reads, after the
+provider's own downscaling. Tiling a tall page trades more image tokens for
+legible text.
+"""
+
+import base64
+import io
+import math
+import random
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from restaurants.llm.image_preprocessing import PreprocessOptions, effective_size, preprocess_image
+
+FONT_SIZE = 40
+
+
+def render_menu(width: int, height: int) -> Image.Image:
+    """A page of "Dish name ..... 12.50" lines, FONT_SIZE pixels high."""
+    rng = random.Random(7)
+    image = Image.new("RGB", (width, height), (245, 240, 228))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=FONT_SIZE)
+    for top in range(FONT_SIZE, height - FONT_SIZE, FONT_SIZE * 2):
+        name = " ".join(rng.choice(["Grilled", "Spicy", "Lamb", "Paneer", "Tikka", "Naan", "Soup"]) for _ in range(3))
+        draw.text((FONT_SIZE, top), name, fill=(30, 25, 20), font=font)
+        draw.text((width - FONT_SIZE * 5, top), f"{rng.randint(3, 30)}.{rng.choice(['00', '50', '95'])}", font=font)
+    return image
+
+
+def phone_photo() -> bytes:
+    """4032x3024 JPEG with sensor noise, stored rotated with EXIF orientation 6."""
+    page = render_menu(3024, 4032)
+    noise = Image.effect_noise(page.size, 24).convert("RGB")
+    page = Image.blend(page, noise, 0.12).rotate(90, expand=True)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    page.save(buffer, "JPEG", quality=92, exif=exif)
+    return buffer.getvalue()
+
+
+def tall_screenshot() -> bytes:
+    buffer = io.BytesIO()
+    render_menu(1080, 9000).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def vision_tokens(width: int, height: int) -> int:
+    """OpenAI high-detail image tokens: 85 plus 170 per 512px tile of the effective size."""
+    width, height = effective_size(width, height)
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def text_height(width: int, height: int, source_width: int) -> float:
+    """
+    Height of a FONT_SIZE text line of a source_width wide page in a
+    width x height image, once the provider has scaled that image.
+    """
+    return FONT_SIZE * effective_size(width, height)[0] / source_width
+
+
+def payload(images: list[bytes]) -> int:
+    return sum(len(base64.b64encode(image)) for image in images)
+
+
+@pytest.mark.parametrize(
+    "fixture, options",
+    [
+        (phone_photo, PreprocessOptions()),
+        (phone_photo, PreprocessOptions(format="webp", grayscale=True)),
+        (tall_screenshot, PreprocessOptions()),
+        (tall_screenshot, PreprocessOptions(tile_tall=False)),
+    ],
+    ids=["photo-jpeg", "photo-webp-gray", "tall-tiled", "tall-untiled"],
+)
+def test_menu_image_preprocessing(fixture, options, bench):
+    data = fixture()
+    with Image.open(io.BytesIO(data)) as original:
+        size = ImageOps.exif_transpose(original).size
+    source_width = size[0]
+
+    segments = preprocess_image(data, options)
+    out = [Image.open(io.BytesIO(segment)) for segment in segments]
+
+    text_before = text_height(*size, source_width)
+    text_after = min(text_height(*image.size, source_width) for image in out)
+    # Every processed image is already at the provider's effective resolution.
+    assert all(effective_size(*image.size) == image.size for image in out)
+    if fixture is phone_photo:
+        assert out[0].height > out[0].width  # upright
+        assert payload(segments) * 5 < payload([data])
+    if options.tile_tall and fixture is tall_screenshot:
+        assert len(segments) > 1
+        assert text_after >= 2 * text_before
+
+    bench.record("payload before", f"{payload([data]) / 1024:.0f} KiB")
+    bench.record("payload after", f"{payload(segments) / 1024:.0f} KiB")
+    bench.record("images sent", len(segments))
+    bench.record("vision tokens before", vision_tokens(*size))
+    bench.record("vision tokens after", sum(vision_tokens(*image.size) for image in out))
+    bench.record("text px before", f"{text_before:.1f}")
+    bench.record("text px after", f"{text_after:.1f}")
+    bench.record_time("preprocess median", bench.measure(lambda: preprocess_image(data, options), repeat=3))
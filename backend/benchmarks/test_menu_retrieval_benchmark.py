@@ -0,0 +1,61 @@
+"""
+Retrieval-pruned menu context on a large (~100 item) fixture menu: prompt
+size against the full menu, and whether every ID the expected parse needs is
+still in the pruned context. Without a live model, "parse accuracy" is that
+upper bound: a parse the model cannot express from its prompt is a miss.
+"""
+
+import re
+
+import pytest
+
+from benchmarks.corpus import build_corpus_menu, load_order_corpus
+from orders.llm.menu_context import get_menu_context
+from orders.llm.menu_retrieval import PRUNED_NOTE, MenuRetrievalIndex, get_relevant_menu_context
+
+_ID_RE = re.compile(r"\((?:item|variant|modifier)_id: (\d+)\)")
+
+
+def _ids(context: str) -> set[int]:
+    return {int(i) for i in _ID_RE.findall(context)}
+
+
+@pytest.mark.django_db
+def test_pruned_context_size_and_recall(bench, settings):
+    settings.LLM_PROMPT_CACHE_ENABLED = False  # retrieval only prunes without prompt caching
+    corpus = load_order_corpus()
+    menu = build_corpus_menu(corpus, large=True)
+    restaurant = menu.restaurant
+    full = get_menu_context(restaurant)
+
+    pruned = recalled = 0
+    sizes = []
+    misses = []
+    for order in corpus["orders"]:
+        context = get_relevant_menu_context(restaurant, order["text"])
+        sizes.append(len(context))
+        pruned += PRUNED_NOTE in context
+
+        expected = menu.expected_order(order)
+        needed = set()
+        for item in expected.items:
+            needed |= {item.menu_item_id, item.variant_id, *item.modifier_ids}
+        if needed <= _ids(context):
+            recalled += 1
+        else:
+            misses.append(order["text"])
+
+    assert misses == []
+    mean_size = sum(sizes) / len(sizes)
+    assert mean_size < len(full) * 0.5
+
+    bench.record("menu items", len(menu.items))
+    bench.record("full context chars", len(full))
+    bench.record("mean prompt context chars", round(mean_size))
+    bench.record("prompt size reduction", f"{1 - mean_size / len(full):.0%}")
+    bench.record("pruned / full-menu fallback", f"{pruned}/{len(sizes) - pruned}")
+    bench.record("expected parse expressible", f"{recalled}/{len(sizes)}")
+    bench.record_time("build index", bench.measure(lambda: MenuRetrievalIndex.build(menu.version.id)))
+    bench.record_time(
+        "select + render", bench.measure(lambda: get_relevant_menu_context(restaurant, "2 large lattes with oat milk"))
+    )
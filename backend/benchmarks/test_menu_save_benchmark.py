@@ -0,0 +1,110 @@
+"""
+Saving a parsed menu: MenuUploadService.save_menu's bulk INSERTs vs. the
+per-row create() calls they replaced. The row-by-row reference below is the
+previous implementation, kept here to prove both paths write the same menu.
+
+Menus have 25 items per category and two variants per item. Timings are
+against the test database (SQLite in memory unless configured otherwise),
+so they understate the cost of a round trip to a real database server.
+SQLite caps the parameters of one statement, so there the bulk INSERTs are
+split into chunks of a few hundred rows; PostgreSQL takes
+BULK_CREATE_BATCH_SIZE rows per INSERT.
+"""
+
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from restaurants.llm.schemas import ParsedMenu, ParsedMenuCategory, ParsedMenuItem, ParsedMenuVariant
+from restaurants.models import MenuCategory, MenuItem, MenuItemVariant, MenuVersion
+from restaurants.services.menu_upload_service import MenuUploadService
+from restaurants.tests.factories import RestaurantFactory
+
+ITEMS_PER_CATEGORY = 25
+
+
+@transaction.atomic
+def row_by_row_save_menu(restaurant, parsed_menu: ParsedMenu, version_name: str) -> MenuVersion:
+    new_version = MenuVersion.objects.create(
+        restaurant=restaurant, name=version_name, source=MenuVersion.Source.AI_UPLOAD, is_active=False
+    )
+    for parsed_category in parsed_menu.categories:
+        category = MenuCategory.objects.create(version=new_version, name=parsed_category.name, sort_order=0)
+        for sort_idx, parsed_item in enumerate(parsed_category.items):
+            item = MenuItem.objects.create(
+                category=category,
+                name=parsed_item.name,
+                description=parsed_item.description or "",
+                sort_order=sort_idx,
+            )
+            for variant in parsed_item.variants:
+                MenuItemVariant.objects.create(
+                    menu_item=item, label=variant.label, price=variant.price, is_default=False
+                )
+    return new_version
+
+
+def _menu(size: int) -> ParsedMenu:
+    return ParsedMenu(
+        categories=[
+            ParsedMenuCategory(
+                name=f"Category {c}",
+                items=[
+                    ParsedMenuItem(
+                        name=f"Item {c}-{i}",
+                        description=f"Description of item {i}" if i % 2 else None,
+                        variants=[
+                            ParsedMenuVariant(label="Regular", price=Decimal(f"{i}.50")),
+                            ParsedMenuVariant(label="Large", price=Decimal(f"{i + 2}.50")),
+                        ],
+                    )
+                    for i in range(ITEMS_PER_CATEGORY)
+                ],
+            )
+            for c in range(size // ITEMS_PER_CATEGORY)
+        ]
+    )
+
+
+def _snapshot(version: MenuVersion) -> list:
+    return [
+        (
+            category.name,
+            category.sort_order,
+            [
+                (item.name, item.description, item.sort_order, [(v.label, v.price) for v in item.variants.all()])
+                for item in category.items.all()
+            ],
+        )
+        for category in version.categories.order_by("id").prefetch_related("items__variants")
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [50, 200, 500, 2000])
+def test_bulk_save_vs_row_by_row(size, bench):
+    restaurant = RestaurantFactory()
+    parsed = _menu(size)
+    runs = iter(range(1_000))
+
+    def save_rows():
+        return row_by_row_save_menu(restaurant, parsed, f"Rows {next(runs)}")
+
+    def save_bulk():
+        return MenuUploadService.save_menu(restaurant, parsed, version_name=f"Bulk {next(runs)}")
+
+    with CaptureQueriesContext(connection) as row_queries:
+        expected = save_rows()
+    with CaptureQueriesContext(connection) as bulk_queries:
+        saved = save_bulk()
+    assert _snapshot(saved) == _snapshot(expected)
+    assert len(row_queries) >= 3 * size  # one INSERT per item and per variant
+    assert len(bulk_queries) * 20 < len(row_queries)
+
+    bench.record("items", size)
+    bench.record("row-by-row queries", len(row_queries))
+    bench.record("bulk queries", len(bulk_queries))
+    bench.record_time("row-by-row median", bench.measure(save_rows, repeat=3))
+    bench.record_time("bulk median", bench.measure(save_bulk, repeat=3))
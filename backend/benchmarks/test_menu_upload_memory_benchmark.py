@@ -0,0 +1,102 @@
+"""
+Memory held by the worker while a menu upload is parsed: images read into
+memory with f.read(), as the upload views used to, vs. spooled to disk
+(restaurants.llm.image_spool) and decoded from their files by the
+preprocessing processes.
+
+Uploads are 12MP phone photos, already in Django's temporary upload files
+as TemporaryFileUploadHandler leaves them. Peaks are Python allocations of
+the worker process (tracemalloc), across the request and executor threads;
+decoding in the preprocessing processes is not counted for either path.
+The model is mocked, so only ingestion and preprocessing run.
+"""
+
+import io
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image
+
+from restaurants.llm.image_spool import spool_uploads
+from restaurants.llm.schemas import ParsedMenuCategory, ParsedMenuItem, ParsedMenuPage, ParsedMenuVariant
+from restaurants.services.menu_upload_service import MenuUploadService
+
+MB = 1024 * 1024
+
+PAGE = ParsedMenuPage(
+    categories=[
+        ParsedMenuCategory(
+            name="Mains", items=[ParsedMenuItem(name="Burger", variants=[ParsedMenuVariant(label="Regular", price=12)])]
+        )
+    ]
+)
+
+
+@pytest.fixture(scope="module")
+def photo() -> bytes:
+    image = Image.blend(
+        Image.new("RGB", (4032, 3024), "white"), Image.effect_noise((4032, 3024), 40).convert("RGB"), 0.3
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def _uploads(photo: bytes, count: int) -> list[TemporaryUploadedFile]:
+    uploads = []
+    for n in range(count):
+        upload = TemporaryUploadedFile(f"page{n}.jpg", "image/jpeg", len(photo), None)
+        upload.write(photo)
+        upload.write(n.to_bytes(4, "big"))  # after the JPEG's end, so every page is distinct
+        upload.flush()
+        uploads.append(upload)
+    return uploads
+
+
+def _peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("count", [1, 5, 10])
+def test_read_all_vs_spooled_upload_memory(count, photo, settings, bench):
+    settings.MENU_PAGE_CACHE_ENABLED = False
+    settings.MENU_IMAGE_WORKERS = 2
+    uploads = _uploads(photo, count)
+
+    def read_all():
+        for upload in uploads:
+            upload.seek(0)
+        MenuUploadService.parse_images([upload.read() for upload in uploads])
+
+    def spooled():
+        with spool_uploads(uploads) as images:
+            MenuUploadService.parse_images(images)
+
+    calls = []
+
+    def parse(image_data):
+        calls.append(len(image_data))  # not the image itself, as a Mock would keep it
+        return PAGE
+
+    with patch("restaurants.services.menu_upload_service.MenuParsingAgent.run", parse):
+        spooled()  # starts the preprocessing processes outside the measurements
+        read_all_peak = _peak(read_all)
+        spooled_peak = _peak(spooled)
+    for upload in uploads:
+        upload.close()
+
+    assert len(calls) == 3 * count
+    assert read_all_peak >= count * len(photo)
+    assert spooled_peak < len(photo) / 2  # not even one upload is held, whatever the count
+
+    bench.record("images", count)
+    bench.record("upload size", f"{count * len(photo) / MB:.1f} MB")
+    bench.record("read-all peak", f"{read_all_peak / MB:.1f} MB")
+    bench.record("spooled peak", f"{spooled_peak / MB:.1f} MB")
@@ -0,0 +1,112 @@
+"""
+Cart validation: in-memory MenuPriceIndex vs. the per-line ORM lookups it
+replaced. The ORM reference below is the previous implementation of
+OrderService.validate_and_price_order, kept here to prove both paths price
+bit-for-bit identically.
+"""
+
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.services import OrderService
+from restaurants.models import MenuItem, MenuItemModifier, MenuItemVariant
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+
+def orm_validate_and_price_order(restaurant, parsed: ParsedOrder) -> dict:
+    validated_items = []
+    total_price = Decimal("0.00")
+    for parsed_item in parsed.items:
+        try:
+            menu_item = MenuItem.objects.get(
+                id=parsed_item.menu_item_id,
+                category__version__restaurant=restaurant,
+                is_active=True,
+            )
+            variant = MenuItemVariant.objects.get(id=parsed_item.variant_id, menu_item=menu_item)
+        except (MenuItem.DoesNotExist, MenuItemVariant.DoesNotExist):
+            continue
+        valid_modifiers = []
+        for mod_id in parsed_item.modifier_ids:
+            try:
+                modifier = MenuItemModifier.objects.get(id=mod_id, menu_item=menu_item)
+                valid_modifiers.append(
+                    {"id": modifier.id, "name": modifier.name, "price_adjustment": str(modifier.price_adjustment)}
+                )
+            except MenuItemModifier.DoesNotExist:
+                continue
+        item_price = variant.price * parsed_item.quantity
+        modifier_total = sum(Decimal(m["price_adjustment"]) for m in valid_modifiers) * parsed_item.quantity
+        line_total = item_price + modifier_total
+        total_price += line_total
+        validated_items.append(
+            {
+                "menu_item_id": menu_item.id,
+                "name": menu_item.name,
+                "variant": {"id": variant.id, "label": variant.label, "price": str(variant.price)},
+                "quantity": parsed_item.quantity,
+                "modifiers": valid_modifiers,
+                "special_requests": parsed_item.special_requests,
+                "line_total": str(line_total),
+            }
+        )
+    return {
+        "items": validated_items,
+        "allergies": parsed.allergies,
+        "total_price": str(total_price),
+        "language": parsed.language,
+    }
+
+
+@pytest.fixture
+def cart(db):
+    restaurant = RestaurantFactory()
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    lines = []
+    for c in range(5):
+        cat = MenuCategoryFactory(version=version)
+        for i in range(20):
+            item = MenuItemFactory(category=cat)
+            variants = [MenuItemVariantFactory(menu_item=item) for _ in range(2)]
+            modifiers = [MenuItemModifierFactory(menu_item=item) for _ in range(3)]
+            if i % 10 == 0:
+                lines.append(
+                    ParsedOrderItem(
+                        menu_item_id=item.id,
+                        variant_id=variants[-1].id,
+                        quantity=c + 1,
+                        modifier_ids=[m.id for m in modifiers[:2]] + [0],
+                    )
+                )
+    return restaurant, ParsedOrder(items=lines)
+
+
+@pytest.mark.django_db
+def test_price_index_vs_orm(cart, bench):
+    restaurant, parsed = cart
+    assert len(parsed.items) == 10
+
+    expected = orm_validate_and_price_order(restaurant, parsed)
+    assert OrderService.validate_and_price_order(restaurant, parsed) == expected
+
+    with CaptureQueriesContext(connection) as orm_queries:
+        orm_validate_and_price_order(restaurant, parsed)
+    with CaptureQueriesContext(connection) as index_queries:
+        OrderService.validate_and_price_order(restaurant, parsed)
+    assert len(index_queries) == 0
+
+    bench.record("orm queries / cart", len(orm_queries))
+    bench.record("index queries / cart", len(index_queries))
+    bench.record_time("orm median", bench.measure(lambda: orm_validate_and_price_order(restaurant, parsed)))
+    bench.record_time("index median", bench.measure(lambda: OrderService.validate_and_price_order(restaurant, parsed)))
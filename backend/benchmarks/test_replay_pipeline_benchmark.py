@@ -0,0 +1,191 @@
+"""
+End-to-end parse pipelines against recorded model responses.
+
+Every model resolves to ai.replay.ReplayModel (LLM_REPLAY_RECORDINGS), which
+serves recorded structured output after a latency sampled from the
+recording's distribution. Recorded latencies are realistic provider
+latencies; REPLAY_LATENCY_SCALE shrinks them so the suite stays fast, and
+the fixed seed makes the sampled latencies the same on every run. No
+request leaves the machine.
+
+Each benchmark reports the time per stage:
+
+    menu build         menu context for the prompt (OrderService) or the
+                       serialized pages (MenuMergeAgent)
+    merge              MenuUploadService.merge_pages(), the local page merge
+    LLM                time inside the model, i.e. the scaled recorded latency
+    schema validation  parsing the model's JSON into the output schema
+    validation         matching a ParsedOrder against the menu and pricing it
+    DB                 database queries, wherever they run
+    save               the rest of MenuUploadService.save_menu()
+    agent              the rest of the agent run (prompt assembly, agno)
+
+Order parsing against the ~30 item corpus menu must price every corpus
+order exactly and stay within a per-order query budget.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from agno.agent import _response as agno_response
+
+from ai.replay import ReplayModel
+from benchmarks.corpus import build_corpus_menu, load_order_corpus
+from orders.llm.agent import OrderParsingAgent
+from orders.services import OrderService
+from restaurants.llm.local_merge import MenuMerge, merge_menu_pages
+from restaurants.llm.merge_agent import MenuMergeAgent
+from restaurants.llm.parse_agent import MenuParsingAgent
+from restaurants.llm.schemas import ParsedMenuPage
+from restaurants.services.menu_upload_service import MenuUploadService
+from restaurants.tests.factories import RestaurantFactory
+
+RECORDINGS_PATH = Path(__file__).parent / "fixtures" / "menu_upload_recordings.json"
+REPLAY_LATENCY_SCALE = 0.002
+ORDER_PARSE_LATENCY = {"median_ms": 900, "p95_ms": 2500}
+MAX_QUERIES_PER_ORDER = 1
+
+
+@pytest.fixture
+def replay(settings, monkeypatch):
+    # agno reports every run to its API by default; keep the benchmark offline.
+    monkeypatch.setenv("AGNO_TELEMETRY", "false")
+    settings.LLM_MODEL = ""
+    settings.LLM_HEDGING_ENABLED = False
+    settings.LLM_METRICS_SINKS = []
+    settings.LLM_REPLAY_LATENCY_SCALE = REPLAY_LATENCY_SCALE
+    settings.LLM_REPLAY_SEED = 13
+
+    def use(path: Path) -> None:
+        settings.LLM_REPLAY_RECORDINGS = str(path)
+
+    return use
+
+
+def time_agent_stages(stages) -> None:
+    stages.time(ReplayModel, "invoke", "LLM")
+    stages.time(agno_response, "parse_response_model_str", "schema validation")
+    stages.time_queries()
+
+
+def load_recorded_pages() -> list[ParsedMenuPage]:
+    recordings = json.loads(RECORDINGS_PATH.read_text())["recordings"]
+    return [ParsedMenuPage.model_validate(r["response"]) for r in recordings if r["schema"] == "ParsedMenuPage"]
+
+
+def test_parse_order_stages(db, settings, tmp_path, replay, stages, bench):
+    settings.ORDER_FAST_PATH_ENABLED = False
+    corpus = load_order_corpus()
+    menu = build_corpus_menu(corpus)
+
+    # Record the parse a correct model returns for each corpus order.
+    recordings = [
+        {
+            "schema": "ParsedOrder",
+            "match": order["text"],
+            "latency": ORDER_PARSE_LATENCY,
+            "response": menu.expected_order(order).model_dump(mode="json"),
+        }
+        for order in corpus["orders"]
+    ]
+    path = tmp_path / "order_recordings.json"
+    path.write_text(json.dumps({"recordings": recordings}))
+    replay(path)
+
+    stages.time(OrderService, "_llm_menu_context", "menu build")
+    stages.time(OrderParsingAgent, "run", "agent")
+    stages.time(OrderService, "validate_and_price_order", "validation")
+    time_agent_stages(stages)
+
+    mismatches = []
+    for i, order in enumerate(corpus["orders"]):
+        expected = menu.expected_order(order)
+        # A unique suffix keeps the parse cache from answering.
+        result = OrderService.parse_order(menu.restaurant, f"{order['text']} #{i}")
+        priced = [(line["menu_item_id"], line["variant"]["id"], line["quantity"]) for line in result["items"]]
+        if priced != [(item.menu_item_id, item.variant_id, item.quantity) for item in expected.items]:
+            mismatches.append(order["text"])
+
+    orders = len(corpus["orders"])
+    assert mismatches == []
+    assert stages.calls["LLM"] == orders
+    assert stages.calls["DB"] <= MAX_QUERIES_PER_ORDER * orders
+
+    bench.record("orders", orders)
+    bench.record("queries per order", round(stages.calls["DB"] / orders, 1))
+    stages.record(bench, runs=orders)
+
+
+def test_menu_upload_parse_images_stages(db, settings, replay, stages, bench):
+    replay(RECORDINGS_PATH)
+    settings.MENU_PAGE_CACHE_ENABLED = False  # every run parses every page
+    restaurant = RestaurantFactory()
+    images = [b"page-1", b"page-2", b"page-3"]
+
+    stages.time(MenuParsingAgent, "run", "agent")
+    stages.time(MenuUploadService, "merge_pages", "merge")
+    stages.time(MenuUploadService, "save_menu", "save")
+    time_agent_stages(stages)
+
+    runs = 3
+    wall = bench.measure(lambda: MenuUploadService.parse_images(images), repeat=runs)
+    parsed = MenuUploadService.parse_images(images)
+    version = MenuUploadService.save_menu(restaurant, parsed.menu)
+
+    expected_items = {item["name"] for category in load_order_corpus()["menu"] for item in category["items"]}
+    saved_items = {item.name for category in version.categories.all() for item in category.items.all()}
+    assert saved_items == expected_items
+    assert stages.calls["LLM"] == (runs + 1) * len(images)  # pages merge locally
+
+    bench.record_time("parse_images wall time", wall)
+    stages.record(bench, runs=runs + 1)
+
+
+def test_menu_reupload_stages(db, settings, replay, stages, bench):
+    """The same photos uploaded again: pages come from the page cache, no model call at all."""
+    replay(RECORDINGS_PATH)
+    settings.MENU_PAGE_CACHE_ENABLED = True
+    images = [b"page-1", b"page-2", b"page-3"]
+    time_agent_stages(stages)
+
+    first = bench.measure(lambda: MenuUploadService.parse_images(images), repeat=1)
+    llm_calls = stages.calls["LLM"]
+    again = bench.measure(lambda: MenuUploadService.parse_images(images), repeat=1)
+    parsed = MenuUploadService.parse_images(images)
+
+    assert parsed.cached_pages == [0, 1, 2]
+    assert stages.calls["LLM"] == llm_calls
+
+    bench.record_time("first upload wall time", first)
+    bench.record_time("re-upload wall time", again)
+
+
+def test_menu_merge_stages(db, replay, stages, bench):
+    replay(RECORDINGS_PATH)
+    pages = load_recorded_pages()
+
+    stages.time(MenuMergeAgent, "get_context", "menu build")
+    stages.time(MenuMergeAgent, "run", "agent")
+    time_agent_stages(stages)
+
+    runs = 5
+    wall = bench.measure(lambda: MenuMergeAgent.run(pages=pages), repeat=runs)
+    merged = MenuMergeAgent.run(pages=pages)
+
+    assert [category.name for category in merged.categories] == [
+        "Burgers",
+        "Pizza",
+        "Salads",
+        "Sides",
+        "Drinks",
+        "Desserts",
+    ]
+    assert stages.calls["LLM"] == runs + 1
+    # The local merge gives exactly the recorded model merge, without the round trip.
+    assert merge_menu_pages(pages) == MenuMerge(menu=merged, conflicts=[])
+
+    bench.record("pages", len(pages))
+    bench.record_time("merge wall time", wall)
+    bench.record_time("local merge wall time", bench.measure(lambda: merge_menu_pages(pages), repeat=runs))
+    stages.record(bench, runs=runs + 1)
@@ -7,11 +7,12 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django_asgi_app = get_asgi_application()
 
 from orders.middleware import JwtAuthMiddleware  # noqa: E402
-from orders.routing import websocket_urlpatterns  # noqa: E402
+from orders.routing import websocket_urlpatterns as order_websocket_urlpatterns  # noqa: E402
+from restaurants.routing import websocket_urlpatterns as restaurant_websocket_urlpatterns  # noqa: E402
 
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
-        "websocket": JwtAuthMiddleware(URLRouter(websocket_urlpatterns)),
+        "websocket": JwtAuthMiddleware(URLRouter(order_websocket_urlpatterns + restaurant_websocket_urlpatterns)),
     }
 )
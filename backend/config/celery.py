@@ -13,4 +13,8 @@ app.conf.beat_schedule = {
         "task": "restaurants.tasks.process_daily_payouts",
         "schedule": crontab(hour=2, minute=0),
     },
+    "cleanup-menu-upload-jobs": {
+        "task": "restaurants.tasks.cleanup_menu_upload_jobs",
+        "schedule": crontab(minute="*/10"),
+    },
 }
@@ -1,7 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -121,6 +121,17 @@ CHANNEL_LAYERS = {
     },
 }
 
+# ---------------------------------------------------------------------------
+# Cache (shared by web and worker processes)
+# ---------------------------------------------------------------------------
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("REDIS_URL", default="redis://localhost:6379/0"),
+        "KEY_PREFIX": "aiqr",
+    },
+}
+
 # ---------------------------------------------------------------------------
 # Stripe
 # ---------------------------------------------------------------------------
@@ -143,6 +154,7 @@ SUBSCRIPTION_PLANS = {
         "order_limit": 200,
         "overage_rate_cents": 20,  # $0.20
         "monthly_price_id": STRIPE_PRICE_STARTER_MONTHLY,
+        "llm_concurrency": 3,  # concurrent LLM requests (see ai.limiter)
         # "annual_price_id": STRIPE_PRICE_STARTER_ANNUAL,
     },
     "growth": {
@@ -150,6 +162,7 @@ SUBSCRIPTION_PLANS = {
         "order_limit": 600,
         "overage_rate_cents": 15,  # $0.15
         "monthly_price_id": STRIPE_PRICE_GROWTH_MONTHLY,
+        "llm_concurrency": 6,  # concurrent LLM requests (see ai.limiter)
         # "annual_price_id": STRIPE_PRICE_GROWTH_ANNUAL,
     },
     "pro": {
@@ -157,6 +170,7 @@ SUBSCRIPTION_PLANS = {
         "order_limit": 1500,
         "overage_rate_cents": 10,  # $0.10
         "monthly_price_id": STRIPE_PRICE_PRO_MONTHLY,
+        "llm_concurrency": 12,  # concurrent LLM requests (see ai.limiter)
         # "annual_price_id": STRIPE_PRICE_PRO_ANNUAL,
     },
 }
@@ -254,6 +268,74 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 OPENAI_API_KEY = config("OPENAI_API_KEY", default="")
 ANTHROPIC_API_KEY = config("ANTHROPIC_API_KEY", default="")
 LLM_MODEL = config("LLM_MODEL", default="")
+# Try the deterministic menu matcher before calling the LLM for order parsing.
+ORDER_FAST_PATH_ENABLED = config("ORDER_FAST_PATH_ENABLED", default=True, cast=bool)
+# Send only the menu items relevant to the order text when the menu is large.
+# Only applies with LLM_PROMPT_CACHE_ENABLED off: a pruned menu differs per order and defeats the prompt cache.
+ORDER_MENU_RETRIEVAL_ENABLED = config("ORDER_MENU_RETRIEVAL_ENABLED", default=True, cast=bool)
+# Menu encoding sent to the order parsing LLM: "verbose" or "compact" (see orders.llm.compact_menu).
+ORDER_MENU_FORMAT = config("ORDER_MENU_FORMAT", default="verbose")
+# Serve order parsing and payment confirmation from async views (ASGI only).
+ORDER_ASYNC_VIEWS = config("ORDER_ASYNC_VIEWS", default=False, cast=bool)
+# Send a second request to LLM_HEDGE_MODEL when an agent's primary model is slow or fails.
+LLM_HEDGING_ENABLED = config("LLM_HEDGING_ENABLED", default=False, cast=bool)
+LLM_HEDGE_MODEL = config("LLM_HEDGE_MODEL", default="")
+# Per-agent hedge budgets in seconds, e.g. "OrderParsingAgent=3.5,MenuMergeAgent=20".
+LLM_HEDGE_BUDGETS = {
+    name.strip(): float(seconds)
+    for name, seconds in (entry.split("=") for entry in config("LLM_HEDGE_BUDGETS", default="", cast=Csv()))
+}
+# Mark stable system prompts (instructions + menu) with Anthropic cache_control, and send
+# the full menu so it stays in the cached prefix (this turns ORDER_MENU_RETRIEVAL_ENABLED off).
+LLM_PROMPT_CACHE_ENABLED = config("LLM_PROMPT_CACHE_ENABLED", default=True, cast=bool)
+# Where per-call LLM metrics go: any of "log", "memory", "prometheus" (see ai.metrics).
+LLM_METRICS_SINKS = config("LLM_METRICS_SINKS", default="log", cast=Csv())
+# Calls kept by the "memory" sink for the admin metrics endpoint.
+LLM_METRICS_BUFFER_SIZE = config("LLM_METRICS_BUFFER_SIZE", default=500, cast=int)
+# Concurrent LLM requests across all restaurants, and per restaurant without a plan
+# (plans set their own llm_concurrency in SUBSCRIPTION_PLANS); 0 means unlimited. See ai.limiter.
+LLM_CONCURRENCY_LIMITS_ENABLED = config("LLM_CONCURRENCY_LIMITS_ENABLED", default=True, cast=bool)
+LLM_GLOBAL_CONCURRENCY = config("LLM_GLOBAL_CONCURRENCY", default=64, cast=int)
+LLM_RESTAURANT_CONCURRENCY = config("LLM_RESTAURANT_CONCURRENCY", default=3, cast=int)
+# Seconds a request may queue for a free slot before it gets a 429/503, and the Retry-After sent with it.
+LLM_CONCURRENCY_MAX_WAIT = config("LLM_CONCURRENCY_MAX_WAIT", default=2.0, cast=float)
+LLM_CONCURRENCY_RETRY_AFTER = config("LLM_CONCURRENCY_RETRY_AFTER", default=2, cast=int)
+# Seconds after which a slot that was never given back (crashed worker) is reclaimed.
+LLM_CONCURRENCY_LEASE = config("LLM_CONCURRENCY_LEASE", default=180, cast=float)
+# Where slots are kept: "redis" (shared by all workers) or "local" (this process only).
+LLM_CONCURRENCY_BACKEND = config("LLM_CONCURRENCY_BACKEND", default="redis")
+# Serve every model from a recordings file instead of the providers (see ai.replay); benchmarks only.
+LLM_REPLAY_RECORDINGS = config("LLM_REPLAY_RECORDINGS", default="")
+# Multiplier for recorded latencies, and the seed they are sampled with.
+LLM_REPLAY_LATENCY_SCALE = config("LLM_REPLAY_LATENCY_SCALE", default=1.0, cast=float)
+LLM_REPLAY_SEED = config("LLM_REPLAY_SEED", default=0, cast=int)
+# Shrink, straighten and re-encode menu photos before vision parsing (see restaurants.llm.image_preprocessing).
+MENU_IMAGE_PREPROCESSING_ENABLED = config("MENU_IMAGE_PREPROCESSING_ENABLED", default=True, cast=bool)
+# Encoding sent to the vision model: "jpeg" or "webp".
+MENU_IMAGE_FORMAT = config("MENU_IMAGE_FORMAT", default="jpeg")
+MENU_IMAGE_GRAYSCALE = config("MENU_IMAGE_GRAYSCALE", default=False, cast=bool)
+# Cut very tall menus into overlapping segments instead of letting the provider shrink them.
+MENU_IMAGE_TILE_TALL = config("MENU_IMAGE_TILE_TALL", default=True, cast=bool)
+# Processes preprocessing images; 0 preprocesses in the calling thread.
+MENU_IMAGE_WORKERS = config("MENU_IMAGE_WORKERS", default=2, cast=int)
+# Parsed menu pages cached by image content, so re-uploaded photos skip the vision call.
+MENU_PAGE_CACHE_ENABLED = config("MENU_PAGE_CACHE_ENABLED", default=True, cast=bool)
+MENU_PAGE_CACHE_TTL = config("MENU_PAGE_CACHE_TTL", default=60 * 60 * 24 * 7, cast=int)  # seconds
+MENU_PAGE_CACHE_MAX_BYTES = config("MENU_PAGE_CACHE_MAX_BYTES", default=256 * 1024, cast=int)
+# Pages are merged locally; when they disagree on a price, let MenuMergeAgent settle those items.
+MENU_MERGE_LLM_FALLBACK = config("MENU_MERGE_LLM_FALLBACK", default=False, cast=bool)
+# Threads per process that fan out LLM calls, shared by all uploads (see ai.executor).
+LLM_EXECUTOR_WORKERS = config("LLM_EXECUTOR_WORKERS", default=16, cast=int)
+# Seconds a menu page may take before it is retried once, and an upload before unfinished pages are dropped.
+MENU_PAGE_TIMEOUT = config("MENU_PAGE_TIMEOUT", default=60.0, cast=float)
+MENU_UPLOAD_DEADLINE = config("MENU_UPLOAD_DEADLINE", default=150.0, cast=float)
+# Seconds LLM requests in a named pool (llm_call_context(pool=...)) may queue for a slot, instead of
+# LLM_CONCURRENCY_MAX_WAIT. Menu upload pages have their own pool and queue as long as the upload may take.
+LLM_POOL_MAX_WAIT = {"menu_upload": MENU_UPLOAD_DEADLINE}
+# Seconds after which an unfinished menu upload job is failed, and a finished one deleted with its pages
+# (see restaurants.tasks.cleanup_menu_upload_jobs).
+MENU_UPLOAD_JOB_STALE_AFTER = config("MENU_UPLOAD_JOB_STALE_AFTER", default=15 * 60, cast=int)
+MENU_UPLOAD_JOB_RETENTION = config("MENU_UPLOAD_JOB_RETENTION", default=60 * 60 * 24 * 7, cast=int)
 
 # ---------------------------------------------------------------------------
 # Social Auth
@@ -7,4 +7,5 @@ urlpatterns = [
     path("api/", include("restaurants.urls")),
     path("api/", include("orders.urls")),
     path("api/", include("integrations.urls")),
+    path("api/", include("ai.urls")),
 ]
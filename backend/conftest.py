@@ -1,7 +1,26 @@
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
+from ai.limiter import llm_limiter
+
 
 @pytest.fixture
 def api_client():
     return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    """Run every test against an empty in-process cache instead of Redis."""
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def local_llm_limiter(settings):
+    """Keep LLM concurrency slots in process memory instead of Redis."""
+    settings.LLM_CONCURRENCY_BACKEND = "local"
+    llm_limiter.reset()
+    yield
+    llm_limiter.reset()
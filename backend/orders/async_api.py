@@ -0,0 +1,49 @@
+"""
+Minimal async counterpart of DRF's APIView for the public ordering API.
+
+DRF 3.15 views are synchronous, so under ASGI every request holds a worker
+thread until the view returns - including the whole LLM call for order
+parsing. AsyncAPIView is a plain Django async view that keeps DRF's
+request/response conventions for these public, unauthenticated endpoints:
+JSON bodies, serializer validation, and APIException -> JSON error
+responses in the same shape DRF's default exception handler produces.
+"""
+
+import json
+
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.renderers import JSONRenderer
+
+
+def api_response(data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    """Render data exactly like rest_framework.response.Response would."""
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type="application/json")
+
+
+class AsyncAPIView(View):
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True  # token-less public API, like DRF's APIView
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail
+            data = detail if isinstance(detail, (list, dict)) else {"detail": detail}
+            response = api_response(data, exc.status_code)
+            if getattr(exc, "wait", None):
+                response["Retry-After"] = str(int(exc.wait))
+            return response
+
+    @staticmethod
+    def parse_json(request) -> dict:
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
@@ -1,10 +1,15 @@
-from orders.llm.agent import OrderParsingAgent
-from orders.llm.base import ParsedOrder, ParsedOrderItem
-from orders.llm.menu_context import build_menu_context
+from orders.llm.agent import BatchOrderParsingAgent, OrderParsingAgent
+from orders.llm.base import ParsedOrder, ParsedOrderBatch, ParsedOrderItem
+from orders.llm.menu_context import build_menu_context, get_menu_context
+from orders.llm.menu_retrieval import get_relevant_menu_context
 
 __all__ = [
     "ParsedOrder",
+    "ParsedOrderBatch",
     "ParsedOrderItem",
     "OrderParsingAgent",
+    "BatchOrderParsingAgent",
     "build_menu_context",
+    "get_menu_context",
+    "get_relevant_menu_context",
 ]
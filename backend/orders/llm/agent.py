@@ -10,7 +10,7 @@ from typing import Any
 from pydantic import BaseModel
 
 from ai.base_agent import BaseAgent
-from orders.llm.base import ParsedOrder
+from orders.llm.base import ParsedOrder, ParsedOrderBatch
 
 INSTRUCTIONS = """\
 You are an order-taking assistant for a restaurant. Given a customer's \
@@ -29,9 +29,22 @@ short labels (e.g. ["Peanuts", "Shellfish"]). Only include actual allergies, \
 not plain preferences like "no onions".
 """
 
+BATCH_INSTRUCTIONS = (
+    INSTRUCTIONS
+    + """\
+- You are given several customers' orders at once, each in its own numbered \
+<order> tag. Parse each one on its own, as if it were the only order: the \
+items, allergies and language of one order never belong to another
+- Return exactly one entry in "orders" per <order>, in the same order, even \
+when an order has no items you recognise (then its "items" list is empty)
+"""
+)
+
 
 class OrderParsingAgent(BaseAgent):
     default_model = "gpt-4o-mini"
+    hedge_after = 4.0  # ~p95 latency; only used when LLM_HEDGING_ENABLED
+    cache_prompt_prefix = True  # instructions + menu are reused across a restaurant's orders
 
     def get_name(self) -> str:
         return "OrderParsingAgent"
@@ -44,11 +57,42 @@ class OrderParsingAgent(BaseAgent):
 
     def get_context(self, **kwargs: Any) -> dict[str, str]:
         context = {}
-        if "raw_input" in kwargs:
-            context["customer_order"] = kwargs["raw_input"]
         if "menu_context" in kwargs:
             context["restaurant_menu"] = kwargs["menu_context"]
         return context
 
+    def get_request_context(self, **kwargs: Any) -> dict[str, str]:
+        context = {}
+        if "raw_input" in kwargs:
+            context["customer_order"] = kwargs["raw_input"]
+        return context
+
     def prompt(self, **kwargs: Any) -> str:
         return "Parse the customer's order from the provided context."
+
+
+class BatchOrderParsingAgent(OrderParsingAgent):
+    """Parses several customers' orders against the same menu in one call."""
+
+    hedge_after = 8.0  # output grows with the number of orders
+
+    def get_name(self) -> str:
+        return "BatchOrderParsingAgent"
+
+    def get_instructions(self) -> str:
+        return BATCH_INSTRUCTIONS
+
+    def get_output_schema(self) -> type[BaseModel] | None:
+        return ParsedOrderBatch
+
+    def get_request_context(self, **kwargs: Any) -> dict[str, str]:
+        context = {}
+        if "raw_inputs" in kwargs:
+            context["customer_orders"] = "\n".join(
+                f'<order number="{number}">\n{raw_input}\n</order>'
+                for number, raw_input in enumerate(kwargs["raw_inputs"], start=1)
+            )
+        return context
+
+    def prompt(self, **kwargs: Any) -> str:
+        return "Parse each customer's order from the provided context."
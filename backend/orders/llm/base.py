@@ -13,3 +13,7 @@ class ParsedOrder(BaseModel):
     items: list[ParsedOrderItem]
     allergies: list[str] = Field(default_factory=list)
     language: str = "en"
+
+
+class ParsedOrderBatch(BaseModel):
+    orders: list[ParsedOrder]
@@ -0,0 +1,200 @@
+"""
+Compact, token-efficient menu encoding for order parsing prompts.
+
+The default menu context spells out every ID and heading for every item
+("(variant_id: 123)", "Sizes/Variants (pick one):"). The compact encoding
+renders one row per item instead:
+
+    12|Margherita|Tomato and mozzarella|1:Small:9.99*,2:Large:14.99|M1
+
+- item IDs are the item's position in the menu (1..N). They are stable for a
+  menu version, so retrieval-pruned prompts use the same numbers.
+- variant IDs are the variant's position within its item.
+- modifiers are listed once, at the end, in groups (M1, M2, ...). Items with
+  the same modifier names and prices share a group; modifier IDs are
+  positions within the group.
+
+The model answers in these short IDs and CompactMenu.to_db() maps its
+ParsedOrder back to database IDs, dropping anything it cannot resolve.
+
+A CompactMenu carries the retrieval index built from the same rows, so a
+pruned prompt's positions always refer to the menu they are rendered from,
+even if the menu changes between two requests for its artifacts.
+"""
+
+from dataclasses import dataclass
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.llm.menu_context import load_menu_categories, with_header
+from orders.llm.menu_retrieval import PRUNED_NOTE, MenuRetrievalIndex, retrieval_enabled
+from restaurants.models import Restaurant
+from restaurants.services.menu_cache_service import LocalMenuArtifacts
+
+LEGEND = """\
+Menu format: one item per line as item_id|name|description|variants|modifier group.
+Variants are variant_id:label:price; * marks the DEFAULT variant.
+Modifier groups are listed at the end as modifier_id:name:price adjustment.
+variant_id and modifier_id are numbered within their item or group: use the numbers exactly as shown."""
+
+
+def _clean(text: str, separators: str = "|") -> str:
+    for separator in separators:
+        text = text.replace(separator, "/")
+    return " ".join(text.split())
+
+
+@dataclass
+class _Row:
+    category_position: int
+    line: str
+    group: int | None  # index into CompactMenu.groups
+    item_id: int
+    variant_ids: list[int]
+    modifier_ids: list[int]  # DB IDs in the order of the item's group
+
+
+class CompactMenu:
+    """
+    Compact rendering of one menu version plus the short ID → DB ID map, and
+    the retrieval index numbering the same items.
+    """
+
+    def __init__(self, category_names: list[str], rows: list[_Row], groups: list[str], index: MenuRetrievalIndex):
+        self.category_names = category_names
+        self.rows = rows
+        self.groups = groups
+        self.index = index
+        self._full = None
+
+    @classmethod
+    def build(cls, version_id: int | None) -> "CompactMenu":
+        if version_id is None:
+            return cls([], [], [], MenuRetrievalIndex([], [], []))
+
+        categories = list(load_menu_categories(version_id))
+        category_names, rows, groups = [], [], []
+        group_index: dict[tuple, int] = {}
+        for position, category in enumerate(categories):
+            category_names.append(category.name)
+            for item in category.items.all():
+                variants = list(item.variants.all())
+                variant_cells = ",".join(
+                    f"{n}:{_clean(v.label, '|,:')}:{v.price}{'*' if v.is_default else ''}"
+                    for n, v in enumerate(variants, start=1)
+                )
+
+                modifiers = list(item.modifiers.all())
+                group = None
+                if modifiers:
+                    signature = tuple((_clean(m.name, "|,:"), m.price_adjustment) for m in modifiers)
+                    group = group_index.get(signature)
+                    if group is None:
+                        group = group_index[signature] = len(groups)
+                        cells = ",".join(f"{n}:{name}:{price:+}" for n, (name, price) in enumerate(signature, start=1))
+                        groups.append(f"M{group + 1}|{cells}")
+
+                item_number = len(rows) + 1
+                line = "|".join(
+                    [
+                        str(item_number),
+                        _clean(item.name),
+                        _clean(item.description),
+                        variant_cells,
+                        f"M{group + 1}" if group is not None else "",
+                    ]
+                )
+                rows.append(
+                    _Row(
+                        category_position=position,
+                        line=line,
+                        group=group,
+                        item_id=item.id,
+                        variant_ids=[v.id for v in variants],
+                        modifier_ids=[m.id for m in modifiers],
+                    )
+                )
+        return cls(category_names, rows, groups, MenuRetrievalIndex.from_categories(categories))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # ── Rendering ──────────────────────────────────────────────────────────────
+
+    def render(self, positions: list[int] | None = None) -> str:
+        """Render all items, or only those at positions (the retrieval index's numbering)."""
+        if positions is None:
+            if self._full is None:
+                self._full = self._render(range(len(self.rows)))
+            return self._full
+        return f"{PRUNED_NOTE}\n\n{self._render(positions)}"
+
+    def _render(self, positions) -> str:
+        if not self.rows:
+            return ""
+        lines = [LEGEND]
+        current_category = None
+        used_groups: list[int] = []
+        for position in positions:
+            row = self.rows[position]
+            if row.category_position != current_category:
+                lines.append("")
+                lines.append(f"## {self.category_names[row.category_position]}")
+                current_category = row.category_position
+            lines.append(row.line)
+            if row.group is not None and row.group not in used_groups:
+                used_groups.append(row.group)
+
+        if used_groups:
+            lines.append("")
+            lines.append("## Modifier groups")
+            lines.extend(self.groups[group] for group in sorted(used_groups))
+        lines.append("")
+        return "\n".join(lines)
+
+    # ── Short ID translation ───────────────────────────────────────────────────
+
+    @staticmethod
+    def _lookup(values: list, number: int):
+        return values[number - 1] if 1 <= number <= len(values) else None
+
+    def item_to_db(self, item: ParsedOrderItem) -> ParsedOrderItem | None:
+        """Map one parsed line to database IDs, or None if its item or variant is unknown."""
+        row = self._lookup(self.rows, item.menu_item_id)
+        if row is None:
+            return None
+        variant_id = self._lookup(row.variant_ids, item.variant_id)
+        if variant_id is None:
+            return None
+        modifier_ids = [self._lookup(row.modifier_ids, number) for number in item.modifier_ids]
+        return item.model_copy(
+            update={
+                "menu_item_id": row.item_id,
+                "variant_id": variant_id,
+                "modifier_ids": [modifier_id for modifier_id in modifier_ids if modifier_id is not None],
+            }
+        )
+
+    def to_db(self, parsed: ParsedOrder) -> ParsedOrder:
+        """Map a ParsedOrder written in short IDs back to database IDs."""
+        items = [self.item_to_db(item) for item in parsed.items]
+        return parsed.model_copy(update={"items": [item for item in items if item is not None]})
+
+
+_compact_menus = LocalMenuArtifacts(CompactMenu.build)
+
+
+def get_compact_menu_context(restaurant: Restaurant, raw_input: str) -> tuple[str, CompactMenu]:
+    """
+    Compact equivalent of get_relevant_menu_context(): the context to send and
+    the CompactMenu that maps the model's short IDs back.
+    """
+    menu = _compact_menus.get(restaurant)
+    positions = menu.index.select(raw_input) if retrieval_enabled() else None
+    return with_header(restaurant, menu.render(positions)), menu
+
+
+async def aget_compact_menu_context(restaurant: Restaurant, raw_input: str) -> tuple[str, CompactMenu]:
+    """Async equivalent of get_compact_menu_context()."""
+    menu = await _compact_menus.aget(restaurant)
+    positions = menu.index.select(raw_input) if retrieval_enabled() else None
+    return with_header(restaurant, menu.render(positions)), menu
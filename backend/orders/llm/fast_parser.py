@@ -0,0 +1,418 @@
+"""
+Deterministic fast-path order parser.
+
+Most orders are a short list of quantity + item name + optional variant
+label + modifier names ("2 large lattes with oat milk, a croissant").
+FastOrderParser resolves those against the active menu in microseconds so
+OrderService.parse_order only calls the LLM when the text needs real
+language understanding.
+
+The matcher is deliberately conservative. Every content word must be
+accounted for as a quantity, item, variant, modifier or "no ..." request.
+Anything else (unknown words, ambiguous names, allergies, non-English text)
+drops the confidence to zero and the caller falls back to OrderParsingAgent.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from django.db.models import Prefetch
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.llm.text import singular, tokenize, words
+from restaurants.models import MenuItem, Restaurant
+from restaurants.services.menu_cache_service import LocalMenuArtifacts
+from restaurants.services.menu_version_service import MenuVersionService
+
+FAST_PATH_MIN_CONFIDENCE = 0.8
+FUZZY_PENALTY = 0.1
+ALIAS_PENALTY = 0.05
+MAX_QUANTITY = 50
+
+_SEPARATORS = {",", ";", "and", "also", "plus", "then"}
+_EXCLUDE_WORDS = {"no", "without", "hold", "minus"}
+_FILLER_WORDS = {
+    "a", "all", "an", "be", "can", "could", "do", "for", "get", "give", "gimme",
+    "have", "hello", "hey", "hi", "i", "id", "ill", "im", "just", "kindly", "let",
+    "lemme", "like", "me", "my", "need", "of", "on", "order", "please", "pls", "plz",
+    "size", "sized", "some", "take", "thank", "thanks", "that", "the", "to", "us",
+    "we", "with", "would", "want", "wants", "x", "you",
+}  # fmt: skip
+_MODIFIER_PREFIXES = ("extra", "add", "with")
+_ARTICLES = {"a", "an"}
+_ALLERGY_RE = re.compile(r"allerg|intoleran|celiac|coeliac|anaphyla")
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "single": 1, "two": 2, "couple": 2, "pair": 2,
+    "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+    "ten": 10, "eleven": 11, "twelve": 12, "dozen": 12,
+}  # fmt: skip
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = j = edits = 0
+    while i < len(a) and j < len(b):
+        if a[i] != b[j]:
+            edits += 1
+            if edits > 1:
+                return False
+            if len(a) == len(b):
+                i += 1
+            j += 1
+        else:
+            i += 1
+            j += 1
+    return edits + (len(b) - j) <= 1
+
+
+@dataclass(frozen=True)
+class _Phrase:
+    tokens: tuple[str, ...]
+    target_id: int
+    is_alias: bool = False
+
+
+@dataclass
+class _ItemEntry:
+    item_id: int
+    variants: list[_Phrase]
+    default_variant_id: int | None
+    modifiers: list[_Phrase]
+    counted_variants: bool = False
+
+
+@dataclass
+class _Line:
+    entry: _ItemEntry
+    quantity: int
+    variant_id: int | None = None
+    modifier_ids: list[int] = field(default_factory=list)
+    requests: list[str] = field(default_factory=list)
+
+
+class _NotConfident(Exception):
+    pass
+
+
+class FastOrderParser:
+    """Token-index matcher over one menu version's active items."""
+
+    def __init__(self, entries: list[_ItemEntry], names: list[_Phrase]):
+        self.entries = {entry.item_id: entry for entry in entries}
+        self.by_first_token: dict[str, list[_Phrase]] = {}
+        for phrase in names:
+            self.by_first_token.setdefault(phrase.tokens[0], []).append(phrase)
+
+    # ── Construction ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, version_id: int | None) -> "FastOrderParser":
+        """Build the matcher from the version's active categories and items."""
+        if version_id is None:
+            return cls([], [])
+
+        categories = MenuVersionService.categories(version_id).filter(is_active=True).prefetch_related(
+            Prefetch("items", queryset=MenuItem.objects.filter(is_active=True)),
+            "items__variants",
+            "items__modifiers",
+        )
+        entries = []
+        full_names = []
+        for category in categories:
+            for item in category.items.all():
+                variants = list(item.variants.all())
+                default = next((v for v in variants if v.is_default), None)
+                if default is None and len(variants) == 1:
+                    default = variants[0]
+                modifiers = []
+                for m in item.modifiers.all():
+                    tokens = words(m.name)
+                    modifiers.append(_Phrase(tokens, m.id))
+                    if len(tokens) > 1 and tokens[0] in _MODIFIER_PREFIXES:
+                        modifiers.append(_Phrase(tokens[1:], m.id, is_alias=True))
+                entries.append(
+                    _ItemEntry(
+                        item_id=item.id,
+                        variants=[_Phrase(words(v.label), v.id) for v in variants],
+                        default_variant_id=default.id if default else None,
+                        modifiers=[p for p in modifiers if p.tokens],
+                        counted_variants=any(c.isdigit() for v in variants for c in v.label),
+                    )
+                )
+                full_names.append(_Phrase(words(item.name), item.id))
+
+        return cls(entries, cls._with_aliases([p for p in full_names if p.tokens]))
+
+    @staticmethod
+    def _with_aliases(full_names: list[_Phrase]) -> list[_Phrase]:
+        """
+        Add every sub-phrase of an item name that identifies exactly one item
+        ("cheeseburger" for "Classic Cheeseburger"), unless it is some other
+        item's full name or made only of filler words.
+        """
+        exact = {p.tokens for p in full_names}
+        owners: dict[tuple[str, ...], set[int]] = {}
+        for phrase in full_names:
+            n = len(phrase.tokens)
+            for start in range(n):
+                for end in range(start + 1, n + 1):
+                    sub = phrase.tokens[start:end]
+                    if sub != phrase.tokens:
+                        owners.setdefault(sub, set()).add(phrase.target_id)
+
+        aliases = [
+            _Phrase(sub, next(iter(ids)), is_alias=True)
+            for sub, ids in owners.items()
+            if len(ids) == 1
+            and sub not in exact
+            and not all(t in _FILLER_WORDS or t in _SEPARATORS or t in _NUMBER_WORDS for t in sub)
+        ]
+        return full_names + aliases
+
+    # ── Matching ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _match_at(tokens: list[str], i: int, phrase: tuple[str, ...]) -> int | None:
+        """Return the number of fuzzy token matches if phrase matches at i."""
+        if i + len(phrase) > len(tokens):
+            return None
+        fuzzy = 0
+        for offset, expected in enumerate(phrase):
+            actual = tokens[i + offset]
+            if actual == expected:
+                continue
+            if len(expected) >= 5 and _within_one_edit(actual, expected):
+                fuzzy += 1
+                continue
+            return None
+        return fuzzy
+
+    def _best_phrase(self, tokens: list[str], i: int, phrases) -> tuple[_Phrase, int] | None:
+        """Longest match among phrases at position i; ties are ambiguous."""
+        best = None
+        best_key = None
+        ambiguous = False
+        for phrase in phrases:
+            fuzzy = self._match_at(tokens, i, phrase.tokens)
+            if fuzzy is None:
+                continue
+            key = (len(phrase.tokens), -fuzzy, not phrase.is_alias)
+            if best_key is None or key > best_key:
+                best, best_key, ambiguous = (phrase, fuzzy), key, False
+            elif key == best_key and phrase.target_id != best[0].target_id:
+                ambiguous = True
+        if ambiguous:
+            raise _NotConfident("ambiguous match")
+        return best
+
+    def _item_candidates(self, token: str) -> list[_Phrase]:
+        candidates = list(self.by_first_token.get(token, ()))
+        if len(token) >= 5:
+            for first, phrases in self.by_first_token.items():
+                if first != token and len(first) >= 5 and _within_one_edit(token, first):
+                    candidates.extend(phrases)
+        return candidates
+
+    @staticmethod
+    def _quantity_at(tokens: list[str], i: int) -> tuple[int, int] | None:
+        token = tokens[i]
+        if token.isdigit():
+            return int(token), 1
+        if token in _NUMBER_WORDS:
+            consumed = 1
+            if token in ("couple", "pair", "dozen") and i + 1 < len(tokens) and tokens[i + 1] == "of":
+                consumed = 2
+            return _NUMBER_WORDS[token], consumed
+        return None
+
+    # ── Parsing ────────────────────────────────────────────────────────────────
+
+    def parse(self, raw_input: str) -> tuple[ParsedOrder | None, float]:
+        """Return (parsed_order, confidence). parsed_order is None when unsure."""
+        try:
+            return self._parse(raw_input)
+        except _NotConfident:
+            return None, 0.0
+
+    def _parse(self, raw_input: str) -> tuple[ParsedOrder | None, float]:
+        if not self.entries or _ALLERGY_RE.search(raw_input.lower()):
+            raise _NotConfident("needs LLM")
+        raw_tokens = tokenize(raw_input)
+        if not raw_tokens:
+            raise _NotConfident("no tokens")
+        tokens = [singular(t) for t in raw_tokens]
+
+        confidence = 1.0
+        lines: list[_Line] = []
+        current: _Line | None = None
+        pending_quantity: int | None = None
+        pending_article = False
+        pending_words: list[int] = []  # token positions seen before the next item
+        excluding: list[str] | None = None
+
+        def close_exclusion():
+            nonlocal excluding
+            if excluding:
+                if current is None:
+                    raise _NotConfident("request without item")
+                current.requests.append("no " + " ".join(excluding))
+            elif excluding is not None:
+                raise _NotConfident("dangling 'no'")
+            excluding = None
+
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+
+            if token in _SEPARATORS:
+                close_exclusion()
+                i += 1
+                continue
+
+            if excluding is not None:
+                if token in _EXCLUDE_WORDS:
+                    close_exclusion()
+                    excluding = []
+                    i += 1
+                    continue
+                if not excluding or not self._ends_exclusion(tokens, i, current):
+                    if token not in _FILLER_WORDS:
+                        excluding.append(raw_tokens[i])
+                    i += 1
+                    continue
+                # "no pickles 2 lattes", "no sugar large": the request ended without a separator.
+                close_exclusion()
+
+            if token in _EXCLUDE_WORDS:
+                excluding = []
+                i += 1
+                continue
+
+            # Item names win over everything else at this position.
+            match = self._best_phrase(tokens, i, self._item_candidates(token))
+            if match is not None:
+                phrase, fuzzy = match
+                confidence -= FUZZY_PENALTY * fuzzy + (ALIAS_PENALTY if phrase.is_alias else 0)
+                current = _Line(self.entries[phrase.target_id], pending_quantity or 1)
+                lines.append(current)
+                pending_quantity, pending_article = None, False
+                self._consume_pending(tokens, pending_words, current)
+                pending_words = []
+                i += len(phrase.tokens)
+                continue
+
+            if token == "x" and current is not None and i + 1 < len(tokens) and tokens[i + 1].isdigit():
+                current.quantity = int(tokens[i + 1])
+                i += 2
+                continue
+
+            quantity = self._quantity_at(tokens, i)
+            if quantity is not None:
+                if pending_quantity is not None and not pending_article:
+                    raise _NotConfident("two quantities")
+                if pending_quantity is None or token not in _ARTICLES:
+                    pending_quantity = quantity[0]
+                    pending_article = token in _ARTICLES
+                i += quantity[1]
+                continue
+
+            if current is not None and not pending_words:
+                consumed = self._consume_option(tokens, i, current)
+                if consumed:
+                    # "with a side of ..." - the article belonged to the option.
+                    if pending_article:
+                        pending_quantity = None
+                    i += consumed
+                    continue
+
+            if token not in _FILLER_WORDS:
+                pending_words.append(i)
+            i += 1
+
+        close_exclusion()
+        if pending_words or (pending_quantity is not None and not pending_article) or not lines:
+            raise _NotConfident("unaccounted words")
+
+        items = []
+        for line in lines:
+            variant_id = line.variant_id or line.entry.default_variant_id
+            if variant_id is None or not 0 < line.quantity <= MAX_QUANTITY:
+                raise _NotConfident("no variant or odd quantity")
+            if line.variant_id is None and line.quantity > 1 and line.entry.counted_variants:
+                # "12 wings" may mean the 12 piece variant rather than 12 orders.
+                raise _NotConfident("quantity could be a variant")
+            items.append(
+                ParsedOrderItem(
+                    menu_item_id=line.entry.item_id,
+                    variant_id=variant_id,
+                    quantity=line.quantity,
+                    modifier_ids=line.modifier_ids,
+                    special_requests=", ".join(line.requests),
+                )
+            )
+
+        if confidence < FAST_PATH_MIN_CONFIDENCE:
+            return None, confidence
+        return ParsedOrder(items=items, language="en"), confidence
+
+    def _ends_exclusion(self, tokens: list[str], i: int, line: _Line | None) -> bool:
+        """
+        Whether the token at i, after at least one excluded word, starts
+        something other than the exclusion: a quantity, an item or a variant.
+        A modifier is ambiguous ("no whipped cream" next to a "Cream" modifier).
+        """
+        token = tokens[i]
+        if token not in _ARTICLES and self._quantity_at(tokens, i) is not None:
+            return True
+        if self._best_phrase(tokens, i, self._item_candidates(token)) is not None:
+            return True
+        if line is None:
+            return False
+        if not line.variant_id and self._best_phrase(tokens, i, line.entry.variants) is not None:
+            return True
+        if self._best_phrase(tokens, i, line.entry.modifiers) is not None:
+            raise _NotConfident("modifier after 'no'")
+        return False
+
+    def _consume_option(self, tokens: list[str], i: int, line: _Line) -> int:
+        """Match a variant label or modifier of line's item at i; return tokens consumed."""
+        phrases = line.entry.modifiers + ([] if line.variant_id else line.entry.variants)
+        match = self._best_phrase(tokens, i, phrases)
+        if match is None or match[1]:
+            return 0
+        phrase = match[0]
+        if phrase in line.entry.variants:
+            line.variant_id = phrase.target_id
+        elif phrase.target_id not in line.modifier_ids:
+            line.modifier_ids.append(phrase.target_id)
+        return len(phrase.tokens)
+
+    def _consume_pending(self, tokens: list[str], positions: list[int], line: _Line) -> None:
+        """Words before an item ("large", "oat milk") must all be its options."""
+        if not positions:
+            return
+        words = [tokens[p] for p in positions]
+        i = 0
+        while i < len(words):
+            consumed = self._consume_option(words, i, line)
+            if not consumed:
+                raise _NotConfident("unknown word before item")
+            i += consumed
+
+
+_parsers = LocalMenuArtifacts(FastOrderParser.build)
+
+
+def fast_parse_order(restaurant: Restaurant, raw_input: str) -> ParsedOrder | None:
+    """Parse raw_input without the LLM, or return None if not confident."""
+    parsed, _ = _parsers.get(restaurant).parse(raw_input)
+    return parsed
+
+
+async def afast_parse_order(restaurant: Restaurant, raw_input: str) -> ParsedOrder | None:
+    """Async equivalent of fast_parse_order()."""
+    parsed, _ = (await _parsers.aget(restaurant)).parse(raw_input)
+    return parsed
@@ -1,4 +1,76 @@
-from restaurants.models import MenuCategory, MenuVersion, Restaurant
+from django.db.models import Prefetch
+
+from restaurants.models import MenuItem, Restaurant
+from restaurants.services.menu_cache_service import MenuCacheService
+from restaurants.services.menu_version_service import MenuVersionService
+
+
+def load_menu_categories(version_id: int):
+    """
+    Active categories of a menu version, owned or shared (see
+    MenuVersionService.categories), with their active items, variants and
+    modifiers prefetched.
+
+    Active items are filtered inside the prefetch so the whole menu loads in
+    a fixed number of queries regardless of how many categories it has.
+    Ties in sort_order (every uploaded category has 0) are broken by ID, so
+    menus rendered from separate queries number items the same way.
+    """
+    return (
+        MenuVersionService.categories(version_id)
+        .filter(is_active=True)
+        .prefetch_related(
+            Prefetch(
+                "items",
+                queryset=MenuItem.objects.filter(is_active=True).order_by("sort_order", "id"),
+            ),
+            "items__variants",
+            "items__modifiers",
+        )
+        .order_by("sort_order", "id")
+    )
+
+
+def render_menu_item(item: MenuItem) -> list[str]:
+    """Prompt lines for one item with its variant and modifier IDs."""
+    lines = [f"  - {item.name} (item_id: {item.id})"]
+    if item.description:
+        lines.append(f"    Description: {item.description}")
+
+    variants = item.variants.all()
+    if variants:
+        lines.append("    Sizes/Variants (pick one):")
+        for v in variants:
+            default_marker = " [DEFAULT]" if v.is_default else ""
+            lines.append(f"      * {v.label}: ${v.price}{default_marker} (variant_id: {v.id})")
+
+    modifiers = item.modifiers.all()
+    if modifiers:
+        lines.append("    Modifiers (optional, pick any):")
+        for m in modifiers:
+            price_str = f"+${m.price_adjustment}" if m.price_adjustment else "free"
+            lines.append(f"      * {m.name}: {price_str} (modifier_id: {m.id})")
+    return lines
+
+
+def _render_menu_body(version_id: int | None) -> str:
+    """Render the category/item/variant/modifier lines for a menu version."""
+    if version_id is None:
+        return ""
+
+    lines = []
+    for category in load_menu_categories(version_id):
+        lines.append(f"## {category.name}")
+        for item in category.items.all():
+            lines.extend(render_menu_item(item))
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def with_header(restaurant: Restaurant, body: str) -> str:
+    header = f"Restaurant: {restaurant.name}\n"
+    return f"{header}\n{body}" if body else header
 
 
 def build_menu_context(restaurant: Restaurant) -> str:
@@ -6,41 +78,24 @@ def build_menu_context(restaurant: Restaurant) -> str:
     Build a text representation of the restaurant's menu for the LLM prompt.
     Includes item IDs so the LLM can reference them in its response.
     """
-    lines = [f"Restaurant: {restaurant.name}", ""]
-
     active_version = restaurant.menu_versions.filter(is_active=True).first()
-    if not active_version:
-        return "\n".join(lines)
+    body = _render_menu_body(active_version.id if active_version else None)
+    return with_header(restaurant, body)
 
-    categories = (
-        MenuCategory.objects.filter(version=active_version, is_active=True)
-        .prefetch_related("items__variants", "items__modifiers")
-        .order_by("sort_order")
-    )
 
-    for category in categories:
-        lines.append(f"## {category.name}")
-        active_items = category.items.filter(is_active=True).order_by("sort_order")
-
-        for item in active_items:
-            lines.append(f"  - {item.name} (item_id: {item.id})")
-            if item.description:
-                lines.append(f"    Description: {item.description}")
-
-            variants = item.variants.all()
-            if variants:
-                lines.append("    Sizes/Variants (pick one):")
-                for v in variants:
-                    default_marker = " [DEFAULT]" if v.is_default else ""
-                    lines.append(f"      * {v.label}: ${v.price}{default_marker} (variant_id: {v.id})")
-
-            modifiers = item.modifiers.all()
-            if modifiers:
-                lines.append("    Modifiers (optional, pick any):")
-                for m in modifiers:
-                    price_str = f"+${m.price_adjustment}" if m.price_adjustment else "free"
-                    lines.append(f"      * {m.name}: {price_str} (modifier_id: {m.id})")
+def get_menu_context(restaurant: Restaurant) -> str:
+    """
+    Cached equivalent of build_menu_context() for the order parsing hot path.
 
-        lines.append("")
+    The rendered menu is stored in the shared cache under the restaurant's
+    menu fingerprint, so repeat calls run no menu queries until a menu write
+    invalidates it. The restaurant name header is applied per call.
+    """
+    body = MenuCacheService.get_or_build(restaurant, "llm_context", _render_menu_body)
+    return with_header(restaurant, body)
 
-    return "\n".join(lines)
+
+async def aget_menu_context(restaurant: Restaurant) -> str:
+    """Async equivalent of get_menu_context()."""
+    body = await MenuCacheService.aget_or_build(restaurant, "llm_context", _render_menu_body)
+    return with_header(restaurant, body)
@@ -0,0 +1,229 @@
+"""
+Retrieval-pruned menu context for order parsing.
+
+Large menus make every parse prompt long. MenuRetrievalIndex is a small
+BM25 index over a menu version's active items (name, description, category,
+variant labels, modifier names). Terms are singular words plus character
+trigrams, so "cheeseburger" still finds "Classic Cheeseburger" when the
+customer types "cheesburger" and "burger" reaches it too.
+
+get_relevant_menu_context() sends only the best matching items, rendered in
+the same format and category order as the full menu. It falls back to the
+full menu whenever pruning might hide what the customer asked for: small
+menus, text in another script, or orders whose words mostly match nothing.
+
+A pruned menu differs from order to order, so it cannot be part of the
+provider's cached prompt prefix (see ai.base_agent). Retrieval is therefore
+only used with LLM_PROMPT_CACHE_ENABLED off; with it on, every order sends
+the same full menu and reads it from the prompt cache.
+"""
+
+import math
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from orders.llm.menu_context import (
+    aget_menu_context,
+    get_menu_context,
+    load_menu_categories,
+    render_menu_item,
+    with_header,
+)
+from orders.llm.text import tokenize, words
+from restaurants.models import Restaurant
+from restaurants.services.menu_cache_service import LocalMenuArtifacts
+
+RETRIEVAL_MIN_ITEMS = 40  # smaller menus are sent in full
+RETRIEVAL_TOP_K = 12
+RETRIEVAL_PER_WORD = 4  # best items kept for each customer word on its own
+RETRIEVAL_MAX_SHARE = 0.6  # pruning that keeps more than this is not worth it
+RETRIEVAL_MIN_COVERAGE = 0.5  # share of customer words that must hit the menu
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3  # name terms count this many times in an item's document
+TRIGRAM_WEIGHT = 0.3  # relative weight of trigram matches in a query
+
+_STOP_WORDS = {
+    "a", "all", "an", "and", "any", "are", "at", "be", "but", "can", "could", "do",
+    "for", "get", "give", "have", "hi", "i", "id", "im", "in", "is", "it", "just",
+    "like", "me", "my", "no", "of", "on", "one", "or", "order", "please", "some",
+    "that", "the", "thank", "thanks", "to", "two", "u", "up", "want", "we", "what",
+    "with", "without", "would", "you",
+}  # fmt: skip
+
+PRUNED_NOTE = "(Only the menu items most relevant to this order are listed.)"
+
+
+def _trigrams(word: str) -> list[str]:
+    if len(word) < 4:
+        return []
+    padded = f"#{word}#"
+    return ["#" + padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def _terms(text: str) -> list[str]:
+    terms = []
+    for word in words(text):
+        terms.append(word)
+        terms.extend(_trigrams(word))
+    return terms
+
+
+@dataclass
+class _Block:
+    category_position: int
+    lines: list[str]
+
+
+class MenuRetrievalIndex:
+    """BM25 index over one menu version; items are addressed by render position."""
+
+    def __init__(self, category_names: list[str], blocks: list[_Block], documents: list[Counter]):
+        self.category_names = category_names
+        self.blocks = blocks
+        self.documents = documents
+        self.doc_lengths = [sum(doc.values()) for doc in documents]
+        self.avg_length = (sum(self.doc_lengths) / len(documents)) if documents else 0.0
+        doc_freq = Counter(term for doc in documents for term in doc)
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+        self.vocabulary = {term for term in self.idf if not term.startswith("#")}
+
+    @classmethod
+    def build(cls, version_id: int | None) -> "MenuRetrievalIndex":
+        if version_id is None:
+            return cls([], [], [])
+        return cls.from_categories(load_menu_categories(version_id))
+
+    @classmethod
+    def from_categories(cls, categories) -> "MenuRetrievalIndex":
+        """Index categories as loaded by load_menu_categories()."""
+        category_names, blocks, documents = [], [], []
+        for position, category in enumerate(categories):
+            category_names.append(category.name)
+            for item in category.items.all():
+                doc = Counter()
+                for _ in range(NAME_WEIGHT):
+                    doc.update(_terms(item.name))
+                doc.update(_terms(item.description))
+                doc.update(_terms(category.name))
+                for v in item.variants.all():
+                    doc.update(_terms(v.label))
+                for m in item.modifiers.all():
+                    doc.update(_terms(m.name))
+                blocks.append(_Block(position, render_menu_item(item)))
+                documents.append(doc)
+        return cls(category_names, blocks, documents)
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    # ── Scoring ────────────────────────────────────────────────────────────────
+
+    def _score(self, doc_index: int, term: str) -> float:
+        tf = self.documents[doc_index].get(term)
+        if not tf:
+            return 0.0
+        length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_index] / self.avg_length
+        return self.idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+    def _word_scores(self, word: str) -> list[float]:
+        """Score every item for one customer word (exact word plus trigrams)."""
+        trigrams = _trigrams(word)
+        trigram_weight = TRIGRAM_WEIGHT / len(trigrams) if trigrams else 0.0
+        scores = []
+        for i in range(len(self.documents)):
+            score = self._score(i, word)
+            for trigram in trigrams:
+                score += trigram_weight * self._score(i, trigram)
+            scores.append(score)
+        return scores
+
+    def _is_known(self, word: str) -> bool:
+        """A word counts as matched if it, or enough of its trigrams, are in the menu."""
+        if word in self.vocabulary:
+            return True
+        trigrams = _trigrams(word)
+        return bool(trigrams) and sum(t in self.idf for t in trigrams) >= 0.6 * len(trigrams)
+
+    def select(self, raw_input: str) -> list[int] | None:
+        """Positions of the items to send, or None to send the full menu."""
+        if len(self.blocks) < RETRIEVAL_MIN_ITEMS or tokenize(raw_input) is None:
+            return None
+        query = [w for w in dict.fromkeys(words(raw_input)) if w not in _STOP_WORDS and not w.isdigit()]
+        if not query:
+            return None
+        known = [w for w in query if self._is_known(w)]
+        if len(known) < RETRIEVAL_MIN_COVERAGE * len(query):
+            return None
+
+        totals = [0.0] * len(self.blocks)
+        selected = set()
+        for word in known:
+            scores = self._word_scores(word)
+            ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: -scores[i])
+            selected.update(ranked[:RETRIEVAL_PER_WORD])
+            totals = [t + s for t, s in zip(totals, scores, strict=True)]
+        ranked = sorted((i for i, s in enumerate(totals) if s > 0), key=lambda i: -totals[i])
+        selected.update(ranked[:RETRIEVAL_TOP_K])
+
+        if not selected or len(selected) > RETRIEVAL_MAX_SHARE * len(self.blocks):
+            return None
+        return sorted(selected)
+
+    def render(self, positions: list[int]) -> str:
+        """Render the chosen items grouped under their categories, in menu order."""
+        lines = [PRUNED_NOTE, ""]
+        current_category = None
+        for position in positions:
+            block = self.blocks[position]
+            if block.category_position != current_category:
+                if current_category is not None:
+                    lines.append("")
+                lines.append(f"## {self.category_names[block.category_position]}")
+                current_category = block.category_position
+            lines.extend(block.lines)
+        lines.append("")
+        return "\n".join(lines)
+
+
+_indexes = LocalMenuArtifacts(MenuRetrievalIndex.build)
+
+
+def retrieval_enabled() -> bool:
+    """Whether menus are pruned: retrieval is on and prompt prefix caching is off."""
+    return settings.ORDER_MENU_RETRIEVAL_ENABLED and not settings.LLM_PROMPT_CACHE_ENABLED
+
+
+def menu_retrieval_index(restaurant: Restaurant) -> MenuRetrievalIndex | None:
+    """The restaurant's retrieval index, or None when retrieval is disabled."""
+    return _indexes.get(restaurant) if retrieval_enabled() else None
+
+
+async def amenu_retrieval_index(restaurant: Restaurant) -> MenuRetrievalIndex | None:
+    """Async equivalent of menu_retrieval_index()."""
+    return await _indexes.aget(restaurant) if retrieval_enabled() else None
+
+
+def get_relevant_menu_context(restaurant: Restaurant, raw_input: str) -> str:
+    """
+    Menu context for parsing raw_input: the most relevant items when the menu
+    is large enough to be worth pruning, otherwise the full cached menu.
+    """
+    index = menu_retrieval_index(restaurant)
+    positions = index.select(raw_input) if index is not None else None
+    if positions is not None:
+        return with_header(restaurant, index.render(positions))
+    return get_menu_context(restaurant)
+
+
+async def aget_relevant_menu_context(restaurant: Restaurant, raw_input: str) -> str:
+    """Async equivalent of get_relevant_menu_context()."""
+    index = await amenu_retrieval_index(restaurant)
+    positions = index.select(raw_input) if index is not None else None
+    if positions is not None:
+        return with_header(restaurant, index.render(positions))
+    return await aget_menu_context(restaurant)
@@ -0,0 +1,116 @@
+"""
+Cache of ParsedOrder results for repeated natural-language orders.
+
+Customers often type the same short orders ("2 lattes", "a cheeseburger no
+onions"). A cached parse skips the LLM round trip; callers still run the
+result through validate_and_price_order so prices always come from the
+current menu.
+
+Entries are keyed on the normalized input plus the menu fingerprint, so any
+menu write makes older parses unreachable. The cache is process-local: each
+restaurant gets its own LRU with a size cap, entries expire after a TTL, and
+the least recently used restaurants are dropped once too many are tracked.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from orders.llm.base import ParsedOrder
+
+PARSE_CACHE_TTL = 60 * 30  # 30 minutes
+PARSE_CACHE_MAX_PER_RESTAURANT = 500
+PARSE_CACHE_MAX_RESTAURANTS = 1000
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " .,!?;:"
+
+
+def normalize_order_text(raw_input: str) -> str:
+    """Lowercase, collapse whitespace and trim edge punctuation."""
+    return _WHITESPACE_RE.sub(" ", raw_input.lower()).strip(_EDGE_PUNCTUATION)
+
+
+@dataclass
+class ParseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ParseResultCache:
+    def __init__(
+        self,
+        ttl: float = PARSE_CACHE_TTL,
+        max_per_restaurant: int = PARSE_CACHE_MAX_PER_RESTAURANT,
+        max_restaurants: int = PARSE_CACHE_MAX_RESTAURANTS,
+        clock=time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_per_restaurant = max_per_restaurant
+        self.max_restaurants = max_restaurants
+        self.clock = clock
+        self.stats = ParseCacheStats()
+        self._entries: OrderedDict[str, OrderedDict[tuple[str, str], tuple[float, ParsedOrder]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, restaurant_id, fingerprint: str, raw_input: str) -> ParsedOrder | None:
+        """Return a copy of the cached parse, or None on a miss."""
+        key = (fingerprint, normalize_order_text(raw_input))
+        restaurant_key = str(restaurant_id)
+        with self._lock:
+            bucket = self._entries.get(restaurant_key)
+            entry = bucket.get(key) if bucket is not None else None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            expires_at, parsed = entry
+            if expires_at <= self.clock():
+                del bucket[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            bucket.move_to_end(key)
+            self._entries.move_to_end(restaurant_key)
+            self.stats.hits += 1
+        return parsed.model_copy(deep=True)
+
+    def set(self, restaurant_id, fingerprint: str, raw_input: str, parsed: ParsedOrder) -> None:
+        """Store a parse. Empty parses are not cached so they get retried."""
+        if not parsed.items:
+            return
+        key = (fingerprint, normalize_order_text(raw_input))
+        restaurant_key = str(restaurant_id)
+        entry = (self.clock() + self.ttl, parsed.model_copy(deep=True))
+        with self._lock:
+            bucket = self._entries.get(restaurant_key)
+            if bucket is None:
+                bucket = self._entries[restaurant_key] = OrderedDict()
+            bucket[key] = entry
+            bucket.move_to_end(key)
+            self._entries.move_to_end(restaurant_key)
+
+            while len(bucket) > self.max_per_restaurant:
+                bucket.popitem(last=False)
+                self.stats.evictions += 1
+            while len(self._entries) > self.max_restaurants:
+                _, dropped = self._entries.popitem(last=False)
+                self.stats.evictions += len(dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = ParseCacheStats()
+
+
+parse_cache = ParseResultCache()
@@ -0,0 +1,78 @@
+"""
+Incremental reader for a ParsedOrder JSON document streamed by the LLM.
+
+The model's structured output arrives as text chunks. ParsedOrderStream
+tracks string/brace state as chunks come in and returns each element of the
+top-level "items" array as soon as its closing brace is seen, so line items
+can be priced and shown before the rest of the response (allergies,
+language) has arrived.
+"""
+
+import json
+
+from pydantic import ValidationError
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+
+
+class ParsedOrderStream:
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._last_key = None
+        self._key_start = None
+        self._items_depth = None  # depth of the "items" array once entered
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list[ParsedOrderItem]:
+        """Consume a chunk and return the line items it completed."""
+        self.buffer += chunk
+        completed = []
+        text = self.buffer
+        while self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._last_key = text[self._key_start : self._pos]
+                        self._key_start = None
+            elif ch == '"':
+                self._in_string = True
+                # Only strings directly inside the top-level object can be the "items" key.
+                self._key_start = self._pos + 1 if self._depth == 1 else None
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == "items":
+                    self._items_depth = 2
+                elif ch == "{" and self._items_depth is not None and self._depth == 3:
+                    self._item_start = self._pos
+            elif ch in "}]":
+                if ch == "}" and self._item_start is not None and self._depth == 3:
+                    item = self._load_item(text[self._item_start : self._pos + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._item_start = None
+                elif ch == "]" and self._depth == 2:
+                    self._items_depth = None
+                self._depth -= 1
+            self._pos += 1
+        return completed
+
+    @staticmethod
+    def _load_item(raw: str) -> ParsedOrderItem | None:
+        try:
+            return ParsedOrderItem.model_validate(json.loads(raw))
+        except (ValueError, ValidationError):
+            return None
+
+    def finish(self) -> ParsedOrder:
+        """Parse the complete document once the stream has ended."""
+        return ParsedOrder.model_validate_json(self.buffer)
@@ -0,0 +1,40 @@
+"""
+Text normalization shared by the local (non-LLM) order parsing helpers.
+"""
+
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r"\d+|[a-z]+|[,;]")
+_PUNCTUATION = {",", ";"}
+
+
+def tokenize(text: str) -> list[str] | None:
+    """
+    Lowercase ASCII word, number and "," / ";" tokens.
+
+    Accents are stripped ("café" -> "cafe"). Returns None when the text
+    contains letters outside the Latin alphabet.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    if any(c.isalpha() and not c.isascii() for c in stripped):
+        return None
+    lowered = stripped.lower().replace("&", " and ").replace("+", " and ").replace("'", "")
+    return _TOKEN_RE.findall(lowered)
+
+
+def singular(token: str) -> str:
+    """Cheap English singular form ("fries" -> "fry", "lattes" -> "latte")."""
+    if len(token) > 3 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith(("ches", "shes", "sses", "xes")):
+        return token[:-2]
+    if len(token) > 2 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def words(text: str) -> tuple[str, ...]:
+    """Singular word tokens without punctuation; empty for non-Latin text."""
+    return tuple(singular(t) for t in (tokenize(text) or []) if t not in _PUNCTUATION)
@@ -0,0 +1,108 @@
+"""
+In-memory price index for a restaurant's active menu version.
+
+Order validation and pricing look up every cart line's item, variant and
+modifiers. MenuPriceIndex holds those rows for one menu version as compact
+immutable records so a whole cart can be validated without touching the
+database.
+
+Indexes are built once per menu fingerprint (see MenuCacheService) and kept
+in a small process-local LRU shared by all requests. A menu write mints a
+new fingerprint, so the next lookup builds a fresh index and the stale one
+ages out of the LRU.
+"""
+
+from decimal import Decimal
+
+from restaurants.models import MenuItem, Restaurant
+from restaurants.services.menu_cache_service import LocalMenuArtifacts
+from restaurants.services.menu_version_service import MenuVersionService
+
+PRICE_INDEX_MAX_ENTRIES = 256
+
+
+class VariantRecord:
+    __slots__ = ("id", "label", "price")
+
+    def __init__(self, id: int, label: str, price: Decimal):
+        self.id = id
+        self.label = label
+        self.price = price
+
+
+class ModifierRecord:
+    __slots__ = ("id", "name", "price_adjustment")
+
+    def __init__(self, id: int, name: str, price_adjustment: Decimal):
+        self.id = id
+        self.name = name
+        self.price_adjustment = price_adjustment
+
+
+class ItemRecord:
+    __slots__ = ("id", "name", "is_active", "variants", "modifiers")
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        is_active: bool,
+        variants: dict[int, VariantRecord],
+        modifiers: dict[int, ModifierRecord],
+    ):
+        self.id = id
+        self.name = name
+        self.is_active = is_active
+        self.variants = variants
+        self.modifiers = modifiers
+
+    @classmethod
+    def from_model(cls, item: MenuItem) -> "ItemRecord":
+        """Snapshot a MenuItem with prefetched variants and modifiers."""
+        return cls(
+            id=item.id,
+            name=item.name,
+            is_active=item.is_active,
+            variants={v.id: VariantRecord(v.id, v.label, v.price) for v in item.variants.all()},
+            modifiers={m.id: ModifierRecord(m.id, m.name, m.price_adjustment) for m in item.modifiers.all()},
+        )
+
+
+class MenuPriceIndex:
+    """Item → variants/modifiers/prices lookup for one menu version."""
+
+    __slots__ = ("version_id", "items")
+
+    def __init__(self, version_id: int | None, items: dict[int, ItemRecord]):
+        self.version_id = version_id
+        self.items = items
+
+    def get_item(self, item_id: int) -> ItemRecord | None:
+        return self.items.get(item_id)
+
+    @classmethod
+    def build(cls, version_id: int | None) -> "MenuPriceIndex":
+        """Load every item of the version (3 queries) into an index."""
+        if version_id is None:
+            return cls(None, {})
+
+        queryset = MenuVersionService.items(version_id).prefetch_related("variants", "modifiers")
+        return cls(version_id, {item.id: ItemRecord.from_model(item) for item in queryset})
+
+    @classmethod
+    def for_restaurant(cls, restaurant: Restaurant) -> "MenuPriceIndex":
+        """
+        Return the shared index for the restaurant's current menu.
+
+        Costs one shared-cache read for the fingerprint on a hit; the first
+        caller after a menu write builds the index.
+        """
+        return _price_indexes.get(restaurant)
+
+    @classmethod
+    async def afor_restaurant(cls, restaurant: Restaurant) -> "MenuPriceIndex":
+        """Async equivalent of for_restaurant()."""
+        return await _price_indexes.aget(restaurant)
+
+
+_price_indexes = LocalMenuArtifacts(MenuPriceIndex.build, PRICE_INDEX_MAX_ENTRIES)
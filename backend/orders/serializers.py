@@ -2,12 +2,20 @@ from rest_framework import serializers
 
 from orders.models import Order, OrderItem
 
+MAX_BATCH_ORDERS = 12  # a large table; one model answer for more orders gets slow
+
 
 class ParseInputSerializer(serializers.Serializer):
     raw_input = serializers.CharField(max_length=2000)
     table_identifier = serializers.CharField(max_length=50, required=False, default="", allow_blank=True)
 
 
+class ParseBatchInputSerializer(serializers.Serializer):
+    raw_inputs = serializers.ListField(
+        child=serializers.CharField(max_length=2000), min_length=1, max_length=MAX_BATCH_ORDERS
+    )
+
+
 class ConfirmOrderItemSerializer(serializers.Serializer):
     menu_item_id = serializers.IntegerField()
     variant_id = serializers.IntegerField()
@@ -1,27 +1,35 @@
 import logging
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from decimal import Decimal
 
 import stripe
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db import models as db_models
 from django.utils import timezone
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 
+from ai.metrics import llm_call_context
 from orders.broadcast import broadcast_order_to_customer, broadcast_order_to_kitchen
-from orders.llm.agent import OrderParsingAgent
-from orders.llm.base import ParsedOrder
-from orders.llm.menu_context import build_menu_context
+from orders.llm.agent import BatchOrderParsingAgent, OrderParsingAgent
+from orders.llm.base import ParsedOrder, ParsedOrderBatch
+from orders.llm.compact_menu import CompactMenu, aget_compact_menu_context, get_compact_menu_context
+from orders.llm.fast_parser import afast_parse_order, fast_parse_order
+from orders.llm.menu_retrieval import aget_relevant_menu_context, get_relevant_menu_context
+from orders.llm.parse_cache import parse_cache
+from orders.llm.stream_parser import ParsedOrderStream
 from orders.models import Order, OrderItem
+from orders.price_index import ItemRecord, MenuPriceIndex, VariantRecord
 from restaurants.models import (
     MenuItem,
-    MenuItemModifier,
-    MenuItemVariant,
     Restaurant,
     RestaurantStaff,
     Subscription,
 )
+from restaurants.services.menu_cache_service import MenuCacheService
+from restaurants.services.menu_version_service import MenuVersionService
 
 logger = logging.getLogger(__name__)
 
@@ -63,50 +71,76 @@ class OrderService:
 
     # ── Item Validation & Pricing (shared by confirm + payment flows) ──
 
+    @staticmethod
+    def _resolve_line(
+        restaurant: Restaurant,
+        index: MenuPriceIndex,
+        menu_item_id: int,
+        variant_id: int,
+    ) -> tuple[ItemRecord, VariantRecord] | None:
+        """Resolve a cart line's item and variant, or None if invalid.
+
+        Lines are served from the in-memory price index of the active menu.
+        Items outside it (e.g. a cart built before a version switch) fall
+        back to the database, which accepts any version of the restaurant.
+        """
+        menu_item = index.get_item(menu_item_id)
+        if menu_item is None:
+            db_item = (
+                MenuItem.objects.filter(
+                    id=menu_item_id,
+                    category__version__restaurant=restaurant,
+                    is_active=True,
+                )
+                .prefetch_related("variants", "modifiers")
+                .first()
+            )
+            menu_item = ItemRecord.from_model(db_item) if db_item else None
+
+        if menu_item is None or not menu_item.is_active:
+            return None
+        variant = menu_item.variants.get(variant_id)
+        if variant is None:
+            return None
+        return menu_item, variant
+
     @staticmethod
     def validate_and_price_items(
         restaurant: Restaurant, items_data: list[dict]
     ) -> tuple[list[dict], OrderPricing]:
-        """Validate order items against the database and calculate pricing.
+        """Validate order items against the menu and calculate pricing.
 
         This is the shared logic used by both ConfirmOrderView and
         CreatePaymentView, eliminating the previous code duplication.
 
         Returns (validated_items, pricing) where validated_items is a list of
-        dicts containing resolved model instances.
+        dicts containing the resolved menu_item_id, variant_id and
+        modifier_ids.
         Raises ValidationError on invalid menu items or variants.
         """
         if not items_data:
             raise ValidationError("Order must contain at least one item.")
 
+        index = MenuPriceIndex.for_restaurant(restaurant)
         total_price = Decimal("0.00")
         validated_items = []
 
         for item_data in items_data:
-            try:
-                menu_item = MenuItem.objects.get(
-                    id=item_data["menu_item_id"],
-                    category__version__restaurant=restaurant,
-                    is_active=True,
-                )
-                variant = MenuItemVariant.objects.get(
-                    id=item_data["variant_id"],
-                    menu_item=menu_item,
-                )
-            except (MenuItem.DoesNotExist, MenuItemVariant.DoesNotExist):
+            resolved = OrderService._resolve_line(
+                restaurant, index, item_data["menu_item_id"], item_data["variant_id"]
+            )
+            if resolved is None:
                 raise ValidationError("Invalid menu item or variant.")
+            menu_item, variant = resolved
 
-            valid_modifiers = []
+            valid_modifier_ids = []
             modifier_total = Decimal("0.00")
             for mod_id in item_data.get("modifier_ids", []):
-                try:
-                    modifier = MenuItemModifier.objects.get(
-                        id=mod_id, menu_item=menu_item
-                    )
-                    valid_modifiers.append(modifier)
-                    modifier_total += modifier.price_adjustment
-                except MenuItemModifier.DoesNotExist:
-                    pass  # Skip invalid modifiers silently
+                modifier = menu_item.modifiers.get(mod_id)
+                if modifier is None:
+                    continue  # Skip invalid modifiers silently
+                valid_modifier_ids.append(modifier.id)
+                modifier_total += modifier.price_adjustment
 
             quantity = item_data["quantity"]
             line_total = (variant.price + modifier_total) * quantity
@@ -114,11 +148,11 @@ class OrderService:
 
             validated_items.append(
                 {
-                    "menu_item": menu_item,
-                    "variant": variant,
+                    "menu_item_id": menu_item.id,
+                    "variant_id": variant.id,
                     "quantity": quantity,
                     "special_requests": item_data.get("special_requests", ""),
-                    "modifiers": valid_modifiers,
+                    "modifier_ids": valid_modifier_ids,
                 }
             )
 
@@ -144,44 +178,58 @@ class OrderService:
     def validate_and_price_order(
         restaurant: Restaurant, parsed: ParsedOrder
     ) -> dict:
-        """Validate LLM-parsed order items against the database.
+        """Validate LLM-parsed order items against the menu.
 
         Calculate prices server-side. Drop any invalid items.
         Returns a dict ready for the frontend confirmation step.
         """
+        index = MenuPriceIndex.for_restaurant(restaurant)
+        return OrderService._price_parsed_order(restaurant, index, parsed)
+
+    @staticmethod
+    async def avalidate_and_price_order(
+        restaurant: Restaurant, parsed: ParsedOrder
+    ) -> dict:
+        """Async equivalent of validate_and_price_order().
+
+        Lines found in the active menu's price index are priced on the event
+        loop; only carts that need the database fallback use a thread.
+        """
+        index = await MenuPriceIndex.afor_restaurant(restaurant)
+        if all(index.get_item(item.menu_item_id) for item in parsed.items):
+            return OrderService._price_parsed_order(restaurant, index, parsed)
+        return await sync_to_async(OrderService._price_parsed_order)(
+            restaurant, index, parsed
+        )
+
+    @staticmethod
+    def _price_parsed_order(
+        restaurant: Restaurant, index: MenuPriceIndex, parsed: ParsedOrder
+    ) -> dict:
         validated_items = []
         total_price = Decimal("0.00")
 
         for parsed_item in parsed.items:
-            try:
-                menu_item = MenuItem.objects.get(
-                    id=parsed_item.menu_item_id,
-                    category__version__restaurant=restaurant,
-                    is_active=True,
-                )
-                variant = MenuItemVariant.objects.get(
-                    id=parsed_item.variant_id,
-                    menu_item=menu_item,
-                )
-            except (MenuItem.DoesNotExist, MenuItemVariant.DoesNotExist):
+            resolved = OrderService._resolve_line(
+                restaurant, index, parsed_item.menu_item_id, parsed_item.variant_id
+            )
+            if resolved is None:
                 continue  # Skip invalid items
+            menu_item, variant = resolved
 
             # Validate modifiers
             valid_modifiers = []
             for mod_id in parsed_item.modifier_ids:
-                try:
-                    modifier = MenuItemModifier.objects.get(
-                        id=mod_id, menu_item=menu_item
-                    )
-                    valid_modifiers.append(
-                        {
-                            "id": modifier.id,
-                            "name": modifier.name,
-                            "price_adjustment": str(modifier.price_adjustment),
-                        }
-                    )
-                except MenuItemModifier.DoesNotExist:
+                modifier = menu_item.modifiers.get(mod_id)
+                if modifier is None:
                     continue  # Skip invalid modifiers
+                valid_modifiers.append(
+                    {
+                        "id": modifier.id,
+                        "name": modifier.name,
+                        "price_adjustment": str(modifier.price_adjustment),
+                    }
+                )
 
             item_price = variant.price * parsed_item.quantity
             modifier_total = (
@@ -266,12 +314,12 @@ class OrderService:
         for item_data in validated_items:
             order_item = OrderItem.objects.create(
                 order=order,
-                menu_item=item_data["menu_item"],
-                variant=item_data["variant"],
+                menu_item_id=item_data["menu_item_id"],
+                variant_id=item_data["variant_id"],
                 quantity=item_data["quantity"],
                 special_requests=item_data["special_requests"],
             )
-            order_item.modifiers.set(item_data["modifiers"])
+            order_item.modifiers.set(item_data["modifier_ids"])
 
         if order_status == "confirmed":
             OrderService.set_status_timestamp(order, "confirmed")
@@ -306,35 +354,239 @@ class OrderService:
             return None  # Legacy restaurant, allow access
 
     @staticmethod
-    def increment_order_count(subscription: Subscription | None) -> None:
+    async def acheck_subscription(restaurant: Restaurant) -> Subscription | None:
+        """Async equivalent of check_subscription()."""
+        subscription = await Subscription.objects.filter(restaurant=restaurant).afirst()
+        if subscription is not None:
+            restaurant.subscription = subscription
+            return OrderService.check_subscription(restaurant)
+        return None
+
+    @staticmethod
+    def increment_order_count(subscription: Subscription | None, count: int = 1) -> None:
         """Increment the order count on a subscription (soft cap)."""
-        if subscription:
+        if subscription and count:
             Subscription.objects.filter(id=subscription.id).update(
+                order_count=db_models.F("order_count") + count
+            )
+
+    @staticmethod
+    async def aincrement_order_count(subscription: Subscription | None) -> None:
+        """Async equivalent of increment_order_count()."""
+        if subscription:
+            await Subscription.objects.filter(id=subscription.id).aupdate(
                 order_count=db_models.F("order_count") + 1
             )
 
     # ── LLM Order Parsing ──────────────────────────────────────────
 
+    @staticmethod
+    def _parse_locally(restaurant: Restaurant, fingerprint: str, raw_input: str) -> ParsedOrder | None:
+        """Return a parse from the parse cache or the fast path, or None if the LLM is needed."""
+        parsed = parse_cache.get(restaurant.id, fingerprint, raw_input)
+        if parsed is None and settings.ORDER_FAST_PATH_ENABLED:
+            parsed = fast_parse_order(restaurant, raw_input)
+            if parsed is not None:
+                parse_cache.set(restaurant.id, fingerprint, raw_input, parsed)
+        return parsed
+
+    @staticmethod
+    def _llm_call_labels(restaurant: Restaurant, subscription: Subscription | None) -> dict[str, str]:
+        """llm_call_context() labels: the restaurant for metrics, its plan for concurrency limits."""
+        return {"restaurant": restaurant.slug, "plan": subscription.plan if subscription else ""}
+
+    @staticmethod
+    def _llm_menu_context(restaurant: Restaurant, raw_input: str) -> tuple[str, CompactMenu | None]:
+        """Menu context for the LLM in the configured ORDER_MENU_FORMAT.
+
+        For the compact format the returned CompactMenu maps the short IDs
+        in the model's answer back to database IDs (see to_menu_ids()).
+        """
+        if settings.ORDER_MENU_FORMAT == "compact":
+            return get_compact_menu_context(restaurant, raw_input)
+        return get_relevant_menu_context(restaurant, raw_input), None
+
+    @staticmethod
+    async def _allm_menu_context(restaurant: Restaurant, raw_input: str) -> tuple[str, CompactMenu | None]:
+        """Async equivalent of _llm_menu_context()."""
+        if settings.ORDER_MENU_FORMAT == "compact":
+            return await aget_compact_menu_context(restaurant, raw_input)
+        return await aget_relevant_menu_context(restaurant, raw_input), None
+
+    @staticmethod
+    def to_menu_ids(parsed: ParsedOrder, compact_menu: CompactMenu | None) -> ParsedOrder:
+        """Translate an LLM parse made against a compact menu back to database IDs.
+
+        Lines whose short item or variant ID does not exist are dropped, as
+        validation would drop unknown database IDs. Verbose-format parses
+        (compact_menu is None) already use database IDs.
+        """
+        return compact_menu.to_db(parsed) if compact_menu is not None else parsed
+
     @staticmethod
     def parse_order(restaurant: Restaurant, raw_input: str) -> dict:
         """Parse a natural language order via LLM and validate/price it.
 
         Checks subscription, runs LLM, validates against DB, increments count.
+        Repeated inputs against the same menu are served from the parse
+        cache without an LLM call, but are still validated and priced.
+        Simple orders that match the menu exactly are handled by the
+        deterministic fast path; everything else goes to the LLM.
         Returns validated order dict for frontend confirmation.
         """
         subscription = OrderService.check_subscription(restaurant)
 
-        menu_context = build_menu_context(restaurant)
-        parsed = OrderParsingAgent.run(
-            raw_input=raw_input,
-            menu_context=menu_context,
-        )
+        fingerprint = MenuCacheService.get_fingerprint(restaurant)
+        parsed = OrderService._parse_locally(restaurant, fingerprint, raw_input)
+        if parsed is None:
+            menu_context, compact_menu = OrderService._llm_menu_context(restaurant, raw_input)
+            with llm_call_context(**OrderService._llm_call_labels(restaurant, subscription)):
+                parsed = OrderParsingAgent.run(
+                    raw_input=raw_input,
+                    menu_context=menu_context,
+                )
+            parsed = OrderService.to_menu_ids(parsed, compact_menu)
+            parse_cache.set(restaurant.id, fingerprint, raw_input, parsed)
         result = OrderService.validate_and_price_order(restaurant, parsed)
 
         OrderService.increment_order_count(subscription)
 
         return result
 
+    @staticmethod
+    async def aparse_order(restaurant: Restaurant, raw_input: str) -> dict:
+        """Async equivalent of parse_order() for the async API views.
+
+        Menu state comes from async cache/ORM reads and the LLM call is
+        awaited, so no thread is held for the duration of the model call.
+        """
+        subscription = await OrderService.acheck_subscription(restaurant)
+
+        _, fingerprint = await MenuCacheService.aget_state(restaurant)
+        parsed = parse_cache.get(restaurant.id, fingerprint, raw_input)
+        if parsed is None:
+            if settings.ORDER_FAST_PATH_ENABLED:
+                parsed = await afast_parse_order(restaurant, raw_input)
+            if parsed is None:
+                menu_context, compact_menu = await OrderService._allm_menu_context(restaurant, raw_input)
+                with llm_call_context(**OrderService._llm_call_labels(restaurant, subscription)):
+                    parsed = await OrderParsingAgent.arun(
+                        raw_input=raw_input,
+                        menu_context=menu_context,
+                    )
+                parsed = OrderService.to_menu_ids(parsed, compact_menu)
+            parse_cache.set(restaurant.id, fingerprint, raw_input, parsed)
+        result = await OrderService.avalidate_and_price_order(restaurant, parsed)
+
+        await OrderService.aincrement_order_count(subscription)
+
+        return result
+
+    @staticmethod
+    def parse_orders(restaurant: Restaurant, raw_inputs: list[str]) -> list[dict]:
+        """Parse several customers' orders, e.g. a whole table's, together.
+
+        Inputs the parse cache or the fast path can answer skip the LLM; the
+        rest go to BatchOrderParsingAgent in a single call, so the menu is
+        sent once for all of them. Every parse is validated and priced
+        against the same MenuPriceIndex.
+        Returns one result per input, in input order: {"raw_input", "order"}
+        where order is what parse_order returns, or {"raw_input", "error"}
+        when the model gave no usable parse for that input.
+        """
+        subscription = OrderService.check_subscription(restaurant)
+
+        fingerprint = MenuCacheService.get_fingerprint(restaurant)
+        parses = {
+            raw_input: OrderService._parse_locally(restaurant, fingerprint, raw_input)
+            for raw_input in raw_inputs
+        }
+        pending = [raw_input for raw_input, parsed in parses.items() if parsed is None]
+        if pending:
+            with llm_call_context(**OrderService._llm_call_labels(restaurant, subscription)):
+                parses.update(OrderService._llm_parse_batch(restaurant, pending))
+            for raw_input in pending:
+                if parses[raw_input] is not None:
+                    parse_cache.set(restaurant.id, fingerprint, raw_input, parses[raw_input])
+
+        index = MenuPriceIndex.for_restaurant(restaurant)
+        results = []
+        for raw_input in raw_inputs:
+            parsed = parses[raw_input]
+            if parsed is None:
+                results.append({"raw_input": raw_input, "error": "Could not parse this order. Please try again."})
+            else:
+                order = OrderService._price_parsed_order(restaurant, index, parsed)
+                results.append({"raw_input": raw_input, "order": order})
+
+        OrderService.increment_order_count(subscription, count=sum("order" in result for result in results))
+
+        return results
+
+    @staticmethod
+    def _llm_parse_batch(restaurant: Restaurant, raw_inputs: list[str]) -> dict[str, ParsedOrder | None]:
+        """LLM parses for distinct raw_inputs, in database IDs; None where there is none."""
+        # Retrieval picks the menu items any of the orders mention.
+        menu_context, compact_menu = OrderService._llm_menu_context(restaurant, "\n".join(raw_inputs))
+        if len(raw_inputs) == 1:
+            parsed_orders = [OrderParsingAgent.run(raw_input=raw_inputs[0], menu_context=menu_context)]
+        else:
+            batch = BatchOrderParsingAgent.run(raw_inputs=raw_inputs, menu_context=menu_context)
+            parsed_orders = batch.orders if isinstance(batch, ParsedOrderBatch) else []
+
+        if len(parsed_orders) != len(raw_inputs):
+            # Without one parse per input there is no telling which parse belongs
+            # to which guest, and a guest must never get someone else's items.
+            logger.warning(
+                "Batch parse for %s returned %d orders for %d inputs",
+                restaurant.slug,
+                len(parsed_orders),
+                len(raw_inputs),
+            )
+            return dict.fromkeys(raw_inputs)
+        return {
+            raw_input: OrderService.to_menu_ids(parsed, compact_menu) if isinstance(parsed, ParsedOrder) else None
+            for raw_input, parsed in zip(raw_inputs, parsed_orders, strict=True)
+        }
+
+    @staticmethod
+    def stream_parse_order(restaurant: Restaurant, raw_input: str) -> Iterator[tuple[str, dict]]:
+        """Streaming variant of parse_order.
+
+        The subscription check runs before this returns, so PermissionDenied
+        is raised eagerly. The returned iterator yields ("item", line) for
+        each validated line item as soon as the LLM has finished it, then
+        ("done", result) where result is exactly what parse_order returns.
+        """
+        subscription = OrderService.check_subscription(restaurant)
+        fingerprint = MenuCacheService.get_fingerprint(restaurant)
+        return OrderService._stream_parse_events(restaurant, raw_input, subscription, fingerprint)
+
+    @staticmethod
+    def _stream_parse_events(restaurant, raw_input, subscription, fingerprint) -> Iterator[tuple[str, dict]]:
+        parsed = OrderService._parse_locally(restaurant, fingerprint, raw_input)
+        if parsed is None:
+            stream = ParsedOrderStream()
+            menu_context, compact_menu = OrderService._llm_menu_context(restaurant, raw_input)
+            chunks = OrderParsingAgent.stream(raw_input=raw_input, menu_context=menu_context)
+            with llm_call_context(**OrderService._llm_call_labels(restaurant, subscription)):
+                for chunk in chunks:
+                    for item in stream.feed(chunk):
+                        line_order = OrderService.to_menu_ids(ParsedOrder(items=[item]), compact_menu)
+                        priced = OrderService.validate_and_price_order(restaurant, line_order)
+                        for line in priced["items"]:
+                            yield "item", line
+            parsed = OrderService.to_menu_ids(stream.finish(), compact_menu)
+            parse_cache.set(restaurant.id, fingerprint, raw_input, parsed)
+            result = OrderService.validate_and_price_order(restaurant, parsed)
+        else:
+            result = OrderService.validate_and_price_order(restaurant, parsed)
+            for line in result["items"]:
+                yield "item", line
+
+        OrderService.increment_order_count(subscription)
+        yield "done", result
+
     # ── Payment ────────────────────────────────────────────────────
 
     @staticmethod
@@ -434,6 +686,33 @@ class OrderService:
         except stripe.error.StripeError as e:
             raise ValidationError(f"Failed to verify payment: {e}")
 
+        return OrderService._apply_payment_intent(order, intent)
+
+    @staticmethod
+    async def aconfirm_payment(order: Order) -> Order:
+        """Async equivalent of confirm_payment().
+
+        The Stripe round trip is awaited; the status transition and
+        broadcasts run in a worker thread.
+        """
+        if not order.stripe_payment_intent_id:
+            raise ValidationError(
+                "No payment intent associated with this order."
+            )
+
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        try:
+            intent = await stripe.PaymentIntent.retrieve_async(
+                order.stripe_payment_intent_id
+            )
+        except stripe.error.StripeError as e:
+            raise ValidationError(f"Failed to verify payment: {e}")
+
+        return await sync_to_async(OrderService._apply_payment_intent)(order, intent)
+
+    @staticmethod
+    def _apply_payment_intent(order: Order, intent) -> Order:
+        """Transition the order according to its PaymentIntent's status."""
         if intent.status == "succeeded":
             updated = Order.objects.filter(
                 id=order.id, payment_status="pending"
@@ -766,22 +1045,16 @@ class OrderService:
     def get_public_menu(slug: str) -> dict:
         """Return active menu categories for a restaurant by slug.
 
-        Raises NotFound if restaurant doesn't exist.
+        The serialized categories are cached under the restaurant's menu
+        fingerprint, so repeat requests run no menu queries until a menu
+        write. Raises NotFound if restaurant doesn't exist.
         """
-        from restaurants.models import MenuCategory
-        from restaurants.serializers import PublicMenuCategorySerializer
-
         try:
             restaurant = Restaurant.objects.get(slug=slug)
         except Restaurant.DoesNotExist:
             raise NotFound("Restaurant not found.")
 
-        active_version = restaurant.menu_versions.filter(is_active=True).first()
-        categories = (
-            MenuCategory.objects.filter(version=active_version, is_active=True)
-            .prefetch_related("items__variants", "items__modifiers")
-            .order_by("sort_order")
-        ) if active_version else MenuCategory.objects.none()
+        categories = MenuCacheService.get_or_build(restaurant, "public_menu", OrderService._build_public_menu)
 
         # Determine payment mode from POS connection
         from integrations.models import POSConnection
@@ -794,12 +1067,25 @@ class OrderService:
         return {
             "restaurant_name": restaurant.name,
             "tax_rate": str(restaurant.tax_rate),
-            "categories": PublicMenuCategorySerializer(
-                categories, many=True
-            ).data,
+            "categories": categories,
             "payment_mode": payment_mode,
         }
 
+    @staticmethod
+    def _build_public_menu(version_id: int | None) -> list:
+        """Serialize the active categories of a menu version for the public menu."""
+        from restaurants.serializers import PublicMenuCategorySerializer
+
+        if version_id is None:
+            return []
+        categories = (
+            MenuVersionService.categories(version_id)
+            .filter(is_active=True)
+            .prefetch_related("items__variants", "items__modifiers")
+            .order_by("sort_order")
+        )
+        return list(PublicMenuCategorySerializer(categories, many=True).data)
+
     @staticmethod
     def get_restaurant_by_slug(slug: str) -> Restaurant:
         """Look up a restaurant by slug. Raises NotFound if missing."""
@@ -807,3 +1093,11 @@ class OrderService:
             return Restaurant.objects.get(slug=slug)
         except Restaurant.DoesNotExist:
             raise NotFound("Restaurant not found.")
+
+    @staticmethod
+    async def aget_restaurant_by_slug(slug: str) -> Restaurant:
+        """Async equivalent of get_restaurant_by_slug()."""
+        try:
+            return await Restaurant.objects.aget(slug=slug)
+        except Restaurant.DoesNotExist:
+            raise NotFound("Restaurant not found.") from None
@@ -0,0 +1,30 @@
+"""
+Server-sent events helpers for streaming API responses.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+def format_sse(event: str, data) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views accept ``Accept: text/event-stream``. Streaming views return
+    their own StreamingHttpResponse; this only renders error responses raised
+    before the stream starts, as a single "error" event.
+    """
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return format_sse("error", data).encode(self.charset)
@@ -0,0 +1,123 @@
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from channels.db import database_sync_to_async
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.models import Order
+from orders.services import OrderService
+from orders.tests.factories import OrderFactory
+from orders.views import AsyncConfirmPaymentView, AsyncParseOrderView
+from restaurants.models import Subscription
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+factory = AsyncRequestFactory()
+
+
+@database_sync_to_async
+def _menu_setup(slug):
+    restaurant = RestaurantFactory(slug=slug)
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    item = MenuItemFactory(category=MenuCategoryFactory(version=version), name="Burger")
+    variant = MenuItemVariantFactory(menu_item=item, label="Regular", price=Decimal("12.99"))
+    return restaurant, ParsedOrder(items=[ParsedOrderItem(menu_item_id=item.id, variant_id=variant.id, quantity=2)])
+
+
+async def _post(view, path, body, **kwargs):
+    request = factory.post(path, data=json.dumps(body), content_type="application/json")
+    return await view.as_view()(request, **kwargs)
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestAsyncParseOrderView:
+    async def test_same_payload_as_sync_parse(self, settings):
+        settings.ORDER_FAST_PATH_ENABLED = False
+        restaurant, parsed = await _menu_setup("async-parse")
+
+        with patch("orders.services.OrderParsingAgent.arun", new=AsyncMock(return_value=parsed)) as mock_arun:
+            response = await _post(AsyncParseOrderView, "/", {"raw_input": "two burgers please"}, slug="async-parse")
+        assert response.status_code == 200
+        mock_arun.assert_awaited_once()
+        assert "Burger" in mock_arun.call_args.kwargs["menu_context"]
+
+        with patch("orders.services.OrderParsingAgent.run", return_value=parsed):
+            expected = await database_sync_to_async(OrderService.parse_order)(restaurant, "something else")
+        assert json.loads(response.content) == json.loads(json.dumps(expected))
+
+    async def test_fast_path_skips_llm(self):
+        await _menu_setup("async-fast")
+        with patch("orders.services.OrderParsingAgent.arun", new=AsyncMock()) as mock_arun:
+            response = await _post(AsyncParseOrderView, "/", {"raw_input": "2 burgers"}, slug="async-fast")
+        mock_arun.assert_not_awaited()
+        assert json.loads(response.content)["total_price"] == "25.98"
+
+    async def test_errors_use_drf_shapes(self):
+        restaurant, _ = await _menu_setup("async-errors")
+
+        missing = await _post(AsyncParseOrderView, "/", {"raw_input": "x"}, slug="nope")
+        assert missing.status_code == 404
+        assert json.loads(missing.content) == {"detail": "Restaurant not found."}
+
+        invalid = await _post(AsyncParseOrderView, "/", {}, slug="async-errors")
+        assert invalid.status_code == 400
+        assert "raw_input" in json.loads(invalid.content)
+
+        await Subscription.objects.acreate(
+            restaurant=restaurant,
+            plan="starter",
+            status="canceled",
+            current_period_start=timezone.now(),
+            current_period_end=timezone.now(),
+        )
+        blocked = await _post(AsyncParseOrderView, "/", {"raw_input": "burger"}, slug="async-errors")
+        assert blocked.status_code == 403
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestAsyncConfirmPaymentView:
+    @patch("orders.services.broadcast_order_to_kitchen")
+    @patch("orders.services.broadcast_order_to_customer")
+    @patch("orders.tasks.broadcast_queue_updates.apply_async")
+    @patch("orders.views.dispatch_order_to_pos.delay")
+    async def test_succeeded_intent_confirms_order(self, mock_dispatch, *_):
+        order = await database_sync_to_async(OrderFactory)(
+            restaurant=await database_sync_to_async(RestaurantFactory)(slug="async-pay"),
+            status="pending_payment",
+            payment_status="pending",
+            stripe_payment_intent_id="pi_123",
+        )
+        retrieve = AsyncMock(return_value=SimpleNamespace(status="succeeded"))
+
+        with patch("orders.services.stripe.PaymentIntent.retrieve_async", new=retrieve):
+            response = await _post(AsyncConfirmPaymentView, "/", {}, slug="async-pay", order_id=order.id)
+
+        assert response.status_code == 200
+        retrieve.assert_awaited_once_with("pi_123")
+        assert json.loads(response.content)["status"] == "confirmed"
+        refreshed = await Order.objects.aget(id=order.id)
+        assert refreshed.payment_status == "paid"
+        mock_dispatch.assert_called_once_with(str(order.id))
+
+    async def test_unknown_order_is_404(self):
+        await database_sync_to_async(RestaurantFactory)(slug="async-pay-404")
+        response = await _post(
+            AsyncConfirmPaymentView,
+            "/",
+            {},
+            slug="async-pay-404",
+            order_id="00000000-0000-0000-0000-000000000000",
+        )
+        assert response.status_code == 404
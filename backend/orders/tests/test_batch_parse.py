@@ -0,0 +1,140 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from orders.llm.agent import BatchOrderParsingAgent
+from orders.llm.base import ParsedOrder, ParsedOrderBatch, ParsedOrderItem
+from orders.services import OrderService
+from restaurants.models import Subscription
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+
+class TestBatchOrderParsingAgent:
+    def test_orders_are_numbered_in_the_user_message(self):
+        agent = BatchOrderParsingAgent()
+        kwargs = {"raw_inputs": ["a burger", "two fries"], "menu_context": "## Mains"}
+
+        assert agent.get_output_schema() is ParsedOrderBatch
+        assert list(agent.get_context(**kwargs)) == ["restaurant_menu"]
+        assert agent.get_request_context(**kwargs) == {
+            "customer_orders": '<order number="1">\na burger\n</order>\n<order number="2">\ntwo fries\n</order>'
+        }
+
+
+@pytest.mark.django_db
+class TestParseOrders:
+    @pytest.fixture(autouse=True)
+    def llm_only(self, settings):
+        settings.ORDER_FAST_PATH_ENABLED = False
+        settings.ORDER_MENU_FORMAT = "verbose"
+
+    @pytest.fixture
+    def menu(self):
+        restaurant = RestaurantFactory(slug="table-six")
+        version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+        cat = MenuCategoryFactory(version=version, name="Mains")
+        burger = MenuItemFactory(category=cat, name="Burger")
+        burger_regular = MenuItemVariantFactory(menu_item=burger, label="Regular", price=Decimal("12.00"))
+        fries = MenuItemFactory(category=cat, name="Fries")
+        fries_regular = MenuItemVariantFactory(menu_item=fries, label="Regular", price=Decimal("3.50"))
+        return {
+            "restaurant": restaurant,
+            "burger": ParsedOrderItem(menu_item_id=burger.id, variant_id=burger_regular.id),
+            "fries": ParsedOrderItem(menu_item_id=fries.id, variant_id=fries_regular.id, quantity=2),
+        }
+
+    @patch("orders.services.OrderParsingAgent.run")
+    @patch("orders.services.BatchOrderParsingAgent.run")
+    def test_one_llm_call_for_the_table(self, mock_batch, mock_single, menu):
+        mock_batch.return_value = ParsedOrderBatch(
+            orders=[
+                ParsedOrder(items=[menu["burger"]], allergies=["Peanuts"]),
+                ParsedOrder(items=[menu["fries"]], language="fr"),
+            ]
+        )
+
+        results = OrderService.parse_orders(menu["restaurant"], ["a burger", "deux frites"])
+
+        mock_batch.assert_called_once()
+        mock_single.assert_not_called()
+        assert mock_batch.call_args.kwargs["raw_inputs"] == ["a burger", "deux frites"]
+        assert [r["raw_input"] for r in results] == ["a burger", "deux frites"]
+        burger, fries = (r["order"] for r in results)
+        assert (burger["total_price"], burger["allergies"]) == ("12.00", ["Peanuts"])
+        assert (fries["total_price"], fries["language"]) == ("7.00", "fr")
+
+    @patch("orders.services.OrderParsingAgent.run")
+    @patch("orders.services.BatchOrderParsingAgent.run")
+    def test_cached_and_repeated_inputs_skip_the_batch(self, mock_batch, mock_single, menu):
+        mock_single.return_value = ParsedOrder(items=[menu["burger"]])
+        OrderService.parse_order(menu["restaurant"], "a burger")
+        mock_single.reset_mock()
+        mock_single.return_value = ParsedOrder(items=[menu["fries"]])
+
+        results = OrderService.parse_orders(menu["restaurant"], ["a burger", "fries", "fries"])
+
+        # Only "fries" needs the LLM, once; a single order uses the single-order agent.
+        mock_batch.assert_not_called()
+        mock_single.assert_called_once()
+        assert mock_single.call_args.kwargs["raw_input"] == "fries"
+        assert [r["order"]["total_price"] for r in results] == ["12.00", "7.00", "7.00"]
+
+    @patch("orders.services.BatchOrderParsingAgent.run")
+    def test_unmatched_batch_answer_is_an_error_per_order(self, mock_batch, menu):
+        mock_batch.return_value = ParsedOrderBatch(orders=[ParsedOrder(items=[menu["burger"]])])
+
+        results = OrderService.parse_orders(menu["restaurant"], ["a burger", "fries"])
+
+        assert [set(r) for r in results] == [{"raw_input", "error"}] * 2
+
+    @patch("orders.services.BatchOrderParsingAgent.run")
+    def test_counts_each_parsed_order(self, mock_batch, menu):
+        restaurant = menu["restaurant"]
+        subscription = Subscription.objects.create(
+            restaurant=restaurant,
+            plan="growth",
+            status="active",
+            current_period_start=timezone.now(),
+            current_period_end=timezone.now() + timedelta(days=30),
+        )
+        mock_batch.return_value = ParsedOrderBatch(
+            orders=[ParsedOrder(items=[menu["burger"]]), ParsedOrder(items=[menu["fries"]])]
+        )
+
+        OrderService.parse_orders(restaurant, ["a burger", "fries"])
+
+        subscription.refresh_from_db()
+        assert subscription.order_count == 2
+
+
+@pytest.mark.django_db
+class TestParseOrderBatchView:
+    @patch("orders.services.BatchOrderParsingAgent.run")
+    def test_returns_results(self, mock_batch, api_client):
+        restaurant = RestaurantFactory(slug="batch-view")
+        mock_batch.return_value = ParsedOrderBatch(orders=[ParsedOrder(items=[]), ParsedOrder(items=[])])
+
+        response = api_client.post(
+            f"/api/order/{restaurant.slug}/parse/batch/", {"raw_inputs": ["one", "two"]}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [r["order"]["items"] for r in response.data["results"]] == [[], []]
+
+    def test_rejects_empty_and_oversized_batches(self, api_client):
+        restaurant = RestaurantFactory(slug="batch-limits")
+        url = f"/api/order/{restaurant.slug}/parse/batch/"
+
+        assert api_client.post(url, {"raw_inputs": []}, format="json").status_code == 400
+        response = api_client.post(url, {"raw_inputs": ["a burger"] * 13}, format="json")
+        assert response.status_code == 400
@@ -0,0 +1,166 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.llm.compact_menu import CompactMenu, get_compact_menu_context
+from orders.llm.menu_context import build_menu_context, load_menu_categories
+from orders.llm.menu_retrieval import PRUNED_NOTE, RETRIEVAL_MIN_ITEMS, MenuRetrievalIndex
+from orders.services import OrderService
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+
+@pytest.fixture
+def pizza_menu(db):
+    restaurant = RestaurantFactory(name="Pizza Place")
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    category = MenuCategoryFactory(version=version, name="Pizzas")
+    pizzas = {}
+    for sort_order, name in enumerate(["Margherita", "Pepperoni"]):
+        item = MenuItemFactory(category=category, name=name, description="Wood fired", sort_order=sort_order)
+        small = MenuItemVariantFactory(menu_item=item, label="Small", price=Decimal("9.00"), is_default=True)
+        large = MenuItemVariantFactory(menu_item=item, label="Large", price=Decimal("14.00"), is_default=False)
+        cheese = MenuItemModifierFactory(menu_item=item, name="Extra Cheese", price_adjustment=Decimal("2.00"))
+        olives = MenuItemModifierFactory(menu_item=item, name="Olives", price_adjustment=Decimal("1.00"))
+        pizzas[name] = (item, small, large, cheese, olives)
+    return restaurant, version, pizzas
+
+
+@pytest.fixture
+def large_menu(db, settings):
+    settings.LLM_PROMPT_CACHE_ENABLED = False  # retrieval only prunes without prompt caching
+    restaurant = RestaurantFactory()
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    category = MenuCategoryFactory(version=version, name="Everything")
+    names = [f"Dish {chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(RETRIEVAL_MIN_ITEMS)] + ["Latte"]
+    for sort_order, name in enumerate(names):
+        item = MenuItemFactory(category=category, name=name, description="", sort_order=sort_order)
+        MenuItemVariantFactory(menu_item=item)
+    MenuItemModifierFactory(menu_item=item, name="Oat Milk")
+    return restaurant, version
+
+
+@pytest.mark.django_db
+class TestCompactMenu:
+    def test_renders_one_row_per_item_with_shared_modifier_group(self, pizza_menu):
+        _, version, _ = pizza_menu
+
+        context = CompactMenu.build(version.id).render()
+
+        assert "1|Margherita|Wood fired|1:Small:9.00*,2:Large:14.00|M1" in context
+        assert "2|Pepperoni|Wood fired|1:Small:9.00*,2:Large:14.00|M1" in context
+        assert context.count("Extra Cheese") == 1
+        assert "M1|1:Extra Cheese:+2.00,2:Olives:+1.00" in context
+
+    def test_is_smaller_than_verbose_context(self, pizza_menu):
+        restaurant, version, _ = pizza_menu
+        assert len(CompactMenu.build(version.id).render()) < len(build_menu_context(restaurant))
+
+    def test_separators_in_names_are_escaped(self, pizza_menu):
+        _, version, _ = pizza_menu
+        category = version.categories.first()
+        item = MenuItemFactory(category=category, name="Half|Half", description="", sort_order=5)
+        MenuItemVariantFactory(menu_item=item, label="10: inch, thin", price=Decimal("11.00"))
+
+        context = CompactMenu.build(version.id).render()
+
+        assert "3|Half/Half||1:10/ inch/ thin:11.00*|" in context
+
+    def test_to_db_maps_short_ids_back(self, pizza_menu):
+        _, version, pizzas = pizza_menu
+        pepperoni, _, large, cheese, olives = pizzas["Pepperoni"]
+        parsed = ParsedOrder(
+            items=[ParsedOrderItem(menu_item_id=2, variant_id=2, quantity=3, modifier_ids=[2, 1])],
+            language="fr",
+        )
+
+        restored = CompactMenu.build(version.id).to_db(parsed)
+
+        [item] = restored.items
+        assert (item.menu_item_id, item.variant_id, item.quantity) == (pepperoni.id, large.id, 3)
+        assert item.modifier_ids == [olives.id, cheese.id]
+        assert restored.language == "fr"
+
+    def test_to_db_drops_unknown_short_ids(self, pizza_menu):
+        _, version, pizzas = pizza_menu
+        parsed = ParsedOrder(
+            items=[
+                ParsedOrderItem(menu_item_id=99, variant_id=1),
+                ParsedOrderItem(menu_item_id=1, variant_id=3),
+                ParsedOrderItem(menu_item_id=1, variant_id=1, modifier_ids=[7, 1]),
+            ]
+        )
+
+        [item] = CompactMenu.build(version.id).to_db(parsed).items
+
+        margherita, small, _, cheese, _ = pizzas["Margherita"]
+        assert (item.menu_item_id, item.variant_id, item.modifier_ids) == (margherita.id, small.id, [cheese.id])
+
+    def test_ties_in_sort_order_are_numbered_by_id(self, db):
+        version = MenuVersionFactory(is_active=True)
+        categories = [MenuCategoryFactory(version=version, name=name, sort_order=0) for name in ("Mains", "Drinks")]
+        for category in categories:
+            for name in ("B", "A"):
+                MenuItemFactory(category=category, name=f"{category.name} {name}", sort_order=0)
+
+        loaded = load_menu_categories(version.id)
+
+        assert loaded.query.order_by == ("sort_order", "id")
+        assert [c.id for c in loaded] == sorted(c.id for c in categories)
+        assert CompactMenu.build(version.id).category_names == MenuRetrievalIndex.build(version.id).category_names
+
+    def test_pruned_context_keeps_full_menu_numbering(self, large_menu):
+        restaurant, version = large_menu
+        full = CompactMenu.build(version.id).render()
+        latte_row = next(line for line in full.splitlines() if "|Latte|" in line)
+
+        context, _ = get_compact_menu_context(restaurant, "two lattes with oat milk")
+
+        assert PRUNED_NOTE in context
+        assert latte_row in context
+        assert "Oat Milk" in context
+        assert "Dish AA" not in context
+
+    def test_pruned_context_uses_the_index_built_with_the_menu(self, large_menu):
+        restaurant, version = large_menu
+        menu = CompactMenu.build(version.id)
+        latte_row = next(line for line in menu.render().splitlines() if "|Latte|" in line)
+        # The menu changes after the cached CompactMenu was read: new items shift every position.
+        for n in range(5):
+            MenuItemFactory(category=version.categories.get(), name=f"Special {n}", sort_order=-1)
+
+        with patch("orders.llm.compact_menu._compact_menus.get", return_value=menu):
+            context, _ = get_compact_menu_context(restaurant, "two lattes with oat milk")
+
+        assert latte_row in context
+        assert "Special" not in context
+
+
+@pytest.mark.django_db
+class TestCompactParseOrder:
+    @patch("orders.services.OrderParsingAgent")
+    def test_parse_order_prices_short_id_answer(self, mock_agent, pizza_menu, settings):
+        settings.ORDER_MENU_FORMAT = "compact"
+        settings.ORDER_FAST_PATH_ENABLED = False
+        restaurant, _, pizzas = pizza_menu
+        mock_agent.run.return_value = ParsedOrder(
+            items=[ParsedOrderItem(menu_item_id=1, variant_id=2, quantity=2, modifier_ids=[1])]
+        )
+
+        result = OrderService.parse_order(restaurant, "two large margheritas with extra cheese")
+
+        margherita, _, large, cheese, _ = pizzas["Margherita"]
+        [line] = result["items"]
+        assert line["menu_item_id"] == margherita.id
+        assert line["variant"]["id"] == large.id
+        assert [m["id"] for m in line["modifiers"]] == [cheese.id]
+        assert line["line_total"] == "32.00"
+        assert "1|Margherita|" in mock_agent.run.call_args.kwargs["menu_context"]
@@ -0,0 +1,148 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.llm.fast_parser import FastOrderParser, fast_parse_order
+from orders.services import OrderService
+from restaurants.services.menu_cache_service import MenuCacheService
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+
+@pytest.fixture
+def menu(db):
+    restaurant = RestaurantFactory()
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    drinks = MenuCategoryFactory(version=version, name="Drinks")
+    mains = MenuCategoryFactory(version=version, name="Mains")
+    latte = MenuItemFactory(category=drinks, name="Latte")
+    medium = MenuItemVariantFactory(menu_item=latte, label="Medium", price=Decimal("4.50"))
+    large = MenuItemVariantFactory(menu_item=latte, label="Large", price=Decimal("5.00"), is_default=False)
+    oat = MenuItemModifierFactory(menu_item=latte, name="Oat Milk", price_adjustment=Decimal("0.75"))
+    burger = MenuItemFactory(category=mains, name="Classic Cheeseburger")
+    single = MenuItemVariantFactory(menu_item=burger, label="Single", price=Decimal("11.50"))
+    bacon = MenuItemModifierFactory(menu_item=burger, name="Extra Bacon", price_adjustment=Decimal("2.00"))
+    veggie = MenuItemFactory(category=mains, name="Veggie Burger")
+    MenuItemVariantFactory(menu_item=veggie, label="Regular")
+    MenuItemFactory(category=mains, name="Mushroom Burger")
+    hidden = MenuItemFactory(category=mains, name="Secret Burrito", is_active=False)
+    MenuItemVariantFactory(menu_item=hidden)
+    return {
+        "restaurant": restaurant,
+        "version": version,
+        "latte": latte,
+        "medium": medium,
+        "large": large,
+        "oat": oat,
+        "burger": burger,
+        "single": single,
+        "bacon": bacon,
+    }
+
+
+def _item(item, variant, quantity=1, modifiers=(), special_requests=""):
+    return ParsedOrderItem(
+        menu_item_id=item.id,
+        variant_id=variant.id,
+        quantity=quantity,
+        modifier_ids=[m.id for m in modifiers],
+        special_requests=special_requests,
+    )
+
+
+@pytest.mark.django_db
+class TestFastOrderParser:
+    def parse(self, menu, text):
+        return FastOrderParser.build(menu["version"].id).parse(text)[0]
+
+    def test_quantity_variant_and_modifier(self, menu):
+        parsed = self.parse(menu, "Two large lattes with oat milk please")
+        assert parsed == ParsedOrder(
+            items=[_item(menu["latte"], menu["large"], 2, [menu["oat"]])],
+            language="en",
+        )
+
+    def test_multiple_items_and_exclusions(self, menu):
+        parsed = self.parse(menu, "a cheeseburger with extra bacon, no onions and 3 lattes")
+        assert parsed.items == [
+            _item(menu["burger"], menu["single"], 1, [menu["bacon"]], "no onions"),
+            _item(menu["latte"], menu["medium"], 3),
+        ]
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("a cheeseburger no pickles 2 lattes", [("burger", "single", 1, "no pickles"), ("latte", "medium", 2, "")]),
+            ("cheeseburger without onions latte", [("burger", "single", 1, "no onions"), ("latte", "medium", 1, "")]),
+            ("latte no sugar large", [("latte", "large", 1, "no sugar")]),
+        ],
+    )
+    def test_exclusion_ends_at_next_quantity_item_or_variant(self, menu, text, expected):
+        parsed = self.parse(menu, text)
+        assert parsed.items == [
+            _item(menu[item], menu[variant], quantity, special_requests=request)
+            for item, variant, quantity, request in expected
+        ]
+
+    def test_trailing_multiplier_and_typo(self, menu):
+        parsed = self.parse(menu, "cheesburger x2")
+        assert parsed.items == [_item(menu["burger"], menu["single"], 2)]
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "a burger",  # three items contain "burger"
+            "latte and a croissant",  # not on the menu
+            "secret burrito",  # inactive
+            "mushroom burger",  # no variant to price
+            "a latte, I'm allergic to nuts",
+            "un café latte, por favor",
+            "quiero un latte",
+            "no onions",
+            "2 lattes no foam oat milk",  # is oat milk excluded or added?
+            "",
+        ],
+    )
+    def test_defers_to_llm(self, menu, text):
+        assert self.parse(menu, text) is None
+
+    def test_matcher_follows_menu_changes(self, menu):
+        restaurant = menu["restaurant"]
+        assert fast_parse_order(restaurant, "croissant") is None
+
+        croissant = MenuItemFactory(category=menu["latte"].category, name="Croissant")
+        variant = MenuItemVariantFactory(menu_item=croissant)
+        MenuCacheService.invalidate(restaurant)
+
+        assert fast_parse_order(restaurant, "croissant").items == [_item(croissant, variant)]
+
+
+@pytest.mark.django_db
+class TestParseOrderFastPath:
+    @patch("orders.services.OrderParsingAgent.run")
+    def test_simple_order_skips_llm(self, mock_run, menu):
+        result = OrderService.parse_order(menu["restaurant"], "2 lattes")
+        mock_run.assert_not_called()
+        assert result["total_price"] == "9.00"
+
+    @patch("orders.services.OrderParsingAgent.run")
+    def test_unclear_order_falls_back_to_llm(self, mock_run, menu):
+        mock_run.return_value = ParsedOrder(items=[_item(menu["latte"], menu["medium"])])
+        result = OrderService.parse_order(menu["restaurant"], "something warm to drink")
+        mock_run.assert_called_once()
+        assert result["items"][0]["name"] == "Latte"
+
+    @patch("orders.services.OrderParsingAgent.run")
+    def test_disabled_by_setting(self, mock_run, menu, settings):
+        settings.ORDER_FAST_PATH_ENABLED = False
+        mock_run.return_value = ParsedOrder(items=[_item(menu["latte"], menu["medium"], 2)])
+        OrderService.parse_order(menu["restaurant"], "2 lattes")
+        mock_run.assert_called_once()
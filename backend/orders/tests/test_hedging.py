@@ -0,0 +1,156 @@
+"""
+Tests for hedged LLM requests (ai.hedging) through OrderParsingAgent.
+
+agno is replaced by a fake whose latency and output depend on the model ID.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import agno.models.anthropic  # noqa: F401  (imported up front so hedges don't pay for it)
+import pytest
+
+from ai.hedging import hedge_stats
+from orders.llm.agent import OrderParsingAgent
+from orders.llm.base import ParsedOrder
+
+PRIMARY = "gpt-4o-mini"
+ALTERNATE = "claude-sonnet-4-20250514"
+
+
+@pytest.fixture(autouse=True)
+def hedging(settings):
+    settings.LLM_MODEL = ""
+    settings.OPENAI_API_KEY = "sk-test"
+    settings.ANTHROPIC_API_KEY = "sk-ant-test"
+    settings.LLM_HEDGING_ENABLED = True
+    settings.LLM_HEDGE_MODEL = ALTERNATE
+    settings.LLM_HEDGE_BUDGETS = {"OrderParsingAgent": 0.05}
+    hedge_stats.clear()
+    yield
+    hedge_stats.clear()
+
+
+def _order(language: str) -> ParsedOrder:
+    return ParsedOrder(items=[], language=language)
+
+
+def fake_agno(behaviour: dict[str, tuple[float, object]]):
+    """Patch agno's Agent: each model sleeps, then returns or raises its outcome."""
+
+    def outcome(model_id):
+        delay, result = behaviour[model_id]
+        return delay, result
+
+    def build(**kwargs):
+        model_id = kwargs["model"].id
+        agent = MagicMock(model=kwargs["model"])
+
+        def run(*args, **kw):
+            delay, result = outcome(model_id)
+            time.sleep(delay)
+            if isinstance(result, Exception):
+                raise result
+            return MagicMock(content=result)
+
+        async def arun(*args, **kw):
+            delay, result = outcome(model_id)
+            await asyncio.sleep(delay)
+            if isinstance(result, Exception):
+                raise result
+            return MagicMock(content=result)
+
+        agent.run.side_effect = run
+        agent.arun = AsyncMock(side_effect=arun)
+        return agent
+
+    return patch("ai.base_agent.Agent", side_effect=build)
+
+
+def _run():
+    return OrderParsingAgent.run(raw_input="a burger", menu_context="menu")
+
+
+class TestHedgedRun:
+    def test_fast_primary_is_not_hedged(self):
+        with fake_agno({PRIMARY: (0, _order("primary")), ALTERNATE: (0, _order("alternate"))}) as agent_class:
+            assert _run().language == "primary"
+
+        assert agent_class.call_count == 1
+        stats = hedge_stats.snapshot()["OrderParsingAgent"]
+        assert (stats.calls, stats.hedged, stats.hedge_wins) == (1, 0, 0)
+
+    def test_slow_primary_loses_to_hedge_and_is_cancelled(self):
+        with (
+            fake_agno({PRIMARY: (1.0, _order("primary")), ALTERNATE: (0, _order("alternate"))}),
+            patch("ai.hedging.Agent.cancel_run") as cancel_run,
+        ):
+            assert _run().language == "alternate"
+
+        cancel_run.assert_called_once()
+        stats = hedge_stats.snapshot()["OrderParsingAgent"]
+        assert (stats.calls, stats.hedged, stats.hedge_wins) == (1, 1, 1)
+        assert stats.hedge_rate == 1.0
+
+    def test_slow_primary_still_wins_over_slower_hedge(self):
+        with fake_agno({PRIMARY: (0.1, _order("primary")), ALTERNATE: (1.0, _order("alternate"))}):
+            assert _run().language == "primary"
+
+        stats = hedge_stats.snapshot()["OrderParsingAgent"]
+        assert (stats.hedged, stats.hedge_wins) == (1, 0)
+
+    def test_invalid_hedge_output_is_ignored(self):
+        with fake_agno({PRIMARY: (0.2, _order("primary")), ALTERNATE: (0, "not json")}):
+            assert _run().language == "primary"
+
+    def test_failed_primary_fails_over_immediately(self):
+        with fake_agno({PRIMARY: (0, RuntimeError("boom")), ALTERNATE: (0, _order("alternate"))}):
+            assert _run().language == "alternate"
+
+        stats = hedge_stats.snapshot()["OrderParsingAgent"]
+        assert (stats.failovers, stats.hedged, stats.hedge_wins) == (1, 0, 1)
+
+    def test_both_failing_raises_the_error(self):
+        with fake_agno({PRIMARY: (0, RuntimeError("primary down")), ALTERNATE: (0, RuntimeError("alt down"))}):
+            with pytest.raises(RuntimeError, match="alt down"):
+                _run()
+
+    def test_disabled_by_default(self, settings):
+        settings.LLM_HEDGING_ENABLED = False
+        with fake_agno({PRIMARY: (0.1, _order("primary")), ALTERNATE: (0, _order("alternate"))}) as agent_class:
+            assert _run().language == "primary"
+
+        assert agent_class.call_count == 1
+        assert hedge_stats.snapshot() == {}
+
+    def test_alternate_equal_to_primary_is_not_hedged(self, settings):
+        settings.LLM_HEDGE_MODEL = PRIMARY
+        with fake_agno({PRIMARY: (0.1, _order("primary"))}) as agent_class:
+            assert _run().language == "primary"
+
+        assert agent_class.call_count == 1
+
+    def test_per_agent_budget_falls_back_to_class_default(self, settings):
+        settings.LLM_HEDGE_BUDGETS = {}
+        assert OrderParsingAgent()._hedge_policy() == (ALTERNATE, OrderParsingAgent.hedge_after)
+
+
+@pytest.mark.asyncio
+class TestHedgedArun:
+    async def test_slow_primary_task_is_cancelled(self):
+        with fake_agno({PRIMARY: (5.0, _order("primary")), ALTERNATE: (0, _order("alternate"))}):
+            started = time.perf_counter()
+            result = await OrderParsingAgent.arun(raw_input="a burger", menu_context="menu")
+
+        assert result.language == "alternate"
+        assert time.perf_counter() - started < 2.0
+        stats = hedge_stats.snapshot()["OrderParsingAgent"]
+        assert (stats.hedged, stats.hedge_wins) == (1, 1)
+
+    async def test_failed_primary_fails_over(self):
+        with fake_agno({PRIMARY: (0, RuntimeError("boom")), ALTERNATE: (0, _order("alternate"))}):
+            result = await OrderParsingAgent.arun(raw_input="a burger", menu_context="menu")
+
+        assert result.language == "alternate"
+        assert hedge_stats.snapshot()["OrderParsingAgent"].failovers == 1
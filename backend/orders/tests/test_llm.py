@@ -1,5 +1,5 @@
 from decimal import Decimal
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -76,26 +76,22 @@ class TestOrderParsingAgent:
 
     def test_agent_context_building(self):
         agent = OrderParsingAgent()
-        context = agent.get_context(
-            raw_input="Two pizzas please",
-            menu_context="## Pizzas\n  - Margherita",
-        )
-        assert "customer_order" in context
-        assert context["customer_order"] == "Two pizzas please"
-        assert "restaurant_menu" in context
+        kwargs = {"raw_input": "Two pizzas please", "menu_context": "## Pizzas\n  - Margherita"}
+        # The menu is part of the stable system prompt; the order text is per request.
+        context = agent.get_context(**kwargs)
+        assert list(context) == ["restaurant_menu"]
         assert "Margherita" in context["restaurant_menu"]
+        assert agent.get_request_context(**kwargs) == {"customer_order": "Two pizzas please"}
 
     def test_agent_context_xml_formatting(self):
         agent = OrderParsingAgent()
-        context = agent.get_context(
-            raw_input="One burger",
-            menu_context="## Burgers",
-        )
-        xml = agent._format_context(context)
-        assert "<customer_order>" in xml
-        assert "</customer_order>" in xml
+        kwargs = {"raw_input": "One burger", "menu_context": "## Burgers"}
+        xml = agent._format_context(agent.get_context(**kwargs))
         assert "<restaurant_menu>" in xml
         assert "</restaurant_menu>" in xml
+        prompt = agent._compose_prompt(agent.prompt(), **kwargs)
+        assert prompt.startswith("<customer_order>\nOne burger\n</customer_order>")
+        assert prompt.endswith(agent.prompt())
 
     @patch("ai.base_agent.Agent")
     def test_agent_run_calls_agno(self, mock_agent_class):
@@ -127,3 +123,178 @@ class TestOrderParsingAgent:
         assert result.items[0].quantity == 2
         assert result.language == "en"
         mock_agent_instance.run.assert_called_once()
+
+    @patch("ai.base_agent.Agent")
+    def test_agent_stream_yields_content_chunks(self, mock_agent_class):
+        """stream() runs agno with stream=True, unparsed, and yields text chunks."""
+        from agno.run.agent import RunContentEvent
+
+        mock_agent_instance = MagicMock()
+        mock_agent_instance.run.return_value = iter(
+            [RunContentEvent(content='{"items": '), MagicMock(), RunContentEvent(content="[]}")]
+        )
+        mock_agent_class.return_value = mock_agent_instance
+
+        chunks = list(OrderParsingAgent.stream(raw_input="nothing", menu_context="menu"))
+
+        assert chunks == ['{"items": ', "[]}"]
+        assert mock_agent_class.call_args.kwargs["parse_response"] is False
+        assert mock_agent_instance.run.call_args.kwargs["stream"] is True
+
+    @pytest.mark.asyncio
+    @patch("ai.base_agent.Agent")
+    async def test_agent_arun_awaits_agno(self, mock_agent_class):
+        """arun() awaits agno's async run and returns the typed content."""
+        mock_parsed = ParsedOrder(items=[], language="en")
+        mock_agent_instance = MagicMock()
+        mock_agent_instance.arun = AsyncMock(return_value=MagicMock(content=mock_parsed))
+        mock_agent_class.return_value = mock_agent_instance
+
+        result = await OrderParsingAgent.arun(raw_input="nothing", menu_context="menu")
+
+        assert result == mock_parsed
+        mock_agent_instance.arun.assert_awaited_once()
+
+
+class TestPromptCacheLayout:
+    @pytest.fixture(autouse=True)
+    def keys(self, settings):
+        settings.LLM_MODEL = ""
+        settings.OPENAI_API_KEY = "sk-test"
+        settings.ANTHROPIC_API_KEY = "sk-ant-test"
+
+    @patch("ai.base_agent.Agent")
+    def test_system_prompt_is_identical_across_orders(self, mock_agent_class):
+        mock_agent_class.return_value.run.return_value = MagicMock(content=ParsedOrder(items=[]))
+
+        OrderParsingAgent.run(raw_input="two burgers", menu_context="the menu")
+        OrderParsingAgent.run(raw_input="one salad", menu_context="the menu")
+
+        first, second = mock_agent_class.call_args_list
+        assert first.kwargs["additional_context"] == second.kwargs["additional_context"]
+        assert "two burgers" not in first.kwargs["additional_context"]
+        prompts = [c.args[0] for c in mock_agent_class.return_value.run.call_args_list]
+        assert "<customer_order>\ntwo burgers\n</customer_order>" in prompts[0]
+        assert "one salad" in prompts[1]
+
+    @patch("ai.base_agent.Agent")
+    def test_anthropic_system_prompt_is_marked_cacheable(self, mock_agent_class, settings):
+        settings.LLM_MODEL = "claude-sonnet-4-20250514"
+        mock_agent_class.return_value.run.return_value = MagicMock(content=ParsedOrder(items=[]))
+
+        OrderParsingAgent.run(raw_input="x", menu_context="menu")
+
+        assert mock_agent_class.call_args.kwargs["model"].cache_system_prompt is True
+
+    @patch("ai.base_agent.Agent")
+    def test_cache_markers_can_be_disabled(self, mock_agent_class, settings):
+        settings.LLM_MODEL = "claude-sonnet-4-20250514"
+        settings.LLM_PROMPT_CACHE_ENABLED = False
+        mock_agent_class.return_value.run.return_value = MagicMock(content=ParsedOrder(items=[]))
+
+        OrderParsingAgent.run(raw_input="x", menu_context="menu")
+
+        assert not mock_agent_class.call_args.kwargs["model"].cache_system_prompt
+
+    def test_anthropic_cached_tokens_count_as_input(self):
+        from agno.models.metrics import Metrics
+
+        from ai.metrics import estimate_cost, metrics_from_run
+
+        run_metrics = Metrics(input_tokens=50, output_tokens=20, cache_read_tokens=900, cache_write_tokens=0)
+        call = metrics_from_run("OrderParsingAgent", "claude-sonnet-4-20250514", run_metrics, wall_time=1, prompt_bytes=0)
+
+        assert (call.input_tokens, call.cached_input_tokens) == (950, 900)
+        assert call.cost == pytest.approx(estimate_cost("claude-sonnet-4-20250514", 950, 20, 900))
+        assert call.cost < estimate_cost("claude-sonnet-4-20250514", 950, 20)
+
+
+class TestModelClientPool:
+    @pytest.fixture(autouse=True)
+    def empty_pool(self, settings):
+        from ai.pool import model_pool
+
+        settings.OPENAI_API_KEY = "sk-test"
+        settings.LLM_MODEL = ""
+        model_pool.clear()
+        yield model_pool
+        model_pool.clear()
+
+    @staticmethod
+    def _fake_agno(mock_agent_class, *, is_async=False):
+        """Make agno Agents touch their model's SDK client like a real run does."""
+
+        def build(**kwargs):
+            model = kwargs["model"]
+            agent = MagicMock(model=model)
+            if is_async:
+                agent.arun = AsyncMock(side_effect=lambda *a, **kw: MagicMock(content=model.get_async_client()))
+            else:
+                agent.run.side_effect = lambda *a, **kw: MagicMock(content=model.get_client())
+            return agent
+
+        mock_agent_class.side_effect = build
+
+    @patch("ai.base_agent.Agent")
+    def test_runs_reuse_one_sdk_client(self, mock_agent_class, empty_pool):
+        self._fake_agno(mock_agent_class)
+
+        first = OrderParsingAgent.run(raw_input="a", menu_context="menu one")
+        second = OrderParsingAgent.run(raw_input="b", menu_context="menu two")
+
+        assert first is second
+        stats = empty_pool.stats()["OrderParsingAgent:gpt-4o-mini"]
+        assert (stats.created, stats.reused) == (1, 1)
+        # Per-call context is still built per run.
+        contexts = [c.kwargs["additional_context"] for c in mock_agent_class.call_args_list]
+        assert "menu one" in contexts[0] and "menu two" in contexts[1]
+
+    @patch("ai.base_agent.Agent")
+    def test_pool_is_keyed_by_agent_class(self, mock_agent_class, empty_pool):
+        from restaurants.llm.merge_agent import MenuMergeAgent
+        from restaurants.llm.schemas import ParsedMenuPage
+
+        self._fake_agno(mock_agent_class)
+        pages = [ParsedMenuPage(categories=[]), ParsedMenuPage(categories=[])]
+
+        order_client = OrderParsingAgent.run(raw_input="a", menu_context="menu")
+        merge_client = MenuMergeAgent.run(pages=pages)
+
+        assert order_client is not merge_client
+        assert set(empty_pool.stats()) == {"OrderParsingAgent:gpt-4o-mini", "MenuMergeAgent:gpt-4o-mini"}
+
+    @patch("ai.base_agent.Agent")
+    def test_closed_client_is_replaced(self, mock_agent_class, empty_pool):
+        self._fake_agno(mock_agent_class)
+
+        first = OrderParsingAgent.run(raw_input="a", menu_context="menu")
+        first.close()
+        second = OrderParsingAgent.run(raw_input="b", menu_context="menu")
+        third = OrderParsingAgent.run(raw_input="c", menu_context="menu")
+
+        assert second is not first
+        assert third is second
+
+    @patch("ai.base_agent.Agent")
+    def test_concurrent_runs_share_the_pooled_client(self, mock_agent_class, empty_pool):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._fake_agno(mock_agent_class)
+        pooled = OrderParsingAgent.run(raw_input="warm", menu_context="menu")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda i: OrderParsingAgent.run(raw_input=str(i), menu_context="menu"), range(32)))
+
+        assert all(client is pooled for client in clients)
+        assert empty_pool.stats()["OrderParsingAgent:gpt-4o-mini"].reused == 32
+
+    @pytest.mark.asyncio
+    @patch("ai.base_agent.Agent")
+    async def test_async_runs_reuse_the_loop_client(self, mock_agent_class, empty_pool):
+        self._fake_agno(mock_agent_class, is_async=True)
+
+        first = await OrderParsingAgent.arun(raw_input="a", menu_context="menu")
+        second = await OrderParsingAgent.arun(raw_input="b", menu_context="menu")
+
+        assert first is second
+        assert type(first).__name__ == "AsyncOpenAI"
@@ -0,0 +1,160 @@
+"""
+Tests for the shared LLM executor (ai.executor): per-task timeouts with one
+retry, the batch deadline, and saturation stats.
+"""
+
+import threading
+import time
+
+import pytest
+
+from ai.executor import LLMExecutor, llm_executor
+from restaurants.tests.factories import UserFactory
+
+
+@pytest.fixture
+def executor(settings):
+    settings.LLM_EXECUTOR_WORKERS = 4
+    settings.LLM_METRICS_SINKS = []
+    return LLMExecutor()
+
+
+@pytest.fixture
+def released():
+    """Set at teardown so tasks left hanging give their worker back."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def _run_all(executor, fn, args, task_timeout=1.0, deadline=5.0, max_parallel=None):
+    results = {}
+    executor.run_all(
+        fn,
+        args,
+        task_timeout=task_timeout,
+        deadline=deadline,
+        on_done=lambda index, result, error: results.__setitem__(index, (result, error)),
+        max_parallel=max_parallel,
+    )
+    return results
+
+
+def test_results_and_errors_are_reported_per_task(executor):
+    def fn(arg):
+        if arg == "bad":
+            raise ValueError(arg)
+        return arg.upper()
+
+    results = _run_all(executor, fn, ["a", "bad", "c"])
+
+    assert {index: result for index, (result, _) in results.items()} == {0: "A", 1: None, 2: "C"}
+    assert isinstance(results[1][1], ValueError)
+    assert executor.stats().retries == 0  # errors are not retried, only timeouts
+
+
+def test_timed_out_task_is_retried_and_first_answer_wins(executor, released):
+    calls = []
+
+    def fn(arg):
+        calls.append(arg)
+        if len(calls) == 1:
+            released.wait(5)
+            return "late"
+        return "retried"
+
+    results = _run_all(executor, fn, ["page"], task_timeout=0.1)
+
+    assert results == {0: ("retried", None)}
+    assert executor.stats().retries == 1
+
+
+def test_task_stuck_twice_fails_without_holding_up_the_others(executor, released):
+    def fn(arg):
+        if arg == "stuck":
+            released.wait(5)
+        return arg
+
+    started = time.monotonic()
+    results = _run_all(executor, fn, ["stuck", "ok"], task_timeout=0.1)
+
+    assert time.monotonic() - started < 1
+    assert results[1] == ("ok", None)
+    assert isinstance(results[0][1], TimeoutError)
+    stats = executor.stats()
+    assert (stats.tasks, stats.retries, stats.timeouts) == (2, 1, 1)
+
+
+def test_batch_deadline_fails_unfinished_tasks(executor, released):
+    def fn(arg):
+        if arg == "slow":
+            released.wait(5)
+        return arg
+
+    results = _run_all(executor, fn, ["slow", "fast"], task_timeout=10, deadline=0.2)
+
+    assert results[1] == ("fast", None)
+    assert isinstance(results[0][1], TimeoutError)
+    assert executor.stats().retries == 0
+
+
+def test_time_queued_does_not_count_against_the_task_timeout(executor, settings):
+    settings.LLM_EXECUTOR_WORKERS = 1
+    executor = LLMExecutor()
+
+    results = _run_all(executor, lambda arg: time.sleep(0.15) or arg, [1, 2, 3], task_timeout=0.25)
+
+    assert results == {0: (1, None), 1: (2, None), 2: (3, None)}
+    stats = executor.stats()
+    assert stats.retries == 0
+    assert stats.max_queued >= 2
+
+
+def test_max_parallel_starts_tasks_as_others_finish(executor):
+    lock = threading.Lock()
+    running = [0]
+    most = [0]
+
+    def fn(arg):
+        with lock:
+            running[0] += 1
+            most[0] = max(most[0], running[0])
+        time.sleep(0.1)
+        with lock:
+            running[0] -= 1
+        return arg
+
+    results = _run_all(executor, fn, list(range(7)), task_timeout=0.15, max_parallel=2)
+
+    assert results == {index: (index, None) for index in range(7)}
+    assert most[0] == 2
+    assert executor.stats().retries == 0  # tasks held back do not run down their timeout
+
+
+def test_saturation_counts_running_and_queued_tasks(executor, released):
+    thread = threading.Thread(
+        target=_run_all, args=(executor, lambda arg: released.wait(5), list(range(6))), kwargs={"task_timeout": 10}
+    )
+    thread.start()
+    for _ in range(100):
+        stats = executor.stats()
+        if stats.running == 4:
+            break
+        time.sleep(0.01)
+    released.set()
+    thread.join(timeout=5)
+
+    assert (stats.workers, stats.running, stats.queued) == (4, 4, 2)
+    assert stats.saturation == 1.5
+    assert executor.stats().running == executor.stats().queued == 0
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_executor(api_client):
+    llm_executor.reset()
+    api_client.force_authenticate(user=UserFactory(is_staff=True))
+
+    response = api_client.get("/api/admin/llm-metrics/")
+
+    assert response.status_code == 200
+    assert {"workers", "running", "queued", "retries", "timeouts", "saturation"} <= response.data["executor"].keys()
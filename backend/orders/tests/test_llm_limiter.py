@@ -0,0 +1,295 @@
+"""
+Tests for the LLM concurrency limiter (ai.limiter), how parse endpoints
+surface it, and the menu upload pool.
+"""
+
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from channels.db import database_sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+
+from ai.executor import llm_executor
+from ai.limiter import LLMCapacityError, llm_limiter
+from ai.metrics import llm_call_context, llm_metrics
+from orders.llm.base import ParsedOrder
+from orders.views import AsyncParseOrderView
+from restaurants.llm.schemas import ParsedMenuPage
+from restaurants.models import Subscription
+from restaurants.tests.factories import RestaurantFactory
+
+
+@pytest.fixture(autouse=True)
+def limits(settings):
+    settings.LLM_MODEL = ""
+    settings.LLM_CONCURRENCY_LIMITS_ENABLED = True
+    settings.LLM_RESTAURANT_CONCURRENCY = 2
+    settings.LLM_GLOBAL_CONCURRENCY = 10
+    settings.LLM_CONCURRENCY_MAX_WAIT = 0
+    settings.LLM_CONCURRENCY_RETRY_AFTER = 3
+    settings.LLM_METRICS_SINKS = ["memory"]
+    llm_metrics.reset()
+    yield
+    llm_metrics.reset()
+
+
+def hold_slots(count, **labels):
+    """Take count slots for labels and keep them until released."""
+    slots = []
+    with llm_call_context(**labels):
+        for _ in range(count):
+            slot = llm_limiter.slot()
+            slot.__enter__()
+            slots.append(slot)
+    return slots
+
+
+def release(slots):
+    for slot in slots:
+        slot.__exit__(None, None, None)
+
+
+class TestConcurrencyLimiter:
+    def test_restaurant_at_limit_gets_429(self):
+        held = hold_slots(2, restaurant="busy")
+
+        with llm_call_context(restaurant="busy"), pytest.raises(LLMCapacityError) as exc_info:
+            with llm_limiter.slot():
+                pass
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.wait == 3
+        assert llm_limiter.stats().rejected == {"restaurant": 1}
+        release(held)
+
+    def test_other_restaurants_are_not_affected(self):
+        held = hold_slots(2, restaurant="busy")
+
+        with llm_call_context(restaurant="quiet"), llm_limiter.slot() as slot:
+            assert slot.wait < 0.05
+
+        release(held)
+
+    def test_global_limit_gets_503(self, settings):
+        settings.LLM_GLOBAL_CONCURRENCY = 3
+        held = hold_slots(2, restaurant="a") + hold_slots(1, restaurant="b")
+
+        with llm_call_context(restaurant="c"), pytest.raises(LLMCapacityError) as exc_info:
+            with llm_limiter.slot():
+                pass
+
+        assert exc_info.value.status_code == 503
+        release(held)
+
+    def test_plan_sets_restaurant_limit(self, settings):
+        settings.SUBSCRIPTION_PLANS = {"pro": {"llm_concurrency": 4}, "starter": {}}
+        assert llm_limiter.restaurant_limit("pro") == 4
+        assert llm_limiter.restaurant_limit("starter") == 2
+        assert llm_limiter.restaurant_limit("") == 2
+
+        held = hold_slots(4, restaurant="big", plan="pro")
+        with llm_call_context(restaurant="big", plan="pro"), pytest.raises(LLMCapacityError):
+            with llm_limiter.slot():
+                pass
+        release(held)
+
+    def test_queued_request_gets_released_slot(self, settings):
+        settings.LLM_CONCURRENCY_MAX_WAIT = 2
+        held = hold_slots(2, restaurant="busy")
+        threading.Timer(0.2, release, args=[held[:1]]).start()
+
+        with llm_call_context(restaurant="busy"), llm_limiter.slot() as slot:
+            assert slot.wait >= 0.15
+
+        stats = llm_limiter.stats()
+        assert (stats.acquired, stats.queued) == (3, 1)
+        assert stats.max_wait == pytest.approx(slot.wait)
+        release(held)
+
+    def test_expired_lease_is_reclaimed(self, settings):
+        settings.LLM_CONCURRENCY_LEASE = 0.05
+        hold_slots(2, restaurant="crashed")
+        time.sleep(0.06)
+
+        with llm_call_context(restaurant="crashed"), llm_limiter.slot():
+            pass
+
+    def test_disabled_limiter_takes_no_slots(self, settings):
+        settings.LLM_CONCURRENCY_LIMITS_ENABLED = False
+        hold_slots(5, restaurant="busy")
+        assert llm_limiter.stats().acquired == 0
+
+    @pytest.mark.asyncio
+    async def test_async_slot(self):
+        held = hold_slots(2, restaurant="busy")
+
+        with llm_call_context(restaurant="busy"), pytest.raises(LLMCapacityError):
+            async with llm_limiter.slot():
+                pass
+        release(held)
+
+        with llm_call_context(restaurant="busy"):
+            async with llm_limiter.slot() as slot:
+                assert slot.wait < 0.05
+
+    def test_unreachable_redis_does_not_block_requests(self, settings):
+        settings.LLM_CONCURRENCY_BACKEND = "redis"
+        settings.CELERY_BROKER_URL = "redis://127.0.0.1:1/0"
+        llm_limiter.reset()
+
+        with llm_call_context(restaurant="busy"), llm_limiter.slot():
+            pass
+
+    def test_unknown_backend_is_rejected(self, settings):
+        settings.LLM_CONCURRENCY_BACKEND = "memcached"
+        llm_limiter.reset()
+        with pytest.raises(ImproperlyConfigured):
+            _ = llm_limiter.store
+
+
+@pytest.mark.django_db
+class TestParseEndpoints:
+    @patch("ai.base_agent.Agent")
+    def test_parse_order_returns_429_with_retry_after(self, mock_agent_class, api_client):
+        agent = MagicMock()
+        agent.run.return_value = MagicMock(content=ParsedOrder(items=[]), metrics=None)
+        mock_agent_class.return_value = agent
+        restaurant = RestaurantFactory(slug="rush-hour")
+        held = hold_slots(2, restaurant="rush-hour", plan="")
+
+        response = api_client.post(f"/api/order/{restaurant.slug}/parse/", {"raw_input": "a mystery dish"})
+
+        assert response.status_code == 429
+        assert response["Retry-After"] == "3"
+        agent.run.assert_not_called()
+        [call] = llm_metrics.recent()
+        assert call.rejected
+        assert call.restaurant == "rush-hour"
+
+        release(held)
+        response = api_client.post(f"/api/order/{restaurant.slug}/parse/", {"raw_input": "a mystery dish"})
+        assert response.status_code == 200
+
+    @patch("ai.base_agent.Agent")
+    def test_plan_limit_applies_to_parse_order(self, mock_agent_class, api_client, settings):
+        settings.SUBSCRIPTION_PLANS = {**settings.SUBSCRIPTION_PLANS, "pro": {"llm_concurrency": 3}}
+        agent = MagicMock()
+        agent.run.return_value = MagicMock(content=ParsedOrder(items=[]), metrics=None)
+        mock_agent_class.return_value = agent
+        restaurant = RestaurantFactory(slug="pro-place")
+        Subscription.objects.create(
+            restaurant=restaurant,
+            plan="pro",
+            status="active",
+            current_period_start=timezone.now(),
+            current_period_end=timezone.now() + timedelta(days=30),
+        )
+        # The default limit (2) is taken, but the pro plan allows a third request.
+        held = hold_slots(2, restaurant="pro-place", plan="pro")
+
+        response = api_client.post(f"/api/order/{restaurant.slug}/parse/", {"raw_input": "a mystery dish"})
+
+        assert response.status_code == 200
+        agent.run.assert_called_once()
+        release(held)
+
+    @patch("ai.base_agent.Agent")
+    def test_stream_reports_retry_after_in_error_event(self, mock_agent_class, api_client):
+        mock_agent_class.return_value = MagicMock()
+        restaurant = RestaurantFactory(slug="stream-rush")
+        held = hold_slots(2, restaurant="stream-rush", plan="")
+
+        response = api_client.post(
+            f"/api/order/{restaurant.slug}/parse/stream/", {"raw_input": "a mystery dish"}, format="json"
+        )
+
+        body = b"".join(response.streaming_content).decode()
+        event, data = body.strip().split("\n")
+        assert event == "event: error"
+        assert json.loads(data.removeprefix("data: "))["retry_after"] == 3
+        release(held)
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    @patch("ai.base_agent.Agent")
+    async def test_async_parse_order_returns_retry_after(self, mock_agent_class, settings):
+        settings.LLM_GLOBAL_CONCURRENCY = 1
+        mock_agent_class.return_value = MagicMock()
+        restaurant = await database_sync_to_async(RestaurantFactory)(slug="async-rush")
+        held = hold_slots(1, restaurant="elsewhere")
+
+        request = AsyncRequestFactory().post(
+            "/", data=json.dumps({"raw_input": "a mystery dish"}), content_type="application/json"
+        )
+        response = await AsyncParseOrderView.as_view()(request, slug=restaurant.slug)
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "3"
+        assert "busy" in json.loads(response.content)["detail"]
+        release(held)
+
+
+@pytest.mark.django_db
+class TestMenuUploadPool:
+    def test_named_pool_has_its_own_slots_and_wait(self, settings):
+        settings.LLM_POOL_MAX_WAIT = {"menu_upload": 2}
+        held = hold_slots(2, restaurant="busy")
+
+        with llm_call_context(restaurant="busy", pool="menu_upload"):
+            assert llm_limiter.restaurant_concurrency() == 2
+            upload_held = hold_slots(2)
+            threading.Timer(0.1, release, args=(upload_held[:1],)).start()
+            with llm_limiter.slot() as slot:
+                assert slot.wait >= 0.1  # queued instead of failing after LLM_CONCURRENCY_MAX_WAIT (0)
+
+        release(held + upload_held[1:])
+
+    @patch("ai.base_agent.Agent")
+    def test_upload_with_more_pages_than_slots_parses_every_page(self, mock_agent_class, api_client, settings):
+        settings.MENU_IMAGE_PREPROCESSING_ENABLED = False
+        settings.MENU_PAGE_CACHE_ENABLED = False
+        settings.MENU_PAGE_TIMEOUT = 0.5
+        restaurant = RestaurantFactory(slug="big-menu")
+        Subscription.objects.create(
+            restaurant=restaurant,
+            plan="starter",
+            status="active",
+            current_period_start=timezone.now(),
+            current_period_end=timezone.now() + timedelta(days=30),
+        )
+        held = hold_slots(3, restaurant="big-menu", plan="starter")  # order parsing is at its limit too
+        lock = threading.Lock()
+        running = [0]
+        most = [0]
+
+        def run(*args, **kwargs):
+            with lock:
+                running[0] += 1
+                most[0] = max(most[0], running[0])
+            time.sleep(0.1)
+            with lock:
+                running[0] -= 1
+            return MagicMock(content=ParsedMenuPage(categories=[]), metrics=None)
+
+        mock_agent_class.return_value.run.side_effect = run
+        api_client.force_authenticate(restaurant.owner)
+        images = [SimpleUploadedFile(f"page{n}.jpg", f"page-{n}".encode(), content_type="image/jpeg") for n in range(8)]
+
+        response = api_client.post(
+            f"/api/restaurants/{restaurant.slug}/menu/upload/parse/", {"images": images}, format="multipart"
+        )
+
+        assert response.status_code == 200
+        assert response.json()["failed_pages"] == []
+        assert mock_agent_class.return_value.run.call_count == 8
+        assert most[0] == 3  # the starter plan's llm_concurrency
+        assert llm_limiter.stats().rejected == {}
+        assert llm_executor.stats().retries == 0
+        release(held)
@@ -0,0 +1,149 @@
+"""
+Tests for per-call LLM metrics (ai.metrics) and the admin metrics endpoint.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from agno.models.metrics import Metrics
+from agno.run.agent import RunCompletedEvent, RunContentEvent
+from django.core.exceptions import ImproperlyConfigured
+
+from ai.metrics import LLMCallMetrics, MetricsRecorder, estimate_cost, llm_call_context, llm_metrics
+from orders.llm.agent import OrderParsingAgent
+from orders.llm.base import ParsedOrder
+from orders.services import OrderService
+from restaurants.tests.factories import RestaurantFactory, UserFactory
+
+
+@pytest.fixture(autouse=True)
+def memory_sink(settings):
+    settings.LLM_MODEL = ""
+    settings.LLM_METRICS_SINKS = ["memory"]
+    settings.LLM_METRICS_BUFFER_SIZE = 10
+    llm_metrics.reset()
+    yield
+    llm_metrics.reset()
+
+
+def _fake_agent(mock_agent_class, **run_attrs):
+    agent = MagicMock(**run_attrs)
+    mock_agent_class.return_value = agent
+    return agent
+
+
+def _run_output(content, **metrics):
+    return MagicMock(content=content, metrics=Metrics(**metrics))
+
+
+class TestAgentMetrics:
+    @patch("ai.base_agent.Agent")
+    def test_run_records_tokens_prompt_size_and_restaurant(self, mock_agent_class):
+        agent = _fake_agent(mock_agent_class)
+        agent.run.return_value = _run_output(
+            ParsedOrder(items=[]), input_tokens=1000, output_tokens=100, cache_read_tokens=800
+        )
+
+        with llm_call_context(restaurant="pizza-place", plan="starter"):
+            OrderParsingAgent.run(raw_input="two pizzas", menu_context="M" * 500)
+
+        [call] = llm_metrics.recent()
+        assert call.agent == "OrderParsingAgent"
+        assert call.model == "gpt-4o-mini"
+        assert (call.restaurant, call.plan) == ("pizza-place", "starter")
+        assert (call.input_tokens, call.output_tokens, call.cached_input_tokens) == (1000, 100, 800)
+        assert call.cache_hit
+        assert call.prompt_bytes > 500
+        assert call.wall_time >= 0
+        assert call.cost == pytest.approx(estimate_cost("gpt-4o-mini", 1000, 100, 800))
+        assert call.retries == 0
+        assert call.error == ""
+
+    @patch("ai.base_agent.Agent")
+    def test_failed_run_is_recorded_with_error(self, mock_agent_class):
+        agent = _fake_agent(mock_agent_class)
+        agent.run.side_effect = RuntimeError("provider down")
+
+        with pytest.raises(RuntimeError):
+            OrderParsingAgent.run(raw_input="x", menu_context="menu")
+
+        [call] = llm_metrics.recent()
+        assert "provider down" in call.error
+        assert call.input_tokens == 0
+
+    @pytest.mark.asyncio
+    @patch("ai.base_agent.Agent")
+    async def test_arun_records_metrics(self, mock_agent_class):
+        agent = _fake_agent(mock_agent_class)
+        agent.arun = AsyncMock(return_value=_run_output(ParsedOrder(items=[]), input_tokens=42))
+
+        with llm_call_context(restaurant="async-cafe"):
+            await OrderParsingAgent.arun(raw_input="x", menu_context="menu")
+
+        [call] = llm_metrics.recent()
+        assert (call.restaurant, call.input_tokens) == ("async-cafe", 42)
+
+    @patch("ai.base_agent.Agent")
+    def test_stream_records_time_to_first_token(self, mock_agent_class):
+        agent = _fake_agent(mock_agent_class)
+        agent.run.return_value = iter(
+            [
+                RunContentEvent(content='{"items": []}'),
+                RunCompletedEvent(metrics=Metrics(input_tokens=10, output_tokens=5)),
+            ]
+        )
+
+        list(OrderParsingAgent.stream(raw_input="x", menu_context="menu"))
+
+        [call] = llm_metrics.recent()
+        assert call.time_to_first_token is not None
+        assert call.time_to_first_token <= call.wall_time
+        assert (call.input_tokens, call.output_tokens) == (10, 5)
+
+
+class TestMetricsRecorder:
+    def test_ring_buffer_keeps_newest_calls(self, settings):
+        settings.LLM_METRICS_BUFFER_SIZE = 2
+        for i in range(3):
+            llm_metrics.record(LLMCallMetrics(agent=f"Agent{i}", model="gpt-4o-mini"))
+
+        assert [call.agent for call in llm_metrics.recent()] == ["Agent2", "Agent1"]
+
+    def test_recent_is_empty_without_memory_sink(self, settings):
+        settings.LLM_METRICS_SINKS = ["log"]
+        llm_metrics.record(LLMCallMetrics(agent="A", model="gpt-4o-mini"))
+        assert llm_metrics.recent() == []
+
+    def test_unknown_sink_is_rejected(self, settings):
+        settings.LLM_METRICS_SINKS = ["statsd"]
+        with pytest.raises(ImproperlyConfigured):
+            assert MetricsRecorder().sinks == {}
+
+    def test_estimate_cost_unknown_model(self):
+        assert estimate_cost("some-local-model", 100, 100) is None
+
+
+@pytest.mark.django_db
+class TestLLMMetricsView:
+    URL = "/api/admin/llm-metrics/"
+
+    @patch("ai.base_agent.Agent")
+    def test_parse_order_calls_are_listed_per_restaurant(self, mock_agent_class, api_client):
+        agent = _fake_agent(mock_agent_class)
+        agent.run.return_value = _run_output(ParsedOrder(items=[]), input_tokens=7)
+        restaurant = RestaurantFactory(slug="slow-menu")
+
+        OrderService.parse_order(restaurant, "something not on the menu")
+        llm_metrics.record(LLMCallMetrics(agent="MenuParsingAgent", model="gpt-4o", restaurant="other"))
+
+        api_client.force_authenticate(user=UserFactory(is_staff=True))
+        response = api_client.get(self.URL, {"restaurant": "slow-menu"})
+
+        assert response.status_code == 200
+        [call] = response.data["calls"]
+        assert call["agent"] == "OrderParsingAgent"
+        assert call["input_tokens"] == 7
+
+    def test_requires_staff(self, api_client):
+        api_client.force_authenticate(user=UserFactory())
+        assert api_client.get(self.URL).status_code == 403
@@ -0,0 +1,103 @@
+from unittest.mock import patch
+
+import pytest
+
+from orders.llm.base import ParsedOrder
+from orders.llm.menu_context import get_menu_context
+from orders.llm.menu_retrieval import PRUNED_NOTE, RETRIEVAL_MIN_ITEMS, get_relevant_menu_context
+from orders.services import OrderService
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+DISHES = [
+    "Margherita Pizza", "Pepperoni Pizza", "Caesar Salad", "Greek Salad", "Chicken Wings",
+    "French Fries", "Onion Rings", "Iced Tea", "Lemonade", "Espresso", "Cappuccino",
+    "Apple Pie", "Cheesecake", "Pancakes", "Waffles", "Omelette", "Carbonara", "Lasagna",
+    "Risotto", "Gnocchi", "Fish Tacos", "Burrito Bowl", "Quesadilla", "Nachos", "Pad Thai",
+    "Grilled Salmon", "Ribeye Steak", "Roast Chicken", "Pork Belly", "Lamb Shank",
+    "Clam Chowder", "Miso Soup", "Lentil Soup", "Mango Smoothie", "Orange Juice",
+    "Hot Chocolate", "Cold Brew", "Kombucha", "Blueberry Muffin", "Cinnamon Roll",
+]  # fmt: skip
+
+
+def _make_menu(names):
+    restaurant = RestaurantFactory()
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    category = MenuCategoryFactory(version=version, name="Everything")
+    items = {}
+    for name in names:
+        items[name] = MenuItemFactory(category=category, name=name, description="")
+        MenuItemVariantFactory(menu_item=items[name])
+    return restaurant, items
+
+
+@pytest.fixture
+def large_menu(db, settings):
+    settings.LLM_PROMPT_CACHE_ENABLED = False  # retrieval only prunes without prompt caching
+    restaurant, items = _make_menu(DISHES + ["Latte"])
+    MenuItemModifierFactory(menu_item=items["Latte"], name="Oat Milk")
+    assert len(items) >= RETRIEVAL_MIN_ITEMS
+    return restaurant, items
+
+
+@pytest.mark.django_db
+class TestRelevantMenuContext:
+    def test_large_menu_is_pruned_to_relevant_items(self, large_menu):
+        restaurant, items = large_menu
+        context = get_relevant_menu_context(restaurant, "two lattes with oat milk and a muffin")
+
+        assert context.startswith(f"Restaurant: {restaurant.name}\n")
+        assert PRUNED_NOTE in context
+        assert f"(item_id: {items['Latte'].id})" in context
+        assert "Oat Milk" in context
+        assert "Blueberry Muffin" in context
+        assert "Ribeye Steak" not in context
+        assert len(context) < len(get_menu_context(restaurant)) / 2
+
+    def test_typo_still_retrieves_item(self, large_menu):
+        restaurant, _ = large_menu
+        assert "Cappuccino" in get_relevant_menu_context(restaurant, "a capucino please")
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "what do you recommend for someone hungry",  # mostly words the menu doesn't know
+            "две пиццы пепперони",  # non-Latin script
+            "please",
+        ],
+    )
+    def test_falls_back_to_full_menu(self, large_menu, text):
+        restaurant, _ = large_menu
+        assert get_relevant_menu_context(restaurant, text) == get_menu_context(restaurant)
+
+    def test_small_menu_is_sent_in_full(self, db):
+        restaurant, _ = _make_menu(DISHES[:10])
+        assert get_relevant_menu_context(restaurant, "iced tea") == get_menu_context(restaurant)
+
+    def test_disabled_by_setting(self, large_menu, settings):
+        settings.ORDER_MENU_RETRIEVAL_ENABLED = False
+        restaurant, _ = large_menu
+        assert get_relevant_menu_context(restaurant, "a latte") == get_menu_context(restaurant)
+
+    def test_prompt_cache_keeps_full_menu(self, large_menu, settings):
+        settings.LLM_PROMPT_CACHE_ENABLED = True
+        restaurant, _ = large_menu
+        assert get_relevant_menu_context(restaurant, "a latte") == get_menu_context(restaurant)
+
+    @patch("orders.services.OrderParsingAgent.run")
+    def test_parse_order_sends_pruned_menu(self, mock_run, large_menu, settings):
+        settings.ORDER_FAST_PATH_ENABLED = False
+        restaurant, _ = large_menu
+        mock_run.return_value = ParsedOrder(items=[])
+
+        OrderService.parse_order(restaurant, "a pepperoni pizza")
+
+        menu_context = mock_run.call_args.kwargs["menu_context"]
+        assert PRUNED_NOTE in menu_context
+        assert "Pepperoni Pizza" in menu_context
@@ -0,0 +1,142 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.llm.parse_cache import ParseResultCache, normalize_order_text, parse_cache
+from orders.services import OrderService
+from restaurants.services.menu_cache_service import MenuCacheService
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+    UserFactory,
+)
+
+
+def _parsed(item_id=1, variant_id=10, quantity=1):
+    return ParsedOrder(items=[ParsedOrderItem(menu_item_id=item_id, variant_id=variant_id, quantity=quantity)])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestNormalizeOrderText:
+    def test_case_whitespace_and_punctuation(self):
+        assert normalize_order_text("  2  Lattes, please!! ") == "2 lattes, please"
+        assert normalize_order_text("2 lattes please") != normalize_order_text("3 lattes please")
+
+
+class TestParseResultCache:
+    def test_hit_after_set(self):
+        cache = ParseResultCache()
+        cache.set("r1", "fp", "Two Lattes", _parsed())
+        assert cache.get("r1", "fp", "two lattes.") == _parsed()
+        assert cache.stats.hits == 1
+
+    def test_miss_on_other_fingerprint_or_restaurant(self):
+        cache = ParseResultCache()
+        cache.set("r1", "fp", "two lattes", _parsed())
+        assert cache.get("r1", "fp2", "two lattes") is None
+        assert cache.get("r2", "fp", "two lattes") is None
+        assert cache.stats.misses == 2
+
+    def test_returns_copies(self):
+        cache = ParseResultCache()
+        cache.set("r1", "fp", "latte", _parsed())
+        cache.get("r1", "fp", "latte").items[0].quantity = 99
+        assert cache.get("r1", "fp", "latte").items[0].quantity == 1
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = ParseResultCache(ttl=10, clock=clock)
+        cache.set("r1", "fp", "latte", _parsed())
+        clock.now = 11
+        assert cache.get("r1", "fp", "latte") is None
+        assert cache.stats.expirations == 1
+
+    def test_per_restaurant_lru_cap(self):
+        cache = ParseResultCache(max_per_restaurant=2)
+        cache.set("r1", "fp", "a", _parsed())
+        cache.set("r1", "fp", "b", _parsed())
+        cache.get("r1", "fp", "a")  # "b" becomes least recently used
+        cache.set("r1", "fp", "c", _parsed())
+        assert cache.get("r1", "fp", "b") is None
+        assert cache.get("r1", "fp", "a") is not None
+        assert cache.stats.evictions == 1
+
+    def test_restaurant_cap(self):
+        cache = ParseResultCache(max_restaurants=1)
+        cache.set("r1", "fp", "a", _parsed())
+        cache.set("r2", "fp", "a", _parsed())
+        assert cache.get("r1", "fp", "a") is None
+        assert cache.get("r2", "fp", "a") is not None
+
+    def test_empty_parse_not_cached(self):
+        cache = ParseResultCache()
+        cache.set("r1", "fp", "gibberish", ParsedOrder(items=[]))
+        assert cache.get("r1", "fp", "gibberish") is None
+
+
+@pytest.mark.django_db
+class TestParseOrderUsesCache:
+    @pytest.fixture(autouse=True)
+    def llm_only(self, settings):
+        settings.ORDER_FAST_PATH_ENABLED = False
+
+    @pytest.fixture
+    def menu_setup(self):
+        restaurant = RestaurantFactory()
+        version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+        item = MenuItemFactory(category=MenuCategoryFactory(version=version), name="Latte")
+        variant = MenuItemVariantFactory(menu_item=item, price=Decimal("4.50"))
+        return restaurant, item, variant
+
+    @patch("orders.services.OrderParsingAgent.run")
+    def test_repeat_input_skips_llm(self, mock_run, menu_setup):
+        restaurant, item, variant = menu_setup
+        mock_run.return_value = _parsed(item.id, variant.id, quantity=2)
+
+        first = OrderService.parse_order(restaurant, "2 lattes")
+        second = OrderService.parse_order(restaurant, "2  Lattes!")
+
+        assert mock_run.call_count == 1
+        assert first == second
+        assert second["total_price"] == "9.00"
+
+    @patch("orders.services.OrderParsingAgent.run")
+    def test_menu_change_reparses_and_reprices(self, mock_run, menu_setup):
+        restaurant, item, variant = menu_setup
+        mock_run.return_value = _parsed(item.id, variant.id)
+        OrderService.parse_order(restaurant, "a latte")
+
+        variant.price = Decimal("5.00")
+        variant.save()
+        MenuCacheService.invalidate(restaurant)
+
+        result = OrderService.parse_order(restaurant, "a latte")
+        assert mock_run.call_count == 2
+        assert result["total_price"] == "5.00"
+
+    @patch("orders.services.OrderParsingAgent.run")
+    def test_metrics_endpoint_reports_hits_and_misses(self, mock_run, menu_setup, api_client):
+        restaurant, item, variant = menu_setup
+        mock_run.return_value = _parsed(item.id, variant.id)
+        parse_cache.clear()
+        OrderService.parse_order(restaurant, "a latte")
+        OrderService.parse_order(restaurant, "A latte.")
+        api_client.force_authenticate(user=UserFactory(is_staff=True))
+
+        response = api_client.get("/api/admin/llm-metrics/")
+
+        assert response.status_code == 200
+        stats = response.data["parse_cache"]
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
@@ -0,0 +1,168 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ValidationError
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.price_index import MenuPriceIndex
+from orders.services import OrderService
+from restaurants.services.menu_cache_service import MenuCacheService
+from restaurants.services.menu_version_service import MenuVersionService
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+
+@pytest.fixture
+def menu_setup(db):
+    restaurant = RestaurantFactory(tax_rate=Decimal("8.875"))
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    cat = MenuCategoryFactory(version=version, name="Mains")
+    burger = MenuItemFactory(category=cat, name="Burger")
+    regular = MenuItemVariantFactory(menu_item=burger, label="Regular", price=Decimal("12.99"))
+    double = MenuItemVariantFactory(menu_item=burger, label="Double", price=Decimal("16.49"), is_default=False)
+    bacon = MenuItemModifierFactory(menu_item=burger, name="Bacon", price_adjustment=Decimal("2.00"))
+    cheese = MenuItemModifierFactory(menu_item=burger, name="Cheese", price_adjustment=Decimal("0.75"))
+    retired = MenuItemFactory(category=cat, name="Retired", is_active=False)
+    retired_variant = MenuItemVariantFactory(menu_item=retired, price=Decimal("5.00"))
+    return {
+        "restaurant": restaurant,
+        "version": version,
+        "burger": burger,
+        "regular": regular,
+        "double": double,
+        "bacon": bacon,
+        "cheese": cheese,
+        "retired": retired,
+        "retired_variant": retired_variant,
+    }
+
+
+@pytest.mark.django_db
+class TestMenuPriceIndex:
+    def test_build_loads_version_in_three_queries(self, menu_setup, django_assert_num_queries):
+        with django_assert_num_queries(3):
+            index = MenuPriceIndex.build(menu_setup["version"].id)
+        burger = index.get_item(menu_setup["burger"].id)
+        assert burger.variants[menu_setup["double"].id].price == Decimal("16.49")
+        assert burger.modifiers[menu_setup["bacon"].id].name == "Bacon"
+        assert index.get_item(menu_setup["retired"].id).is_active is False
+
+    def test_index_is_shared_until_menu_changes(self, menu_setup):
+        restaurant = menu_setup["restaurant"]
+        first = MenuPriceIndex.for_restaurant(restaurant)
+        assert MenuPriceIndex.for_restaurant(restaurant) is first
+
+        MenuCacheService.invalidate(restaurant)
+        assert MenuPriceIndex.for_restaurant(restaurant) is not first
+
+    def test_records_use_slots(self, menu_setup):
+        index = MenuPriceIndex.build(menu_setup["version"].id)
+        item = index.get_item(menu_setup["burger"].id)
+        with pytest.raises(AttributeError):
+            item.extra = 1
+
+
+@pytest.mark.django_db
+class TestIndexedValidation:
+    def test_warm_cart_validation_runs_no_queries(self, menu_setup, django_assert_num_queries):
+        items = [
+            {
+                "menu_item_id": menu_setup["burger"].id,
+                "variant_id": menu_setup["double"].id,
+                "quantity": 2,
+                "modifier_ids": [menu_setup["bacon"].id, menu_setup["cheese"].id],
+            }
+        ] * 10
+        OrderService.validate_and_price_items(menu_setup["restaurant"], items)
+
+        with django_assert_num_queries(0):
+            validated, pricing = OrderService.validate_and_price_items(menu_setup["restaurant"], items)
+        assert len(validated) == 10
+        assert pricing.subtotal == Decimal("384.80")
+        assert pricing.tax_amount == Decimal("34.15")
+
+    def test_inactive_item_rejected(self, menu_setup):
+        with pytest.raises(ValidationError):
+            OrderService.validate_and_price_items(
+                menu_setup["restaurant"],
+                [
+                    {
+                        "menu_item_id": menu_setup["retired"].id,
+                        "variant_id": menu_setup["retired_variant"].id,
+                        "quantity": 1,
+                    }
+                ],
+            )
+
+    def test_variant_of_other_item_rejected(self, menu_setup):
+        other = MenuItemFactory(category=menu_setup["burger"].category)
+        with pytest.raises(ValidationError):
+            OrderService.validate_and_price_items(
+                menu_setup["restaurant"],
+                [{"menu_item_id": other.id, "variant_id": menu_setup["regular"].id, "quantity": 1}],
+            )
+
+    def test_item_from_inactive_version_falls_back_to_database(self, menu_setup):
+        old_version = MenuVersionFactory(restaurant=menu_setup["restaurant"])
+        old_item = MenuItemFactory(category=MenuCategoryFactory(version=old_version), name="Old Soup")
+        old_variant = MenuItemVariantFactory(menu_item=old_item, price=Decimal("4.25"))
+
+        validated, pricing = OrderService.validate_and_price_items(
+            menu_setup["restaurant"],
+            [{"menu_item_id": old_item.id, "variant_id": old_variant.id, "quantity": 1}],
+        )
+        assert validated[0]["menu_item_id"] == old_item.id
+        assert pricing.subtotal == Decimal("4.25")
+
+    def test_stale_cart_sees_edits_made_through_a_derived_version(self, menu_setup):
+        restaurant = menu_setup["restaurant"]
+        derived = MenuVersionService.duplicate_version(menu_setup["version"], "Derived")
+        MenuVersionService.activate_version(restaurant, derived)
+        cart = [{"menu_item_id": menu_setup["burger"].id, "variant_id": menu_setup["regular"].id, "quantity": 1}]
+
+        burger = MenuVersionService.own_item(derived, menu_setup["burger"])
+        burger.variants.filter(id=menu_setup["regular"].id).update(price=Decimal("13.99"))
+        MenuCacheService.invalidate(restaurant)
+        _, pricing = OrderService.validate_and_price_items(restaurant, cart)
+        assert pricing.subtotal == Decimal("13.99")
+
+        burger.is_active = False
+        burger.save()
+        MenuCacheService.invalidate(restaurant)
+        with pytest.raises(ValidationError):
+            OrderService.validate_and_price_items(restaurant, cart)
+
+    def test_item_from_other_restaurant_rejected(self, menu_setup):
+        foreign_item = MenuItemFactory()
+        foreign_variant = MenuItemVariantFactory(menu_item=foreign_item)
+        with pytest.raises(ValidationError):
+            OrderService.validate_and_price_items(
+                menu_setup["restaurant"],
+                [{"menu_item_id": foreign_item.id, "variant_id": foreign_variant.id, "quantity": 1}],
+            )
+
+    def test_parsed_order_prices_and_drops_invalid(self, menu_setup):
+        parsed = ParsedOrder(
+            items=[
+                ParsedOrderItem(
+                    menu_item_id=menu_setup["burger"].id,
+                    variant_id=menu_setup["regular"].id,
+                    quantity=3,
+                    modifier_ids=[menu_setup["cheese"].id, 999999],
+                ),
+                ParsedOrderItem(menu_item_id=999999, variant_id=1),
+            ],
+        )
+        result = OrderService.validate_and_price_order(menu_setup["restaurant"], parsed)
+        assert len(result["items"]) == 1
+        assert result["items"][0]["modifiers"] == [
+            {"id": menu_setup["cheese"].id, "name": "Cheese", "price_adjustment": "0.75"}
+        ]
+        assert result["items"][0]["line_total"] == "41.22"
+        assert result["total_price"] == "41.22"
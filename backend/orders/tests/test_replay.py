@@ -0,0 +1,131 @@
+"""
+Tests for the replay model backend (ai.replay).
+"""
+
+import json
+import random
+import statistics
+
+import pytest
+
+from ai.metrics import llm_metrics
+from ai.models import resolve_model
+from ai.replay import LatencyDistribution, ReplayLibrary, ReplayMissError, ReplayModel
+from orders.llm.agent import OrderParsingAgent
+from orders.llm.base import ParsedOrder
+
+LATTE_ORDER = {"items": [{"menu_item_id": 7, "variant_id": 3, "quantity": 2}], "language": "en"}
+
+
+@pytest.fixture
+def recordings(settings, tmp_path, monkeypatch):
+    monkeypatch.setenv("AGNO_TELEMETRY", "false")
+    path = tmp_path / "recordings.json"
+    path.write_text(
+        json.dumps(
+            {
+                "recordings": [
+                    {"schema": "ParsedOrder", "match": "latte", "response": LATTE_ORDER},
+                    {"schema": "ParsedOrder", "response": {"items": []}},
+                ]
+            }
+        )
+    )
+    settings.LLM_MODEL = ""
+    settings.LLM_HEDGING_ENABLED = False
+    settings.LLM_METRICS_SINKS = ["memory"]
+    settings.LLM_REPLAY_RECORDINGS = str(path)
+    llm_metrics.reset()
+    yield
+    llm_metrics.reset()
+
+
+class TestLatencyDistribution:
+    def test_samples_match_median_and_p95(self):
+        rng = random.Random(1)
+        samples = sorted(LatencyDistribution(median_ms=800, p95_ms=2000).sample(rng) for _ in range(4000))
+
+        assert statistics.median(samples) == pytest.approx(0.8, rel=0.1)
+        assert samples[int(len(samples) * 0.95)] == pytest.approx(2.0, rel=0.15)
+
+    def test_fixed_latency_without_p95(self):
+        assert LatencyDistribution(median_ms=250).sample(random.Random()) == 0.25
+
+    def test_no_latency_by_default(self):
+        assert LatencyDistribution().sample(random.Random()) == 0.0
+
+
+class TestReplayLibrary:
+    def test_longest_match_wins(self):
+        library = ReplayLibrary()
+        library.add("ParsedOrder", {"items": []})
+        library.add("ParsedOrder", LATTE_ORDER, match="latte")
+
+        recording, _ = library.lookup("ParsedOrder", "two lattes please")
+
+        assert recording.response == LATTE_ORDER
+
+    def test_equal_matches_are_served_in_turn(self):
+        library = ReplayLibrary()
+        for page in range(3):
+            library.add("ParsedMenuPage", {"page": page})
+
+        served = [library.lookup("ParsedMenuPage", "")[0].response["page"] for _ in range(4)]
+
+        assert served == [0, 1, 2, 0]
+
+    def test_latency_is_scaled_and_seeded(self):
+        def latencies(seed):
+            library = ReplayLibrary(seed=seed, latency_scale=0.5)
+            library.add("ParsedOrder", {}, latency=LatencyDistribution(median_ms=100, p95_ms=300))
+            return [library.lookup("ParsedOrder", "")[1] for _ in range(3)]
+
+        assert latencies(4) == latencies(4)
+        assert all(0 < latency < 1 for latency in latencies(4))
+
+    def test_miss_raises(self):
+        library = ReplayLibrary()
+        library.add("ParsedOrder", LATTE_ORDER, match="latte")
+
+        with pytest.raises(ReplayMissError):
+            library.lookup("ParsedOrder", "a pizza")
+        with pytest.raises(ReplayMissError):
+            library.lookup("ParsedMenu", "latte")
+
+
+class TestReplayModel:
+    def test_resolve_model_replays_any_model(self, recordings):
+        model = resolve_model("claude-sonnet-4-20250514")
+
+        assert isinstance(model, ReplayModel)
+        assert model.id == "claude-sonnet-4-20250514"
+
+    def test_resolve_model_uses_provider_without_recordings(self, settings):
+        settings.LLM_REPLAY_RECORDINGS = ""
+        assert not isinstance(resolve_model("gpt-4o-mini"), ReplayModel)
+
+    def test_agent_run_returns_recorded_output(self, recordings):
+        parsed = OrderParsingAgent.run(raw_input="two lattes", menu_context="menu")
+
+        assert isinstance(parsed, ParsedOrder)
+        assert [(item.menu_item_id, item.variant_id, item.quantity) for item in parsed.items] == [(7, 3, 2)]
+
+    @pytest.mark.asyncio
+    async def test_agent_arun_returns_recorded_output(self, recordings):
+        parsed = await OrderParsingAgent.arun(raw_input="something else", menu_context="menu")
+
+        assert parsed == ParsedOrder(items=[])
+
+    def test_stream_concatenates_to_recorded_json(self, recordings):
+        chunks = list(OrderParsingAgent.stream(raw_input="a latte", menu_context="menu"))
+
+        assert json.loads("".join(chunks)) == LATTE_ORDER
+
+    def test_replayed_calls_are_recorded_with_estimated_tokens(self, recordings):
+        OrderParsingAgent.run(raw_input="two lattes", menu_context="M" * 4000)
+
+        [call] = llm_metrics.recent()
+        assert call.agent == "OrderParsingAgent"
+        assert call.input_tokens >= 1000
+        assert call.output_tokens > 0
+        assert call.error == ""
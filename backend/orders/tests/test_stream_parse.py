@@ -0,0 +1,141 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from orders.llm.base import ParsedOrder, ParsedOrderItem
+from orders.llm.parse_cache import parse_cache
+from orders.llm.stream_parser import ParsedOrderStream
+from restaurants.models import Subscription
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+)
+
+
+class TestParsedOrderStream:
+    DOCUMENT = json.dumps(
+        {
+            "items": [
+                {"menu_item_id": 1, "variant_id": 10, "quantity": 2, "modifier_ids": [100, 101]},
+                {"menu_item_id": 2, "variant_id": 20, "special_requests": 'no "{onions}" \\ please'},
+            ],
+            "allergies": ["Peanuts"],
+            "language": "en",
+        }
+    )
+
+    def test_items_complete_as_their_braces_close(self):
+        stream = ParsedOrderStream()
+        completed_at = []
+        for i, ch in enumerate(self.DOCUMENT):
+            for item in stream.feed(ch):
+                completed_at.append((i, item.menu_item_id))
+
+        first_end = self.DOCUMENT.index("}") + 1
+        assert [item_id for _, item_id in completed_at] == [1, 2]
+        assert completed_at[0][0] == first_end - 1
+        assert stream.finish() == ParsedOrder.model_validate_json(self.DOCUMENT)
+
+    def test_ignores_objects_outside_items(self):
+        stream = ParsedOrderStream()
+        items = stream.feed('{"note": {"items": [{"menu_item_id": 9, "variant_id": 9}]}, "items": []}')
+        assert items == []
+
+    def test_invalid_item_is_skipped(self):
+        stream = ParsedOrderStream()
+        items = stream.feed('{"items": [{"menu_item_id": "x"}, {"menu_item_id": 3, "variant_id": 4}]}')
+        assert [i.menu_item_id for i in items] == [3]
+
+
+def _events(response) -> list[tuple[str, dict]]:
+    body = b"".join(response.streaming_content).decode()
+    events = []
+    for block in body.strip().split("\n\n"):
+        event_line, data_line = block.split("\n")
+        events.append((event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+    return events
+
+
+@pytest.mark.django_db
+class TestParseOrderStreamView:
+    @pytest.fixture
+    def menu_setup(self):
+        restaurant = RestaurantFactory(slug="stream-test")
+        version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+        cat = MenuCategoryFactory(version=version, name="Mains")
+        burger = MenuItemFactory(category=cat, name="Burger")
+        regular = MenuItemVariantFactory(menu_item=burger, label="Regular", price=Decimal("12.99"))
+        bacon = MenuItemModifierFactory(menu_item=burger, name="Extra Bacon", price_adjustment=Decimal("2.00"))
+        fries = MenuItemFactory(category=cat, name="Fries")
+        fries_regular = MenuItemVariantFactory(menu_item=fries, label="Regular", price=Decimal("3.50"))
+        parsed = ParsedOrder(
+            items=[
+                ParsedOrderItem(menu_item_id=burger.id, variant_id=regular.id, modifier_ids=[bacon.id]),
+                ParsedOrderItem(menu_item_id=fries.id, variant_id=fries_regular.id, quantity=2),
+                ParsedOrderItem(menu_item_id=99999, variant_id=99999),
+            ],
+            allergies=["Sesame"],
+        )
+        return restaurant, parsed
+
+    @patch("orders.services.OrderParsingAgent.run")
+    @patch("orders.services.OrderParsingAgent.stream")
+    def test_streams_items_then_same_payload_as_parse(self, mock_stream, mock_run, api_client, menu_setup):
+        restaurant, parsed = menu_setup
+        document = parsed.model_dump_json()
+        mock_stream.return_value = iter(document[i : i + 7] for i in range(0, len(document), 7))
+        mock_run.return_value = parsed
+        text = {"raw_input": "burger with bacon and two fries, sesame allergy"}
+
+        response = api_client.post("/api/order/stream-test/parse/stream/", text, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "text/event-stream"
+        events = _events(response)
+        assert [name for name, _ in events] == ["item", "item", "done"]
+        assert events[0][1]["name"] == "Burger"
+        assert events[1][1]["line_total"] == "7.00"
+        parse_cache.clear()
+        plain = api_client.post("/api/order/stream-test/parse/", text, format="json")
+        assert events[-1][1] == plain.data
+        assert plain.data["allergies"] == ["Sesame"]
+
+    @patch("orders.services.OrderParsingAgent.stream")
+    def test_fast_path_streams_without_llm(self, mock_stream, api_client, menu_setup):
+        response = api_client.post("/api/order/stream-test/parse/stream/", {"raw_input": "2 fries"}, format="json")
+        events = _events(response)
+        mock_stream.assert_not_called()
+        assert [name for name, _ in events] == ["item", "done"]
+        assert events[-1][1]["total_price"] == "7.00"
+
+    @patch("orders.services.OrderParsingAgent.stream")
+    def test_llm_failure_becomes_error_event(self, mock_stream, api_client, menu_setup):
+        mock_stream.return_value = iter(['{"items": [', "oops"])
+        response = api_client.post("/api/order/stream-test/parse/stream/", {"raw_input": "surprise me"}, format="json")
+        assert _events(response)[-1][0] == "error"
+
+    def test_inactive_subscription_rejected_before_streaming(self, api_client, menu_setup):
+        restaurant, _ = menu_setup
+        Subscription.objects.create(
+            restaurant=restaurant,
+            plan="starter",
+            status="canceled",
+            current_period_start=timezone.now(),
+            current_period_end=timezone.now(),
+        )
+        response = api_client.post(
+            "/api/order/stream-test/parse/stream/",
+            {"raw_input": "2 fries"},
+            format="json",
+            HTTP_ACCEPT="text/event-stream",
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert response.content.startswith(b"event: error\n")
@@ -1,12 +1,17 @@
+from django.conf import settings
 from django.urls import path
 
 from orders.views import (
+    AsyncConfirmPaymentView,
+    AsyncParseOrderView,
     ConfirmOrderView,
     ConfirmPaymentView,
     CreatePaymentView,
     KitchenOrderUpdateView,
     OrderQueueView,
     OrderStatusView,
+    ParseOrderBatchView,
+    ParseOrderStreamView,
     ParseOrderView,
     PublicMenuView,
     QueueInfoView,
@@ -15,15 +20,24 @@ from orders.views import (
     StripeWebhookView,
 )
 
+# Under ASGI the async views release the worker thread while waiting on the
+# LLM / Stripe; under WSGI the sync views avoid a per-request event loop.
+if settings.ORDER_ASYNC_VIEWS:
+    parse_view, confirm_payment_view = AsyncParseOrderView, AsyncConfirmPaymentView
+else:
+    parse_view, confirm_payment_view = ParseOrderView, ConfirmPaymentView
+
 urlpatterns = [
     path("order/<slug:slug>/menu/", PublicMenuView.as_view(), name="public-menu"),
-    path("order/<slug:slug>/parse/", ParseOrderView.as_view(), name="parse-order"),
+    path("order/<slug:slug>/parse/", parse_view.as_view(), name="parse-order"),
+    path("order/<slug:slug>/parse/batch/", ParseOrderBatchView.as_view(), name="parse-order-batch"),
+    path("order/<slug:slug>/parse/stream/", ParseOrderStreamView.as_view(), name="parse-order-stream"),
     path("order/<slug:slug>/confirm/", ConfirmOrderView.as_view(), name="confirm-order"),
     path("order/<slug:slug>/create-payment/", CreatePaymentView.as_view(), name="create-payment"),
     path("order/<slug:slug>/save-card/<uuid:order_id>/", SaveCardConsentView.as_view(), name="save-card-consent"),
     path(
         "order/<slug:slug>/confirm-payment/<uuid:order_id>/",
-        ConfirmPaymentView.as_view(),
+        confirm_payment_view.as_view(),
         name="confirm-payment",
     ),
     path(
@@ -1,18 +1,33 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ai.limiter import LLMCapacityError
+from orders.async_api import AsyncAPIView, api_response
 from orders.broadcast import broadcast_order_to_customer
 from integrations.models import POSConnection
 from integrations.tasks import dispatch_order_to_pos
 from orders.models import Order
 from orders.queue_service import QueueService
-from orders.serializers import ConfirmOrderSerializer, OrderResponseSerializer, ParseInputSerializer
+from orders.serializers import (
+    ConfirmOrderSerializer,
+    OrderResponseSerializer,
+    ParseBatchInputSerializer,
+    ParseInputSerializer,
+)
 from orders.services import OrderService
+from orders.sse import EventStreamRenderer, format_sse
 from restaurants.models import Restaurant
 
+logger = logging.getLogger(__name__)
+
 
 class PublicMenuView(APIView):
     permission_classes = [AllowAny]
@@ -36,6 +51,80 @@ class ParseOrderView(APIView):
         return Response(result)
 
 
+class ParseOrderBatchView(APIView):
+    """Parse several guests' orders, e.g. one table's, in one request.
+
+    Returns a result per input, in order, each with either the parsed
+    "order" (as ParseOrderView returns it) or an "error".
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request, slug):
+        restaurant = OrderService.get_restaurant_by_slug(slug)
+
+        serializer = ParseBatchInputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = OrderService.parse_orders(
+            restaurant, serializer.validated_data["raw_inputs"]
+        )
+        return Response({"results": results})
+
+
+class ParseOrderStreamView(APIView):
+    """Server-sent events version of ParseOrderView.
+
+    Emits an "item" event per validated line item as the LLM produces it and
+    a final "done" event with the same payload ParseOrderView returns.
+    """
+
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def post(self, request, slug):
+        restaurant = OrderService.get_restaurant_by_slug(slug)
+
+        serializer = ParseInputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        events = OrderService.stream_parse_order(
+            restaurant, serializer.validated_data["raw_input"]
+        )
+        response = StreamingHttpResponse(
+            self._event_stream(events), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def _event_stream(events):
+        try:
+            for event, data in events:
+                yield format_sse(event, data)
+        except LLMCapacityError as exc:
+            yield format_sse("error", {"detail": str(exc.detail), "retry_after": exc.wait})
+        except Exception:
+            logger.exception("Streaming order parse failed")
+            yield format_sse("error", {"detail": "Failed to parse order."})
+
+
+class AsyncParseOrderView(AsyncAPIView):
+    """Async ParseOrderView: no thread is held while the LLM responds."""
+
+    async def post(self, request, slug):
+        restaurant = await OrderService.aget_restaurant_by_slug(slug)
+
+        serializer = ParseInputSerializer(data=self.parse_json(request))
+        serializer.is_valid(raise_exception=True)
+
+        result = await OrderService.aparse_order(
+            restaurant, serializer.validated_data["raw_input"]
+        )
+        return api_response(result)
+
+
 class ConfirmOrderView(APIView):
     permission_classes = [AllowAny]
 
@@ -235,6 +324,33 @@ class ConfirmPaymentView(APIView):
         return Response(OrderResponseSerializer(order).data)
 
 
+class AsyncConfirmPaymentView(AsyncAPIView):
+    """Async ConfirmPaymentView: the Stripe round trip is awaited."""
+
+    async def post(self, request, slug, order_id):
+        order = await Order.objects.filter(id=order_id, restaurant__slug=slug).afirst()
+        if order is None:
+            return api_response({"detail": "Order not found."}, status.HTTP_404_NOT_FOUND)
+
+        order = await OrderService.aconfirm_payment(order)
+
+        if order.payment_status == "paid":
+            await sync_to_async(dispatch_order_to_pos.delay)(str(order.id))
+
+        if order.payment_status == "failed":
+            return api_response(
+                {
+                    "detail": "Payment failed.",
+                    "status": order.status,
+                    "payment_status": "failed",
+                },
+                status.HTTP_402_PAYMENT_REQUIRED,
+            )
+
+        data = await sync_to_async(lambda: OrderResponseSerializer(order).data)()
+        return api_response(data)
+
+
 class StripeWebhookView(APIView):
     authentication_classes = []
     permission_classes = [AllowAny]
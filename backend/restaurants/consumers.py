@@ -0,0 +1,58 @@
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+
+from restaurants.models import Restaurant, RestaurantStaff
+from restaurants.serializers.menu_upload_serializers import MenuUploadJobSerializer
+from restaurants.services.menu_upload_job_service import MenuUploadJobService, job_group_name
+
+
+class MenuUploadJobConsumer(AsyncWebsocketConsumer):
+    """Progress of a MenuUploadJob, for the restaurant's owner and staff.
+
+    Sends the job as the job detail endpoint returns it on connect, then
+    the job's progress events (see MenuUploadJobService).
+    """
+
+    async def connect(self):
+        self.slug = self.scope["url_route"]["kwargs"]["slug"]
+        self.job_id = self.scope["url_route"]["kwargs"]["job_id"]
+
+        user = self.scope.get("user", AnonymousUser())
+        job_data = None if isinstance(user, AnonymousUser) else await self._get_job_data(user)
+        if job_data is None:
+            await self.close()
+            return
+
+        self.group_name = job_group_name(self.job_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        await self.send(text_data=json.dumps({"event": "job", "job": job_data}))
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def menu_upload_progress(self, event):
+        """Handle menu_upload_progress messages from the channel layer."""
+        await self.send(text_data=json.dumps(event["data"]))
+
+    @database_sync_to_async
+    def _get_job_data(self, user):
+        try:
+            restaurant = Restaurant.objects.get(slug=self.slug)
+        except Restaurant.DoesNotExist:
+            return None
+        if restaurant.owner != user and not RestaurantStaff.objects.filter(user=user, restaurant=restaurant).exists():
+            return None
+
+        try:
+            job = MenuUploadJobService.get_job(restaurant, self.job_id)
+        except (NotFound, ValidationError):  # unknown or malformed job id
+            return None
+        return MenuUploadJobSerializer(job).data
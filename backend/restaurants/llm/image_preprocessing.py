@@ -0,0 +1,173 @@
+"""
+Menu photo preprocessing before vision parsing.
+
+Uploads are phone photos of up to 10MB. The vision model never sees more
+than its own effective resolution: OpenAI scales a high-detail image to fit
+2048x2048 and then its shorter side down to 768px. Sending the full photo
+only costs upload time. preprocess_menu_image() therefore:
+
+- applies the EXIF orientation, so the model gets the page upright;
+- scales the image down to that effective resolution;
+- stretches its contrast, optionally in grayscale;
+- re-encodes it as a compact JPEG or WebP.
+
+A very tall menu (a long board or a scrolled screenshot) would be scaled by
+the provider until its text is unreadable. It is cut into overlapping
+segments instead, each sent at full effective resolution. MenuParsingAgent
+reads all segments of a page in one request.
+
+Decoding and resizing run in a process pool (MENU_IMAGE_WORKERS), so they
+do not hold the GIL of the request or task worker. An upload spooled to disk
+(see restaurants.llm.image_spool) is decoded from its file there, without
+its bytes passing through the caller. Images Pillow cannot read, e.g. HEIC,
+are passed through unchanged.
+"""
+
+import io
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from restaurants.llm.image_spool import ImageSource, read_image
+
+logger = logging.getLogger(__name__)
+
+MAX_LONG_SIDE = 2048  # the provider fits high-detail images into 2048x2048...
+MAX_SHORT_SIDE = 768  # ...then scales their shorter side down to 768px
+TALL_RATIO = 2.5  # height/width above which a page is cut into segments
+SEGMENT_RATIO = 1.5  # height/width of one segment
+SEGMENT_OVERLAP = 0.1  # share of a segment repeated in the next, so no line is cut in half
+MAX_SEGMENTS = 8
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    format: str = "jpeg"  # "jpeg" or "webp"
+    grayscale: bool = False
+    tile_tall: bool = True
+
+    @classmethod
+    def from_settings(cls) -> "PreprocessOptions":
+        return cls(
+            format=settings.MENU_IMAGE_FORMAT,
+            grayscale=settings.MENU_IMAGE_GRAYSCALE,
+            tile_tall=settings.MENU_IMAGE_TILE_TALL,
+        )
+
+
+def effective_size(width: int, height: int) -> tuple[int, int]:
+    """The size the vision model sees an image of width x height at."""
+    scale = min(1.0, MAX_LONG_SIDE / max(width, height))
+    scale *= min(1.0, MAX_SHORT_SIDE / (min(width, height) * scale))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def segment_boxes(width: int, height: int) -> list[tuple[int, int, int, int]]:
+    """Crop boxes of overlapping segments covering a tall page top to bottom."""
+    segment_height = round(width * SEGMENT_RATIO)
+    step = round(segment_height * (1 - SEGMENT_OVERLAP))
+    count = min(MAX_SEGMENTS, math.ceil((height - segment_height) / step) + 1)
+    if count == MAX_SEGMENTS:
+        # Spread the segments over the whole page rather than dropping its end.
+        segment_height = math.ceil(height / (count - (count - 1) * SEGMENT_OVERLAP))
+        step = (height - segment_height) / (count - 1)
+    return [
+        (0, top, width, min(height, top + segment_height))
+        for top in (min(round(i * step), height - segment_height) for i in range(count))
+    ]
+
+
+def _normalize(image: Image.Image, options: PreprocessOptions) -> Image.Image:
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, "white")
+        image = Image.alpha_composite(background, image)
+    image = image.convert("L" if options.grayscale else "RGB")
+    return ImageOps.autocontrast(image, cutoff=1, preserve_tone=True)
+
+
+def _encode(image: Image.Image, options: PreprocessOptions) -> bytes:
+    buffer = io.BytesIO()
+    if options.format == "webp":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY)
+    else:
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def preprocess_image(data: ImageSource, options: PreprocessOptions) -> list[bytes]:
+    """
+    Preprocess one uploaded image: one encoded image, or several for a tall
+    page. Returns the image's bytes unchanged if it cannot be read.
+    """
+    try:
+        image = Image.open(io.BytesIO(data) if isinstance(data, bytes) else data.path)
+        # Let JPEG decoding skip detail below the effective resolution.
+        image.draft("L" if options.grayscale else "RGB", (MAX_SHORT_SIDE, MAX_SHORT_SIDE))
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+
+        if options.tile_tall and height > width * TALL_RATIO:
+            crops = [image.crop(box) for box in segment_boxes(width, height)]
+        else:
+            crops = [image]
+
+        segments = []
+        for crop in crops:
+            crop = crop.resize(effective_size(*crop.size), Image.Resampling.LANCZOS)
+            segments.append(_encode(_normalize(crop, options), options))
+    except Exception as exc:
+        logger.warning("Could not preprocess menu image, sending it as uploaded: %s", exc)
+        return [read_image(data)]
+    return segments
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool() -> ProcessPoolExecutor | None:
+    """The shared worker pool, or None to preprocess in the calling thread."""
+    global _pool
+    # Celery's prefork workers are daemonic, and daemonic processes may not start children.
+    if settings.MENU_IMAGE_WORKERS <= 0 or multiprocessing.current_process().daemon:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: forking a process that runs threads can deadlock the child.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.MENU_IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def preprocess_menu_image(data: ImageSource) -> list[bytes]:
+    """preprocess_image() with the configured options, in the process pool."""
+    if not settings.MENU_IMAGE_PREPROCESSING_ENABLED:
+        return [read_image(data)]
+    options = PreprocessOptions.from_settings()
+    pool = _process_pool()
+    if pool is not None:
+        try:
+            return pool.submit(preprocess_image, data, options).result()
+        except BrokenProcessPool:
+            logger.warning("Menu image process pool broke, preprocessing in-process")
+            _discard_pool(pool)
+    return preprocess_image(data, options)
@@ -0,0 +1,101 @@
+"""
+Uploaded menu images, kept on disk until they are parsed.
+
+The upload views used to read every image into memory (f.read()), up to
+ten of 10MB per request, before parsing started; each was then copied
+again into the preprocessing process. Uploads now stay on disk instead:
+
+- the upload views have Django stream request files into temporary files
+  (TemporaryFileUploadHandler), rather than keeping small ones in memory;
+- spool_uploads() hashes each file one chunk at a time, copying into a
+  temporary file of its own only an upload that is not on disk already;
+- the parse stage passes SpooledImages, not bytes, along: preprocessing
+  decodes each image from its path in the worker process, and only the
+  small re-encoded segments come back.
+
+A request thus holds one chunk of an upload at a time and, while parsing,
+no image bytes at all. Background jobs (MenuUploadJobService.run_job) do
+the same with the images stored on their page rows: spool_images() writes
+them out as they are read, one row at a time. Images sent to the model as uploaded (those Pillow
+cannot read, or all of them with preprocessing off) are the exception:
+read_image() reads them whole, one per running parse task.
+"""
+
+import hashlib
+import tempfile
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+from django.core.files.uploadedfile import UploadedFile
+
+CHUNK_SIZE = 64 * 1024  # bytes read at a time when hashing or copying an upload
+
+
+@dataclass(frozen=True)
+class SpooledImage:
+    path: str
+    size: int
+    sha256: str
+
+
+type ImageSource = bytes | SpooledImage
+
+
+def read_image(image: ImageSource) -> bytes:
+    """The image's bytes, read from disk for a SpooledImage."""
+    if isinstance(image, bytes):
+        return image
+    with open(image.path, "rb") as file:
+        return file.read()
+
+
+def image_digest(image: ImageSource) -> str:
+    """SHA-256 of the image as uploaded."""
+    if isinstance(image, bytes):
+        return hashlib.sha256(image).hexdigest()
+    return image.sha256
+
+
+@contextmanager
+def spool_uploads(uploads: Iterable[UploadedFile]) -> Iterator[list[SpooledImage]]:
+    """
+    Spool uploaded files to disk and hash them, a chunk at a time. The
+    temporary files made here are removed on exit; Django's own go at the
+    end of the request.
+    """
+    with ExitStack() as stack:
+        images = []
+        for upload in uploads:
+            digest = hashlib.sha256()
+            if hasattr(upload, "temporary_file_path"):
+                for chunk in upload.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                path = upload.temporary_file_path()
+            else:
+                spool = stack.enter_context(tempfile.NamedTemporaryFile(prefix="menu-upload-"))
+                for chunk in upload.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                    spool.write(chunk)
+                spool.flush()
+                path = spool.name
+            images.append(SpooledImage(path=path, size=upload.size, sha256=digest.hexdigest()))
+        yield images
+
+
+@contextmanager
+def spool_images(images: Iterable[bytes]) -> Iterator[list[SpooledImage]]:
+    """
+    Write images to temporary files, removed on exit. Pass an iterator that
+    reads them one at a time (e.g. from the database), so only one image is
+    held in memory at once.
+    """
+    with ExitStack() as stack:
+        spooled = []
+        for image in images:
+            spool = stack.enter_context(tempfile.NamedTemporaryFile(prefix="menu-upload-"))
+            spool.write(image)
+            spool.flush()
+            spooled.append(SpooledImage(path=spool.name, size=len(image), sha256=hashlib.sha256(image).hexdigest()))
+            del image  # the last one would otherwise stay in memory while the images are parsed
+        yield spooled
@@ -0,0 +1,202 @@
+"""
+Deterministic merge of ParsedMenuPage results, without a model call.
+
+Pages of one menu overlap: a category continues on the next page, or the
+same page is photographed twice. merge_menu_pages() unions them:
+
+- Categories, and items within a category, are matched by normalized name
+  (case, accents, punctuation and spacing ignored), then fuzzily to absorb
+  misreadings such as "Chiken Tikka". Names with different numbers
+  ("Combo 1", "Combo 2") never match.
+- A matched item keeps its first name and description and the union of
+  its variants, matched by normalized label.
+- When copies of a variant disagree on price, the price read on most pages
+  wins, ties going to the earliest page, and the disagreement is reported
+  as a PriceConflict.
+
+Names, categories, items and variants keep the order they first appear in,
+so the result depends only on the pages and their order.
+resolve_conflicts_with_model() hands just the conflicting items to
+MenuMergeAgent, for deployments that let the model settle price conflicts
+(MENU_MERGE_LLM_FALLBACK).
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from difflib import SequenceMatcher
+
+from restaurants.llm.merge_agent import MenuMergeAgent
+from restaurants.llm.schemas import (
+    ParsedMenu,
+    ParsedMenuCategory,
+    ParsedMenuItem,
+    ParsedMenuPage,
+    ParsedMenuVariant,
+)
+
+FUZZY_MATCH_RATIO = 0.9  # SequenceMatcher ratio of normalized names
+FUZZY_MIN_LENGTH = 6  # shorter names ("tea", "pea") only match exactly
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def normalize_name(name: str) -> str:
+    """Casefold, strip accents and punctuation, and collapse whitespace."""
+    text = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    return " ".join(_NON_WORD_RE.sub(" ", text.casefold()).split())
+
+
+def _similarity(a: str, b: str) -> float:
+    """Match ratio of two normalized names; 0 if they cannot be the same name."""
+    if a == b:
+        return 1.0
+    if min(len(a), len(b)) < FUZZY_MIN_LENGTH or _NUMBER_RE.findall(a) != _NUMBER_RE.findall(b):
+        return 0.0
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def _find[T](entries: dict[str, T], key: str) -> T | None:
+    """The entry whose key matches, exactly or else most closely; None if none is close enough."""
+    if key in entries:
+        return entries[key]
+    best, best_ratio = None, 0.0
+    for other, entry in entries.items():
+        ratio = _similarity(key, other)
+        if ratio >= FUZZY_MATCH_RATIO and ratio > best_ratio:
+            best, best_ratio = entry, ratio
+    return best
+
+
+@dataclass(frozen=True)
+class PriceConflict:
+    category: str
+    item: str
+    variant: str
+    prices: tuple[Decimal, ...]  # distinct prices read, in page order
+    chosen: Decimal
+    copies: tuple[ParsedMenuItem, ...] = field(repr=False)  # the item as read on each page
+
+
+@dataclass
+class MenuMerge:
+    menu: ParsedMenu
+    conflicts: list[PriceConflict]
+
+
+@dataclass
+class _Variant:
+    label: str
+    prices: list[Decimal] = field(default_factory=list)  # one per copy, in page order
+
+
+@dataclass
+class _Item:
+    name: str
+    description: str | None
+    variants: dict[str, _Variant] = field(default_factory=dict)
+    copies: list[ParsedMenuItem] = field(default_factory=list)
+
+    def add(self, item: ParsedMenuItem) -> None:
+        self.copies.append(item)
+        if not self.description:
+            self.description = item.description
+        for variant in item.variants:
+            key = normalize_name(variant.label)
+            merged = self.variants.setdefault(key, _Variant(label=variant.label))
+            merged.prices.append(variant.price)
+
+
+@dataclass
+class _Category:
+    name: str
+    items: dict[str, _Item] = field(default_factory=dict)
+
+
+def _choose_price(prices: list[Decimal]) -> Decimal:
+    """The most often read price; the earliest one on a tie."""
+    counts = Counter(prices)
+    return max(dict.fromkeys(prices), key=lambda price: counts[price])
+
+
+def merge_menu_pages(pages: list[ParsedMenuPage]) -> MenuMerge:
+    """Merge parsed pages, in page order, into one ParsedMenu."""
+    categories: dict[str, _Category] = {}
+    for page in pages:
+        for category in page.categories:
+            key = normalize_name(category.name)
+            merged_category = _find(categories, key)
+            if merged_category is None:
+                merged_category = categories[key] = _Category(name=category.name)
+            for item in category.items:
+                item_key = normalize_name(item.name)
+                merged_item = _find(merged_category.items, item_key)
+                if merged_item is None:
+                    merged_item = merged_category.items[item_key] = _Item(name=item.name, description=None)
+                merged_item.add(item)
+
+    conflicts = []
+    menu_categories = []
+    for category in categories.values():
+        items = []
+        for item in category.items.values():
+            variants = []
+            for variant in item.variants.values():
+                price = _choose_price(variant.prices)
+                distinct = tuple(dict.fromkeys(variant.prices))
+                if len(distinct) > 1:
+                    conflicts.append(
+                        PriceConflict(
+                            category=category.name,
+                            item=item.name,
+                            variant=variant.label,
+                            prices=distinct,
+                            chosen=price,
+                            copies=tuple(item.copies),
+                        )
+                    )
+                variants.append(ParsedMenuVariant(label=variant.label, price=price))
+            items.append(ParsedMenuItem(name=item.name, description=item.description, variants=variants))
+        if items:
+            menu_categories.append(ParsedMenuCategory(name=category.name, items=items))
+    return MenuMerge(menu=ParsedMenu(categories=menu_categories), conflicts=conflicts)
+
+
+def resolve_conflicts_with_model(merge: MenuMerge) -> ParsedMenu:
+    """
+    Let MenuMergeAgent settle the items with price conflicts, sending only
+    their copies. Items the model does not answer for keep the local result.
+    """
+    conflicted: dict[tuple[str, str], tuple[ParsedMenuItem, ...]] = {}
+    for conflict in merge.conflicts:
+        conflicted.setdefault((conflict.category, conflict.item), conflict.copies)
+    if not conflicted:
+        return merge.menu
+
+    pages = [
+        ParsedMenuPage(categories=[ParsedMenuCategory(name=category, items=[copy])])
+        for (category, _), copies in conflicted.items()
+        for copy in copies
+    ]
+    resolved = MenuMergeAgent.run(pages=pages)
+    if not isinstance(resolved, ParsedMenu):
+        return merge.menu
+    answers = {
+        (normalize_name(category.name), normalize_name(item.name)): item
+        for category in resolved.categories
+        for item in category.items
+    }
+
+    categories = []
+    for category in merge.menu.categories:
+        items = [
+            answers.get((normalize_name(category.name), normalize_name(item.name)), item)
+            if (category.name, item.name) in conflicted
+            else item
+            for item in category.items
+        ]
+        categories.append(category.model_copy(update={"items": items}))
+    return ParsedMenu(categories=categories)
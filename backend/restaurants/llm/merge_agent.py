@@ -30,6 +30,7 @@ by name within each category).
 
 class MenuMergeAgent(BaseAgent):
     default_model = "gpt-4o-mini"
+    hedge_after = 30.0  # ~p95 latency; only used when LLM_HEDGING_ENABLED
 
     def get_name(self) -> str:
         return "MenuMergeAgent"
@@ -74,5 +75,4 @@ class MenuMergeAgent(BaseAgent):
         instance = cls()
         agent = instance._build_agent(pages=pages)
 
-        result = agent.run(instance.prompt(pages=pages))
-        return result.content
+        return instance._run_agent(agent, instance.prompt(pages=pages))
@@ -0,0 +1,92 @@
+"""
+Content-addressed cache of ParsedMenuPage results.
+
+Owners often upload the same photos again, after a failed save or to append
+one new page to pages they already sent. Each page is keyed on the SHA-256
+of its preprocessed image bytes (every segment of a tall page) together with
+the parsing model and instructions, so a prompt or model change re-parses
+instead of serving results the new prompt would not give.
+
+Entries live in the shared cache, so parses made by the web process and by
+Celery workers serve each other. They expire after MENU_PAGE_CACHE_TTL, and
+the cache server's eviction policy bounds their total size; pages whose JSON
+is larger than MENU_PAGE_CACHE_MAX_BYTES are not stored. Empty pages are not
+cached so they get retried. Cache errors count as misses: an outage costs a
+vision call, not the upload.
+"""
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from restaurants.llm.parse_agent import INSTRUCTIONS, SEGMENTS_PROMPT, MenuParsingAgent
+from restaurants.llm.schemas import ParsedMenuPage
+
+logger = logging.getLogger(__name__)
+
+# Changes whenever the parsing model or prompts do, so old entries are never read again.
+_PARSER_DIGEST = hashlib.sha256(
+    "\0".join([MenuParsingAgent.default_model, INSTRUCTIONS, SEGMENTS_PROMPT]).encode()
+).hexdigest()[:12]
+
+
+def page_digest(segments: list[bytes]) -> str:
+    """SHA-256 of a page's preprocessed image segments, in order."""
+    digest = hashlib.sha256()
+    for segment in segments:
+        digest.update(len(segment).to_bytes(8, "big"))
+        digest.update(segment)
+    return digest.hexdigest()
+
+
+@dataclass
+class PageCacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+
+
+class MenuPageCache:
+    def __init__(self):
+        self.stats = PageCacheStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(segments: list[bytes]) -> str:
+        return f"menu_page:{_PARSER_DIGEST}:{page_digest(segments)}"
+
+    def get(self, segments: list[bytes]) -> ParsedMenuPage | None:
+        """Return the cached parse of a page, or None on a miss."""
+        if not settings.MENU_PAGE_CACHE_ENABLED:
+            return None
+        try:
+            data = cache.get(self._key(segments))
+        except Exception as exc:
+            logger.warning("Menu page cache read failed: %s", exc)
+            data = None
+            self._count("errors")
+        self._count("hits" if data is not None else "misses")
+        return ParsedMenuPage.model_validate_json(data) if data is not None else None
+
+    def set(self, segments: list[bytes], page: ParsedMenuPage) -> None:
+        if not settings.MENU_PAGE_CACHE_ENABLED or not page.categories:
+            return
+        data = page.model_dump_json()
+        if len(data) > settings.MENU_PAGE_CACHE_MAX_BYTES:
+            return
+        try:
+            cache.set(self._key(segments), data, settings.MENU_PAGE_CACHE_TTL)
+        except Exception as exc:
+            logger.warning("Menu page cache write failed: %s", exc)
+            self._count("errors")
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            setattr(self.stats, stat, getattr(self.stats, stat) + 1)
+
+
+menu_page_cache = MenuPageCache()
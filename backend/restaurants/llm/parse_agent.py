@@ -11,7 +11,6 @@ from agno.media import Image
 from pydantic import BaseModel
 
 from ai.base_agent import BaseAgent
-from ai.models import resolve_model
 from restaurants.llm.schemas import ParsedMenuPage
 
 INSTRUCTIONS = """\
@@ -30,9 +29,16 @@ label "Standard" and that price.
 - Do not invent items or prices that are not clearly visible.
 """
 
+SEGMENTS_PROMPT = (
+    "These images are consecutive segments of one tall menu page, from top to bottom. "
+    "Neighbouring segments overlap, so items at a segment boundary appear twice: include them once. "
+    "Extract all menu categories, items, and prices from the page."
+)
+
 
 class MenuParsingAgent(BaseAgent):
     default_model = "gpt-4o"
+    hedge_after = 40.0  # ~p95 latency; only used when LLM_HEDGING_ENABLED
 
     def get_name(self) -> str:
         return "MenuParsingAgent"
@@ -43,17 +49,18 @@ class MenuParsingAgent(BaseAgent):
     def get_output_schema(self) -> type[BaseModel] | None:
         return ParsedMenuPage
 
-    def _resolve_model(self):
+    def get_model_id(self) -> str:
         """Always use gpt-4o regardless of the global LLM_MODEL setting."""
-        return resolve_model(self.default_model)
+        return self.default_model
 
     @classmethod
-    def run(cls, image_data: bytes, **kwargs: Any) -> ParsedMenuPage:  # type: ignore[override]
+    def run(cls, image_data: bytes | list[bytes], **kwargs: Any) -> ParsedMenuPage:  # type: ignore[override]
         """
         Parse a single menu page image.
 
         Args:
-            image_data: Raw bytes of the image (JPEG, PNG, WEBP, etc.).
+            image_data: Raw bytes of the image (JPEG, PNG, WEBP, etc.), or
+                the overlapping segments of one tall page, top to bottom.
 
         Returns:
             A ParsedMenuPage with all extracted categories and items.
@@ -61,9 +68,10 @@ class MenuParsingAgent(BaseAgent):
         instance = cls()
         agent = instance._build_agent()
 
-        image = Image(content=image_data)
-        result = agent.run(
-            "Extract all menu categories, items, and prices from this image.",
-            images=[image],
-        )
-        return result.content
+        if isinstance(image_data, bytes):
+            prompt = "Extract all menu categories, items, and prices from this image."
+            images = [Image(content=image_data)]
+        else:
+            prompt = SEGMENTS_PROMPT
+            images = [Image(content=segment) for segment in image_data]
+        return instance._run_agent(agent, prompt, images=images)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-16 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0012_menuuploadjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuuploadjobpage',
+            name='cached',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.17 on 2026-10-17 00:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0013_menuuploadjobpage_cached'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuversion',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='restaurants.menuversion'),
+        ),
+        migrations.AddField(
+            model_name='menuversion',
+            name='shared_categories',
+            field=models.ManyToManyField(blank=True, related_name='sharing_versions', to='restaurants.menucategory'),
+        ),
+    ]
@@ -115,6 +115,15 @@ class MenuVersion(models.Model):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=False)
     source = models.CharField(max_length=20, choices=Source.choices, default=Source.MANUAL)
+    # The version this one was derived from (duplicate or append upload), if any.
+    parent = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="children"
+    )
+    # Categories of other versions that this version shows unchanged instead of
+    # copying them; see MenuVersionService for how they are resolved and written.
+    shared_categories = models.ManyToManyField(
+        "MenuCategory", blank=True, related_name="sharing_versions"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -224,3 +233,55 @@ class Payout(models.Model):
 
     def __str__(self):
         return f"Payout({self.restaurant.name}, {self.amount} {self.currency}, {self.status})"
+
+
+class MenuUploadJob(models.Model):
+    """A background parse of uploaded menu images (see MenuUploadJobService)."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        PARSING = "parsing"
+        MERGING = "merging"
+        COMPLETED = "completed"
+        FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name="menu_upload_jobs"
+    )
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    page_count = models.PositiveSmallIntegerField()
+    result = models.JSONField(null=True, blank=True)  # the merged ParsedMenu
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"MenuUploadJob({self.restaurant.name}, {self.page_count} pages, {self.status})"
+
+
+class MenuUploadJobPage(models.Model):
+    """One uploaded image of a MenuUploadJob and its ParsedMenuPage once parsed."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        PARSED = "parsed"
+        FAILED = "failed"
+
+    job = models.ForeignKey(MenuUploadJob, on_delete=models.CASCADE, related_name="pages")
+    index = models.PositiveSmallIntegerField()
+    image = models.BinaryField(null=True)  # cleared once the page is parsed
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    result = models.JSONField(null=True, blank=True)
+    cached = models.BooleanField(default=False)  # result came from the menu page cache
+
+    class Meta:
+        ordering = ["index"]
+        unique_together = ("job", "index")
+
+    def __str__(self):
+        return f"Page {self.index + 1} of {self.job_id}"
@@ -0,0 +1,10 @@
+from django.urls import re_path
+
+from restaurants.consumers import MenuUploadJobConsumer
+
+websocket_urlpatterns = [
+    re_path(
+        r"ws/menu-upload/(?P<slug>[\w-]+)/(?P<job_id>[0-9a-f-]+)/$",
+        MenuUploadJobConsumer.as_asgi(),
+    ),
+]
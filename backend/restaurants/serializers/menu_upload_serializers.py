@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from restaurants.models import MenuVersion
+from restaurants.models import MenuUploadJob, MenuUploadJobPage, MenuVersion
 
 ALLOWED_IMAGE_CONTENT_TYPES = {
     "image/jpeg",
@@ -68,10 +68,48 @@ class ParsedMenuInput(serializers.Serializer):
 
 
 class MenuSaveSerializer(serializers.Serializer):
-    menu = ParsedMenuInput()
+    """Either the reviewed menu, or the job_id of a completed MenuUploadJob to save as is."""
+
+    menu = ParsedMenuInput(required=False)
+    job_id = serializers.UUIDField(required=False)
     mode = serializers.ChoiceField(choices=["overwrite", "append"])
     version_name = serializers.CharField(required=False, allow_blank=True, default="")
 
+    def validate(self, attrs):
+        if ("menu" in attrs) == ("job_id" in attrs):
+            raise serializers.ValidationError("Provide either menu or job_id.")
+        return attrs
+
+
+class MenuUploadJobPageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MenuUploadJobPage
+        fields = ["index", "status", "result", "cached"]
+        read_only_fields = fields
+
+
+class MenuUploadJobSerializer(serializers.ModelSerializer):
+    pages = MenuUploadJobPageSerializer(many=True, read_only=True)
+    pages_done = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MenuUploadJob
+        fields = [
+            "id",
+            "status",
+            "page_count",
+            "pages_done",
+            "pages",
+            "result",
+            "error",
+            "created_at",
+            "completed_at",
+        ]
+        read_only_fields = fields
+
+    def get_pages_done(self, obj):
+        return sum(page.status != MenuUploadJobPage.Status.PENDING for page in obj.pages.all())
+
 
 class MenuVersionSerializer(serializers.ModelSerializer):
     item_count = serializers.SerializerMethodField()
@@ -82,8 +120,13 @@ class MenuVersionSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_item_count(self, obj):
-        from restaurants.models import MenuItem
-        return MenuItem.objects.filter(category__version=obj).count()
+        # Listings annotate item_count (MenuVersionService.with_item_counts);
+        # a single version is counted with the same query.
+        if hasattr(obj, "item_count"):
+            return obj.item_count
+        from restaurants.services.menu_version_service import MenuVersionService
+        versions = MenuVersionService.with_item_counts(MenuVersion.objects.filter(pk=obj.pk))
+        return versions.values_list("item_count", flat=True).first() or 0
 
 
 class MenuVersionRenameSerializer(serializers.Serializer):
@@ -151,10 +151,14 @@ class MenuItemSerializer(serializers.ModelSerializer):
         active_version = self.context.get("active_version")
         if active_version is None:
             raise serializers.ValidationError({"category_id": "No active menu version found."})
+        from restaurants.services.menu_version_service import MenuVersionService
+
         try:
-            category = MenuCategory.objects.get(id=category_id, version=active_version)
+            category = MenuVersionService.categories(active_version.id).get(id=category_id)
         except MenuCategory.DoesNotExist:
             raise serializers.ValidationError({"category_id": "Invalid category."}) from None
+        # Other versions showing this category get a copy of it before it gains an item.
+        category, _ = MenuVersionService.own_category(active_version, category)
 
         item = MenuItem.objects.create(category=category, **validated_data)
 
@@ -0,0 +1,192 @@
+"""
+MenuCacheService — shared-cache bookkeeping for compiled menu artifacts.
+
+Read-heavy views of a restaurant's active menu (the LLM menu context, for
+example) are expensive to rebuild and change rarely. They are cached under a
+per-restaurant fingerprint of the form "<active version id>:<edit stamp>".
+
+Every menu write calls invalidate(), which drops the fingerprint. The next
+reader resolves the active version again and mints a fresh edit stamp, so
+artifacts cached under the old fingerprint are never read again and simply
+expire by TTL.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+from restaurants.models import MenuVersion, Restaurant
+
+MENU_CACHE_TTL = 60 * 60 * 6  # 6 hours; writes invalidate explicitly
+LOCAL_ARTIFACT_MAX_ENTRIES = 256
+
+
+class MenuCacheService:
+    # ── Keys ───────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _fingerprint_key(restaurant_id) -> str:
+        return f"menu:{restaurant_id}:fingerprint"
+
+    @staticmethod
+    def _artifact_key(restaurant_id, artifact: str, fingerprint: str) -> str:
+        return f"menu:{restaurant_id}:{artifact}:{fingerprint}"
+
+    # ── Fingerprint ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def get_state(restaurant: Restaurant) -> tuple[int | None, str]:
+        """
+        Return (active_version_id, fingerprint) for the restaurant.
+
+        Served from the shared cache; only the first call after an
+        invalidation runs a query to find the active version.
+        """
+        key = MenuCacheService._fingerprint_key(restaurant.id)
+        state = cache.get(key)
+        if state is None:
+            version_id = (
+                MenuVersion.objects.filter(restaurant=restaurant, is_active=True).values_list("id", flat=True).first()
+            )
+            state = (version_id, f"{version_id}:{uuid.uuid4().hex[:12]}")
+            cache.set(key, state, MENU_CACHE_TTL)
+        return state
+
+    @staticmethod
+    async def aget_state(restaurant: Restaurant) -> tuple[int | None, str]:
+        """Async equivalent of get_state()."""
+        key = MenuCacheService._fingerprint_key(restaurant.id)
+        state = await cache.aget(key)
+        if state is None:
+            version_id = (
+                await MenuVersion.objects.filter(restaurant=restaurant, is_active=True)
+                .values_list("id", flat=True)
+                .afirst()
+            )
+            state = (version_id, f"{version_id}:{uuid.uuid4().hex[:12]}")
+            await cache.aset(key, state, MENU_CACHE_TTL)
+        return state
+
+    @staticmethod
+    def get_fingerprint(restaurant: Restaurant) -> str:
+        """Return the current menu fingerprint for the restaurant."""
+        return MenuCacheService.get_state(restaurant)[1]
+
+    # ── Artifacts ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def get_or_build(
+        restaurant: Restaurant,
+        artifact: str,
+        builder: Callable[[int | None], Any],
+    ) -> Any:
+        """
+        Return the cached artifact for the restaurant's current menu.
+
+        On a miss, builder(active_version_id) is called and its (picklable)
+        result is cached under the current fingerprint.
+        """
+        version_id, fingerprint = MenuCacheService.get_state(restaurant)
+        key = MenuCacheService._artifact_key(restaurant.id, artifact, fingerprint)
+        value = cache.get(key)
+        if value is None:
+            value = builder(version_id)
+            cache.set(key, value, MENU_CACHE_TTL)
+        return value
+
+    @staticmethod
+    async def aget_or_build(
+        restaurant: Restaurant,
+        artifact: str,
+        builder: Callable[[int | None], Any],
+    ) -> Any:
+        """
+        Async equivalent of get_or_build(). Cache reads are awaited; builder
+        is synchronous ORM code and runs in a worker thread on a miss.
+        """
+        version_id, fingerprint = await MenuCacheService.aget_state(restaurant)
+        key = MenuCacheService._artifact_key(restaurant.id, artifact, fingerprint)
+        value = await cache.aget(key)
+        if value is None:
+            value = await sync_to_async(builder)(version_id)
+            await cache.aset(key, value, MENU_CACHE_TTL)
+        return value
+
+    # ── Invalidation ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def invalidate(restaurant: Restaurant) -> None:
+        """
+        Drop the restaurant's menu fingerprint after a menu write.
+
+        The key is deleted immediately and again once the surrounding
+        transaction commits, so a reader that repopulates the cache from
+        pre-commit data in between cannot leave a stale fingerprint behind.
+        """
+        key = MenuCacheService._fingerprint_key(restaurant.id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+
+class LocalMenuArtifacts:
+    """
+    Process-local LRU of objects built from a restaurant's current menu.
+
+    For artifacts that are cheap to hold in memory but too costly to unpickle
+    from the shared cache on every request (indexes, matchers). Entries are
+    keyed by menu fingerprint, so after a menu write the next get() rebuilds
+    and the stale entry ages out of the LRU.
+    """
+
+    def __init__(
+        self,
+        builder: Callable[[int | None], Any],
+        max_entries: int = LOCAL_ARTIFACT_MAX_ENTRIES,
+    ):
+        self.builder = builder
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, restaurant: Restaurant) -> Any:
+        version_id, fingerprint = MenuCacheService.get_state(restaurant)
+        key = (restaurant.id, fingerprint)
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        return self._store(key, self.builder(version_id))
+
+    async def aget(self, restaurant: Restaurant) -> Any:
+        """Async equivalent of get(); a rebuild runs in a worker thread."""
+        version_id, fingerprint = await MenuCacheService.aget_state(restaurant)
+        key = (restaurant.id, fingerprint)
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        return self._store(key, await sync_to_async(self.builder)(version_id))
+
+    def _store(self, key: tuple, value: Any) -> Any:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
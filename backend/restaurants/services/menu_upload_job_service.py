@@ -0,0 +1,197 @@
+"""
+MenuUploadJobService — menu image parsing as a background job.
+
+create_job() stores the uploaded images and queues the parse_menu_upload
+Celery task, so the upload request returns at once. run_job() (the task)
+parses the pages with MenuUploadService, recording each page's
+ParsedMenuPage on the job as it finishes, then merges them and keeps the
+ParsedMenu on the job for MenuUploadSaveView.
+
+Progress goes to the "menu_upload_<job id>" channel group, which
+MenuUploadJobConsumer forwards to WebSocket clients, as events:
+
+    {"event": "status", "status": "parsing" | "merging"}
+    {"event": "page", "index": 0, "status": "parsed" | "failed", "page": {...} | null,
+     "cached": false, "pages_done": 1, "page_count": 3}
+    {"event": "status", "status": "completed", "menu": {...}}
+    {"event": "status", "status": "failed", "error": "..."}
+
+Clients without a WebSocket poll the job instead.
+
+The cleanup_menu_upload_jobs periodic task fails jobs left unfinished for
+MENU_UPLOAD_JOB_STALE_AFTER seconds (e.g. their worker died or the queued
+task was lost), clearing their stored images, and deletes finished jobs
+after MENU_UPLOAD_JOB_RETENTION seconds.
+"""
+
+import logging
+from datetime import timedelta
+from uuid import UUID
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from ai.metrics import llm_call_context
+from restaurants.llm.image_spool import ImageSource, read_image, spool_images
+from restaurants.llm.schemas import ParsedMenu, ParsedMenuPage
+from restaurants.models import MenuUploadJob, MenuUploadJobPage, Restaurant, Subscription
+from restaurants.services.menu_upload_service import MenuUploadService
+
+logger = logging.getLogger(__name__)
+
+
+def job_group_name(job_id) -> str:
+    return f"menu_upload_{job_id}"
+
+
+class MenuUploadJobService:
+    @staticmethod
+    @transaction.atomic
+    def create_job(restaurant: Restaurant, image_data_list: list[ImageSource]) -> MenuUploadJob:
+        """Store the images as a queued job and parse them in the background."""
+        from restaurants.tasks import parse_menu_upload
+
+        job = MenuUploadJob.objects.create(restaurant=restaurant, page_count=len(image_data_list))
+        # One INSERT per page, so only one image is read into memory at a time.
+        for index, image_data in enumerate(image_data_list):
+            MenuUploadJobPage.objects.create(job=job, index=index, image=read_image(image_data))
+        transaction.on_commit(lambda: parse_menu_upload.delay(str(job.id)))
+        return job
+
+    @staticmethod
+    def get_job(restaurant: Restaurant, job_id: UUID) -> MenuUploadJob:
+        """The restaurant's job with its pages, without their image bytes."""
+        pages = Prefetch("pages", queryset=MenuUploadJobPage.objects.defer("image"))
+        try:
+            return MenuUploadJob.objects.prefetch_related(pages).get(restaurant=restaurant, id=job_id)
+        except MenuUploadJob.DoesNotExist as err:
+            raise NotFound("Menu upload job not found.") from err
+
+    @staticmethod
+    def get_parsed_menu(restaurant: Restaurant, job_id: UUID) -> ParsedMenu:
+        """The merged menu of a completed job, for saving."""
+        job = MenuUploadJobService.get_job(restaurant, job_id)
+        if job.status != MenuUploadJob.Status.COMPLETED:
+            raise ValidationError({"job_id": f"Menu upload job is {job.status}, not completed."})
+        return ParsedMenu.model_validate(job.result)
+
+    @staticmethod
+    def run_job(job_id: str) -> None:
+        """Parse and merge a queued job's pages, reporting progress as it goes."""
+        claimed = MenuUploadJob.objects.filter(id=job_id, status=MenuUploadJob.Status.QUEUED).update(
+            status=MenuUploadJob.Status.PARSING, updated_at=timezone.now()
+        )
+        if not claimed:
+            logger.info("Menu upload job %s is not queued, skipping", job_id)
+            return
+        job = MenuUploadJob.objects.select_related("restaurant").get(id=job_id)
+        MenuUploadJobService._broadcast(job, {"event": "status", "status": job.status})
+
+        try:
+            pages = {page.index: page for page in job.pages.defer("image")}
+            # Streamed to temporary files one row at a time, never all in memory at once.
+            stored_images = job.pages.order_by("index").values_list("image", flat=True).iterator(chunk_size=1)
+            pages_done = 0
+
+            def on_page(index: int, parsed: ParsedMenuPage | None, cached: bool) -> None:
+                nonlocal pages_done
+                pages_done += 1
+                page = pages[index]
+                page.image = None
+                page.status = MenuUploadJobPage.Status.PARSED if parsed else MenuUploadJobPage.Status.FAILED
+                page.result = parsed.model_dump(mode="json") if parsed else None
+                page.cached = cached
+                page.save(update_fields=["image", "status", "result", "cached"])
+                MenuUploadJobService._broadcast(
+                    job,
+                    {
+                        "event": "page",
+                        "index": index,
+                        "status": page.status,
+                        "page": page.result,
+                        "cached": page.cached,
+                        "pages_done": pages_done,
+                        "page_count": job.page_count,
+                    },
+                )
+
+            restaurant = job.restaurant
+            plan = Subscription.objects.filter(restaurant=restaurant).values_list("plan", flat=True).first()
+            with (
+                spool_images(bytes(image) for image in stored_images) as images,
+                llm_call_context(restaurant=restaurant.slug, plan=plan or "", pool="menu_upload"),
+            ):
+                parsed_pages = MenuUploadService.parse_pages(images, on_page=on_page)
+                MenuUploadJobService._set_status(job, MenuUploadJob.Status.MERGING)
+                MenuUploadJobService._broadcast(job, {"event": "status", "status": job.status})
+                parsed_menu = MenuUploadService.merge_pages(parsed_pages)
+        except Exception:
+            logger.exception("Menu upload job %s failed", job_id)
+            job.pages.update(image=None)
+            job.error = "Menu parsing failed. Please try again."
+            MenuUploadJobService._set_status(job, MenuUploadJob.Status.FAILED, "error")
+            MenuUploadJobService._broadcast(job, {"event": "status", "status": job.status, "error": job.error})
+            return
+
+        job.result = parsed_menu.model_dump(mode="json")
+        MenuUploadJobService._set_status(job, MenuUploadJob.Status.COMPLETED, "result")
+        MenuUploadJobService._broadcast(job, {"event": "status", "status": job.status, "menu": job.result})
+
+    @staticmethod
+    def fail_stale_jobs() -> int:
+        """
+        Fail jobs not finished, nor moved on a stage, in the last
+        MENU_UPLOAD_JOB_STALE_AFTER seconds, and clear their images.
+        Returns how many were failed.
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.MENU_UPLOAD_JOB_STALE_AFTER)
+        unfinished = (MenuUploadJob.Status.QUEUED, MenuUploadJob.Status.PARSING, MenuUploadJob.Status.MERGING)
+        stale = MenuUploadJob.objects.filter(status__in=unfinished, updated_at__lt=cutoff)
+        failed = 0
+        for job in stale:
+            # Unless its worker got to it since the query above.
+            if not MenuUploadJob.objects.filter(id=job.id, status=job.status, updated_at=job.updated_at).update(
+                status=MenuUploadJob.Status.FAILED,
+                error="Menu parsing took too long. Please try again.",
+                completed_at=timezone.now(),
+                updated_at=timezone.now(),
+            ):
+                continue
+            logger.warning("Menu upload job %s was stuck %s, failed it", job.id, job.status)
+            job.pages.update(image=None)
+            job.refresh_from_db()
+            MenuUploadJobService._broadcast(job, {"event": "status", "status": job.status, "error": job.error})
+            failed += 1
+        return failed
+
+    @staticmethod
+    def delete_old_jobs() -> int:
+        """Delete finished jobs, with their pages, completed over MENU_UPLOAD_JOB_RETENTION seconds ago."""
+        cutoff = timezone.now() - timedelta(seconds=settings.MENU_UPLOAD_JOB_RETENTION)
+        _, per_model = MenuUploadJob.objects.filter(completed_at__lt=cutoff).delete()
+        return per_model.get(MenuUploadJob._meta.label, 0)
+
+    @staticmethod
+    def _set_status(job: MenuUploadJob, status: str, *fields: str) -> None:
+        job.status = status
+        update_fields = ["status", "updated_at", *fields]
+        if status in (MenuUploadJob.Status.COMPLETED, MenuUploadJob.Status.FAILED):
+            job.completed_at = timezone.now()
+            update_fields.append("completed_at")
+        job.save(update_fields=update_fields)
+
+    @staticmethod
+    def _broadcast(job: MenuUploadJob, data: dict) -> None:
+        """Send a progress event to the job's WebSocket group; polling still works if this fails."""
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                job_group_name(job.id),
+                {"type": "menu_upload_progress", "data": data},
+            )
+        except Exception as exc:
+            logger.warning("Could not broadcast progress of menu upload job %s: %s", job.id, exc)
@@ -1,17 +1,28 @@
 """
 MenuUploadService — orchestrates menu image parsing and persistence.
 
-parse_images() fans out to MenuParsingAgent in parallel then merges results
-via MenuMergeAgent. save_menu() writes the parsed structure to the database,
-either as a fresh version (overwrite) or appended to an existing one (append).
+parse_images() fans out to MenuParsingAgent on the shared LLM executor
+(ai.executor), with a per-page timeout and an overall deadline, skipping
+pages already in the menu page cache, then merges results locally (see
+restaurants.llm.local_merge). Images are raw bytes or uploads spooled to
+disk (restaurants.llm.image_spool), read only by the task parsing them.
+save_menu() writes the parsed structure to the database, either as a fresh
+version (overwrite) or appended to an existing one (append).
 """
 
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections.abc import Callable
+from dataclasses import dataclass, field
 
+from django.conf import settings
 from django.db import transaction
 
-from restaurants.llm.merge_agent import MenuMergeAgent
+from ai.executor import llm_executor
+from ai.limiter import llm_limiter
+from restaurants.llm.image_preprocessing import preprocess_menu_image
+from restaurants.llm.image_spool import ImageSource, image_digest
+from restaurants.llm.local_merge import merge_menu_pages, resolve_conflicts_with_model
+from restaurants.llm.page_cache import menu_page_cache
 from restaurants.llm.parse_agent import MenuParsingAgent
 from restaurants.llm.schemas import ParsedMenu, ParsedMenuPage
 from restaurants.models import (
@@ -21,46 +32,134 @@ from restaurants.models import (
     MenuVersion,
     Restaurant,
 )
+from restaurants.services.menu_cache_service import MenuCacheService
 from restaurants.services.menu_version_service import MenuVersionService
 
 logger = logging.getLogger(__name__)
 
+BULK_CREATE_BATCH_SIZE = 1000  # rows per INSERT when saving a menu
+
+
+@dataclass
+class MenuParseResult:
+    menu: ParsedMenu
+    cached_pages: list[int] = field(default_factory=list)  # indexes of images served from the page cache
+    failed_pages: list[int] = field(default_factory=list)  # indexes of images that failed or timed out
+
 
 class MenuUploadService:
     # ── Parsing ────────────────────────────────────────────────────────────────
 
     @staticmethod
-    def parse_images(image_data_list: list[bytes]) -> ParsedMenu:
+    def parse_images(image_data_list: list[ImageSource]) -> MenuParseResult:
+        """
+        Parse a list of images into a single merged ParsedMenu.
+
+        Each image is parsed in parallel using MenuParsingAgent, unless the
+        page cache already knows it. If an individual image fails or times
+        out, it is skipped with a warning and listed in failed_pages. The
+        successful ParsedMenuPage results are then merged with merge_pages().
+
+        The menu is empty if all images fail.
+        """
+        cached_pages = []
+        failed_pages = []
+
+        def on_page(index: int, page: ParsedMenuPage | None, cached: bool) -> None:
+            if cached:
+                cached_pages.append(index)
+            if page is None:
+                failed_pages.append(index)
+
+        pages = MenuUploadService.parse_pages(image_data_list, on_page=on_page)
+        return MenuParseResult(
+            menu=MenuUploadService.merge_pages(pages),
+            cached_pages=sorted(cached_pages),
+            failed_pages=sorted(failed_pages),
+        )
+
+    @staticmethod
+    def parse_pages(
+        image_data_list: list[ImageSource],
+        on_page: Callable[[int, ParsedMenuPage | None, bool], None] | None = None,
+    ) -> list[ParsedMenuPage]:
+        """
+        Preprocess each image and parse it with MenuParsingAgent, in parallel
+        on the shared LLM executor. Pages found in the page cache skip the
+        vision call, and an image sent more than once is parsed once. A page
+        gets MENU_PAGE_TIMEOUT seconds, and one retry, and the whole upload
+        MENU_UPLOAD_DEADLINE seconds. No more pages are parsed at once than
+        the restaurant's LLM concurrency limit allows, so pages queue here
+        rather than time out waiting for a slot.
+
+        Returns the successfully parsed pages in image order; failed and
+        timed-out images are skipped with a warning. on_page(index, page,
+        cached) is called on the calling thread as each image finishes, with
+        page None if it failed and cached True if it came from the page cache.
         """
-        Parse a list of raw image bytes into a single merged ParsedMenu.
+        pages: dict[int, ParsedMenuPage] = {}
+
+        # Indexes of the copies of each distinct image, in order of first appearance.
+        copies: dict[str, list[int]] = {}
+        for index, image_data in enumerate(image_data_list):
+            copies.setdefault(image_digest(image_data), []).append(index)
+        distinct = list(copies.values())
+
+        def _parse_one(image_data: ImageSource) -> tuple[ParsedMenuPage, bool]:
+            segments = preprocess_menu_image(image_data)
+            page = menu_page_cache.get(segments)
+            if page is not None:
+                return page, True
+            page = MenuParsingAgent.run(image_data=segments[0] if len(segments) == 1 else segments)
+            menu_page_cache.set(segments, page)
+            return page, False
+
+        def on_done(task: int, result: tuple[ParsedMenuPage, bool] | None, error: BaseException | None) -> None:
+            for index in distinct[task]:
+                cached = False
+                if error is None:
+                    pages[index], cached = result
+                else:
+                    logger.warning("MenuParsingAgent failed for image %d: %s", index, error)
+                if on_page is not None:
+                    on_page(index, pages.get(index), cached)
+
+        llm_executor.run_all(
+            _parse_one,
+            [image_data_list[indexes[0]] for indexes in distinct],
+            task_timeout=settings.MENU_PAGE_TIMEOUT,
+            deadline=settings.MENU_UPLOAD_DEADLINE,
+            on_done=on_done,
+            max_parallel=llm_limiter.restaurant_concurrency(),
+        )
 
-        Each image is parsed in parallel using MenuParsingAgent. If an
-        individual image fails, it is skipped with a warning. The successful
-        ParsedMenuPage results are then merged via MenuMergeAgent.
+        return [pages[index] for index in sorted(pages)]
 
-        Returns an empty ParsedMenu if all images fail.
+    @staticmethod
+    def merge_pages(pages: list[ParsedMenuPage]) -> ParsedMenu:
+        """
+        Merge parsed pages into one ParsedMenu, without a model call.
+
+        Price conflicts between pages keep the price read most often. With
+        MENU_MERGE_LLM_FALLBACK, MenuMergeAgent settles the conflicting
+        items instead; if it fails, the local result stands.
         """
-        pages: list[ParsedMenuPage] = []
-
-        def _parse_one(image_data: bytes) -> ParsedMenuPage:
-            return MenuParsingAgent.run(image_data=image_data)
-
-        with ThreadPoolExecutor() as executor:
-            future_to_index = {
-                executor.submit(_parse_one, data): i
-                for i, data in enumerate(image_data_list)
-            }
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
-                try:
-                    page = future.result()
-                    pages.append(page)
-                except Exception as exc:
-                    logger.warning(
-                        "MenuParsingAgent failed for image %d: %s", index, exc
-                    )
-
-        return MenuMergeAgent.run(pages=pages)
+        merge = merge_menu_pages(pages)
+        for conflict in merge.conflicts:
+            logger.info(
+                "Menu pages disagree on %s / %s / %s: %s, chose %s",
+                conflict.category,
+                conflict.item,
+                conflict.variant,
+                ", ".join(str(price) for price in conflict.prices),
+                conflict.chosen,
+            )
+        if merge.conflicts and settings.MENU_MERGE_LLM_FALLBACK:
+            try:
+                return resolve_conflicts_with_model(merge)
+            except Exception as exc:
+                logger.warning("MenuMergeAgent failed to resolve price conflicts: %s", exc)
+        return merge.menu
 
     # ── Saving ─────────────────────────────────────────────────────────────────
 
@@ -73,14 +172,15 @@ class MenuUploadService:
         version_name: str | None = None,
     ) -> MenuVersion:
         """
-        Persist a ParsedMenu to the database.
+        Persist a ParsedMenu to the database, with one bulk INSERT each for
+        categories, items and variants whatever the menu's size.
 
         Args:
             restaurant: The restaurant this menu belongs to.
             parsed_menu: The merged ParsedMenu to persist.
-            mode: "overwrite" creates a fresh new version; "append" copies
-                  categories/items from the currently active version first, then
-                  adds the parsed data on top.
+            mode: "overwrite" creates a fresh new version; "append" derives
+                  the version from the currently active one, sharing its
+                  categories/items, then adds the parsed data on top.
             version_name: Optional custom name for the new version. Defaults to
                           the result of MenuVersionService.generate_default_name.
 
@@ -90,37 +190,52 @@ class MenuUploadService:
         if version_name is None:
             version_name = MenuVersionService.generate_default_name(restaurant)
 
-        new_version = MenuVersion.objects.create(
-            restaurant=restaurant,
-            name=version_name,
-            source=MenuVersion.Source.AI_UPLOAD,
-            is_active=False,
-        )
-
-        if mode == "append":
-            active_version = restaurant.menu_versions.filter(is_active=True).first()
-            if active_version:
-                MenuVersionService.duplicate_version_into(active_version, new_version)
-
-        for parsed_category in parsed_menu.categories:
-            category = MenuCategory.objects.create(
-                version=new_version,
-                name=parsed_category.name,
-                sort_order=0,
+        active_version = restaurant.menu_versions.filter(is_active=True).first() if mode == "append" else None
+        if active_version:
+            # Shares the active menu's categories instead of copying them.
+            new_version = MenuVersionService.derive_version(
+                active_version, version_name, source_kind=MenuVersion.Source.AI_UPLOAD
+            )
+        else:
+            new_version = MenuVersion.objects.create(
+                restaurant=restaurant,
+                name=version_name,
+                source=MenuVersion.Source.AI_UPLOAD,
+                is_active=False,
             )
-            for sort_idx, parsed_item in enumerate(parsed_category.items):
-                item = MenuItem.objects.create(
+
+        # One INSERT per level: bulk_create sets the new primary keys on the
+        # objects (RETURNING on PostgreSQL and SQLite), so children can point
+        # at their parents without further queries.
+        categories = MenuCategory.objects.bulk_create(
+            [MenuCategory(version=new_version, name=c.name, sort_order=0) for c in parsed_menu.categories],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        parsed_items = [
+            (category, sort_idx, parsed_item)
+            for category, parsed_category in zip(categories, parsed_menu.categories, strict=True)
+            for sort_idx, parsed_item in enumerate(parsed_category.items)
+        ]
+        items = MenuItem.objects.bulk_create(
+            [
+                MenuItem(
                     category=category,
                     name=parsed_item.name,
                     description=parsed_item.description or "",
                     sort_order=sort_idx,
                 )
-                for variant in parsed_item.variants:
-                    MenuItemVariant.objects.create(
-                        menu_item=item,
-                        label=variant.label,
-                        price=variant.price,
-                        is_default=False,
-                    )
+                for category, sort_idx, parsed_item in parsed_items
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        MenuItemVariant.objects.bulk_create(
+            [
+                MenuItemVariant(menu_item=item, label=variant.label, price=variant.price, is_default=False)
+                for item, (_, _, parsed_item) in zip(items, parsed_items, strict=True)
+                for variant in parsed_item.variants
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
 
+        MenuCacheService.invalidate(restaurant)
         return new_version
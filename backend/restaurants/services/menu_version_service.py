@@ -3,11 +3,35 @@ MenuVersionService — manages menu version lifecycle.
 
 Provides methods for creating, activating, deleting, renaming, listing,
 and duplicating MenuVersion objects and their associated categories/items.
+
+Versions are copy-on-write. A derived version (duplicate_version, an
+append-mode upload) does not copy its source's rows: it lists the source's
+categories in shared_categories and points parent at the source. A
+version's menu is the categories it owns plus those it shares, resolved by
+categories() and items(). Before a category, or one of its items, is
+written through a version, own_category() makes the write private to it:
+
+- the writing version keeps, or for the active version takes over, the
+  category's rows, so the IDs customers and the admin UI hold stay valid;
+  the other versions showing the category get one copy of it as it was,
+  owned by one of them and shared by the rest;
+- a shared category written through an inactive version is copied into
+  that version instead, leaving the rows of the versions sharing it alone.
+
+own_category() locks the category row first, so concurrent writes to one
+category copy it once; a write through an inactive version that lost the
+race finds the category gone from its menu (NotFound), as a later request
+with the old IDs would. Rows are never moved between categories or deleted by this, so
+order items keep pointing at the rows they were ordered from. delete_version() hands
+categories that other versions still share over to one of them.
 """
 
 from datetime import date
 
-from django.db import transaction
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
 
 from restaurants.models import (
     MenuCategory,
@@ -17,9 +41,51 @@ from restaurants.models import (
     MenuVersion,
     Restaurant,
 )
+from restaurants.services.menu_cache_service import MenuCacheService
+
+BULK_CREATE_BATCH_SIZE = 1000  # rows per INSERT when copying a version
+
+SharedCategory = MenuVersion.shared_categories.through
 
 
 class MenuVersionService:
+    # ── Resolution ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def categories(version_id: int) -> QuerySet[MenuCategory]:
+        """
+        Categories of a version's menu, owned or shared, as one query that
+        can be filtered and prefetched further.
+        """
+        shared = SharedCategory.objects.filter(menuversion_id=version_id).values("menucategory_id")
+        return MenuCategory.objects.filter(Q(version_id=version_id) | Q(id__in=shared))
+
+    @staticmethod
+    def items(version_id: int) -> QuerySet[MenuItem]:
+        """Items of a version's menu, in owned or shared categories."""
+        return MenuItem.objects.filter(category__in=MenuVersionService.categories(version_id))
+
+    @staticmethod
+    def with_item_counts(versions: QuerySet[MenuVersion]) -> QuerySet[MenuVersion]:
+        """
+        Annotate versions with item_count, the number of items in their
+        menus, computed in the same query that loads the versions.
+        """
+
+        def count_items(version_path: str) -> Coalesce:
+            items = (
+                MenuItem.objects.filter(**{version_path: OuterRef("pk")})
+                .order_by()
+                .values(version_path)
+                .annotate(count=Count("pk"))
+                .values("count")
+            )
+            return Coalesce(Subquery(items), 0)
+
+        return versions.annotate(
+            item_count=count_items("category__version") + count_items("category__sharing_versions")
+        )
+
     # ── Name Generation ────────────────────────────────────────────────────────
 
     @staticmethod
@@ -59,6 +125,7 @@ class MenuVersionService:
         MenuVersion.objects.filter(restaurant=restaurant).update(is_active=False)
         version.is_active = True
         version.save(update_fields=["is_active", "updated_at"])
+        MenuCacheService.invalidate(restaurant)
         return version
 
     # ── Deletion ───────────────────────────────────────────────────────────────
@@ -70,7 +137,17 @@ class MenuVersionService:
         """
         if version.is_active:
             raise ValueError("Cannot delete the active menu version.")
-        version.delete()
+        with transaction.atomic():
+            # Categories other versions still share move to one of them instead
+            # of being deleted; the rest keep sharing them there.
+            handed_over = set()
+            links = SharedCategory.objects.filter(menucategory__version=version).order_by("menucategory_id", "id")
+            for link in links:
+                if link.menucategory_id not in handed_over:
+                    handed_over.add(link.menucategory_id)
+                    MenuCategory.objects.filter(id=link.menucategory_id).update(version_id=link.menuversion_id)
+                    link.delete()
+            version.delete()
 
     # ── Rename ─────────────────────────────────────────────────────────────────
 
@@ -92,14 +169,9 @@ class MenuVersionService:
 
         Each dict has: id, name, is_active, source, created_at, item_count.
         """
-        versions = MenuVersion.objects.filter(restaurant=restaurant).prefetch_related(
-            "categories__items"
-        )
+        versions = MenuVersionService.with_item_counts(MenuVersion.objects.filter(restaurant=restaurant))
         result = []
         for version in versions:
-            item_count = sum(
-                category.items.count() for category in version.categories.all()
-            )
             result.append(
                 {
                     "id": version.id,
@@ -107,7 +179,7 @@ class MenuVersionService:
                     "is_active": version.is_active,
                     "source": version.source,
                     "created_at": version.created_at,
-                    "item_count": item_count,
+                    "item_count": version.item_count,
                 }
             )
         return result
@@ -116,56 +188,147 @@ class MenuVersionService:
 
     @staticmethod
     @transaction.atomic
-    def duplicate_version_into(source: MenuVersion, target: MenuVersion) -> MenuVersion:
+    def derive_version(source: MenuVersion, name: str, source_kind: str | None = None) -> MenuVersion:
         """
-        Copy all categories, items, variants, and modifiers from source into
-        target. Returns the target version.
-        """
-        for category in source.categories.prefetch_related(
-            "items__variants", "items__modifiers"
-        ).all():
-            new_category = MenuCategory.objects.create(
-                version=target,
-                name=category.name,
-                sort_order=category.sort_order,
-                is_active=category.is_active,
-            )
-            for item in category.items.all():
-                new_item = MenuItem.objects.create(
-                    category=new_category,
-                    name=item.name,
-                    description=item.description,
-                    image_url=item.image_url,
-                    is_active=item.is_active,
-                    sort_order=item.sort_order,
-                )
-                for variant in item.variants.all():
-                    MenuItemVariant.objects.create(
-                        menu_item=new_item,
-                        label=variant.label,
-                        price=variant.price,
-                        is_default=variant.is_default,
-                    )
-                for modifier in item.modifiers.all():
-                    MenuItemModifier.objects.create(
-                        menu_item=new_item,
-                        name=modifier.name,
-                        price_adjustment=modifier.price_adjustment,
-                    )
+        Create an inactive version showing source's whole menu without copying
+        it: the new version shares every category of source. Returns the new
+        version; its source field defaults to source's.
+        """
+        target = MenuVersion.objects.create(
+            restaurant=source.restaurant,
+            name=name,
+            source=source_kind or source.source,
+            parent=source,
+            is_active=False,
+        )
+        SharedCategory.objects.bulk_create(
+            [
+                SharedCategory(menuversion_id=target.id, menucategory_id=category_id)
+                for category_id in MenuVersionService.categories(source.id).values_list("id", flat=True)
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
         return target
 
     @staticmethod
     @transaction.atomic
+    def duplicate_version_into(source: MenuVersion, target: MenuVersion) -> MenuVersion:
+        """
+        Copy all categories, items, variants, and modifiers of source's menu
+        into target as rows target owns. Returns the target version.
+
+        Each level is read with one query and written with one bulk INSERT,
+        whatever the menu's size; the copies are created in the order the
+        source is displayed in.
+        """
+        _copy_categories(MenuVersionService.categories(source.id), target)
+        return target
+
+    @staticmethod
     def duplicate_version(source: MenuVersion, new_name: str) -> MenuVersion:
         """
-        Create a new MenuVersion with new_name for the same restaurant, then
-        copy all data from source into it. Returns the new version.
+        Create a new MenuVersion with new_name for the same restaurant,
+        sharing all of source's categories. Returns the new version.
         """
-        target = MenuVersion.objects.create(
-            restaurant=source.restaurant,
-            name=new_name,
-            source=source.source,
-            is_active=False,
+        return MenuVersionService.derive_version(source, new_name)
+
+    # ── Copy-on-write ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    @transaction.atomic
+    def own_category(version: MenuVersion, category: MenuCategory) -> tuple[MenuCategory, dict[int, MenuItem]]:
+        """
+        Make category, part of version's menu, writable through version
+        without changing any other version's menu.
+
+        Returns the row to write to and, if that is a new copy, the copies
+        of the category's items keyed by their original IDs. Whatever the
+        number of other versions showing the category, it is copied at most
+        once. Raises NotFound if a concurrent write has already copied
+        category out of version's menu.
+        """
+        category = MenuCategory.objects.select_for_update().filter(id=category.id).first()
+        in_menu = category is not None and (
+            category.version_id == version.id or version.shared_categories.filter(id=category.id).exists()
         )
-        MenuVersionService.duplicate_version_into(source, target)
-        return target
+        if not in_menu:
+            raise NotFound("This menu category has changed. Reload the menu and try again.")
+        if category.version_id != version.id and not version.is_active:
+            version.shared_categories.remove(category)
+            new_categories, new_items = _copy_categories(MenuCategory.objects.filter(id=category.id), version)
+            return new_categories[category.id], new_items
+        others = list(category.sharing_versions.exclude(id=version.id).order_by("id"))
+        if category.version_id != version.id:
+            others.insert(0, category.version)
+        if others:
+            _replace_with_copy(category, others)
+        if category.version_id != version.id:
+            version.shared_categories.remove(category)
+            category.version = version
+            category.save(update_fields=["version"])
+        return category, {}
+
+    @staticmethod
+    def own_item(version: MenuVersion, item: MenuItem) -> MenuItem:
+        """The row to write to for item, as own_category() does for its category."""
+        _, new_items = MenuVersionService.own_category(version, item.category)
+        return new_items.get(item.id, item)
+
+
+def _replace_with_copy(category: MenuCategory, versions: list[MenuVersion]) -> None:
+    """
+    Show one copy of category in versions' menus instead of category: the
+    copy is owned by the first of them and shared by the rest.
+    """
+    new_categories, _ = _copy_categories(MenuCategory.objects.filter(id=category.id), versions[0])
+    copy = new_categories[category.id]
+    SharedCategory.objects.filter(menucategory_id=category.id, menuversion_id__in=[v.id for v in versions]).delete()
+    SharedCategory.objects.bulk_create(
+        [SharedCategory(menuversion_id=v.id, menucategory_id=copy.id) for v in versions[1:]]
+    )
+
+
+def _copy_categories(
+    categories: QuerySet[MenuCategory], target: MenuVersion
+) -> tuple[dict[int, MenuCategory], dict[int, MenuItem]]:
+    """
+    Copy categories with their items, variants and modifiers into target,
+    in display order. Returns the new categories and items by original ID.
+    """
+    source_categories = list(categories.order_by("sort_order", "id"))
+    items = list(
+        MenuItem.objects.filter(category__in=categories).order_by(
+            "category__sort_order", "category_id", "sort_order", "id"
+        )
+    )
+    item_position = {item.id: position for position, item in enumerate(items)}
+    variants, modifiers = (
+        sorted(
+            model.objects.filter(menu_item__category__in=categories),
+            key=lambda row: (item_position[row.menu_item_id], row.id),
+        )
+        for model in (MenuItemVariant, MenuItemModifier)
+    )
+
+    new_categories = _copy_rows(source_categories, "version", {c.version_id: target for c in source_categories})
+    new_items = _copy_rows(items, "category", new_categories)
+    _copy_rows(variants, "menu_item", new_items)
+    _copy_rows(modifiers, "menu_item", new_items)
+    return new_categories, new_items
+
+
+def _copy_rows[T: models.Model](rows: list[T], parent: str, new_parents: dict[int, models.Model]) -> dict[int, T]:
+    """
+    Insert copies of rows under the parents new_parents maps their current
+    parent IDs to, with one bulk_create. Returns the copies by original ID.
+    """
+    copies = {}
+    for row in rows:
+        original_id = row.pk
+        row.pk = None
+        row._state.adding = True
+        setattr(row, parent, new_parents[getattr(row, f"{parent}_id")])
+        copies[original_id] = row
+    if rows:
+        type(rows[0]).objects.bulk_create(rows, batch_size=BULK_CREATE_BATCH_SIZE)
+    return copies
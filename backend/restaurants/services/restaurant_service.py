@@ -5,12 +5,12 @@ from rest_framework.exceptions import NotFound, ValidationError
 from orders.models import Order
 from orders.serializers import OrderResponseSerializer
 from restaurants.models import (
-    MenuCategory,
     Restaurant,
     RestaurantStaff,
     Subscription,
 )
 from restaurants.serializers import MenuItemSerializer, SubscriptionSerializer
+from restaurants.services.menu_version_service import MenuVersionService
 
 
 class RestaurantService:
@@ -37,7 +37,7 @@ class RestaurantService:
         if not active_version:
             return {"restaurant_name": restaurant.name, "categories": []}
         categories = (
-            MenuCategory.objects.filter(version=active_version)
+            MenuVersionService.categories(active_version.id)
             .prefetch_related("items__variants", "items__modifiers")
             .order_by("sort_order")
         )
@@ -1,5 +1,6 @@
 import logging
 from config.celery import app
+from restaurants.services.menu_upload_job_service import MenuUploadJobService
 from restaurants.services.payout_service import PayoutService
 
 logger = logging.getLogger(__name__)
@@ -10,3 +11,15 @@ def process_daily_payouts():
     logger.info("Starting daily payout processing")
     PayoutService.process_all_payouts()
     logger.info("Daily payout processing complete")
+
+
+@app.task(name="restaurants.tasks.parse_menu_upload")
+def parse_menu_upload(job_id):
+    MenuUploadJobService.run_job(job_id)
+
+
+@app.task(name="restaurants.tasks.cleanup_menu_upload_jobs")
+def cleanup_menu_upload_jobs():
+    failed = MenuUploadJobService.fail_stale_jobs()
+    deleted = MenuUploadJobService.delete_old_jobs()
+    logger.info("Menu upload job cleanup: %d stale jobs failed, %d old jobs deleted", failed, deleted)
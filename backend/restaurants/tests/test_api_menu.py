@@ -1,6 +1,8 @@
 import pytest
 from rest_framework import status
 
+from restaurants.models import MenuCategory
+from restaurants.services.menu_version_service import MenuVersionService
 from restaurants.tests.factories import (
     MenuCategoryFactory,
     MenuItemFactory,
@@ -132,3 +134,50 @@ class TestFullMenuAPI:
         # Admin view includes all items (active and inactive)
         total_items = sum(len(cat["items"]) for cat in response.data["categories"])
         assert total_items == 2
+
+
+@pytest.mark.django_db
+class TestCopyOnWriteMenuAPI:
+    def test_editing_a_shared_item_keeps_its_id_and_leaves_the_source_version_alone(self, api_client):
+        owner = UserFactory()
+        restaurant = RestaurantFactory(owner=owner)
+        source = MenuVersionFactory(restaurant=restaurant)
+        item = MenuItemFactory(category=MenuCategoryFactory(version=source), name="Old Name")
+        derived = MenuVersionService.duplicate_version(source, "Derived")
+        MenuVersionService.activate_version(restaurant, derived)
+        api_client.force_authenticate(user=owner)
+
+        response = api_client.patch(
+            f"/api/restaurants/{restaurant.slug}/items/{item.id}/", {"name": "New Name"}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["id"] == item.id
+        public = api_client.get(f"/api/order/{restaurant.slug}/menu/").data
+        assert [i["name"] for c in public["categories"] for i in c["items"]] == ["New Name"]
+        [source_item] = MenuVersionService.items(source.id)
+        assert (source_item.name, source_item.id != item.id) == ("Old Name", True)
+
+    def test_editing_items_twice_keeps_every_id(self, api_client):
+        owner = UserFactory()
+        restaurant = RestaurantFactory(owner=owner)
+        source = MenuVersionFactory(restaurant=restaurant)
+        category = MenuCategoryFactory(version=source)
+        item = MenuItemFactory(category=category, name="Old Name")
+        neighbour = MenuItemFactory(category=category, name="Neighbour")
+        derived = MenuVersionService.duplicate_version(source, "Derived")
+        MenuVersionService.activate_version(restaurant, derived)
+        api_client.force_authenticate(user=owner)
+
+        first = api_client.patch(f"/api/restaurants/{restaurant.slug}/items/{item.id}/", {"name": "New"}, format="json")
+        second = api_client.patch(
+            f"/api/restaurants/{restaurant.slug}/items/{neighbour.id}/", {"name": "Next door"}, format="json"
+        )
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert (first.data["id"], second.data["id"]) == (item.id, neighbour.id)
+        items = api_client.get(f"/api/restaurants/{restaurant.slug}/menu/").data["categories"][0]["items"]
+        assert sorted((i["name"], i["id"]) for i in items) == [("New", item.id), ("Next door", neighbour.id)]
+        # The source version kept one copy of the category as it was.
+        assert sorted(i.name for i in MenuVersionService.items(source.id)) == ["Neighbour", "Old Name"]
+        assert MenuCategory.objects.count() == 2
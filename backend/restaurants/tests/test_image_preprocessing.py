@@ -0,0 +1,133 @@
+import io
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from restaurants.llm import image_preprocessing
+from restaurants.llm.image_preprocessing import (
+    MAX_SEGMENTS,
+    PreprocessOptions,
+    effective_size,
+    preprocess_image,
+    preprocess_menu_image,
+    segment_boxes,
+)
+
+
+def _photo(width: int, height: int, fmt: str = "JPEG", mode: str = "RGB", orientation: int | None = None) -> bytes:
+    image = Image.new(mode, (width, height), "white")
+    # A dark block in the top-left corner, to see where it ends up.
+    image.paste("black" if mode != "RGBA" else (0, 0, 0, 255), (0, 0, width // 4, height // 4))
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(buffer, fmt, exif=exif)
+    return buffer.getvalue()
+
+
+def _open(data: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(data))
+
+
+class TestEffectiveSize:
+    def test_phone_photo_is_scaled_to_short_side(self):
+        assert effective_size(4032, 3024) == (1024, 768)
+
+    def test_tall_image_is_fitted_to_long_side(self):
+        assert effective_size(1000, 6000) == (341, 2048)
+
+    def test_small_image_is_kept(self):
+        assert effective_size(600, 400) == (600, 400)
+
+
+class TestSegmentBoxes:
+    def test_segments_overlap_and_cover_page(self):
+        boxes = segment_boxes(1000, 4000)
+
+        assert boxes[0][1] == 0
+        assert boxes[-1][3] == 4000
+        for (_, _, _, bottom), (_, top, _, _) in zip(boxes, boxes[1:], strict=False):
+            assert top < bottom
+
+    def test_very_long_page_is_capped(self):
+        boxes = segment_boxes(500, 50000)
+
+        assert len(boxes) == MAX_SEGMENTS
+        assert (boxes[0][1], boxes[-1][3]) == (0, 50000)
+
+
+class TestPreprocessImage:
+    def test_downscales_and_reencodes(self):
+        data = _photo(4032, 3024, fmt="PNG")
+
+        [out] = preprocess_image(data, PreprocessOptions())
+
+        image = _open(out)
+        assert (image.format, image.size) == ("JPEG", (1024, 768))
+        assert len(out) < len(data)
+
+    def test_applies_exif_orientation(self):
+        # Orientation 6: the camera was turned, the stored pixels need a 90° clockwise turn.
+        [out] = preprocess_image(_photo(800, 600, orientation=6), PreprocessOptions())
+
+        image = _open(out).convert("L")
+        assert image.size == (600, 800)
+        assert image.getpixel((image.width - 10, 10)) < 64
+        assert image.getpixel((10, 10)) > 192
+
+    def test_tiles_tall_page(self):
+        segments = preprocess_image(_photo(600, 3000), PreprocessOptions())
+
+        assert len(segments) > 1
+        assert all(_open(s).width == 600 for s in segments)
+
+    def test_tiling_can_be_disabled(self):
+        assert len(preprocess_image(_photo(600, 3000), PreprocessOptions(tile_tall=False))) == 1
+
+    def test_webp_grayscale(self):
+        [out] = preprocess_image(_photo(800, 600), PreprocessOptions(format="webp", grayscale=True))
+
+        image = _open(out)
+        assert image.format == "WEBP"
+        assert len(set(image.convert("RGB").getpixel((10, 10)))) == 1
+
+    def test_transparent_png_gets_white_background(self):
+        [out] = preprocess_image(_photo(400, 300, fmt="PNG", mode="RGBA"), PreprocessOptions())
+
+        assert _open(out).convert("L").getpixel((390, 290)) > 192
+
+    def test_unreadable_image_is_passed_through(self):
+        assert preprocess_image(b"not-an-image", PreprocessOptions()) == [b"not-an-image"]
+
+
+class TestPreprocessMenuImage:
+    @pytest.fixture(autouse=True)
+    def preprocessing(self, settings):
+        settings.MENU_IMAGE_PREPROCESSING_ENABLED = True
+        settings.MENU_IMAGE_FORMAT = "jpeg"
+        settings.MENU_IMAGE_GRAYSCALE = False
+        settings.MENU_IMAGE_TILE_TALL = True
+
+    def test_disabled_returns_upload(self, settings):
+        settings.MENU_IMAGE_PREPROCESSING_ENABLED = False
+        data = _photo(4032, 3024)
+
+        assert preprocess_menu_image(data) == [data]
+
+    def test_no_workers_preprocesses_inline(self, settings):
+        settings.MENU_IMAGE_WORKERS = 0
+
+        with patch.object(image_preprocessing, "ProcessPoolExecutor") as mock_pool:
+            [out] = preprocess_menu_image(_photo(4032, 3024))
+
+        mock_pool.assert_not_called()
+        assert _open(out).size == (1024, 768)
+
+    def test_process_pool(self, settings):
+        settings.MENU_IMAGE_WORKERS = 1
+
+        [out] = preprocess_menu_image(_photo(4032, 3024))
+
+        assert _open(out).size == (1024, 768)
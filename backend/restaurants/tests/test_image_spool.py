@@ -0,0 +1,52 @@
+import hashlib
+import os
+
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+
+from restaurants.llm.image_preprocessing import PreprocessOptions, preprocess_image
+from restaurants.llm.image_spool import CHUNK_SIZE, read_image, spool_images, spool_uploads
+from restaurants.tests.test_image_preprocessing import _photo
+
+
+class TestSpoolUploads:
+    def test_in_memory_upload_is_copied_to_disk_and_removed(self):
+        data = os.urandom(CHUNK_SIZE * 3 + 5)
+
+        with spool_uploads([SimpleUploadedFile("menu.jpg", data)]) as [image]:
+            path = image.path
+            assert read_image(image) == data
+            assert (image.size, image.sha256) == (len(data), hashlib.sha256(data).hexdigest())
+
+        assert not os.path.exists(path)
+
+    def test_upload_on_disk_is_used_in_place(self):
+        upload = TemporaryUploadedFile("menu.jpg", "image/jpeg", 0, None)
+        upload.write(b"photo")
+        upload.flush()
+
+        with spool_uploads([upload]) as [image]:
+            assert image.path == upload.temporary_file_path()
+            assert image.sha256 == hashlib.sha256(b"photo").hexdigest()
+        upload.close()
+
+
+class TestSpoolImages:
+    def test_images_are_written_to_disk_and_removed(self):
+        with spool_images(iter([b"page-0", b"page-1"])) as images:
+            paths = [image.path for image in images]
+            assert [read_image(image) for image in images] == [b"page-0", b"page-1"]
+            assert images[1].sha256 == hashlib.sha256(b"page-1").hexdigest()
+
+        assert not any(os.path.exists(path) for path in paths)
+
+
+class TestPreprocessSpooledImage:
+    def test_decodes_from_file(self):
+        data = _photo(1600, 1200)
+
+        with spool_uploads([SimpleUploadedFile("menu.jpg", data)]) as [image]:
+            assert preprocess_image(image, PreprocessOptions()) == preprocess_image(data, PreprocessOptions())
+
+    def test_unreadable_image_is_read_as_uploaded(self):
+        with spool_uploads([SimpleUploadedFile("menu.heic", b"not-an-image")]) as [image]:
+            assert preprocess_image(image, PreprocessOptions()) == [b"not-an-image"]
@@ -8,6 +8,7 @@ from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.test import override_settings
 from pydantic import ValidationError
 
 from restaurants.llm.merge_agent import MenuMergeAgent
@@ -173,10 +174,11 @@ class TestMenuParsingAgent:
     def test_default_model_is_gpt4o(self):
         assert MenuParsingAgent.default_model == "gpt-4o"
 
+    @override_settings(LLM_MODEL="claude-sonnet-4-20250514")
     def test_resolve_model_always_uses_gpt4o(self):
         """_resolve_model should ignore LLM_MODEL and always use gpt-4o."""
         agent = MenuParsingAgent()
-        with patch("restaurants.llm.parse_agent.resolve_model") as mock_resolve:
+        with patch("ai.pool.resolve_model") as mock_resolve:
             mock_resolve.return_value = MagicMock()
             agent._resolve_model()
             mock_resolve.assert_called_once_with("gpt-4o")
@@ -202,6 +204,18 @@ class TestMenuParsingAgent:
 
         assert result is expected_page
 
+    def test_run_sends_segments_of_a_tall_page_together(self):
+        mock_agent = MagicMock()
+        mock_agent.run.return_value = MagicMock(content=self._make_page())
+
+        with patch.object(MenuParsingAgent, "_build_agent", return_value=mock_agent):
+            MenuParsingAgent.run(image_data=[b"top", b"bottom"])
+
+        mock_agent.run.assert_called_once()
+        prompt = mock_agent.run.call_args.args[0]
+        assert "segments" in prompt
+        assert [image.content for image in mock_agent.run.call_args.kwargs["images"]] == [b"top", b"bottom"]
+
     def test_run_returns_parsed_menu_page(self):
         expected_page = self._make_page()
         mock_result = MagicMock()
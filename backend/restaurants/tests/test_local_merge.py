@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+from restaurants.llm.local_merge import merge_menu_pages, normalize_name
+from restaurants.llm.schemas import ParsedMenuCategory, ParsedMenuItem, ParsedMenuPage, ParsedMenuVariant
+
+
+def _item(name: str, *variants: tuple[str, str], description: str | None = None) -> ParsedMenuItem:
+    return ParsedMenuItem(
+        name=name,
+        description=description,
+        variants=[ParsedMenuVariant(label=label, price=Decimal(price)) for label, price in variants],
+    )
+
+
+def _page(**categories: list[ParsedMenuItem]) -> ParsedMenuPage:
+    return ParsedMenuPage(categories=[ParsedMenuCategory(name=name, items=items) for name, items in categories.items()])
+
+
+def _summary(menu) -> list:
+    return [
+        (c.name, [(i.name, [(v.label, str(v.price)) for v in i.variants]) for i in c.items]) for c in menu.categories
+    ]
+
+
+def test_normalize_name():
+    assert normalize_name("  Crème  Brûlée! ") == "creme brulee"
+    assert normalize_name("Coca-Cola") == normalize_name("coca cola")
+
+
+def test_continued_category_and_repeated_items_are_merged():
+    pages = [
+        _page(Mains=[_item("Burger", ("Single", "11.50"))]),
+        _page(MAINS=[_item("burger", ("Single", "11.50"), ("Double", "14.50")), _item("Fries", ("Regular", "4.00"))]),
+    ]
+
+    merge = merge_menu_pages(pages)
+
+    assert _summary(merge.menu) == [
+        ("Mains", [("Burger", [("Single", "11.50"), ("Double", "14.50")]), ("Fries", [("Regular", "4.00")])])
+    ]
+    assert merge.conflicts == []
+
+
+def test_misread_names_match_but_numbered_names_do_not():
+    pages = [
+        _page(Desserts=[_item("Chicken Tikka", ("Regular", "12.00")), _item("Combo 1", ("Regular", "9.00"))]),
+        _page(Deserts=[_item("Chiken Tikka", ("Regular", "12.00")), _item("Combo 2", ("Regular", "10.00"))]),
+    ]
+
+    merge = merge_menu_pages(pages)
+
+    assert [(c.name, [i.name for i in c.items]) for c in merge.menu.categories] == [
+        ("Desserts", ["Chicken Tikka", "Combo 1", "Combo 2"])
+    ]
+
+
+def test_short_names_only_match_exactly():
+    merge = merge_menu_pages([_page(Drinks=[_item("Tea", ("Cup", "2.00")), _item("Pea", ("Cup", "2.00"))])])
+
+    assert [i.name for i in merge.menu.categories[0].items] == ["Tea", "Pea"]
+
+
+def test_same_item_in_different_categories_is_kept():
+    merge = merge_menu_pages(
+        [_page(Kids=[_item("Fries", ("Regular", "3.00"))], Sides=[_item("Fries", ("Regular", "4.00"))])]
+    )
+
+    assert merge.conflicts == []
+    assert [c.items[0].variants[0].price for c in merge.menu.categories] == [Decimal("3.00"), Decimal("4.00")]
+
+
+def test_first_description_is_kept():
+    pages = [
+        _page(Mains=[_item("Burger", ("Single", "11.50"))]),
+        _page(Mains=[_item("Burger", ("Single", "11.50"), description="With cheddar")]),
+        _page(Mains=[_item("Burger", ("Single", "11.50"), description="Cheddar, pickles")]),
+    ]
+
+    assert merge_menu_pages(pages).menu.categories[0].items[0].description == "With cheddar"
+
+
+def test_price_conflict_majority_wins():
+    pages = [_page(Mains=[_item("Burger", ("Single", price))]) for price in ("11.00", "11.50", "11.50")]
+
+    merge = merge_menu_pages(pages)
+
+    assert merge.menu.categories[0].items[0].variants[0].price == Decimal("11.50")
+    [conflict] = merge.conflicts
+    assert (conflict.item, conflict.variant, conflict.prices, conflict.chosen) == (
+        "Burger",
+        "Single",
+        (Decimal("11.00"), Decimal("11.50")),
+        Decimal("11.50"),
+    )
+    assert len(conflict.copies) == 3
+
+
+def test_price_conflict_tie_goes_to_earliest_page():
+    pages = [_page(Mains=[_item("Burger", ("Single", price))]) for price in ("12.00", "11.50")]
+
+    assert merge_menu_pages(pages).menu.categories[0].items[0].variants[0].price == Decimal("12.00")
+
+
+def test_result_is_deterministic():
+    pages = [
+        _page(Drinks=[_item("Iced Tea", ("Large", "3.75"))], Desserts=[_item("Pie", ("Slice", "5.00"))]),
+        _page(drinks=[_item("Iced Teas", ("Regular", "3.00"), ("Large", "3.50"))]),
+    ]
+
+    results = {merge_menu_pages(pages).menu.model_dump_json() for _ in range(5)}
+
+    assert len(results) == 1
+    assert _summary(merge_menu_pages(pages).menu) == [
+        ("Drinks", [("Iced Tea", [("Large", "3.75"), ("Regular", "3.00")])]),
+        ("Desserts", [("Pie", [("Slice", "5.00")])]),
+    ]
+
+
+def test_no_pages():
+    assert merge_menu_pages([]).menu.categories == []
@@ -0,0 +1,154 @@
+"""
+Tests for MenuCacheService and the cached LLM menu context.
+"""
+
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+
+from orders.llm.menu_context import build_menu_context, get_menu_context
+from restaurants.llm.schemas import ParsedMenu, ParsedMenuCategory, ParsedMenuItem, ParsedMenuVariant
+from restaurants.services.menu_cache_service import MenuCacheService
+from restaurants.services.menu_upload_service import MenuUploadService
+from restaurants.services.menu_version_service import MenuVersionService
+from restaurants.tests.factories import (
+    MenuCategoryFactory,
+    MenuItemFactory,
+    MenuItemModifierFactory,
+    MenuItemVariantFactory,
+    MenuVersionFactory,
+    RestaurantFactory,
+    UserFactory,
+)
+
+
+@pytest.fixture
+def menu(db):
+    owner = UserFactory()
+    restaurant = RestaurantFactory(owner=owner, name="Cache Diner")
+    version = MenuVersionFactory(restaurant=restaurant, is_active=True)
+    for c in range(3):
+        cat = MenuCategoryFactory(version=version, name=f"Cat {c}", sort_order=c)
+        for i in range(2):
+            item = MenuItemFactory(category=cat, name=f"Dish {c}-{i}", sort_order=i)
+            MenuItemVariantFactory(menu_item=item, label="Regular", price=Decimal("9.50"))
+            MenuItemModifierFactory(menu_item=item, name="Extra", price_adjustment=Decimal("1.00"))
+        MenuItemFactory(category=cat, name=f"Hidden {c}", is_active=False)
+    return {"owner": owner, "restaurant": restaurant, "version": version}
+
+
+@pytest.mark.django_db
+class TestFingerprint:
+    def test_fingerprint_is_stable_and_cached(self, menu, django_assert_num_queries):
+        restaurant = menu["restaurant"]
+        first = MenuCacheService.get_fingerprint(restaurant)
+        with django_assert_num_queries(0):
+            assert MenuCacheService.get_fingerprint(restaurant) == first
+        assert first.startswith(f"{menu['version'].id}:")
+
+    def test_invalidate_mints_new_fingerprint(self, menu):
+        restaurant = menu["restaurant"]
+        before = MenuCacheService.get_fingerprint(restaurant)
+        MenuCacheService.invalidate(restaurant)
+        assert MenuCacheService.get_fingerprint(restaurant) != before
+
+    def test_no_active_version(self, db):
+        restaurant = RestaurantFactory()
+        assert MenuCacheService.get_state(restaurant)[0] is None
+
+    def test_get_or_build_calls_builder_once(self, menu):
+        calls = []
+
+        def builder(version_id):
+            calls.append(version_id)
+            return "built"
+
+        restaurant = menu["restaurant"]
+        assert MenuCacheService.get_or_build(restaurant, "test", builder) == "built"
+        assert MenuCacheService.get_or_build(restaurant, "test", builder) == "built"
+        assert calls == [menu["version"].id]
+
+
+@pytest.mark.django_db
+class TestCachedMenuContext:
+    def test_matches_uncached_context(self, menu):
+        restaurant = menu["restaurant"]
+        assert get_menu_context(restaurant) == build_menu_context(restaurant)
+        assert "Hidden" not in get_menu_context(restaurant)
+
+    def test_build_uses_fixed_query_count(self, menu, django_assert_max_num_queries):
+        # 1 active version + categories + items + variants + modifiers
+        with django_assert_max_num_queries(5):
+            build_menu_context(menu["restaurant"])
+
+    def test_warm_cache_runs_no_menu_queries(self, menu, django_assert_num_queries):
+        restaurant = menu["restaurant"]
+        get_menu_context(restaurant)
+        with django_assert_num_queries(0):
+            get_menu_context(restaurant)
+
+    def test_activate_version_invalidates(self, menu):
+        restaurant = menu["restaurant"]
+        assert "Dish 0-0" in get_menu_context(restaurant)
+
+        new_version = MenuVersionFactory(restaurant=restaurant)
+        cat = MenuCategoryFactory(version=new_version, name="Brunch")
+        MenuItemFactory(category=cat, name="Pancakes")
+        MenuVersionService.activate_version(restaurant, new_version)
+
+        context = get_menu_context(restaurant)
+        assert "Pancakes" in context
+        assert "Dish 0-0" not in context
+
+    def test_save_menu_invalidates(self, menu):
+        restaurant = menu["restaurant"]
+        before = MenuCacheService.get_fingerprint(restaurant)
+        parsed = ParsedMenu(
+            categories=[
+                ParsedMenuCategory(
+                    name="Drinks",
+                    items=[
+                        ParsedMenuItem(name="Tea", variants=[ParsedMenuVariant(label="Cup", price=Decimal("2.00"))])
+                    ],
+                )
+            ]
+        )
+        MenuUploadService.save_menu(restaurant, parsed)
+        assert MenuCacheService.get_fingerprint(restaurant) != before
+
+    def test_item_edit_via_api_invalidates(self, menu, api_client):
+        restaurant = menu["restaurant"]
+        assert "Renamed Dish" not in get_menu_context(restaurant)
+
+        item = MenuItemFactory(category=menu["version"].categories.first(), name="Soon Renamed")
+        api_client.force_authenticate(user=menu["owner"])
+        response = api_client.patch(
+            f"/api/restaurants/{restaurant.slug}/items/{item.id}/",
+            {"name": "Renamed Dish"},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert "Renamed Dish" in get_menu_context(restaurant)
+
+    def test_item_deactivate_via_api_invalidates(self, menu, api_client):
+        restaurant = menu["restaurant"]
+        item = restaurant.menu_versions.get().categories.first().items.filter(is_active=True).first()
+        assert item.name in get_menu_context(restaurant)
+
+        api_client.force_authenticate(user=menu["owner"])
+        response = api_client.delete(f"/api/restaurants/{restaurant.slug}/items/{item.id}/")
+        assert response.status_code == status.HTTP_200_OK
+        assert item.name not in get_menu_context(restaurant)
+
+    def test_category_create_via_api_invalidates(self, menu, api_client):
+        restaurant = menu["restaurant"]
+        before = MenuCacheService.get_fingerprint(restaurant)
+        api_client.force_authenticate(user=menu["owner"])
+        response = api_client.post(
+            f"/api/restaurants/{restaurant.slug}/categories/",
+            {"name": "Desserts", "sort_order": 9},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert MenuCacheService.get_fingerprint(restaurant) != before
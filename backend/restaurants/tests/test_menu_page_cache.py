@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import pytest
+
+from restaurants.llm.page_cache import menu_page_cache, page_digest
+from restaurants.llm.schemas import ParsedMenuCategory, ParsedMenuItem, ParsedMenuPage, ParsedMenuVariant
+from restaurants.models import MenuUploadJobPage, Restaurant
+from restaurants.services.menu_upload_job_service import MenuUploadJobService
+from restaurants.services.menu_upload_service import MenuUploadService
+
+
+def _page(category_name: str) -> ParsedMenuPage:
+    item = ParsedMenuItem(name=f"{category_name} special", variants=[ParsedMenuVariant(label="Regular", price="9.50")])
+    return ParsedMenuPage(categories=[ParsedMenuCategory(name=category_name, items=[item])])
+
+
+@pytest.fixture(autouse=True)
+def page_cache(settings):
+    settings.MENU_IMAGE_WORKERS = 0
+    settings.MENU_PAGE_CACHE_ENABLED = True
+    settings.MENU_PAGE_CACHE_MAX_BYTES = 256 * 1024
+
+
+@pytest.fixture
+def mock_parse():
+    pages = {b"starters": _page("Starters"), b"mains": _page("Mains"), b"blank": ParsedMenuPage(categories=[])}
+    with patch("restaurants.services.menu_upload_service.MenuParsingAgent.run") as mock_run:
+        mock_run.side_effect = lambda image_data: pages[image_data]
+        yield mock_run
+
+
+def test_digest_separates_segments():
+    assert page_digest([b"ab", b"c"]) != page_digest([b"a", b"bc"])
+    assert page_digest([b"ab"]) == page_digest([b"ab"])
+
+
+class TestParseImages:
+    def test_reuploaded_pages_skip_the_vision_call(self, mock_parse):
+        first = MenuUploadService.parse_images([b"starters"])
+        second = MenuUploadService.parse_images([b"starters", b"mains"])
+
+        assert first.cached_pages == []
+        assert second.cached_pages == [0]
+        assert [call.kwargs["image_data"] for call in mock_parse.call_args_list] == [b"starters", b"mains"]
+        assert [c.name for c in second.menu.categories] == ["Starters", "Mains"]
+
+    def test_empty_pages_are_not_cached(self, mock_parse):
+        MenuUploadService.parse_images([b"blank"])
+        result = MenuUploadService.parse_images([b"blank"])
+
+        assert result.cached_pages == []
+        assert mock_parse.call_count == 2
+
+    def test_oversized_pages_are_not_cached(self, mock_parse, settings):
+        settings.MENU_PAGE_CACHE_MAX_BYTES = 10
+
+        MenuUploadService.parse_images([b"mains"])
+
+        assert menu_page_cache.get([b"mains"]) is None
+
+    def test_disabled(self, mock_parse, settings):
+        settings.MENU_PAGE_CACHE_ENABLED = False
+
+        MenuUploadService.parse_images([b"mains"])
+        result = MenuUploadService.parse_images([b"mains"])
+
+        assert result.cached_pages == []
+        assert mock_parse.call_count == 2
+
+    def test_cache_outage_is_a_miss(self, mock_parse):
+        with patch("restaurants.llm.page_cache.cache.get", side_effect=ConnectionError("redis down")):
+            result = MenuUploadService.parse_images([b"mains"])
+
+        assert [c.name for c in result.menu.categories] == ["Mains"]
+        mock_parse.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_job_pages_report_cache_hits(mock_parse, settings, django_user_model):
+    settings.LLM_METRICS_SINKS = []
+    owner = django_user_model.objects.create_user(email="owner@test.com", password="testpass123")
+    restaurant = Restaurant.objects.create(name="Cached", slug="cached-rest", owner=owner)
+    menu_page_cache.set([b"starters"], _page("Starters"))
+    events = []
+
+    with (
+        patch("restaurants.tasks.parse_menu_upload.delay"),
+        patch.object(MenuUploadJobService, "_broadcast", side_effect=lambda job, data: events.append(data)),
+    ):
+        job = MenuUploadJobService.create_job(restaurant, [b"starters", b"mains"])
+        MenuUploadJobService.run_job(str(job.id))
+
+    assert list(job.pages.values_list("index", "cached")) == [(0, True), (1, False)]
+    assert {e["index"]: e["cached"] for e in events if e["event"] == "page"} == {0: True, 1: False}
+    mock_parse.assert_called_once_with(image_data=b"mains")
+    assert MenuUploadJobPage.objects.filter(job=job, status="parsed").count() == 2
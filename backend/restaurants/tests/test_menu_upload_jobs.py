@@ -0,0 +1,278 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.asgi import application
+from restaurants.llm.image_spool import SpooledImage, read_image
+from restaurants.llm.schemas import ParsedMenuCategory, ParsedMenuItem, ParsedMenuPage, ParsedMenuVariant
+from restaurants.models import MenuItem, MenuUploadJob, MenuUploadJobPage, Restaurant
+from restaurants.services.menu_upload_job_service import MenuUploadJobService, job_group_name
+
+
+def _page(category_name: str) -> ParsedMenuPage:
+    item = ParsedMenuItem(name=f"{category_name} special", variants=[ParsedMenuVariant(label="Regular", price="9.50")])
+    return ParsedMenuPage(categories=[ParsedMenuCategory(name=category_name, items=[item])])
+
+
+@pytest.fixture
+def owner(db):
+    return get_user_model().objects.create_user(email="owner@test.com", password="testpass123")
+
+
+@pytest.fixture
+def restaurant(owner):
+    return Restaurant.objects.create(name="Test Restaurant", slug="job-rest", owner=owner)
+
+
+@pytest.fixture
+def auth_client(owner):
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client
+
+
+@pytest.fixture
+def progress(settings):
+    """Progress events sent to job groups, in order."""
+    settings.LLM_METRICS_SINKS = []
+    events = []
+    with patch.object(MenuUploadJobService, "_broadcast", side_effect=lambda job, data: events.append(data)):
+        yield events
+
+
+@pytest.mark.django_db
+class TestRunJob:
+    @patch("restaurants.services.menu_upload_service.MenuParsingAgent.run")
+    def test_pages_are_recorded_then_merged(self, mock_parse, restaurant, progress):
+        pages = {b"img0": _page("Starters"), b"img1": _page("Mains")}
+        mock_parse.side_effect = lambda image_data: pages[image_data]
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0", b"img1"])
+
+        MenuUploadJobService.run_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == MenuUploadJob.Status.COMPLETED
+        assert job.completed_at is not None
+        # Pages are merged in upload order, whatever order they finished in.
+        assert [c["name"] for c in job.result["categories"]] == ["Starters", "Mains"]
+        assert list(job.pages.values_list("status", "image")) == [("parsed", None), ("parsed", None)]
+        assert job.pages.get(index=1).result == pages[b"img1"].model_dump(mode="json")
+
+        assert [e["status"] for e in progress if e["event"] == "status"] == ["parsing", "merging", "completed"]
+        page_events = [e for e in progress if e["event"] == "page"]
+        assert sorted(e["index"] for e in page_events) == [0, 1]
+        assert [e["pages_done"] for e in page_events] == [1, 2]
+        assert progress[-1]["menu"] == job.result
+
+    @patch("restaurants.services.menu_upload_service.MenuParsingAgent.run")
+    def test_failed_page_is_reported_and_skipped(self, mock_parse, restaurant, progress):
+        def parse(image_data):
+            if image_data == b"blurry":
+                raise RuntimeError("unreadable")
+            return _page("Mains")
+
+        mock_parse.side_effect = parse
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"blurry", b"sharp"])
+
+        MenuUploadJobService.run_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == MenuUploadJob.Status.COMPLETED
+        assert [c["name"] for c in job.result["categories"]] == ["Mains"]
+        assert job.pages.get(index=0).status == MenuUploadJobPage.Status.FAILED
+        [failed] = [e for e in progress if e["event"] == "page" and e["index"] == 0]
+        assert (failed["status"], failed["page"]) == ("failed", None)
+
+    @patch("restaurants.services.menu_upload_service.MenuParsingAgent.run", return_value=_page("Mains"))
+    @patch("restaurants.services.menu_upload_service.merge_menu_pages", side_effect=RuntimeError("merge bug"))
+    def test_merge_failure_fails_the_job(self, mock_merge, mock_parse, restaurant, progress):
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0", b"img1"])
+
+        MenuUploadJobService.run_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == MenuUploadJob.Status.FAILED
+        assert job.error
+        assert progress[-1] == {"event": "status", "status": "failed", "error": job.error}
+
+    def test_stored_images_are_parsed_from_disk(self, restaurant, progress):
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0", b"img1"])
+
+        def parse_pages(images, on_page):
+            assert all(isinstance(image, SpooledImage) for image in images)
+            assert [read_image(image) for image in images] == [b"img0", b"img1"]
+            return []
+
+        with patch("restaurants.services.menu_upload_job_service.MenuUploadService.parse_pages", parse_pages):
+            MenuUploadJobService.run_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == MenuUploadJob.Status.COMPLETED
+
+    @patch("restaurants.services.menu_upload_service.MenuParsingAgent.run")
+    def test_job_runs_once(self, mock_parse, restaurant, progress):
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0"])
+        MenuUploadJob.objects.filter(id=job.id).update(status=MenuUploadJob.Status.COMPLETED)
+
+        MenuUploadJobService.run_job(str(job.id))
+
+        mock_parse.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestJobCleanup:
+    def _job(self, restaurant, status, age):
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0"])
+        past = timezone.now() - timedelta(seconds=age)
+        completed_at = past if status in (MenuUploadJob.Status.COMPLETED, MenuUploadJob.Status.FAILED) else None
+        MenuUploadJob.objects.filter(id=job.id).update(status=status, updated_at=past, completed_at=completed_at)
+        return job
+
+    def test_stuck_jobs_are_failed_and_their_images_cleared(self, restaurant, progress, settings):
+        settings.MENU_UPLOAD_JOB_STALE_AFTER = 600
+        stuck = self._job(restaurant, MenuUploadJob.Status.PARSING, 601)
+        lost = self._job(restaurant, MenuUploadJob.Status.QUEUED, 601)
+        running = self._job(restaurant, MenuUploadJob.Status.PARSING, 60)
+
+        assert MenuUploadJobService.fail_stale_jobs() == 2
+
+        for job in (stuck, lost):
+            job.refresh_from_db()
+            assert (job.status, job.pages.get().image) == (MenuUploadJob.Status.FAILED, None)
+            assert job.error and job.completed_at
+        running.refresh_from_db()
+        assert running.status == MenuUploadJob.Status.PARSING
+        assert running.pages.get().image is not None
+        assert [e["status"] for e in progress] == ["failed", "failed"]
+
+    def test_old_finished_jobs_are_deleted_with_their_pages(self, restaurant, settings):
+        settings.MENU_UPLOAD_JOB_RETENTION = 3600
+        old = self._job(restaurant, MenuUploadJob.Status.COMPLETED, 3601)
+        recent = self._job(restaurant, MenuUploadJob.Status.FAILED, 60)
+        unfinished = self._job(restaurant, MenuUploadJob.Status.PARSING, 3601)  # fail_stale_jobs' to finish
+
+        assert MenuUploadJobService.delete_old_jobs() == 1
+
+        assert set(MenuUploadJob.objects.values_list("id", flat=True)) == {recent.id, unfinished.id}
+        assert not MenuUploadJobPage.objects.filter(job_id=old.id).exists()
+
+    @patch("restaurants.services.menu_upload_service.MenuParsingAgent.run", return_value=_page("Mains"))
+    def test_claiming_a_job_marks_when_parsing_started(self, mock_parse, restaurant, progress):
+        job = self._job(restaurant, MenuUploadJob.Status.QUEUED, 3600)
+        started = timezone.now()
+
+        with patch.object(MenuUploadJobService, "_set_status"):  # stop at parsing
+            MenuUploadJobService.run_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.updated_at >= started
+
+
+@pytest.mark.django_db
+class TestMenuUploadJobViews:
+    @patch("restaurants.tasks.parse_menu_upload.delay")
+    def test_upload_returns_job_and_queues_task(
+        self, mock_delay, auth_client, restaurant, django_capture_on_commit_callbacks
+    ):
+        image = SimpleUploadedFile("menu.jpg", b"fake-image-data", content_type="image/jpeg")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = auth_client.post(
+                f"/api/restaurants/{restaurant.slug}/menu/upload/jobs/", {"images": [image]}, format="multipart"
+            )
+
+        assert resp.status_code == 202
+        assert resp.data["status"] == "queued"
+        assert resp.data["pages"] == [{"index": 0, "status": "pending", "result": None, "cached": False}]
+        mock_delay.assert_called_once_with(str(resp.data["id"]))
+        assert bytes(MenuUploadJobPage.objects.get(job_id=resp.data["id"]).image) == b"fake-image-data"
+
+    @patch("restaurants.services.menu_upload_service.MenuParsingAgent.run", return_value=_page("Mains"))
+    def test_poll_then_save_completed_job(self, mock_parse, auth_client, restaurant, progress):
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0"])
+        MenuUploadJobService.run_job(str(job.id))
+
+        resp = auth_client.get(f"/api/restaurants/{restaurant.slug}/menu/upload/jobs/{job.id}/")
+        assert resp.status_code == 200
+        assert (resp.data["status"], resp.data["pages_done"]) == ("completed", 1)
+        assert resp.data["pages"][0]["result"]["categories"][0]["name"] == "Mains"
+
+        resp = auth_client.post(
+            f"/api/restaurants/{restaurant.slug}/menu/upload/save/",
+            {"job_id": str(job.id), "mode": "overwrite"},
+            format="json",
+        )
+        assert resp.status_code == 201
+        item = MenuItem.objects.get(category__version_id=resp.data["id"])
+        assert (item.name, item.variants.get().price) == ("Mains special", Decimal("9.50"))
+
+    def test_save_rejects_unfinished_job(self, auth_client, restaurant):
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0"])
+
+        resp = auth_client.post(
+            f"/api/restaurants/{restaurant.slug}/menu/upload/save/",
+            {"job_id": str(job.id), "mode": "overwrite"},
+            format="json",
+        )
+        assert resp.status_code == 400
+
+    def test_other_restaurants_jobs_are_not_found(self, auth_client, restaurant):
+        other = Restaurant.objects.create(name="Other", slug="other-rest", owner=restaurant.owner)
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(other, [b"img0"])
+
+        resp = auth_client.get(f"/api/restaurants/{restaurant.slug}/menu/upload/jobs/{job.id}/")
+        assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestMenuUploadJobWebSocket:
+    @database_sync_to_async
+    def _create_job(self):
+        owner = get_user_model().objects.create_user(email="ws-owner@test.com", password="testpass123")
+        restaurant = Restaurant.objects.create(name="WS Restaurant", slug="ws-jobs", owner=owner)
+        with patch("restaurants.tasks.parse_menu_upload.delay"):
+            job = MenuUploadJobService.create_job(restaurant, [b"img0"])
+        return str(AccessToken.for_user(owner)), job
+
+    async def test_sends_job_then_progress(self, settings):
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        token, job = await self._create_job()
+        communicator = WebsocketCommunicator(application, f"/ws/menu-upload/ws-jobs/{job.id}/?token={token}")
+        connected, _ = await communicator.connect()
+        assert connected
+
+        first = await communicator.receive_json_from(timeout=5)
+        assert (first["event"], first["job"]["status"]) == ("job", "queued")
+
+        await get_channel_layer().group_send(
+            job_group_name(job.id),
+            {"type": "menu_upload_progress", "data": {"event": "status", "status": "parsing"}},
+        )
+        assert await communicator.receive_json_from(timeout=5) == {"event": "status", "status": "parsing"}
+        await communicator.disconnect()
+
+    async def test_rejects_anonymous(self):
+        _, job = await self._create_job()
+        communicator = WebsocketCommunicator(application, f"/ws/menu-upload/ws-jobs/{job.id}/")
+        connected, _ = await communicator.connect()
+        assert not connected
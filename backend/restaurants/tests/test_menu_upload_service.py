@@ -4,11 +4,14 @@ Tests for MenuUploadService.
 All LLM agent calls are mocked — no API key required.
 """
 
+import threading
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from restaurants.llm.schemas import (
     ParsedMenu,
@@ -25,6 +28,7 @@ from restaurants.models import (
     Restaurant,
 )
 from restaurants.services.menu_upload_service import MenuUploadService
+from restaurants.services.menu_version_service import MenuVersionService
 
 User = get_user_model()
 
@@ -75,98 +79,147 @@ def _make_parsed_page(category_name="Mains") -> ParsedMenuPage:
 
 
 class TestParseImages:
-    def test_parse_single_image_skips_merge_llm_call(self):
-        """Single image: parse runs once, merge short-circuits without LLM."""
+    def test_parse_single_image(self):
+        """Single image: parse runs once, no merge LLM call."""
         page = _make_parsed_page()
-        expected = ParsedMenu(categories=page.categories)
 
         with (
             patch(
                 "restaurants.services.menu_upload_service.MenuParsingAgent.run",
                 return_value=page,
             ) as mock_parse,
-            patch(
-                "restaurants.services.menu_upload_service.MenuMergeAgent.run",
-                return_value=expected,
-            ) as mock_merge,
+            patch("restaurants.llm.local_merge.MenuMergeAgent.run") as mock_merge,
         ):
             result = MenuUploadService.parse_images([b"img1"])
 
         mock_parse.assert_called_once_with(image_data=b"img1")
-        mock_merge.assert_called_once()
-        assert result is expected
+        mock_merge.assert_not_called()
+        assert result.menu == ParsedMenu(categories=page.categories)
+        assert result.cached_pages == []
 
-    def test_parse_multiple_images_calls_merge(self):
-        """Multiple images: each is parsed separately, then merge is called."""
+    def test_parse_multiple_images_merges_locally(self):
+        """Multiple images: each is parsed separately, then merged without an LLM call."""
         page1 = _make_parsed_page("Starters")
         page2 = _make_parsed_page("Mains")
-        merged = _make_parsed_menu("All")
-
-        parse_returns = [page1, page2]
 
         with (
             patch(
                 "restaurants.services.menu_upload_service.MenuParsingAgent.run",
-                side_effect=parse_returns,
+                side_effect=lambda image_data: {b"img1": page1, b"img2": page2}[image_data],
             ) as mock_parse,
-            patch(
-                "restaurants.services.menu_upload_service.MenuMergeAgent.run",
-                return_value=merged,
-            ) as mock_merge,
+            patch("restaurants.llm.local_merge.MenuMergeAgent.run") as mock_merge,
         ):
             result = MenuUploadService.parse_images([b"img1", b"img2"])
 
         assert mock_parse.call_count == 2
-        mock_merge.assert_called_once()
-        assert result is merged
+        mock_merge.assert_not_called()
+        assert [c.name for c in result.menu.categories] == ["Starters", "Mains"]
+
+    def test_image_sent_twice_is_parsed_once(self):
+        page = _make_parsed_page("Starters")
+
+        with patch(
+            "restaurants.services.menu_upload_service.MenuParsingAgent.run", return_value=page
+        ) as mock_parse:
+            pages = MenuUploadService.parse_pages([b"img1", b"img1"])
+
+        mock_parse.assert_called_once()
+        assert pages == [page, page]
 
     def test_parse_handles_individual_image_failure(self):
         """If one image fails, the others are still parsed and merged."""
         good_page = _make_parsed_page("Mains")
-        merged = ParsedMenu(categories=good_page.categories)
-
-        call_count = {"n": 0}
 
         def _parse_side_effect(image_data):
-            call_count["n"] += 1
             if image_data == b"bad":
                 raise RuntimeError("Vision API error")
             return good_page
 
-        with (
-            patch(
-                "restaurants.services.menu_upload_service.MenuParsingAgent.run",
-                side_effect=_parse_side_effect,
-            ),
-            patch(
-                "restaurants.services.menu_upload_service.MenuMergeAgent.run",
-                return_value=merged,
-            ) as mock_merge,
+        with patch(
+            "restaurants.services.menu_upload_service.MenuParsingAgent.run",
+            side_effect=_parse_side_effect,
         ):
             result = MenuUploadService.parse_images([b"good", b"bad"])
 
-        # merge called with only the good page
-        called_pages = mock_merge.call_args[1]["pages"]
-        assert len(called_pages) == 1
-        assert called_pages[0] is good_page
-        assert result is merged
+        assert result.menu == ParsedMenu(categories=good_page.categories)
+        assert result.failed_pages == [1]
 
-    def test_all_images_fail_returns_empty_menu(self):
-        """If every image fails, merge is called with empty list -> empty menu."""
-        with (
-            patch(
+    def test_stuck_page_is_retried_then_dropped(self, settings):
+        """A page that never answers is retried once, then reported as failed; the rest still merge."""
+        settings.MENU_PAGE_TIMEOUT = 0.1
+        released = threading.Event()
+        good_page = _make_parsed_page("Mains")
+
+        def _parse_side_effect(image_data):
+            if image_data == b"stuck":
+                released.wait(5)
+            return good_page
+
+        try:
+            with patch(
                 "restaurants.services.menu_upload_service.MenuParsingAgent.run",
-                side_effect=RuntimeError("fail"),
-            ),
-            patch(
-                "restaurants.services.menu_upload_service.MenuMergeAgent.run",
-                return_value=ParsedMenu(categories=[]),
-            ) as mock_merge,
+                side_effect=_parse_side_effect,
+            ) as mock_parse:
+                result = MenuUploadService.parse_images([b"stuck", b"good"])
+        finally:
+            released.set()
+
+        assert result.failed_pages == [0]
+        assert result.menu == ParsedMenu(categories=good_page.categories)
+        assert [call.kwargs["image_data"] for call in mock_parse.call_args_list].count(b"stuck") == 2
+
+    def test_all_images_fail_returns_empty_menu(self):
+        with patch(
+            "restaurants.services.menu_upload_service.MenuParsingAgent.run",
+            side_effect=RuntimeError("fail"),
         ):
             result = MenuUploadService.parse_images([b"bad"])
 
-        mock_merge.assert_called_once_with(pages=[])
-        assert result.categories == []
+        assert result.menu.categories == []
+
+
+class TestMergePages:
+    def _pages(self, first_price: str, second_price: str) -> list[ParsedMenuPage]:
+        return [
+            ParsedMenuPage(categories=_make_parsed_menu(price=first_price).categories),
+            ParsedMenuPage(categories=_make_parsed_menu(price=second_price).categories),
+        ]
+
+    @patch("restaurants.llm.local_merge.MenuMergeAgent.run")
+    def test_conflicts_are_resolved_locally_by_default(self, mock_merge, settings):
+        settings.MENU_MERGE_LLM_FALLBACK = False
+
+        menu = MenuUploadService.merge_pages(self._pages("10.00", "11.00"))
+
+        mock_merge.assert_not_called()
+        assert menu.categories[0].items[0].variants[0].price == Decimal("10.00")
+
+    @patch("restaurants.llm.local_merge.MenuMergeAgent.run")
+    def test_llm_fallback_gets_only_conflicting_items(self, mock_merge, settings):
+        settings.MENU_MERGE_LLM_FALLBACK = True
+        pages = self._pages("10.00", "11.00")
+        pages[0].categories[0].items.append(
+            ParsedMenuItem(name="Fries", variants=[ParsedMenuVariant(label="Standard", price=Decimal("4.00"))])
+        )
+        mock_merge.return_value = _make_parsed_menu(price="11.00")
+
+        menu = MenuUploadService.merge_pages(pages)
+
+        sent = mock_merge.call_args.kwargs["pages"]
+        assert [item.name for page in sent for c in page.categories for item in c.items] == ["Burger", "Burger"]
+        assert [(i.name, i.variants[0].price) for i in menu.categories[0].items] == [
+            ("Burger", Decimal("11.00")),
+            ("Fries", Decimal("4.00")),
+        ]
+
+    @patch("restaurants.llm.local_merge.MenuMergeAgent.run", side_effect=RuntimeError("provider down"))
+    def test_failed_llm_fallback_keeps_local_merge(self, mock_merge, settings):
+        settings.MENU_MERGE_LLM_FALLBACK = True
+
+        menu = MenuUploadService.merge_pages(self._pages("10.00", "11.00"))
+
+        mock_merge.assert_called_once()
+        assert menu.categories[0].items[0].variants[0].price == Decimal("10.00")
 
 
 # ── save_menu ──────────────────────────────────────────────────────────────────
@@ -209,7 +262,7 @@ class TestSaveMenu:
         assert len(variants) == 1
         assert variants[0].price == Decimal("12.50")
 
-    def test_append_copies_active_version_items_first(self, restaurant):
+    def test_append_shares_active_version_items(self, restaurant):
         # Set up an active version with an existing item
         active_v = MenuVersion.objects.create(
             restaurant=restaurant, name="Active", source="manual", is_active=True
@@ -222,13 +275,15 @@ class TestSaveMenu:
             restaurant, parsed, mode="append", version_name="Appended"
         )
 
-        cat_names = set(MenuCategory.objects.filter(version=new_version).values_list("name", flat=True))
+        cat_names = set(MenuVersionService.categories(new_version.id).values_list("name", flat=True))
         assert "Existing Cat" in cat_names
         assert "New Cat" in cat_names
 
-        item_names = set(MenuItem.objects.filter(category__version=new_version).values_list("name", flat=True))
+        item_names = set(MenuVersionService.items(new_version.id).values_list("name", flat=True))
         assert "Existing Item" in item_names
         assert "New Item" in item_names
+        assert new_version.parent == active_v
+        assert MenuItem.objects.filter(name="Existing Item").count() == 1  # shared, not copied
 
     def test_append_with_no_active_version_still_works(self, restaurant):
         """If there's no active version, append behaves like overwrite."""
@@ -250,3 +305,44 @@ class TestSaveMenu:
         today = date.today()
         expected_base = f"Menu - {today.strftime('%b %-d, %Y')}"
         assert version.name == expected_base
+
+    def test_rows_keep_their_parents_and_order(self, restaurant):
+        parsed = ParsedMenu(
+            categories=[
+                ParsedMenuCategory(
+                    name=category,
+                    items=[
+                        ParsedMenuItem(
+                            name=f"{category} {i}",
+                            variants=[
+                                ParsedMenuVariant(label="Small", price=Decimal(i)),
+                                ParsedMenuVariant(label="Large", price=Decimal(i + 2)),
+                            ],
+                        )
+                        for i in range(3)
+                    ],
+                )
+                for category in ("Starters", "Mains")
+            ]
+        )
+
+        version = MenuUploadService.save_menu(restaurant, parsed, version_name="Test")
+
+        saved = [
+            (item.category.name, item.name, item.sort_order, [(v.label, v.price) for v in item.variants.order_by("id")])
+            for item in MenuItem.objects.filter(category__version=version).order_by("id")
+        ]
+        assert saved == [
+            (category, f"{category} {i}", i, [("Small", Decimal(i)), ("Large", Decimal(i + 2))])
+            for category in ("Starters", "Mains")
+            for i in range(3)
+        ]
+
+    def test_query_count_does_not_grow_with_menu_size(self, restaurant):
+        def queries_to_save(size: int) -> int:
+            parsed = ParsedMenu(categories=_make_parsed_menu().categories * size)
+            with CaptureQueriesContext(connection) as queries:
+                MenuUploadService.save_menu(restaurant, parsed, version_name=f"Size {size}")
+            return len(queries)
+
+        assert queries_to_save(1) == queries_to_save(50)
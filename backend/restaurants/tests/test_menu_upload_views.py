@@ -5,6 +5,7 @@ from django.test import override_settings
 from rest_framework.test import APIClient
 from restaurants.models import MenuVersion, MenuCategory, MenuItem, MenuItemVariant
 from restaurants.llm.schemas import ParsedMenu, ParsedMenuCategory, ParsedMenuItem, ParsedMenuVariant
+from restaurants.services.menu_upload_service import MenuParseResult
 
 
 @pytest.fixture
@@ -36,19 +37,22 @@ class TestMenuUploadParseView:
 
     @patch("restaurants.views_menu_upload.MenuUploadService.parse_images")
     def test_parse_returns_menu(self, mock_parse, auth_client, restaurant):
-        mock_parse.return_value = ParsedMenu(
-            categories=[
-                ParsedMenuCategory(
-                    name="Mains",
-                    items=[
-                        ParsedMenuItem(
-                            name="Burger",
-                            description=None,
-                            variants=[ParsedMenuVariant(label="Regular", price=Decimal("12.00"))],
-                        )
-                    ],
-                )
-            ]
+        mock_parse.return_value = MenuParseResult(
+            menu=ParsedMenu(
+                categories=[
+                    ParsedMenuCategory(
+                        name="Mains",
+                        items=[
+                            ParsedMenuItem(
+                                name="Burger",
+                                description=None,
+                                variants=[ParsedMenuVariant(label="Regular", price=Decimal("12.00"))],
+                            )
+                        ],
+                    )
+                ]
+            ),
+            cached_pages=[0],
         )
         from django.core.files.uploadedfile import SimpleUploadedFile
         image = SimpleUploadedFile("menu.jpg", b"fake-image-data", content_type="image/jpeg")
@@ -59,6 +63,32 @@ class TestMenuUploadParseView:
         )
         assert resp.status_code == 200
         assert "categories" in resp.json()
+        assert resp.json()["cached_pages"] == [0]
+
+    @patch("restaurants.views_menu_upload.MenuUploadService.parse_images")
+    def test_parse_reads_images_from_disk(self, mock_parse, auth_client, restaurant):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from restaurants.llm.image_spool import SpooledImage, read_image
+
+        def parse(images):
+            assert all(isinstance(image, SpooledImage) for image in images)
+            # Streamed to disk by Django even though they are small.
+            assert all(image.path.endswith(".upload.jpg") for image in images)
+            assert [read_image(image) for image in images] == [b"page-1", b"page-2"]
+            return MenuParseResult(menu=ParsedMenu(categories=[]))
+
+        mock_parse.side_effect = parse
+        images = [
+            SimpleUploadedFile(f"menu{n}.jpg", f"page-{n}".encode(), content_type="image/jpeg") for n in (1, 2)
+        ]
+        resp = auth_client.post(
+            f"/api/restaurants/{restaurant.slug}/menu/upload/parse/",
+            {"images": images},
+            format="multipart",
+        )
+        assert resp.status_code == 200
+        mock_parse.assert_called_once()
 
 
 @pytest.mark.django_db
@@ -104,6 +134,31 @@ class TestMenuVersionViews:
         assert resp.status_code == 200
         assert len(resp.json()) == 1
 
+    def test_list_versions_query_budget(self, auth_client, restaurant, django_assert_max_num_queries):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from restaurants.services.menu_version_service import MenuVersionService
+
+        url = f"/api/restaurants/{restaurant.slug}/menu/versions/"
+        base = MenuVersion.objects.create(restaurant=restaurant, name="V1", is_active=True, source="manual")
+        category = MenuCategory.objects.create(version=base, name="Mains")
+        MenuItem.objects.create(category=category, name="Burger")
+        with CaptureQueriesContext(connection) as few:
+            auth_client.get(url)
+
+        for n in range(10):
+            derived = MenuVersionService.derive_version(base, f"V{n + 2}")
+            extra = MenuCategory.objects.create(version=derived, name=f"Extra {n}")
+            MenuItem.objects.bulk_create(MenuItem(category=extra, name=f"Item {i}") for i in range(n))
+        with django_assert_max_num_queries(len(few)):
+            resp = auth_client.get(url)
+
+        assert len(few) <= 5
+        counts = {v["name"]: v["item_count"] for v in resp.json()}
+        assert counts["V1"] == 1
+        assert counts["V11"] == 1 + 9
+
     def test_activate_version(self, auth_client, restaurant):
         v1 = MenuVersion.objects.create(
             restaurant=restaurant, name="V1", is_active=True, source="manual"
@@ -3,9 +3,13 @@ Tests for MenuVersionService.
 """
 
 from decimal import Decimal
+from unittest.mock import patch
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import NotFound
 
 from restaurants.models import (
     MenuCategory,
@@ -59,6 +63,79 @@ def version_with_items(restaurant):
     return v
 
 
+def _deep_copy_into(source: MenuVersion, target: MenuVersion) -> None:
+    """The row-by-row copy duplicate_version_into used to make, as a reference."""
+    for category in source.categories.prefetch_related("items__variants", "items__modifiers").all():
+        new_category = MenuCategory.objects.create(
+            version=target, name=category.name, sort_order=category.sort_order, is_active=category.is_active
+        )
+        for item in category.items.all():
+            new_item = MenuItem.objects.create(
+                category=new_category,
+                name=item.name,
+                description=item.description,
+                image_url=item.image_url,
+                is_active=item.is_active,
+                sort_order=item.sort_order,
+            )
+            for variant in item.variants.all():
+                MenuItemVariant.objects.create(
+                    menu_item=new_item, label=variant.label, price=variant.price, is_default=variant.is_default
+                )
+            for modifier in item.modifiers.all():
+                MenuItemModifier.objects.create(
+                    menu_item=new_item, name=modifier.name, price_adjustment=modifier.price_adjustment
+                )
+
+
+def _snapshot(version: MenuVersion) -> list:
+    """Every copied field of a version's rows, in creation order, without IDs."""
+    return [
+        (
+            category.name,
+            category.sort_order,
+            category.is_active,
+            [
+                (
+                    item.name,
+                    item.description,
+                    item.image_url,
+                    item.is_active,
+                    item.sort_order,
+                    [(v.label, v.price, v.is_default) for v in item.variants.order_by("id")],
+                    [(m.name, m.price_adjustment) for m in item.modifiers.order_by("id")],
+                )
+                for item in category.items.order_by("id")
+            ],
+        )
+        for category in version.categories.order_by("id")
+    ]
+
+
+@pytest.fixture
+def large_version(restaurant):
+    """Categories out of id order, with inactive rows and several variants and modifiers per item."""
+    v = MenuVersion.objects.create(restaurant=restaurant, name="Large", source="manual")
+    for c in range(4):
+        cat = MenuCategory.objects.create(version=v, name=f"Cat {c}", sort_order=3 - c, is_active=c != 1)
+        for i in range(5):
+            item = MenuItem.objects.create(
+                category=cat,
+                name=f"Item {c}-{i}",
+                description=f"Desc {i}",
+                image_url=f"https://img.example.com/{c}/{i}.jpg" if i % 2 else "",
+                is_active=i != 3,
+                sort_order=4 - i,
+            )
+            for label, price in (("Small", "4.50"), ("Large", "6.75")):
+                MenuItemVariant.objects.create(
+                    menu_item=item, label=label, price=Decimal(price), is_default=label == "Small"
+                )
+            for m in range(i % 3):
+                MenuItemModifier.objects.create(menu_item=item, name=f"Extra {m}", price_adjustment=Decimal(m))
+    return v
+
+
 # ── generate_default_name ──────────────────────────────────────────────────────
 
 
@@ -202,6 +279,24 @@ class TestListVersions:
         result = MenuVersionService.list_versions(restaurant)
         assert len(result) == 2
 
+    def test_item_count_includes_shared_categories(self, restaurant, version_with_items):
+        derived = MenuVersionService.derive_version(version_with_items, "Derived")
+        extra = MenuCategory.objects.create(version=derived, name="Extra", sort_order=9)
+        MenuItem.objects.create(category=extra, name="Extra item")
+
+        counts = {entry["id"]: entry["item_count"] for entry in MenuVersionService.list_versions(restaurant)}
+
+        assert counts == {version_with_items.id: 2, derived.id: 3}
+
+    def test_counts_every_version_in_one_query(self, restaurant, version_with_items, django_assert_num_queries):
+        for n in range(5):
+            MenuVersionService.derive_version(version_with_items, f"Derived {n}")
+
+        with django_assert_num_queries(1):
+            result = MenuVersionService.list_versions(restaurant)
+
+        assert [entry["item_count"] for entry in result] == [2] * 6
+
 
 # ── duplicate_version_into ─────────────────────────────────────────────────────
 
@@ -264,6 +359,35 @@ class TestDuplicateVersionInto:
         )
         assert source_item_ids.isdisjoint(target_item_ids)
 
+    def test_matches_row_by_row_deep_copy(self, restaurant, large_version):
+        expected = MenuVersion.objects.create(restaurant=restaurant, name="Expected", source="manual")
+        _deep_copy_into(large_version, expected)
+        target = MenuVersion.objects.create(restaurant=restaurant, name="Target", source="manual")
+
+        MenuVersionService.duplicate_version_into(large_version, target)
+
+        assert _snapshot(target) == _snapshot(expected)
+
+    def test_query_count_does_not_grow_with_menu_size(self, restaurant, version_with_items, large_version):
+        def queries_to_copy(source: MenuVersion) -> int:
+            target = MenuVersion.objects.create(restaurant=restaurant, name=f"Copy of {source}", source="manual")
+            with CaptureQueriesContext(connection) as queries:
+                MenuVersionService.duplicate_version_into(source, target)
+            return len(queries)
+
+        assert queries_to_copy(version_with_items) == queries_to_copy(large_version)
+
+    def test_failed_copy_leaves_no_rows(self, restaurant, large_version):
+        target = MenuVersion.objects.create(restaurant=restaurant, name="Target", source="manual")
+
+        with (
+            patch.object(MenuItemModifier.objects, "bulk_create", side_effect=RuntimeError("db down")),
+            pytest.raises(RuntimeError),
+        ):
+            MenuVersionService.duplicate_version_into(large_version, target)
+
+        assert not target.categories.exists()
+
 
 # ── duplicate_version ──────────────────────────────────────────────────────────
 
@@ -279,21 +403,19 @@ class TestDuplicateVersion:
         new_version = MenuVersionService.duplicate_version(version_with_items, "Copy")
         assert new_version.is_active is False
 
-    def test_new_version_has_full_deep_copy(self, restaurant, version_with_items):
+    def test_new_version_shows_the_full_menu(self, restaurant, version_with_items):
         new_version = MenuVersionService.duplicate_version(version_with_items, "Copy")
 
-        assert new_version.categories.count() == version_with_items.categories.count()
+        assert MenuVersionService.categories(new_version.id).count() == version_with_items.categories.count()
 
-        target_item_count = MenuItem.objects.filter(
-            category__version=new_version
-        ).count()
+        target_item_count = MenuVersionService.items(new_version.id).count()
         source_item_count = MenuItem.objects.filter(
             category__version=version_with_items
         ).count()
         assert target_item_count == source_item_count
 
         target_variant_count = MenuItemVariant.objects.filter(
-            menu_item__category__version=new_version
+            menu_item__in=MenuVersionService.items(new_version.id)
         ).count()
         source_variant_count = MenuItemVariant.objects.filter(
             menu_item__category__version=version_with_items
@@ -311,3 +433,143 @@ class TestDuplicateVersion:
             MenuItem.objects.filter(category__version=version_with_items).count()
             == original_item_count
         )
+
+
+# ── Copy-on-write ──────────────────────────────────────────────────────────────
+
+
+def _menu(version: MenuVersion) -> list:
+    """A version's effective menu as (category, [(item, [(variant, price)])]) by name."""
+    return sorted(
+        (
+            category.name,
+            sorted(
+                (item.name, item.is_active, sorted((v.label, v.price) for v in item.variants.all()))
+                for item in category.items.all()
+            ),
+        )
+        for category in MenuVersionService.categories(version.id)
+    )
+
+
+@pytest.mark.django_db
+class TestCopyOnWrite:
+    def test_duplicate_shares_rows_instead_of_copying(self, version_with_items):
+        rows_before = MenuItem.objects.count(), MenuItemVariant.objects.count()
+
+        copy = MenuVersionService.duplicate_version(version_with_items, "Copy")
+
+        assert (MenuItem.objects.count(), MenuItemVariant.objects.count()) == rows_before
+        assert copy.parent == version_with_items
+        assert _menu(copy) == _menu(version_with_items)
+
+    def test_writing_a_shared_category_copies_it_first(self, version_with_items):
+        copy = MenuVersionService.duplicate_version(version_with_items, "Copy")
+        original = version_with_items.categories.get()
+        source_menu = _menu(version_with_items)
+
+        category, new_items = MenuVersionService.own_category(copy, original)
+        category.name = "Renamed"
+        category.save()
+
+        assert category.version == copy and category.id != original.id
+        assert sorted(item.name for item in new_items.values()) == ["Item 0", "Item 1"]
+        assert _menu(version_with_items) == source_menu
+        assert [name for name, _ in _menu(copy)] == ["Renamed"]
+        assert not copy.shared_categories.exists()
+
+    def test_writing_an_owned_category_gives_sharing_versions_a_copy(self, version_with_items):
+        copy = MenuVersionService.duplicate_version(version_with_items, "Copy")
+        original = version_with_items.categories.get()
+        copy_menu = _menu(copy)
+
+        category, new_items = MenuVersionService.own_category(version_with_items, original)
+        category.name = "Renamed"
+        category.save()
+
+        assert (category.id, new_items) == (original.id, {})  # the writer keeps its rows and their IDs
+        assert _menu(copy) == copy_menu
+        assert copy.categories.get().id != original.id
+
+    def test_write_that_lost_the_race_copies_nothing(self, version_with_items):
+        copy = MenuVersionService.duplicate_version(version_with_items, "Copy")
+        original = version_with_items.categories.get()
+        MenuVersionService.own_category(copy, original)
+        rows_before = MenuCategory.objects.count(), MenuItem.objects.count()
+
+        # A second write that read the category before the first one copied it.
+        with pytest.raises(NotFound):
+            MenuVersionService.own_category(copy, original)
+
+        assert (MenuCategory.objects.count(), MenuItem.objects.count()) == rows_before
+        assert copy.categories.count() == 1
+
+    def test_versions_sharing_a_written_category_get_one_copy(self, version_with_items):
+        copies = [MenuVersionService.duplicate_version(version_with_items, f"Copy {n}") for n in range(3)]
+        original = version_with_items.categories.get()
+        menu = _menu(version_with_items)
+        items_before = MenuItem.objects.count()
+
+        MenuVersionService.own_category(version_with_items, original)
+
+        assert MenuItem.objects.count() == items_before + 2  # one copy of the category's items, not three
+        assert all(_menu(copy) == menu for copy in copies)
+        [copy_category] = MenuCategory.objects.exclude(id=original.id)
+        assert copy_category.version == copies[0]
+        assert [list(copy.shared_categories.all()) for copy in copies[1:]] == [[copy_category]] * 2
+
+    def test_active_version_takes_over_the_rows_it_writes(self, restaurant, version_with_items):
+        active = MenuVersionService.duplicate_version(version_with_items, "Active")
+        MenuVersionService.activate_version(restaurant, active)
+        active.refresh_from_db()
+        sibling = MenuVersionService.duplicate_version(version_with_items, "Sibling")
+        original = version_with_items.categories.get()
+        menu = _menu(version_with_items)
+
+        category, new_items = MenuVersionService.own_category(active, original)
+        category.name = "Renamed"
+        category.save()
+
+        assert (category.id, category.version, new_items) == (original.id, active, {})
+        assert not active.shared_categories.exists()
+        # The source owns one copy as it was, which the sibling now shares.
+        assert _menu(version_with_items) == _menu(sibling) == menu
+        assert list(sibling.shared_categories.all()) == [version_with_items.categories.get()]
+
+    def test_item_write_leaves_ordered_rows_alone(self, version_with_items):
+        from orders.tests.factories import OrderItemFactory
+
+        copy = MenuVersionService.duplicate_version(version_with_items, "Copy")
+        ordered = MenuItem.objects.get(name="Item 0")
+        order_item = OrderItemFactory(menu_item=ordered, variant=ordered.variants.get())
+
+        item = MenuVersionService.own_item(copy, ordered)
+        item.is_active = False
+        item.save()
+
+        order_item.refresh_from_db()
+        ordered.refresh_from_db()
+        assert item.id != ordered.id
+        assert order_item.menu_item_id == ordered.id and ordered.is_active
+        assert ("Item 0", False, [("Standard", Decimal("9.99"))]) in _menu(copy)[0][1]
+
+    def test_deleting_a_source_hands_shared_categories_over(self, version_with_items):
+        first = MenuVersionService.duplicate_version(version_with_items, "First")
+        second = MenuVersionService.duplicate_version(version_with_items, "Second")
+        menu = _menu(version_with_items)
+        category_id = version_with_items.categories.get().id
+
+        MenuVersionService.delete_version(version_with_items)
+
+        assert _menu(first) == _menu(second) == menu
+        assert MenuCategory.objects.get(id=category_id).version == first
+        first.refresh_from_db()
+        assert first.parent is None
+
+    def test_chained_versions_resolve_through_every_level(self, restaurant, version_with_items):
+        child = MenuVersionService.duplicate_version(version_with_items, "Child")
+        MenuCategory.objects.create(version=child, name="Drinks", sort_order=1)
+        grandchild = MenuVersionService.duplicate_version(child, "Grandchild")
+
+        assert [name for name, _ in _menu(grandchild)] == ["Burgers", "Drinks"]
+        assert not grandchild.categories.exists()
@@ -1,6 +1,8 @@
 from django.urls import path
 
 from restaurants.views_menu_upload import (
+    MenuUploadJobCreateView,
+    MenuUploadJobDetailView,
     MenuUploadParseView,
     MenuUploadSaveView,
     MenuVersionActivateView,
@@ -107,6 +109,12 @@ urlpatterns = [
     ),
     # Menu Upload & Versions
     path("restaurants/<slug:slug>/menu/upload/parse/", MenuUploadParseView.as_view(), name="menu-upload-parse"),
+    path("restaurants/<slug:slug>/menu/upload/jobs/", MenuUploadJobCreateView.as_view(), name="menu-upload-jobs"),
+    path(
+        "restaurants/<slug:slug>/menu/upload/jobs/<uuid:job_id>/",
+        MenuUploadJobDetailView.as_view(),
+        name="menu-upload-job-detail",
+    ),
     path("restaurants/<slug:slug>/menu/upload/save/", MenuUploadSaveView.as_view(), name="menu-upload-save"),
     path("restaurants/<slug:slug>/menu/versions/", MenuVersionListView.as_view(), name="menu-versions"),
     path("restaurants/<slug:slug>/menu/versions/<int:pk>/", MenuVersionDetailView.as_view(), name="menu-version-detail"),
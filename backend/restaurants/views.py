@@ -10,6 +10,8 @@ from restaurants.serializers import (
     SubscriptionSerializer,
 )
 from restaurants.services import RestaurantService
+from restaurants.services.menu_cache_service import MenuCacheService
+from restaurants.services.menu_version_service import MenuVersionService
 
 
 class MyRestaurantsView(generics.ListAPIView):
@@ -71,7 +73,7 @@ class MenuCategoryListCreateView(RestaurantMixin, generics.ListCreateAPIView):
         active_version = self._get_active_version(restaurant)
         if not active_version:
             return MenuCategory.objects.none()
-        return MenuCategory.objects.filter(version=active_version)
+        return MenuVersionService.categories(active_version.id)
 
     def perform_create(self, serializer):
         restaurant = self.get_restaurant()
@@ -80,9 +82,17 @@ class MenuCategoryListCreateView(RestaurantMixin, generics.ListCreateAPIView):
             from rest_framework.exceptions import ValidationError
             raise ValidationError("No active menu version found. Please create and activate a menu version first.")
         serializer.save(version=active_version)
+        MenuCacheService.invalidate(restaurant)
 
 
 class MenuCategoryDetailView(RestaurantMixin, generics.RetrieveUpdateAPIView):
+    """A category of the active menu version.
+
+    Updating a category the version shares with others keeps its ID; the
+    other versions get a copy of it as it was (see
+    MenuVersionService.own_category).
+    """
+
     serializer_class = MenuCategorySerializer
     lookup_field = "pk"
 
@@ -91,7 +101,15 @@ class MenuCategoryDetailView(RestaurantMixin, generics.RetrieveUpdateAPIView):
         active_version = restaurant.menu_versions.filter(is_active=True).first()
         if not active_version:
             return MenuCategory.objects.none()
-        return MenuCategory.objects.filter(version=active_version)
+        return MenuVersionService.categories(active_version.id)
+
+    def perform_update(self, serializer):
+        restaurant = self.get_restaurant()
+        active_version = restaurant.menu_versions.filter(is_active=True).first()
+        # Other versions showing this category get a copy of it before it changes.
+        serializer.instance, _ = MenuVersionService.own_category(active_version, serializer.instance)
+        serializer.save()
+        MenuCacheService.invalidate(restaurant)
 
 
 class MenuItemListCreateView(RestaurantMixin, generics.ListCreateAPIView):
@@ -105,7 +123,7 @@ class MenuItemListCreateView(RestaurantMixin, generics.ListCreateAPIView):
         active_version = self._get_active_version(restaurant)
         if not active_version:
             return MenuItem.objects.none()
-        return MenuItem.objects.filter(category__version=active_version).prefetch_related("variants", "modifiers")
+        return MenuVersionService.items(active_version.id).prefetch_related("variants", "modifiers")
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -116,9 +134,17 @@ class MenuItemListCreateView(RestaurantMixin, generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save()
+        MenuCacheService.invalidate(serializer.context["restaurant"])
 
 
 class MenuItemDetailView(RestaurantMixin, generics.RetrieveUpdateDestroyAPIView):
+    """An item of the active menu version.
+
+    Updating or deactivating an item the version shares with others keeps
+    its ID, and those of its category; the other versions get a copy of the
+    category as it was.
+    """
+
     serializer_class = MenuItemSerializer
     lookup_field = "pk"
 
@@ -130,7 +156,7 @@ class MenuItemDetailView(RestaurantMixin, generics.RetrieveUpdateDestroyAPIView)
         active_version = self._get_active_version(restaurant)
         if not active_version:
             return MenuItem.objects.none()
-        return MenuItem.objects.filter(category__version=active_version).prefetch_related("variants", "modifiers")
+        return MenuVersionService.items(active_version.id).prefetch_related("variants", "modifiers")
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -139,14 +165,23 @@ class MenuItemDetailView(RestaurantMixin, generics.RetrieveUpdateDestroyAPIView)
         ctx["active_version"] = self._get_active_version(restaurant)
         return ctx
 
+    def perform_update(self, serializer):
+        # Other versions showing this item get a copy of its category before it changes.
+        serializer.instance = MenuVersionService.own_item(serializer.context["active_version"], serializer.instance)
+        serializer.save()
+        MenuCacheService.invalidate(serializer.context["restaurant"])
+
     def perform_destroy(self, instance):
-        """Soft-delete: deactivate instead of deleting."""
+        """Soft-delete: deactivate instead of deleting. Returns the row deactivated."""
+        restaurant = self.get_restaurant()
+        instance = MenuVersionService.own_item(self._get_active_version(restaurant), instance)
         instance.is_active = False
         instance.save()
+        MenuCacheService.invalidate(restaurant)
+        return instance
 
     def destroy(self, request, *args, **kwargs):
-        instance = self.get_object()
-        self.perform_destroy(instance)
+        instance = self.perform_destroy(self.get_object())
         return Response(
             {"status": "deactivated", "id": instance.id},
             status=status.HTTP_200_OK,
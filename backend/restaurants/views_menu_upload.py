@@ -1,31 +1,77 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ai.metrics import llm_call_context
+from restaurants.llm.image_spool import spool_uploads
 from restaurants.llm.schemas import ParsedMenu
-from restaurants.models import MenuVersion
+from restaurants.models import MenuVersion, Subscription
 from restaurants.serializers.menu_upload_serializers import (
     MenuSaveSerializer,
+    MenuUploadJobSerializer,
     MenuUploadParseSerializer,
     MenuVersionRenameSerializer,
     MenuVersionSerializer,
 )
+from restaurants.services.menu_upload_job_service import MenuUploadJobService
 from restaurants.services.menu_upload_service import MenuUploadService
 from restaurants.services.menu_version_service import MenuVersionService
 from restaurants.views import RestaurantMixin
 
 
-class MenuUploadParseView(RestaurantMixin, APIView):
+class SpooledUploadMixin:
+    """Stream uploaded files to temporary files, however small, instead of memory."""
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+class MenuUploadParseView(SpooledUploadMixin, RestaurantMixin, APIView):
+    def post(self, request, slug):
+        restaurant = self.get_restaurant()
+        serializer = MenuUploadParseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        plan = Subscription.objects.filter(restaurant=restaurant).values_list("plan", flat=True).first()
+        with (
+            spool_uploads(serializer.validated_data["images"]) as images,
+            llm_call_context(restaurant=restaurant.slug, plan=plan or "", pool="menu_upload"),
+        ):
+            parsed = MenuUploadService.parse_images(images)
+        return Response(
+            {
+                **parsed.menu.model_dump(mode="json"),
+                "cached_pages": parsed.cached_pages,
+                "failed_pages": parsed.failed_pages,
+            }
+        )
+
+
+class MenuUploadJobCreateView(SpooledUploadMixin, RestaurantMixin, APIView):
+    """Start parsing menu images in the background and return the job at once.
+
+    Follow the job on ws/menu-upload/<slug>/<job id>/ or by polling
+    MenuUploadJobDetailView; save it with MenuUploadSaveView once completed.
+    """
+
     def post(self, request, slug):
         restaurant = self.get_restaurant()
         serializer = MenuUploadParseSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        image_files = serializer.validated_data["images"]
-        image_data = [f.read() for f in image_files]
+        with spool_uploads(serializer.validated_data["images"]) as images:
+            job = MenuUploadJobService.create_job(restaurant, images)
+        job = MenuUploadJobService.get_job(restaurant, job.id)
+        return Response(MenuUploadJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-        parsed_menu = MenuUploadService.parse_images(image_data)
-        return Response(parsed_menu.model_dump(mode="json"))
+
+class MenuUploadJobDetailView(RestaurantMixin, APIView):
+    def get(self, request, slug, job_id):
+        restaurant = self.get_restaurant()
+        job = MenuUploadJobService.get_job(restaurant, job_id)
+        return Response(MenuUploadJobSerializer(job).data)
 
 
 class MenuUploadSaveView(RestaurantMixin, APIView):
@@ -35,7 +81,10 @@ class MenuUploadSaveView(RestaurantMixin, APIView):
         serializer.is_valid(raise_exception=True)
 
         data = serializer.validated_data
-        parsed_menu = ParsedMenu(**data["menu"])
+        if "job_id" in data:
+            parsed_menu = MenuUploadJobService.get_parsed_menu(restaurant, data["job_id"])
+        else:
+            parsed_menu = ParsedMenu(**data["menu"])
         version_name = data.get("version_name") or None
 
         new_version = MenuUploadService.save_menu(
@@ -53,7 +102,7 @@ class MenuUploadSaveView(RestaurantMixin, APIView):
 class MenuVersionListView(RestaurantMixin, APIView):
     def get(self, request, slug):
         restaurant = self.get_restaurant()
-        versions = MenuVersion.objects.filter(restaurant=restaurant)
+        versions = MenuVersionService.with_item_counts(MenuVersion.objects.filter(restaurant=restaurant))
         serializer = MenuVersionSerializer(versions, many=True)
         return Response(serializer.data)
 